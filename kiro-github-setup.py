@@ -8,10 +8,21 @@ This script sets up the complete workflow for integrating Kiro planning with Git
 import os
 import sys
 import json
+import time
+import hashlib
 import subprocess
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Tool checks are cached here (gitignored) so a re-run skips the gh network call
+TOOL_CHECK_CACHE = '.kiro/.sync/tool-check.json'
+TOOL_CHECK_TTL = 3600
+TOOL_CHECK_TIMEOUT = 5
+
+# (path, 'created' | 'updated' | 'unchanged') for every generated file
+generated_files = []
+
 class Colors:
     RED = '\033[0;31m'
     GREEN = '\033[0;32m'
@@ -31,6 +42,38 @@ def print_error(message):
 def print_info(message):
     print(f"{Colors.BLUE}ℹ️  {message}{Colors.NC}")
 
+def write_generated(path, content, mode=None):
+    """Write a generated file only if its content changed, atomically
+
+    Unchanged files are left alone so their mtimes stay put and editor and CI
+    watchers are not triggered.
+    """
+    path = Path(path)
+    data = content.encode('utf-8') if isinstance(content, str) else content
+
+    try:
+        existing = path.read_bytes()
+    except FileNotFoundError:
+        existing = None
+
+    if existing is not None and hashlib.sha256(existing).digest() == hashlib.sha256(data).digest():
+        status = 'unchanged'
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        if existing is not None and mode is None:
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+        status = 'created' if existing is None else 'updated'
+
+    if mode is not None and (path.stat().st_mode & 0o777) != mode:
+        os.chmod(path, mode)
+
+    generated_files.append((str(path), status))
+    return status
+
 def check_prerequisites():
     """Check if we're in a git repository and required files exist"""
     print_info("Checking prerequisites...")
@@ -40,20 +83,25 @@ def check_prerequisites():
         print_error("This script must be run from the root of a git repository")
         sys.exit(1)
 
-    # Check for required Kiro files
-    required_files = [
-        ".kiro/specs/file-action-bar/requirements.md",
-        ".kiro/specs/file-action-bar/design.md",
-        ".kiro/specs/file-action-bar/tasks.md"
-    ]
-
-    for file_path in required_files:
-        if not Path(file_path).exists():
-            print_error(f"{file_path} not found")
-            print(f"Please ensure your Kiro file exists at the expected location")
-            sys.exit(1)
+    # Every .kiro/specs/<feature>/ directory with all three Kiro files is a spec
+    required_files = ['requirements.md', 'design.md', 'tasks.md']
+    specs_root = Path('.kiro/specs')
+    spec_dirs = sorted(path for path in specs_root.iterdir() if path.is_dir()) if specs_root.is_dir() else []
+    specs = []
+
+    for spec_dir in spec_dirs:
+        missing = [name for name in required_files if not (spec_dir / name).exists()]
+        if missing:
+            print_warning(f"Skipping {spec_dir}: missing {', '.join(missing)}")
+        else:
+            specs.append(spec_dir.name)
+
+    if not specs:
+        print_error("No Kiro specs found in .kiro/specs/")
+        print("Please ensure each feature has requirements.md, design.md and tasks.md in .kiro/specs/<feature>/")
+        sys.exit(1)
 
-    print_status("All Kiro planning files found")
+    print_status(f"Found {len(specs)} Kiro spec(s): {', '.join(specs)}")
 
 def create_directory_structure():
     """Create the GitHub directory structure"""
@@ -96,9 +144,32 @@ on:
       milestone_name:
         description: 'Milestone name (optional)'
         required: false
+      issue_workers:
+        description: 'Concurrent issue create, update and close workers'
+        required: false
+        default: '4'
+      sync_mode:
+        description: 'sync updates only changed issues; recreate creates every issue again'
+        required: false
+        type: choice
+        options:
+          - sync
+          - recreate
+        default: 'sync'
+      all_specs:
+        description: 'Discover and sync every spec under .kiro/specs (ignores the file and project inputs)'
+        required: false
+        type: boolean
+        default: false
+      profile:
+        description: 'Also run each step under cProfile and upload the pstats with the timing trace'
+        required: false
+        type: boolean
+        default: false
 
 jobs:
   create-project-structure:
+    if: ${{ !inputs.all_specs }}
     runs-on: ubuntu-latest
     permissions:
       contents: write
@@ -118,65 +189,44 @@ jobs:
         with:
           python-version: '3.x'
 
+      - name: Restore sync manifest
+        uses: actions/cache/restore@v4
+        with:
+          path: .kiro/.sync
+          key: kiro-sync-${{ github.run_id }}
+          restore-keys: |
+            kiro-sync-
+
       - name: Create milestone
         id: create-milestone
         if: ${{ inputs.milestone_name != '' }}
         env:
           GITHUB_TOKEN: ${{ secrets.GITHUB_TOKEN }}
+          PYTHONPATH: scripts
+          KIRO_PROFILE: ${{ inputs.profile }}
         run: |
           python3 << 'PYTHON_SCRIPT'
-          import subprocess
-          import json
           import os
           import sys
 
+          from kiro_sync.client import GitHubApiError, GitHubClient
+          from kiro_sync.issues import ensure_milestone
+          from kiro_sync.trace import start_trace
+
+          start_trace('create-milestone')
+
           milestone_name = "${{ inputs.milestone_name }}"
-          repo = "${{ github.repository }}"
+          client = GitHubClient("${{ github.repository }}")
 
           try:
-              # First, try to get existing milestones
-              get_cmd = [
-                  'gh', 'api', f'repos/{repo}/milestones'
-              ]
-              
-              result = subprocess.run(get_cmd, capture_output=True, text=True, check=True)
-              milestones = json.loads(result.stdout)
-              
-              # Check if milestone with this title already exists
-              existing_milestone = None
-              for milestone in milestones:
-                  if milestone['title'] == milestone_name:
-                      existing_milestone = milestone
-                      break
-              
-              if existing_milestone:
-                  milestone_number = existing_milestone['number']
-                  print(f"Found existing milestone: {milestone_name} (#{milestone_number})")
-              else:
-                  # Create new milestone
-                  create_cmd = [
-                      'gh', 'api', f'repos/{repo}/milestones',
-                      '--method', 'POST',
-                      '--field', f'title={milestone_name}',
-                      '--field', 'description=Auto-generated milestone from Kiro planning'
-                  ]
-                  
-                  result = subprocess.run(create_cmd, capture_output=True, text=True, check=True)
-                  response = json.loads(result.stdout)
-                  milestone_number = response['number']
-                  
-                  print(f"Created new milestone: {milestone_name} (#{milestone_number})")
-              
+              milestone_number = ensure_milestone(client, milestone_name)
+
               # Set GitHub output
               with open(os.environ['GITHUB_OUTPUT'], 'a') as f:
                   f.write(f"milestone_number={milestone_number}\\n")
-                  
-          except subprocess.CalledProcessError as e:
+
+          except GitHubApiError as e:
               print(f"Error with milestone operation: {e}")
-              print(f"Error output: {e.stderr}")
-              sys.exit(1)
-          except json.JSONDecodeError as e:
-              print(f"Error parsing JSON response: {e}")
               sys.exit(1)
           PYTHON_SCRIPT
 
@@ -184,33 +234,21 @@ jobs:
         id: create-epic
         env:
           GITHUB_TOKEN: ${{ secrets.GITHUB_TOKEN }}
+          PYTHONPATH: scripts
+          KIRO_PROFILE: ${{ inputs.profile }}
         run: |
           python3 << 'PYTHON_SCRIPT'
           import os
-          import subprocess
           import sys
 
-          def read_file_section(file_path, start_marker, end_marker=None):
-              """Read a section from a markdown file between markers"""
-              try:
-                  with open(file_path, 'r') as f:
-                      content = f.read()
+          from kiro_sync.bodies import epic_issue_body
+          from kiro_sync.client import GitHubApiError, GitHubClient
+          from kiro_sync.issues import sync_epic_issue
+          from kiro_sync.manifest import load_manifest, manifest_path, save_manifest
+          from kiro_sync.sections import read_file_section
+          from kiro_sync.trace import start_trace
 
-                  start_idx = content.find(start_marker)
-                  if start_idx == -1:
-                      return "See attached document"
-
-                  start_idx += len(start_marker)
-
-                  if end_marker:
-                      end_idx = content.find(end_marker, start_idx)
-                      if end_idx != -1:
-                        return content[start_idx:end_idx].strip()
-
-                  # If no end marker or not found, take next 500 chars
-                  return content[start_idx:start_idx+500].strip()
-              except Exception as e:
-                  return f"Error reading file: {e}"
+          start_trace('create-epic')
 
           # Read file sections
           requirements_summary = read_file_section(
@@ -234,70 +272,50 @@ jobs:
           design_url = f'{base_url}/${{ inputs.design_file }}'
           tasks_url = f'{base_url}/${{ inputs.tasks_file }}'
 
-          epic_body = f"""## Epic: ${{ inputs.project_name }}
-
-          ### Overview
-          This epic tracks the implementation of the ${{ inputs.project_name }} feature based on Kiro-generated planning documents.
-
-          ### Requirements Summary
-          {requirements_summary}
-
-          ### Architecture Overview
-          {architecture_overview}
-
-          ### Related Documents
-          - [Requirements]({requirements_url})
-          - [Design]({design_url})
-          - [Tasks]({tasks_url})
-
-          ### Acceptance Criteria
-          - [ ] All task items completed
-          - [ ] Requirements validated
-          - [ ] Code reviewed and approved
-          - [ ] Tests passing
-
-          *Auto-generated from Kiro planning documents*"""
+          epic_body = epic_issue_body(
+              '${{ inputs.project_name }}', requirements_summary, architecture_overview,
+              requirements_url, design_url, tasks_url
+          )
 
-          # Create epic issue
-          milestone_arg = []
+          # Create the epic issue, or update it only if its body changed
           milestone_number = '${{ steps.create-milestone.outputs.milestone_number }}'
-          if milestone_number and milestone_number != '':
-              milestone_arg = ['--milestone', milestone_number]
-
-          cmd = [
-              'gh', 'issue', 'create',
-              '--title', 'Epic: ${{ inputs.project_name }}',
-              '--body', epic_body,
-              '--label', 'epic,enhancement'
-          ] + milestone_arg
+          manifest_file = manifest_path('${{ inputs.tasks_file }}')
+          manifest = load_manifest(manifest_file)
+          recreate = '${{ inputs.sync_mode }}' == 'recreate'
 
           try:
-              result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-              issue_url = result.stdout.strip()
-
-              # Extract issue number from URL
-              epic_number = issue_url.rsplit('/', 1)[-1] if issue_url else None
-              if epic_number and not epic_number.isdigit():
-                  print(f"Unexpected issue URL format: {issue_url}")
-                  sys.exit(1)
-
-              if epic_number:
-                  print(f"issue_number={epic_number}")
-                  print(f"Created epic issue #{epic_number}")
-
-                  # Set GitHub output
-                  with open(os.environ['GITHUB_OUTPUT'], 'a') as f:
-                      f.write(f"issue_number={epic_number}\\n")
-              else:
-                  print("Failed to extract issue number from URL")
-                  sys.exit(1)
-
-          except subprocess.CalledProcessError as e:
+              epic_number = sync_epic_issue(
+                  GitHubClient(repo), 'Epic: ${{ inputs.project_name }}', epic_body,
+                  milestone_number, manifest, recreate=recreate, run_id='${{ github.run_id }}'
+              )
+          except GitHubApiError as e:
               print(f"Error creating epic issue: {e}")
-              print(f"Error output: {e.stderr}")
               sys.exit(1)
+
+          save_manifest(manifest_file, manifest)
+          print(f"issue_number={epic_number}")
+
+          # Set GitHub output
+          with open(os.environ['GITHUB_OUTPUT'], 'a') as f:
+              f.write(f"issue_number={epic_number}\\n")
           PYTHON_SCRIPT
 
+      # Keys include the attempt so a re-run can save the journal of its own progress
+      - name: Save sync manifest
+        if: always()
+        uses: actions/cache/save@v4
+        with:
+          path: .kiro/.sync
+          key: kiro-sync-${{ github.run_id }}-${{ github.run_attempt }}-epic
+
+      - name: Upload timing trace
+        if: always()
+        uses: actions/upload-artifact@v4
+        with:
+          name: kiro-trace-create-project-structure-${{ github.run_attempt }}
+          path: .kiro/trace/
+          if-no-files-found: ignore
+
   create-task-issues:
     needs: create-project-structure
     runs-on: ubuntu-latest
@@ -315,130 +333,172 @@ jobs:
       with:
         python-version: '3.x'
 
+    - name: Restore sync manifest
+      uses: actions/cache/restore@v4
+      with:
+        path: .kiro/.sync
+        key: kiro-sync-${{ github.run_id }}-${{ github.run_attempt }}-epic
+        restore-keys: |
+          kiro-sync-${{ github.run_id }}-
+          kiro-sync-
+
     - name: Parse tasks and create issues
       env:
         GITHUB_TOKEN: ${{ secrets.GITHUB_TOKEN }}
+        PYTHONPATH: scripts
+        KIRO_PROFILE: ${{ inputs.profile }}
       run: |
         python3 << 'PYTHON_SCRIPT'
-        import re
-        import subprocess
         import sys
 
-        def parse_tasks_file(file_path):
-            """Parse the tasks.md file and extract task information"""
-            try:
-                with open(file_path, 'r') as f:
-                    content = f.read()
-            except FileNotFoundError:
-                print(f"Tasks file not found: {file_path}")
-                return []
-
-            # Improved regex to capture task details
-            task_pattern = r'- \\[([ x])\\] (\\d+)\\. (.*?)(?=\\n- \\[|\\n\\n|$)'
-            matches = re.findall(task_pattern, content, re.DOTALL)
-
-            tasks = []
-            for completed, task_num, content_block in matches:
-                is_completed = completed == 'x'
-
-                # Split content into lines and process
-                lines = content_block.strip().split('\\n')
-                title = lines[0].strip()
-
-                # Extract description and requirements
-                description_lines = []
-                requirements = 'Not specified'
-
-                for line in lines[1:]:
-                    line = line.strip()
-                    if line.startswith('_Requirements:') and line.endswith('_'):
-                        requirements = line.replace('_Requirements: ', '').replace('_', '')
-                    elif line and not line.startswith('_'):
-                        description_lines.append(line)
-
-                description = '\\n'.join(description_lines).strip()
-
-                tasks.append({
-                    'number': task_num,
-                    'title': title,
-                    'description': description,
-                    'requirements': requirements,
-                    'completed': is_completed
-                })
-
-            return tasks
-
-        def create_task_issue(task, epic_number, milestone_number):
-            """Create a GitHub issue for a task"""
-            issue_body = f"""## Task #{task['number']}: {task['title']}
-
-            ### Description
-            {task['description'] if task['description'] else 'Implementation details to be determined during development.'}
-
-            ### Requirements Covered
-            {task['requirements']}
-
-            ### Related Epic
-            Part of epic #{epic_number}
-
-            ### Definition of Done
-            - [ ] Implementation completed
-            - [ ] Unit tests written and passing
-            - [ ] Code reviewed
-            - [ ] Requirements validated
-            - [ ] Documentation updated
-
-            *Auto-generated from Kiro tasks*
-            """
-
-            labels = 'task,enhancement'
-            if task['completed']:
-                labels += ',completed'
-
-            cmd = [
-                'gh', 'issue', 'create',
-                '--title', f"Task {task['number']}: {task['title']}",
-                '--body', issue_body,
-                '--label', labels
-            ]
-
-            if milestone_number and milestone_number != 'null' and milestone_number != '':
-                cmd.extend(['--milestone', milestone_number])
-
-            try:
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                issue_url = result.stdout.strip()
-                print(f"Created issue for task {task['number']}: {task['title']}")
-
-                return True
-            except subprocess.CalledProcessError as e:
-                print(f"Failed to create issue for task {task['number']}: {e}")
-                print(f"Error output: {e.stderr}")
-                return False
+        from kiro_sync.client import GitHubClient
+        from kiro_sync.index import update_index
+        from kiro_sync.issues import print_latency_report, run_task_sync
+        from kiro_sync.journal import Journal, journal_path
+        from kiro_sync.manifest import load_manifest, manifest_path, spec_name
+        from kiro_sync.tasks import parse_tasks_file
+        from kiro_sync.trace import start_trace
+        from kiro_sync.traceability import update_traceability
+
+        start_trace('create-task-issues')
 
         # Main execution
+        client = GitHubClient('${{ github.repository }}', pool_size=int('${{ inputs.issue_workers }}' or 4))
         epic_number = '${{ needs.create-project-structure.outputs.epic_issue_number }}'
         milestone_number = '${{ needs.create-project-structure.outputs.milestone_number }}'
+        workers = int('${{ inputs.issue_workers }}' or 4)
 
         print(f"Epic number: {epic_number}")
         print(f"Milestone number: {milestone_number}")
 
-        # Parse tasks
+        # Tasks are streamed: issue calls start while the file is still being parsed
         tasks = parse_tasks_file('${{ inputs.tasks_file }}')
-        print(f"Found {len(tasks)} tasks to process")
+        print(f"Processing tasks with {workers} workers")
+
+        # Create or sync issues for each task; every completed call is journaled at once,
+        # so a rerun after a failure or timeout skips it and only retries what failed
+        manifest_file = manifest_path('${{ inputs.tasks_file }}')
+        manifest = load_manifest(manifest_file)
+        journal = Journal(journal_path('${{ inputs.tasks_file }}'))
+        recreate = '${{ inputs.sync_mode }}' == 'recreate'
+
+        try:
+            results = run_task_sync(client, tasks, epic_number, milestone_number, manifest, journal, recreate, workers,
+                                    spec=spec_name('${{ inputs.tasks_file }}'))
+        finally:
+            journal.checkpoint(manifest, manifest_file)
+
+        # Task -> issue -> epic index read by the auto-PR workflow
+        update_index(spec_name('${{ inputs.tasks_file }}'), manifest, epic_number)
+        # Requirement -> criteria -> task -> issue index; rebuilt only when a spec document changed
+        update_traceability(
+            spec_name('${{ inputs.tasks_file }}'), '${{ inputs.requirements_file }}',
+            '${{ inputs.design_file }}', '${{ inputs.tasks_file }}', manifest
+        )
+        success_count = sum(1 for result in results if not result['error'])
+
+        print_latency_report(results)
+        print(f"Successfully applied {success_count} out of {len(results)} issue changes")
+
+        if success_count < len(results):
+            print("Re-run this job to retry only the failed issue changes")
+            sys.exit(1)
+        PYTHON_SCRIPT
+
+    - name: Save sync manifest
+      if: always()
+      uses: actions/cache/save@v4
+      with:
+        path: .kiro/.sync
+        key: kiro-sync-${{ github.run_id }}-${{ github.run_attempt }}-tasks
+
+    - name: Upload timing trace
+      if: always()
+      uses: actions/upload-artifact@v4
+      with:
+        name: kiro-trace-create-task-issues-${{ github.run_attempt }}
+        path: .kiro/trace/
+        if-no-files-found: ignore
+
+  sync-all-specs:
+    if: ${{ inputs.all_specs }}
+    runs-on: ubuntu-latest
+    permissions:
+      contents: write
+      issues: write
+      pull-requests: write
+
+    steps:
+    - name: Checkout repository
+      uses: actions/checkout@v4
+
+    - name: Setup Python
+      uses: actions/setup-python@v4
+      with:
+        python-version: '3.x'
+
+    - name: Restore sync manifest
+      uses: actions/cache/restore@v4
+      with:
+        path: .kiro/.sync
+        key: kiro-sync-${{ github.run_id }}
+        restore-keys: |
+          kiro-sync-
+
+    - name: Discover specs and sync all features
+      env:
+        GITHUB_TOKEN: ${{ secrets.GITHUB_TOKEN }}
+        PYTHONPATH: scripts
+        KIRO_PROFILE: ${{ inputs.profile }}
+      run: |
+        python3 << 'PYTHON_SCRIPT'
+        import sys
+
+        from kiro_sync.client import GitHubClient
+        from kiro_sync.issues import ensure_milestone
+        from kiro_sync.specs import discover_specs, print_spec_summary, sync_all_specs
+        from kiro_sync.trace import start_trace
+
+        start_trace('sync-all-specs')
+
+        workers = int('${{ inputs.issue_workers }}' or 4)
+        client = GitHubClient('${{ github.repository }}', pool_size=workers)
+        docs_url = 'https://github.com/${{ github.repository }}/blob/${{ github.ref_name }}'
+        recreate = '${{ inputs.sync_mode }}' == 'recreate'
 
-        # Create issues for each task
-        success_count = 0
-        for task in tasks:
-            if create_task_issue(task, epic_number, milestone_number):
-                success_count += 1
+        specs = discover_specs()
+        if not specs:
+            print("No specs with requirements.md, design.md and tasks.md found in .kiro/specs")
+            sys.exit(1)
+        print(f"Discovered {len(specs)} specs: {', '.join(spec.name for spec in specs)}")
+
+        milestone_name = '${{ inputs.milestone_name }}'
+        milestone_number = ensure_milestone(client, milestone_name) if milestone_name else ''
+
+        summaries = sync_all_specs(client, specs, milestone_number, docs_url, recreate, workers)
+        print_spec_summary(summaries)
 
-        print(f"Successfully created {success_count} out of {len(tasks)} task issues")
+        if any(summary['error'] or summary['failures'] for summary in summaries):
+            sys.exit(1)
         PYTHON_SCRIPT
+
+    - name: Save sync manifest
+      if: always()
+      uses: actions/cache/save@v4
+      with:
+        path: .kiro/.sync
+        key: kiro-sync-${{ github.run_id }}-${{ github.run_attempt }}-all
+
+    - name: Upload timing trace
+      if: always()
+      uses: actions/upload-artifact@v4
+      with:
+        name: kiro-trace-sync-all-specs-${{ github.run_attempt }}
+        path: .kiro/trace/
+        if-no-files-found: ignore
 '''
 
-    with open('.github/workflows/kiro-integration.yml', 'w') as f:
-        f.write(workflow_content)
+    write_generated('.github/workflows/kiro-integration.yml', workflow_content)
 
 def create_auto_pr_workflow():
     """Create the auto PR creation workflow"""
@@ -449,8 +509,10 @@ on:
   push:
     branches:
       - 'feature/task-*'
+      - 'feature/*/task-*'
       - 'task/*'
       - 'feat/task-*'
+      - 'feat/*/task-*'
   workflow_dispatch:
     inputs:
       task_number:
@@ -460,208 +522,147 @@ on:
         description: 'Base branch for PR'
         required: false
         default: 'main'
+      profile:
+        description: 'Also run under cProfile and upload the pstats with the timing trace'
+        required: false
+        type: boolean
+        default: false
+
+# Both jobs compare against the same base: the dispatch input, or main for pushes
+env:
+  BASE_BRANCH: ${{ inputs.base_branch || 'main' }}
 
 jobs:
+  # Decides "a PR is already open" without a checkout or Python: from the push payload, the
+  # branch's cached PR record and at most two API calls. That is the common case after the first push.
+  precheck:
+    if: ${{ github.event_name == 'push' }}
+    runs-on: ubuntu-latest
+    # Pushes in quick succession to one branch cancel the older prechecks; only the newest goes on
+    concurrency:
+      group: auto-pr-precheck-${{ github.ref }}
+      cancel-in-progress: true
+    permissions:
+      pull-requests: read
+
+    outputs:
+      skip: ${{ steps.decide.outputs.skip }}
+
+    steps:
+      - name: Restore PR record
+        uses: actions/cache/restore@v4
+        with:
+          path: .kiro/.pr
+          key: kiro-pr-${{ github.ref_name }}-${{ github.run_id }}
+          restore-keys: |
+            kiro-pr-${{ github.ref_name }}-
+
+      - name: Check for an open PR
+        id: decide
+        env:
+          GH_TOKEN: ${{ secrets.GITHUB_TOKEN }}
+          BRANCH_DELETED: ${{ github.event.deleted }}
+          RECORD: .kiro/.pr/pull.json
+        run: |
+          skip=false
+          number=''
+          if [ "$BRANCH_DELETED" = "true" ]; then
+            echo "Branch $GITHUB_REF_NAME was deleted; nothing to do"
+            echo "skip=true" >> "$GITHUB_OUTPUT"
+            exit 0
+          fi
+
+          # A cached record only counts if its PR is still open against the same base
+          if [ -f "$RECORD" ] && [ "$(jq -r '.base' "$RECORD")" = "$BASE_BRANCH" ]; then
+            number=$(jq -r '.number // empty' "$RECORD")
+            state=$(gh api "repos/$GITHUB_REPOSITORY/pulls/$number" --jq .state 2>/dev/null || true)
+            [ "$state" = "open" ] || number=''
+          fi
+
+          # No usable record, e.g. the PR was opened by hand: one list call, recorded for next time
+          if [ -z "$number" ]; then
+            number=$(gh pr list --repo "$GITHUB_REPOSITORY" --head "$GITHUB_REF_NAME" --base "$BASE_BRANCH" \\
+              --state open --json number --jq '.[0].number // empty' 2>/dev/null || true)
+            if [ -n "$number" ]; then
+              mkdir -p "$(dirname "$RECORD")"
+              jq -n --argjson number "$number" --arg head "$GITHUB_REF_NAME" --arg base "$BASE_BRANCH" \\
+                '{number: $number, head: $head, base: $base}' > "$RECORD"
+              echo "save=true" >> "$GITHUB_OUTPUT"
+            fi
+          fi
+
+          if [ -n "$number" ]; then
+            echo "PR #$number is already open for $GITHUB_REF_NAME; nothing to do"
+            skip=true
+          fi
+          echo "skip=$skip" >> "$GITHUB_OUTPUT"
+
+      - name: Save PR record
+        if: ${{ steps.decide.outputs.save == 'true' }}
+        uses: actions/cache/save@v4
+        with:
+          path: .kiro/.pr
+          key: kiro-pr-${{ github.ref_name }}-${{ github.run_id }}-${{ github.run_attempt }}
+
   create-pr:
+    needs: precheck
+    # Runs when precheck found no open PR, was skipped (workflow_dispatch) or could not decide
+    if: ${{ !cancelled() && needs.precheck.result != 'cancelled' && needs.precheck.outputs.skip != 'true' }}
     runs-on: ubuntu-latest
+    # One PR creation per branch at a time; a running one is never cancelled half way through
+    concurrency:
+      group: auto-pr-create-${{ github.ref }}
+      cancel-in-progress: false
     permissions:
       contents: write
       pull-requests: write
       issues: write
 
     steps:
+      # Shallow checkout; the PR step deepens history only as far as the merge-base
       - name: Checkout repository
         uses: actions/checkout@v4
         with:
-          fetch-depth: 0
+          fetch-depth: 1
 
       - name: Setup Python
         uses: actions/setup-python@v4
         with:
           python-version: '3.x'
 
+      - name: Restore task index
+        uses: actions/cache/restore@v4
+        with:
+          path: .kiro/.sync
+          key: kiro-sync-${{ github.run_id }}
+          restore-keys: |
+            kiro-sync-
+
       - name: Extract task number and create PR
         env:
           GITHUB_TOKEN: ${{ secrets.GITHUB_TOKEN }}
+          PYTHONPATH: scripts
+          KIRO_PROFILE: ${{ inputs.profile }}
         run: |
           python3 << 'PYTHON_SCRIPT'
           import os
-          import subprocess
           import sys
-          import json
+
+          from kiro_sync.client import GitHubApiError, GitHubClient
+          from kiro_sync.index import load_index
+          from kiro_sync.pulls import create_task_pull_request, save_pr_record, task_number_from_branch
+          from kiro_sync.trace import start_trace
+
+          start_trace('create-pr')
+
+          client = GitHubClient(os.environ['GITHUB_REPOSITORY'])
+          task_index = load_index()
 
           def extract_task_number():
               """Extract task number from branch name or workflow input"""
               if os.environ.get('GITHUB_EVENT_NAME') == 'workflow_dispatch':
                   return os.environ.get('INPUT_TASK_NUMBER', '')
-              else:
-                  branch_name = os.environ.get('GITHUB_REF_NAME', '')
-                  import re
-                  match = re.search(r'\\d+', branch_name)
-                  return match.group() if match else ''
-
-          def find_issue_for_task(task_number):
-              """Find the GitHub issue for a specific task number"""
-              cmd = ['gh', 'issue', 'list', '--search', f'Task {task_number}:', '--state', 'open', '--limit', '1']
-
-              try:
-                  result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                  lines = result.stdout.strip().split('\\n')
-
-                  if not lines or not lines[0]:
-                      return None, None, None
-
-                  # Parse the first line to extract issue number and title
-                  first_line = lines[0]
-                  parts = first_line.split('\\t')
-                  if len(parts) >= 2:
-                      issue_number = parts[0]
-                      issue_title = parts[1]
-                      return issue_number, issue_title, None
-
-                  return None, None, None
-              except subprocess.CalledProcessError as e:
-                  print(f"Error finding issue: {e}")
-                  return None, None, None
-
-          def check_existing_pr(branch_name, base_branch):
-              """Check if PR already exists for this branch"""
-              cmd = ['gh', 'pr', 'list', '--head', branch_name, '--base', base_branch]
-
-              try:
-                  result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                  lines = result.stdout.strip().split('\\n')
-
-                  if not lines or not lines[0]:
-                      return None
-
-                  # Parse the first line to extract PR number
-                  first_line = lines[0]
-                  parts = first_line.split('\\t')
-                  if len(parts) >= 1:
-                      return parts[0]
-
-                  return None
-              except subprocess.CalledProcessError:
-                  return None
-
-          def get_commit_summary(base_branch, current_branch):
-              """Get commit summary since branching"""
-              cmd = ['git', 'log', '--pretty=format:- %s', f'{base_branch}..{current_branch}']
-
-              try:
-                  result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                  commits = result.stdout.strip()
-                  return commits if commits else '- Initial commit for this task'
-              except subprocess.CalledProcessError:
-                  return '- Initial commit for this task'
-
-          def find_epic_issue():
-              """Find the epic issue"""
-              cmd = ['gh', 'issue', 'list', '--search', 'Epic:', '--state', 'open']
-
-              try:
-                  result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                  lines = result.stdout.strip().split('\\n')
-
-                  if not lines or not lines[0]:
-                      return None
-
-                  # Parse the first line to extract issue number
-                  first_line = lines[0]
-                  parts = first_line.split('\\t')
-                  if len(parts) >= 1:
-                      return parts[0]
-
-                  return None
-              except subprocess.CalledProcessError:
-                  return None
-
-          def create_pull_request(task_number, issue_number, issue_title, milestone_number, commits, base_branch, current_branch):
-              """Create the pull request"""
-              epic_number = find_epic_issue()
-
-              # Clean up issue title for PR title
-              pr_title = issue_title.replace(f'Task {task_number}: ', '') if issue_title else f'Task {task_number}'
-
-              pr_body = f"""## Task {task_number}: {pr_title}
-
-          ### Description
-          This PR implements the changes for Task {task_number} as part of the Kiro-planned feature development.
-
-          ### Related Issues
-          - Resolves #{issue_number}"""
-
-              if epic_number:
-                  pr_body += f"\\n- Related to Epic #{epic_number}"
-
-              pr_body += f"""
-
-          ### Changes Made
-          {commits}
-
-          ### Testing Checklist
-          - [ ] Unit tests added/updated
-          - [ ] Integration tests pass
-          - [ ] Manual testing completed
-          - [ ] Edge cases tested
-          - [ ] Error handling tested
-
-          ### Code Quality Checklist
-          - [ ] Code follows project standards
-          - [ ] TypeScript types properly defined
-          - [ ] Error handling implemented
-          - [ ] Loading states implemented
-          - [ ] No console.log statements left in code
-
-          ### Review Checklist
-          - [ ] Functionality matches requirements
-          - [ ] Code is readable and maintainable
-          - [ ] Performance considerations addressed
-          - [ ] Security considerations addressed
-          - [ ] Accessibility requirements met
-
-          ### Deployment Notes
-          <!-- Add any special deployment considerations -->
-
-          ---
-          *This PR was auto-generated from Kiro task tracking*"""
-
-              cmd = [
-                  'gh', 'pr', 'create',
-                  '--title', pr_title,
-                  '--body', pr_body,
-                  '--base', base_branch,
-                  '--head', current_branch,
-                  '--label', 'task,kiro-generated'
-              ]
-
-              try:
-                  result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                  # Extract PR URL from output
-                  pr_url = (result.stdout or "").strip()
-
-                  if pr_url:
-                      # Extract PR number from URL
-                      pr_number = pr_url.rsplit('/', 1)[-1] if pr_url.startswith('http') else None
-
-                      if pr_number and issue_number:
-                          # Link PR to issue
-                          comment_cmd = ['gh', 'issue', 'comment', str(issue_number), '--body', f'🔗 Pull Request created: {pr_url}']
-                          subprocess.run(comment_cmd, check=True)
-
-                      print(f"✅ Created PR: {pr_title}")
-                      print(f"PR URL: {pr_url}")
-
-                      return pr_number
-                  else:
-                      print(f"✅ Created PR: {pr_title}")
-                      return True
-              except subprocess.CalledProcessError as e:
-                  print(f"Error creating PR: {e}")
-                  print(f"Command output: {e.stdout if hasattr(e, 'stdout') else 'N/A'}")
-                  print(f"Command error: {e.stderr if hasattr(e, 'stderr') else 'N/A'}")
-                  return None
+              return task_number_from_branch(os.environ.get('GITHUB_REF_NAME', ''))
 
           # Main execution
           task_number = extract_task_number()
@@ -672,47 +673,42 @@ jobs:
           print(f"Task number: {task_number}")
 
           branch_name = os.environ.get('GITHUB_REF_NAME', '')
-          base_branch = os.environ.get('INPUT_BASE_BRANCH', 'main')
+          base_branch = os.environ.get('BASE_BRANCH', 'main')
 
           print(f"Branch: {branch_name}")
           print(f"Base branch: {base_branch}")
 
-          # Check if PR already exists
-          existing_pr = check_existing_pr(branch_name, base_branch)
-          if existing_pr:
-              print(f"PR already exists: #{existing_pr}")
-              sys.exit(0)
-
-          # Find corresponding issue
-          issue_number, issue_title, milestone_number = find_issue_for_task(task_number)
-          if not issue_number:
-              print(f"No open issue found for task {task_number}")
-              print("Creating PR without linked issue...")
-              issue_number = None
-              issue_title = f"Task {task_number}"
-
-          if issue_number:
-              print(f"Found issue #{issue_number}: {issue_title}")
-
-          # Get commit summary
-          commits = get_commit_summary(base_branch, branch_name)
-
-          # Create PR
-          pr_result = create_pull_request(
-              task_number, issue_number, issue_title,
-              milestone_number, commits, base_branch, branch_name
-          )
-
-          if pr_result:
-              print(f"Successfully created PR for task {task_number}")
-          else:
+          try:
+              pull, created = create_task_pull_request(client, task_number, branch_name, base_branch, task_index)
+          except GitHubApiError as e:
+              print(f"Error creating PR for task {task_number}: {e}")
               print("Failed to create PR")
               sys.exit(1)
+
+          save_pr_record(pull, branch_name, base_branch)
+          if created:
+              print(f"✅ Created PR: {pull.title}")
+              print(f"PR URL: {pull.url}")
+              print(f"Successfully created PR for task {task_number}")
           PYTHON_SCRIPT
+
+      - name: Save PR record
+        if: ${{ always() && hashFiles('.kiro/.pr/pull.json') != '' }}
+        uses: actions/cache/save@v4
+        with:
+          path: .kiro/.pr
+          key: kiro-pr-${{ github.ref_name }}-${{ github.run_id }}-${{ github.run_attempt }}
+
+      - name: Upload timing trace
+        if: always()
+        uses: actions/upload-artifact@v4
+        with:
+          name: kiro-trace-create-pr-${{ github.run_attempt }}
+          path: .kiro/trace/
+          if-no-files-found: ignore
 '''
 
-    with open('.github/workflows/auto-pr-creation.yml', 'w') as f:
-        f.write(workflow_content)
+    write_generated('.github/workflows/auto-pr-creation.yml', workflow_content)
 
 def create_templates():
     """Create GitHub issue and PR templates"""
@@ -753,8 +749,7 @@ assignees: ''
 *This issue was auto-generated from Kiro planning documents*
 '''
 
-    with open('.github/ISSUE_TEMPLATE/kiro-task.md', 'w') as f:
-        f.write(issue_template)
+    write_generated('.github/ISSUE_TEMPLATE/kiro-task.md', issue_template)
 
     # PR template
     pr_template = '''## Pull Request
@@ -780,13 +775,9 @@ Brief description of the changes implemented in this PR.
 - [ ] Tests added
 
 ### Requirements Validation
-<!-- Check off requirements from Kiro requirements.md that this PR addresses -->
-- [ ] Requirement 1: User interface requirements met
-- [ ] Requirement 2: Selection state requirements met
-- [ ] Requirement 3: File operations requirements met
-- [ ] Requirement 4: Permissions requirements met
-- [ ] Requirement 5: Visual feedback requirements met
-- [ ] Requirement 6: Progress tracking requirements met
+<!-- List the acceptance criteria from Kiro requirements.md that this PR addresses, e.g.
+- [ ] **3.1** WHEN I click "Upload File" THEN the system SHALL open a file picker dialog
+Auto-generated task PRs fill this in from the task's _Requirements: line. -->
 
 ### Testing Checklist
 - [ ] Unit tests added/updated
@@ -819,8 +810,7 @@ Brief description of the changes implemented in this PR.
 *This PR was created as part of Kiro-planned feature development*
 '''
 
-    with open('.github/pull_request_template.md', 'w') as f:
-        f.write(pr_template)
+    write_generated('.github/pull_request_template.md', pr_template)
 
 def create_helper_scripts():
     """Create helper scripts"""
@@ -829,15 +819,21 @@ def create_helper_scripts():
 # Create a branch for a specific task
 
 if [ $# -eq 0 ]; then
-    echo "Usage: $0 <task_number> [base_branch]"
-    echo "Example: $0 04 main"
+    echo "Usage: $0 <task_number> [base_branch] [spec]"
+    echo "Example: $0 04 main file-action-bar"
+    echo "Name the spec when more than one spec has a task with this number"
     exit 1
 fi
 
 TASK_NUMBER=$(printf "%02d" $1)
 BASE_BRANCH=${2:-main}
+SPEC=$3
 
-BRANCH_NAME="feature/task-$TASK_NUMBER"
+if [ -n "$SPEC" ]; then
+    BRANCH_NAME="feature/$SPEC/task-$TASK_NUMBER"
+else
+    BRANCH_NAME="feature/task-$TASK_NUMBER"
+fi
 
 echo "Creating branch $BRANCH_NAME from $BASE_BRANCH..."
 
@@ -850,36 +846,72 @@ echo "💡 When you're ready to create a PR, just push this branch:"
 echo "   git push -u origin $BRANCH_NAME"
 '''
 
-    with open('scripts/create-task-branch.sh', 'w') as f:
-        f.write(branch_script)
-    os.chmod('scripts/create-task-branch.sh', 0o755)
+    write_generated('scripts/create-task-branch.sh', branch_script, mode=0o755)
 
     # Feature setup script
     setup_script = '''#!/bin/bash
 # Quick setup script for new Kiro features
+# Usage: setup-kiro-feature.sh [--all | --watch [--milestone NAME]]
 
 echo "🚀 Kiro Feature Setup"
 echo "===================="
 
-read -p "Enter project/feature name: " PROJECT_NAME
+# Discover every spec directory that has all three Kiro files
+SPECS=()
+for dir in .kiro/specs/*/; do
+    dir=${dir%/}
+    if [ -f "$dir/requirements.md" ] && [ -f "$dir/design.md" ] && [ -f "$dir/tasks.md" ]; then
+        SPECS+=("$(basename "$dir")")
+    fi
+done
+
+if [ ${#SPECS[@]} -eq 0 ]; then
+    echo "❌ No Kiro specs found in .kiro/specs/"
+    exit 1
+fi
+
+echo "Found specs: ${SPECS[*]}"
+
+if [ "$1" = "--watch" ]; then
+    # Live-sync edits from this checkout instead of dispatching the workflow
+    shift
+    PYTHONPATH=scripts exec python3 -m kiro_sync.watch "$@"
+fi
+
+if [ "$1" = "--all" ]; then
+    SPEC_NAME="all"
+else
+    read -p "Enter spec to sync (or 'all') [${SPECS[0]}]: " SPEC_NAME
+    SPEC_NAME=${SPEC_NAME:-${SPECS[0]}}
+fi
+
 read -p "Enter milestone name (optional): " MILESTONE_NAME
 
-echo "Setting up GitHub integration for: $PROJECT_NAME"
+ARGS=()
+if [ -n "$MILESTONE_NAME" ]; then
+    ARGS+=(-f milestone_name="$MILESTONE_NAME")
+fi
 
 # Trigger the GitHub workflow
-if [ -z "$MILESTONE_NAME" ]; then
-    gh workflow run kiro-integration.yml \\
-      -f project_name="$PROJECT_NAME" \\
-      -f requirements_file=".kiro/specs/file-action-bar/requirements.md" \\
-      -f design_file=".kiro/specs/file-action-bar/design.md" \\
-      -f tasks_file=".kiro/specs/file-action-bar/tasks.md"
+if [ "$SPEC_NAME" = "all" ]; then
+    echo "Setting up GitHub integration for all ${#SPECS[@]} specs"
+    gh workflow run kiro-integration.yml -f all_specs=true "${ARGS[@]}"
 else
+    SPEC_DIR=".kiro/specs/$SPEC_NAME"
+    if [ ! -f "$SPEC_DIR/tasks.md" ]; then
+        echo "❌ $SPEC_DIR is not a complete Kiro spec"
+        exit 1
+    fi
+
+    read -p "Enter project/feature name: " PROJECT_NAME
+    echo "Setting up GitHub integration for: $PROJECT_NAME"
+
     gh workflow run kiro-integration.yml \\
       -f project_name="$PROJECT_NAME" \\
-      -f milestone_name="$MILESTONE_NAME" \\
-      -f requirements_file=".kiro/specs/file-action-bar/requirements.md" \\
-      -f design_file=".kiro/specs/file-action-bar/design.md" \\
-      -f tasks_file=".kiro/specs/file-action-bar/tasks.md"
+      -f requirements_file="$SPEC_DIR/requirements.md" \\
+      -f design_file="$SPEC_DIR/design.md" \\
+      -f tasks_file="$SPEC_DIR/tasks.md" \\
+      "${ARGS[@]}"
 fi
 
 echo "✅ GitHub workflow triggered!"
@@ -887,9 +919,24 @@ echo "🔗 Check the Actions tab to see the progress"
 echo "📋 Issues and milestone will be created automatically"
 '''
 
-    with open('scripts/setup-kiro-feature.sh', 'w') as f:
-        f.write(setup_script)
-    os.chmod('scripts/setup-kiro-feature.sh', 0o755)
+    write_generated('scripts/setup-kiro-feature.sh', setup_script, mode=0o755)
+
+def install_sync_package():
+    """Install the kiro_sync helper package imported by the workflows"""
+    source = Path(__file__).resolve().parent / 'scripts' / 'kiro_sync'
+    target = Path('scripts/kiro_sync')
+
+    if not source.exists():
+        print_warning(f"kiro_sync package not found at {source}; workflows will not run without it")
+        return
+
+    # Nothing to copy when the setup script runs inside its own repository
+    if target.exists() and target.resolve() == source:
+        return
+
+    for path in sorted(source.rglob('*.py')):
+        if '__pycache__' not in path.parts:
+            write_generated(target / path.relative_to(source), path.read_bytes())
 
 def create_documentation():
     """Create integration documentation"""
@@ -914,11 +961,13 @@ This repository has been set up with automated workflows to convert Kiro plannin
 ## Workflow Overview
 
 ### Files Structure
-- `.kiro/specs/file-action-bar/requirements.md` - Kiro requirements document
-- `.kiro/specs/file-action-bar/design.md` - Kiro design document
-- `.kiro/specs/file-action-bar/tasks.md` - Kiro implementation tasks
+- `.kiro/specs/<feature>/requirements.md` - Kiro requirements document
+- `.kiro/specs/<feature>/design.md` - Kiro design document
+- `.kiro/specs/<feature>/tasks.md` - Kiro implementation tasks
 - `.github/workflows/` - Automated workflows
 - `scripts/` - Helper scripts
+- `scripts/kiro_sync/` - Python package imported by the workflows (GitHub API client, tasks.md parser, issue creation, rate limiting, sync manifest)
+- `.kiro/.sync/` - Sync manifests restored from the Actions cache (not committed)
 
 ### Epic and Task Linking Implementation
 
@@ -932,6 +981,18 @@ This repository has been set up with automated workflows to convert Kiro plannin
 - **Title Format**: "Task [NUMBER]: [Title]" (e.g., "Task 04: Create FileActionBarComponent")
 - **Epic Link**: Each task issue body contains "Part of epic #[EPIC_NUMBER]"
 
+Every generated issue body also ends with a hidden `<!-- kiro-sync {...} -->` comment recording its
+kind, task number and epic, which the sync and auto-PR steps use to identify issues reliably.
+
+**Sub-tasks:**
+- Indented checkboxes under a task in tasks.md with dotted numbers (`  - [ ] 2.1 Add the API client`)
+  become sub-tasks of task 2; any depth is allowed. Other indented lines stay in the task description
+- Each sub-task gets its own issue ("Task 2.1: ..."). The parent's issue lists its sub-tasks as a
+  checklist under "Sub-tasks", and each sub-task's issue names its parent under "Parent Task"
+- The issues are also linked as GitHub sub-issues (`scripts/kiro_sync/subissues.py`). Links are read
+  and written in batched GraphQL requests, so a tasks.md with thousands of sub-tasks costs a few
+  dozen requests. GitHub allows 100 sub-issues per parent; further ones only appear in the checklist
+
 **Example Linking:**
 Epic issue #15 "Epic: File Action Bar" is referenced by task issue #16 "Task 04: Create FileActionBarComponent" which contains "Part of epic #15" in its description, creating clickable backlinks in GitHub's interface.
 
@@ -947,21 +1008,98 @@ Features:
 - Sets up milestone tracking
 - Links all issues together using issue references
 
+Task issues are created, updated and closed concurrently by a bounded worker pool (`issue_workers`
+input, default 4). All workers share one rate limiter that reads GitHub's `x-ratelimit-*` and
+`retry-after` headers, pauses every worker when a primary or secondary limit is hit and widens the
+spacing between requests until the limit clears. Results are reported in task order together with
+per-task latency. GitHub numbers issues in the order requests arrive, so issue numbers need not
+follow task order; the task-to-issue mapping is the one recorded from each create response in the
+manifest and the task index, and every task issue carries its task number in hidden metadata.
+
+By default the workflow runs in `sync` mode and is safe to rerun. Each run stores a manifest in
+`.kiro/.sync/<spec>.json` (persisted with the Actions cache) holding the issue number and a content
+hash for every task and for the epic body. A rerun only creates issues for new tasks, updates issues
+whose task content changed and closes issues for tasks removed from tasks.md, so an unchanged spec
+makes no mutating API calls. If the cache has expired, existing `task` and `epic` issues are matched
+by title instead of being created again. Use `sync_mode: recreate` to create every issue from scratch.
+
+#### Syncing Every Spec
+
+Each `.kiro/specs/<feature>/` directory containing requirements.md, design.md and tasks.md is a spec.
+Dispatch the workflow with `all_specs: true` (or run `./scripts/setup-kiro-feature.sh --all`) to
+discover every spec, parse them concurrently in a process pool and sync each feature's epic and task
+issues in a single run. Each feature gets its own epic ("Epic: File Action Bar" for `file-action-bar`)
+and sync manifest, and the job ends with a per-spec table of task counts, changes, parse and sync
+times and results. Specs may reuse task numbers: each spec's task issues carry the spec in their
+hidden metadata, and the auto-PR task index keeps its entries per spec. A task number that several
+specs use resolves through a branch that names the spec, e.g. `feature/file-action-bar/task-02`.
+
+#### Watch Mode
+
+While editing a plan, `./scripts/setup-kiro-feature.sh --watch` (or
+`PYTHONPATH=scripts python3 -m kiro_sync.watch`) syncs from your checkout without a workflow run.
+It syncs every spec once, then watches `.kiro/specs/` with inotify (mtime polling on other
+platforms), waits for a burst of saves to settle (`--debounce`, default 0.3s), re-parses only the
+files that changed and pushes only the issues whose content or checkbox changed, so an edit shows up
+on GitHub in about a second. It needs `GITHUB_TOKEN`, `GH_TOKEN` or a logged-in `gh`; the repository
+comes from `--repo` or the `origin` remote, and `--milestone NAME` assigns new issues to a milestone.
+Its manifests live in the local `.kiro/.sync/`, separate from the workflow's cache, so the next
+workflow run may rewrite the issues edited locally once.
+
+#### Sync Service
+
+`PYTHONPATH=scripts python3 -m kiro_sync.service` runs from the root of a clone it can own and
+does the work of both workflows in one long-lived process, without a runner, checkout or
+setup-python per event. It takes GitHub `push` webhooks on `POST /webhook` (point a repository
+webhook at it and set the same secret with `--secret` or `KIRO_WEBHOOK_SECRET`) and JSON events
+dropped into a `--queue` directory. A push to a task branch opens its PR. A push to the base branch
+fast-forwards the clone and re-syncs only the specs its commits touched, and
+`{"event": "sync", "spec": "<name>"}` re-syncs a spec. The API connections, the parsed specs and
+the task index stay warm between events. Events for different branches run concurrently
+(`--concurrency`); events for one branch run in order, and a push that arrives while its branch is
+busy merges into the one already waiting. `GET /status` reports event counts, latency percentiles
+and API calls, and `PYTHONPATH=scripts python3 -m benchmarks.service` measures throughput and
+latency against the offline GitHub API emulator. Turn the workflows off while the service runs, or
+both will act on the same events.
+
 #### 2. Auto PR Creation
-**Trigger**: Push to `feature/task-*` or `task/*` branches
+**Trigger**: Push to `feature/task-*`, `feature/<spec>/task-*` or `task/*` branches
 **Purpose**: Automatically creates PRs for task branches
 
 Features:
+- Resolves the task's issue and epic from a task index (`.kiro/.sync/index.json`) written by the
+  integration workflow and restored from the Actions cache, so no search API call is needed;
+  on an index miss it falls back to a title search that only accepts an exact `Task N:` match.
+  When several specs have task N and the branch does not name one of them, the PR is opened without
+  a linked issue rather than linking another spec's issue. A searched issue's epic is the one named
+  in its hidden metadata; without it the PR links no epic
+- Looks up the branch's open PR, the task issue, the epic and the label ids in one batched GraphQL
+  query, creates the PR, then posts the back-link comment with the PR's URL on the issue and applies
+  the labels in one follow-up mutation (`scripts/kiro_sync/pulls.py`): three round-trips per new PR
 - Links PR to related issue using "Resolves #[ISSUE_NUMBER]"
 - Links PR to epic using "Related to Epic #[EPIC_NUMBER]"
-- Generates PR description from commits
+- Generates PR description from commits: short branches list every commit, longer ones are grouped
+  by conventional-commit type (`feat`, `fix`, ...) or top-level path with a few subjects per group,
+  and the summary is capped well inside GitHub's PR body size limit
+- Starts from a shallow clone and deepens the base and task branches step by step only until their
+  merge-base is found, so long-lived branches in a large repository never need a full clone
+- Lists the acceptance criteria the task covers (its `_Requirements:` IDs resolved against
+  requirements.md) as a Requirements Validation checklist, read from the traceability index
+- Lists the test levels from the spec's design (`## Testing Strategy`) as a Testing Requirements checklist
 - Adds appropriate labels (`task,kiro-generated`)
 - Sets up comprehensive review checklist
+- Exits early without a checkout: a `precheck` job reads the branch's cached PR record
+  (`.kiro/.pr/pull.json`, written once the PR exists) and confirms with one API call that the PR
+  is still open, so later pushes to a branch that has its PR finish in seconds
+- Coalesces rapid pushes: prechecks share a concurrency group per branch, so a new push cancels
+  the older prechecks for that branch. PR creation has its own group without cancellation, so a
+  run that is already creating a PR always finishes and the next one finds it open
 
 ### Branch Naming Convention
 
 Use these branch naming patterns for automatic PR creation:
 - `feature/task-01` - Feature branch for task 1
+- `feature/file-action-bar/task-01` - Task 1 of the file-action-bar spec, when several specs have a task 1
 - `task/05` - Task branch for task 5
 - `feat/task-12` - Alternative feature branch
 
@@ -975,9 +1113,49 @@ Issues are automatically created with:
 - Appropriate labels (`task,enhancement` or `epic,enhancement`)
 - Milestone assignment (if specified)
 
+Long imports are resumable. Every successful create, update or close is appended to
+`.kiro/.sync/<spec>.journal.jsonl` and flushed immediately, and the journal is saved with the
+manifest in the Actions cache even when the job fails or times out. The job fails if any issue
+change failed; re-running it replays the journal, skips everything that already succeeded and
+retries only the failures (in `recreate` mode, only issues created by an earlier attempt of the
+same run are kept). Rate-limited and 5xx calls back off exponentially with jitter, capped at two
+minutes, for up to five attempts; only rate limits slow down the other workers. A create that hit
+a 5xx or a dropped connection may still have gone through, so before sending it again the newest
+task issues are checked for its hidden task metadata and a match is used instead of a duplicate.
+
+Checking a task off in tasks.md closes its issue as completed and adds the `completed` label;
+unchecking it reopens the issue and removes the label. Open/closed state is reconciled after the
+content sync by `scripts/kiro_sync/states.py`, which only looks at tasks whose checkbox changed since
+the last run: their issue state is read with one aliased GraphQL query per 100 issues and all the
+close, reopen and label changes are sent as aliased mutations, 100 to a request, so checking off 60
+tasks costs three requests. An issue closed on GitHub while its box is still unchecked (for example
+by a merged PR) is left closed; only unchecking a box reopens an issue. Content updates no longer
+reset an issue's labels.
+
+Tasks are read from tasks.md by a streaming, line-by-line parser (`scripts/kiro_sync/tasks.py`).
+Each task starts with a top-level `- [ ] N. Title` (or `- [x]`) line; indented bullets below it,
+including nested ones, become the description and a `_Requirements: ..._` line (bare or as a bullet)
+becomes the requirements list. Blank lines between a task and its bullets are allowed.
+
+Sections of requirements.md and design.md (the epic's requirements summary and architecture
+overview, the PR's testing requirements) come from a section index (`scripts/kiro_sync/sections.py`)
+built by one pass over each document. It records every heading outside code fences with its level,
+heading path and offsets, so any section is a dictionary lookup and a slice; documents over 256 KiB
+are memory-mapped. The index is cached by the document's git blob SHA in `.kiro/.sync/sections/`,
+which travels with the Actions cache, so each revision of a document is scanned once for all steps.
+A missing end marker now yields the rest of the section rather than a fixed 500 characters.
+
+After each sync the integration workflow writes a requirement traceability index per spec to
+`.kiro/.sync/traceability/<spec>.json` (`scripts/kiro_sync/traceability.py`). It maps every
+acceptance criterion (`3.1` is item 1 under `### Requirement 3`) to its text and to the tasks that
+list it in `_Requirements:`, and each task to its issue. The index is stamped with the blob SHAs of
+requirements.md, design.md and tasks.md and is only rebuilt when one of them changed. It travels with
+the Actions cache, and the auto-PR job reads the task's criteria and test levels from it instead of
+parsing the spec documents.
+
 ### Usage Tips
 
-1. **Start with Planning**: Ensure your Kiro files are complete in `.kiro/specs/file-action-bar/`
+1. **Start with Planning**: Ensure your Kiro files are complete in `.kiro/specs/<feature>/`
 2. **Run Integration**: Use the setup script to create all GitHub issues
 3. **Work on Tasks**: Create branches using the helper script
 4. **Auto PRs**: Push branches to automatically create pull requests
@@ -991,30 +1169,54 @@ You can customize the integration by:
 - Adjusting helper scripts in `scripts/`
 - Changing Kiro file paths in workflow inputs
 
+Re-running `kiro-github-setup.py` is cheap: each generated file is rewritten (atomically) only when
+its content hash changed, so unchanged files keep their mtimes and the tree stays clean. The tool
+checks run concurrently with file generation, time out after 5 seconds, and their result is cached
+in `.kiro/.sync/tool-check.json` for an hour.
+
+### Timing Traces
+
+Every workflow step records the time spent in each external call (REST and GraphQL requests, git
+commands) and parse phase as spans with their latency, bytes and retry counts
+(`scripts/kiro_sync/trace.py`). When a step finishes, its spans are written to `.kiro/trace/<step>.json`,
+uploaded as a `kiro-trace-*` artifact, and summarised per span in the job's step summary: calls, total,
+mean, p95 and max time, bytes and retries. Dispatch a workflow with `profile: true` to also run each step
+under cProfile; the `<step>.pstats` files in the same artifact open with `python3 -m pstats` or snakeviz.
+cProfile follows the main thread only, so calls made by issue workers appear there as pool waits; their
+latencies are in the trace spans.
+
+### GitHub API Access
+
+The workflow scripts talk to GitHub through `kiro_sync.client.GitHubClient`, an in-process REST
+client that keeps a small pool of keep-alive connections instead of spawning `gh` for every call.
+It authenticates with `GITHUB_TOKEN` (or `GH_TOKEN`) and sends requests to `GITHUB_API_URL`, which
+Actions sets automatically; pass `base_url=` to point it at another host such as a local fake server.
+
 ### Requirements
 
-- GitHub CLI (`gh`) installed and authenticated
+- GitHub CLI (`gh`) installed and authenticated (for the helper scripts)
 - Python 3.x
 - Proper repository permissions (issues, PRs, workflows)
-- Kiro planning documents in `.kiro/specs/file-action-bar/` directory
+- Kiro planning documents in `.kiro/specs/<feature>/` directories
 
 ## Troubleshooting
 
 ### Common Issues
 
-1. **Workflow fails**: Check that all Kiro files exist at `.kiro/specs/file-action-bar/` and are properly formatted
+1. **Workflow fails**: Check that all Kiro files exist at `.kiro/specs/<feature>/` and are properly formatted
 2. **Issues not created**: Verify GitHub token permissions include issues and milestones
-3. **Auto PR fails**: Ensure branch naming follows the convention (`feature/task-XX`, `task/XX`, `feat/task-XX`)
+3. **Auto PR fails**: Ensure branch naming follows the convention (`feature/task-XX`, `feature/<spec>/task-XX`, `task/XX`, `feat/task-XX`)
 4. **Epic linking broken**: Check that epic issue was created first and task issues reference the correct epic number
 
 ### File Path Issues
 
 The workflows expect Kiro files at:
-- `.kiro/specs/file-action-bar/requirements.md`
-- `.kiro/specs/file-action-bar/design.md`
-- `.kiro/specs/file-action-bar/tasks.md`
+- `.kiro/specs/<feature>/requirements.md`
+- `.kiro/specs/<feature>/design.md`
+- `.kiro/specs/<feature>/tasks.md`
 
-If your files are in different locations, update the workflow inputs in `scripts/setup-kiro-feature.sh`.
+Directories missing any of the three files are skipped. For a single-spec run in a different
+location, pass the file paths as workflow inputs.
 
 ### Getting Help
 
@@ -1024,41 +1226,99 @@ Check the workflow logs in the Actions tab for detailed error information. Look
 - Task parsing errors (check tasks.md format)
 '''
 
-    with open('kiro-github-integration.md', 'w') as f:
-        f.write(doc_content)
+    write_generated('kiro-github-integration.md', doc_content)
+
+def _run_check(cmd):
+    """Run one tool check, returning (ok, detail) without ever blocking past the timeout"""
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=TOOL_CHECK_TIMEOUT)
+        return result.returncode == 0, (result.stdout or result.stderr).strip().splitlines()[:1]
+    except subprocess.TimeoutExpired:
+        return None, [f"timed out after {TOOL_CHECK_TIMEOUT}s"]
+    except OSError as e:
+        return False, [str(e)]
+
+def run_tool_checks():
+    """Run the tool checks concurrently, reusing a cached result younger than the TTL"""
+    tools = {name: shutil.which(name) for name in ('gh', 'git', 'node')}
 
-def check_tools():
-    """Check if required tools are available"""
+    try:
+        with open(TOOL_CHECK_CACHE, 'r') as f:
+            cached = json.load(f)
+        if cached.get('tools') == tools and time.time() - cached.get('checked_at', 0) < TOOL_CHECK_TTL:
+            return cached['results']
+    except (OSError, json.JSONDecodeError):
+        pass
+
+    checks = {name: [path, '--version'] for name, path in tools.items() if path}
+    if tools['gh']:
+        checks['gh auth'] = [tools['gh'], 'auth', 'status']
+
+    with ThreadPoolExecutor(max_workers=max(1, len(checks))) as pool:
+        futures = {name: pool.submit(_run_check, cmd) for name, cmd in checks.items()}
+        results = {name: future.result() for name, future in futures.items()}
+
+    # A timed-out check is not cached, so the next run tries again
+    if all(ok is not None for ok, _ in results.values()):
+        try:
+            Path(TOOL_CHECK_CACHE).parent.mkdir(parents=True, exist_ok=True)
+            with open(TOOL_CHECK_CACHE, 'w') as f:
+                json.dump({'tools': tools, 'checked_at': time.time(), 'results': results}, f)
+        except OSError:
+            pass
+
+    return results
+
+def check_tools(results):
+    """Report the tool check results"""
     print_info("Checking for required tools...")
 
     # Check GitHub CLI
-    if shutil.which('gh'):
+    if 'gh' in results:
         print_status("GitHub CLI is available")
 
-        # Check if authenticated
-        try:
-            subprocess.run(['gh', 'auth', 'status'],
-                         capture_output=True, check=True)
+        auth_ok, auth_detail = results['gh auth']
+        if auth_ok:
             print_status("GitHub CLI is authenticated")
-        except subprocess.CalledProcessError:
+        elif auth_ok is None:
+            print_warning(f"Could not verify GitHub CLI authentication ({auth_detail[0]}). Run 'gh auth status' to check.")
+        else:
             print_warning("GitHub CLI is not authenticated. Run 'gh auth login' to authenticate.")
     else:
         print_warning("GitHub CLI (gh) is not installed. Please install it to use the helper scripts.")
         print_info("Install from: https://cli.github.com/")
 
+    if 'node' not in results:
+        print_warning("Node.js is not installed; pr-generator.js needs it to generate PR templates.")
+
+def report_generated_files():
+    """Summarise which generated files changed"""
+    changed = [(path, status) for path, status in generated_files if status != 'unchanged']
+    for path, status in changed:
+        print(f"   {status}: {path}")
+    print_info(f"{len(changed)} file(s) written, {len(generated_files) - len(changed)} unchanged")
+
 def main():
     """Main setup function"""
     print("🚀 Setting up Kiro to GitHub Integration...")
 
     try:
         check_prerequisites()
-        create_directory_structure()
-        create_kiro_integration_workflow()
-        create_auto_pr_workflow()
-        create_templates()
-        create_helper_scripts()
-        create_documentation()
-        check_tools()
+
+        # Tool checks (one of which is a network call) run while the files are generated
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            tool_checks = pool.submit(run_tool_checks)
+
+            create_directory_structure()
+            create_kiro_integration_workflow()
+            create_auto_pr_workflow()
+            create_templates()
+            create_helper_scripts()
+            install_sync_package()
+            create_documentation()
+            report_generated_files()
+
+            check_tools(tool_checks.result())
 
         print_status("Kiro GitHub Integration setup complete!")
 
@@ -1066,9 +1326,10 @@ def main():
         print("   - GitHub workflows for automation")
         print("   - Issue and PR templates")
         print("   - Helper scripts in scripts/")
+        print("   - kiro_sync workflow package in scripts/kiro_sync/")
         print("   - Integration documentation")
         print("\n🚀 Next steps:")
-        print("   1. Review your Kiro files in .kiro/specs/file-action-bar/")
+        print("   1. Review your Kiro files in .kiro/specs/")
         print("   2. Run: ./scripts/setup-kiro-feature.sh")
         print("   3. Start working on tasks using: ./scripts/create-task-branch.sh <task_number>")
         print("\n📖 For detailed instructions, see: kiro-github-integration.md")
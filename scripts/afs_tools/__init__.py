@@ -0,0 +1,8 @@
+"""
+Command-line tools for the AdvancedFileServer (AFS) backend API
+
+Standard library only. Operations are looked up in the server's OpenAPI
+document (project_docs/afs-srv/api-docs.json) and sent over a shared
+asyncio keep-alive pool. Run a tool with `PYTHONPATH=scripts python3 -m
+afs_tools.<tool>` from the repository root.
+"""
@@ -0,0 +1,331 @@
+"""
+Parallel bulk upload of a local tree to the AFS server
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m afs_tools.bulkupload ./archive --to /projects/archive \\
+        --username internal1 --password password123 --jobs 16
+    PYTHONPATH=scripts python3 -m afs_tools.bulkupload ./archive --to /projects/archive ... \\
+        --skip-existing --failed-list failed.tsv
+
+Each file is sent to /files/upload as a multipart POST like the SPA's
+FileOperationService.uploadFile() does, but over one pool of keep-alive
+connections with --jobs uploads in flight. Files are streamed from disk with
+a Content-Length, so memory use does not grow with file size, and small files
+go first so most of the tree lands early while large files finish in the
+background. Remote directories are created before their files.
+
+Failures are grouped into the categories the SPA's getUploadErrorMessage()
+distinguishes (413 too large, 403 permission denied, 409 already exists, ...).
+Network errors and transient 5xx responses are retried; --failed-list writes
+every failure for a later run.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import posixpath
+import sys
+import time
+from collections import Counter
+from typing import NamedTuple
+
+from .http import HttpError, HttpPool
+from .openapi import DEFAULT_SPEC, load_api
+from .progress import Progress, format_bytes, format_duration
+from .session import AfsSession, multipart_fields
+
+READ_SIZE = 256 * 1024
+# Files up to this size are read whole and sent in one write
+SMALL_FILE = 256 * 1024
+RETRY_STATUSES = (500, 502, 503, 504)
+
+# Status -> (category, message), as getUploadErrorMessage() in file-operation.service.ts
+UPLOAD_ERRORS = {
+    413: ('too-large', 'File is too large to upload'),
+    415: ('unsupported-type', 'File type is not supported'),
+    403: ('forbidden', 'Permission denied: Cannot upload to this location'),
+    507: ('insufficient-storage', 'Insufficient storage space'),
+    409: ('exists', 'A file with this name already exists'),
+}
+SERVER_ERROR = ('server-error', 'Upload failed due to server error')
+NETWORK_ERROR = ('network', 'Upload failed due to network error')
+CANCELLED = ('cancelled', 'Upload cancelled by user')
+UNKNOWN_ERROR = ('unknown', 'Upload failed due to unknown error')
+
+
+class SourceChanged(Exception):
+    """A file got shorter between the scan and its upload"""
+
+
+class LocalFile(NamedTuple):
+    path: str  # on disk
+    relative: str  # posix path below the source directory
+    size: int
+
+
+class Outcome(NamedTuple):
+    file: LocalFile
+    category: str  # 'uploaded', 'skipped' or an error category
+    message: str
+
+
+def upload_error(status, body=b''):
+    """(category, message) for an upload that failed with status"""
+    if status in UPLOAD_ERRORS:
+        return UPLOAD_ERRORS[status]
+    try:
+        message = (json.loads(body) or {}).get('message') if body else None
+    except (ValueError, AttributeError):
+        message = None
+    return SERVER_ERROR[0], message or SERVER_ERROR[1]
+
+
+def scan(source, excludes=()):
+    """Every regular file below source as LocalFile records, smallest first"""
+    files = []
+    if os.path.isfile(source):
+        return [LocalFile(source, os.path.basename(source), os.path.getsize(source))]
+    pending = [source]
+    while pending:
+        directory = pending.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                relative = os.path.relpath(entry.path, source).replace(os.sep, '/')
+                if any(fnmatch.fnmatch(entry.name, pattern) or fnmatch.fnmatch(relative, pattern)
+                       for pattern in excludes):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    files.append(LocalFile(entry.path, relative, entry.stat().st_size))
+    files.sort(key=lambda f: (f.size, f.relative))
+    return files
+
+
+class BulkUploader:
+    def __init__(self, session, target, jobs=8, retries=2, skip_existing=False):
+        self.session = session
+        self.target = target.rstrip('/') or '/'
+        self.jobs = jobs
+        self.retries = retries
+        self.skip_existing = skip_existing
+        self.progress = None
+
+    def remote_directory(self, file):
+        return posixpath.normpath(posixpath.join(self.target, posixpath.dirname(file.relative)))
+
+    async def create_directories(self, files):
+        """Create the remote directories for files, parents before children; returns {path: error}"""
+        wanted = set()
+        for file in files:
+            directory = self.remote_directory(file)
+            while directory not in wanted and directory != '/':
+                wanted.add(directory)
+                directory = posixpath.dirname(directory)
+        failures = {}
+        slots = asyncio.Semaphore(self.jobs)
+
+        async def create(path):
+            if posixpath.dirname(path) in failures:
+                failures[path] = failures[posixpath.dirname(path)]
+                return
+            async with slots:
+                try:
+                    response = await self.session.call('createDirectory', path=path)
+                except (OSError, asyncio.TimeoutError) as e:
+                    failures[path] = f'{NETWORK_ERROR[1]} ({e})'
+                    return
+            # 409: it exists already, which is what we want
+            if not response.ok and response.status != 409:
+                failures[path] = upload_error(response.status, response.body)[1]
+
+        for depth in sorted({path.count('/') for path in wanted}):
+            await asyncio.gather(*(create(path) for path in sorted(wanted) if path.count('/') == depth))
+        return failures
+
+    async def _body(self, file, head, tail, counted):
+        yield head
+        with open(file.path, 'rb') as f:
+            remaining = file.size
+            while remaining:
+                chunk = await asyncio.to_thread(f.read, min(READ_SIZE, remaining))
+                if not chunk:
+                    raise SourceChanged(f'{file.relative} shrank while it was uploaded')
+                remaining -= len(chunk)
+                counted[0] += len(chunk)
+                self.progress.transferred += len(chunk)
+                yield chunk
+        yield tail
+
+    async def _send(self, file, directory):
+        head, tail, content_type = multipart_fields({'path': directory}, 'file', os.path.basename(file.path))
+        if file.size <= SMALL_FILE:
+            with open(file.path, 'rb') as f:
+                data = f.read()
+            response = await self.session.call('upload', body=head + data + tail,
+                                               headers={'Content-Type': content_type}, path=directory)
+            self.progress.transferred += len(data)
+            return response
+
+        counted = [0]
+        headers = {'Content-Type': content_type, 'Content-Length': str(len(head) + file.size + len(tail))}
+        try:
+            response = await self.session.call('upload', body=self._body(file, head, tail, counted),
+                                               headers=headers, path=directory)
+            if response.status == 401:
+                # A streamed body cannot be replayed by the session, so refresh and resend here
+                self.progress.transferred -= counted[0]
+                counted[0] = 0
+                await self.session.refresh()
+                response = await self.session.call('upload', body=self._body(file, head, tail, counted),
+                                                   headers=headers, path=directory)
+        except BaseException:
+            self.progress.transferred -= counted[0]
+            raise
+        return response
+
+    async def upload(self, file, failed_directories):
+        directory = self.remote_directory(file)
+        if directory in failed_directories:
+            return Outcome(file, 'directory', failed_directories[directory])
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._send(file, directory)
+            except (SourceChanged, FileNotFoundError, PermissionError, IsADirectoryError) as e:
+                return Outcome(file, UNKNOWN_ERROR[0], str(e) or UNKNOWN_ERROR[1])
+            except (OSError, asyncio.TimeoutError, HttpError) as e:
+                if attempt < self.retries:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                    continue
+                return Outcome(file, NETWORK_ERROR[0], f'{NETWORK_ERROR[1]} ({e})')
+            if response.ok:
+                return Outcome(file, 'uploaded', '')
+            if response.status == 409 and self.skip_existing:
+                return Outcome(file, 'skipped', UPLOAD_ERRORS[409][1])
+            if response.status in RETRY_STATUSES and attempt < self.retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+            return Outcome(file, *upload_error(response.status, response.body))
+
+    async def run(self, files, report_every=1.0):
+        self.progress = Progress(len(files), sum(file.size for file in files))
+        failed_directories = await self.create_directories(files)
+        queue = asyncio.Queue()
+        for file in files:
+            queue.put_nowait(file)
+        outcomes = []
+
+        async def worker():
+            while not queue.empty():
+                file = queue.get_nowait()
+                outcome = await self.upload(file, failed_directories)
+                outcomes.append(outcome)
+                if outcome.category in ('uploaded', 'skipped'):
+                    self.progress.done += 1
+                else:
+                    self.progress.failed += 1
+
+        reporter = asyncio.ensure_future(self.progress.report(report_every))
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.jobs)]
+        try:
+            await asyncio.gather(*workers)
+        except asyncio.CancelledError:
+            # Ctrl-C: report what finished and count the rest as cancelled
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            reporter.cancel()
+        finished = {outcome.file for outcome in outcomes}
+        outcomes.extend(Outcome(file, *CANCELLED) for file in files if file not in finished)
+        self.progress.print(final=True)
+        return outcomes
+
+
+def print_summary(outcomes, elapsed):
+    counts = Counter(outcome.category for outcome in outcomes)
+    sizes = Counter()
+    for outcome in outcomes:
+        sizes[outcome.category] += outcome.file.size
+    uploaded = sizes['uploaded']
+    print(f"\nUploaded {counts['uploaded']} files ({format_bytes(uploaded)}) in {format_duration(elapsed)}, "
+          f"{format_bytes(uploaded / elapsed if elapsed else 0)}/s")
+    for category, count in counts.most_common():
+        if category != 'uploaded':
+            print(f"  {category:<22}{count:>8} files  {format_bytes(sizes[category])}")
+    failures = [outcome for outcome in outcomes if outcome.category not in ('uploaded', 'skipped')]
+    for outcome in failures[:20]:
+        print(f"  ❌ {outcome.file.relative}: {outcome.message}")
+    if len(failures) > 20:
+        print(f"  ... and {len(failures) - 20} more")
+
+
+def write_failed(path, outcomes):
+    with open(path, 'w') as f:
+        for outcome in outcomes:
+            if outcome.category not in ('uploaded', 'skipped'):
+                f.write(f'{outcome.file.relative}\t{outcome.category}\t{outcome.message}\n')
+
+
+async def run_upload(args, api, files):
+    pool = HttpPool(args.base_url or api.base_url, limit=args.connections or args.jobs, timeout=args.timeout)
+    session = AfsSession(pool, api, token=args.token)
+    try:
+        if not args.token:
+            await session.login(args.username, args.password, args.otp)
+        uploader = BulkUploader(session, args.to, args.jobs, args.retries, args.skip_existing)
+        return await uploader.run(files)
+    finally:
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upload a local directory tree to the AFS server in parallel')
+    parser.add_argument('source', help='Local directory (or single file) to upload')
+    parser.add_argument('--to', default='/', help='Remote directory to upload into')
+    parser.add_argument('--spec', default=DEFAULT_SPEC, help='OpenAPI document of the server')
+    parser.add_argument('--base-url', help="Server URL, defaults to the spec's first server")
+    parser.add_argument('--username', default='internal1')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--otp', help='One-time code for users that need one')
+    parser.add_argument('--token', help='Use this bearer token instead of logging in')
+    parser.add_argument('--jobs', type=int, default=8, help='Uploads in flight')
+    parser.add_argument('--connections', type=int, help='Keep-alive connections (default: --jobs)')
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds without progress before a request fails')
+    parser.add_argument('--retries', type=int, default=2, help='Retries after network errors and transient 5xx')
+    parser.add_argument('--exclude', action='append', default=[], help='Glob of names or paths to leave out')
+    parser.add_argument('--skip-existing', action='store_true', help='Count 409 (already exists) as skipped')
+    parser.add_argument('--failed-list', help='Write failed files as path<TAB>category<TAB>message')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be uploaded and stop')
+    args = parser.parse_args()
+
+    try:
+        files = scan(args.source, args.exclude)
+    except OSError as e:
+        print(f"❌ {e}")
+        return 2
+    total = sum(file.size for file in files)
+    print(f"{len(files)} files ({format_bytes(total)}) from {args.source} to {args.to}, {args.jobs} in parallel")
+    if args.dry_run:
+        for file in files:
+            print(f"  {file.size:>12}  {file.relative}")
+        return 0
+
+    api = load_api(args.spec)
+    started = time.monotonic()
+    try:
+        outcomes = asyncio.run(run_upload(args, api, files))
+    except (HttpError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_summary(outcomes, time.monotonic() - started)
+    if args.failed_list:
+        write_failed(args.failed_list, outcomes)
+    return 0 if all(outcome.category in ('uploaded', 'skipped') for outcome in outcomes) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+HDR-style latency histograms
+
+Histogram keeps counts in log-linear buckets the way HdrHistogram does:
+values are recorded in microseconds with three significant digits, so
+percentiles stay accurate from microseconds to minutes in a few kilobytes,
+and histograms from several runs or workers can be added together.
+to_dict()/from_dict() round-trip through JSON for comparing runs, and
+percentile_distribution() writes the .hgrm text format that HdrHistogram's
+plotter and most tooling around it read.
+"""
+
+import math
+
+SIGNIFICANT_DIGITS = 3
+# Seconds to recorded units (microseconds)
+UNITS_PER_SECOND = 1_000_000
+
+
+class Histogram:
+    def __init__(self, significant_digits=SIGNIFICANT_DIGITS):
+        self.significant_digits = significant_digits
+        self.sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self.sub_bucket_count = 1 << self.sub_bucket_bits
+        self.half_count = self.sub_bucket_count // 2
+        self.counts = {}
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    def index(self, value):
+        if value < self.sub_bucket_count:
+            return value
+        exponent = value.bit_length() - self.sub_bucket_bits
+        return self.sub_bucket_count + (exponent - 1) * self.half_count + (value >> exponent) - self.half_count
+
+    def highest_equivalent(self, index):
+        """Largest value that lands in the bucket at index"""
+        if index < self.sub_bucket_count:
+            return index
+        exponent, offset = divmod(index - self.sub_bucket_count, self.half_count)
+        exponent += 1
+        return ((offset + self.half_count) << exponent) + (1 << exponent) - 1
+
+    def record(self, seconds, count=1):
+        value = max(0, int(seconds * UNITS_PER_SECOND))
+        index = self.index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.total += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def add(self, other):
+        """Merge another histogram with the same precision into this one"""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, percentile):
+        """Value at percentile (0-100) in seconds"""
+        if not self.total:
+            return 0.0
+        wanted = max(1, math.ceil(percentile / 100 * self.total))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= wanted:
+                return min(self.highest_equivalent(index), self.max) / UNITS_PER_SECOND
+        return self.max / UNITS_PER_SECOND
+
+    @property
+    def mean(self):
+        return self.sum / self.total / UNITS_PER_SECOND if self.total else 0.0
+
+    def stddev(self):
+        if not self.total:
+            return 0.0
+        mean = self.sum / self.total
+        variance = sum(
+            count * (self.highest_equivalent(index) - mean) ** 2 for index, count in self.counts.items()
+        ) / self.total
+        return math.sqrt(variance) / UNITS_PER_SECOND
+
+    def to_dict(self):
+        return {
+            'significant_digits': self.significant_digits,
+            'unit': 'us',
+            'total': self.total,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'counts': {str(index): count for index, count in sorted(self.counts.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data.get('significant_digits', SIGNIFICANT_DIGITS))
+        histogram.counts = {int(index): count for index, count in data['counts'].items()}
+        histogram.total = data['total']
+        histogram.sum = data['sum']
+        histogram.min = data['min']
+        histogram.max = data['max']
+        return histogram
+
+    def percentile_distribution(self, ticks_per_half_distance=5, scale=1000):
+        """The .hgrm percentile distribution; scale=1000 reports milliseconds"""
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", '']
+        if self.total:
+            percentile = 0.0
+            while True:
+                value = self.percentile(percentile) * scale
+                count = min(self.total, max(1, math.ceil(percentile / 100 * self.total)))
+                if percentile >= 100:
+                    lines.append(f'{value:12.3f} {1:14.12f} {self.total:10d}')
+                    break
+                lines.append(f'{value:12.3f} {percentile / 100:14.12f} {count:10d} {1 / (1 - percentile / 100):14.2f}')
+                if value >= self.max / UNITS_PER_SECOND * scale:
+                    percentile = 100.0
+                    continue
+                half_distance = 2 ** (math.floor(math.log2(100 / (100 - percentile))) + 1)
+                percentile += 100 / (half_distance * ticks_per_half_distance)
+
+        buckets = max(1, (self.index(self.max) - self.sub_bucket_count) // self.half_count + 2)
+        lines.append(f'#[Mean    = {self.mean * scale:12.3f}, StdDeviation   = {self.stddev() * scale:12.3f}]')
+        lines.append(f'#[Max     = {self.max / UNITS_PER_SECOND * scale:12.3f}, Total count    = {self.total:12d}]')
+        lines.append(f'#[Buckets = {buckets:12d}, SubBuckets     = {self.sub_bucket_count:12d}]')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,285 @@
+"""
+Minimal asyncio HTTP/1.1 client for the AFS API tools
+
+Connections are kept alive and pooled, up to a limit shared by every task
+using the pool, so thousands of virtual users or transfer workers share a
+bounded number of sockets. TCP_NODELAY is set on every connection so small
+requests are not held back by Nagle's algorithm. Bodies can be bytes or an
+async iterator of chunks (sent chunked), and responses can be read whole or
+streamed chunk by chunk for downloads.
+"""
+
+import asyncio
+import json
+import socket
+import ssl
+from contextlib import asynccontextmanager
+from urllib.parse import quote, urlencode, urlsplit
+
+DEFAULT_TIMEOUT = 30
+CHUNK_SIZE = 64 * 1024
+
+
+class HttpError(Exception):
+    """Raised for responses with an error status when the caller asked for one to be raised"""
+
+    def __init__(self, status, message, body=b''):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+        self.body = body
+
+
+class Response:
+    """A response whose body has been read"""
+
+    __slots__ = ('status', 'reason', 'headers', 'body')
+
+    def __init__(self, status, reason, headers, body):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HttpError(self.status, self.reason, self.body)
+        return self
+
+
+class StreamResponse:
+    """A response whose body is read incrementally with iter_chunks() or read()"""
+
+    def __init__(self, status, reason, headers, reader, length, chunked):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._reader = reader
+        self._remaining = length
+        self._chunked = chunked
+        self.complete = length == 0
+        self.received = 0
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    async def iter_chunks(self, size=CHUNK_SIZE):
+        if self._chunked:
+            while True:
+                line = await self._reader.readline()
+                chunk_length = int(line.split(b';', 1)[0].strip() or b'0', 16)
+                if chunk_length == 0:
+                    # Trailer headers end with a blank line
+                    while (await self._reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                remaining = chunk_length
+                while remaining:
+                    data = await self._reader.read(min(size, remaining))
+                    if not data:
+                        raise ConnectionResetError('Connection closed inside a chunk')
+                    remaining -= len(data)
+                    self.received += len(data)
+                    yield data
+                await self._reader.readexactly(2)
+        elif self._remaining is None:
+            # No length: the body runs until the server closes the connection
+            while True:
+                data = await self._reader.read(size)
+                if not data:
+                    break
+                self.received += len(data)
+                yield data
+        else:
+            while self._remaining:
+                data = await self._reader.read(min(size, self._remaining))
+                if not data:
+                    raise ConnectionResetError(f'Connection closed with {self._remaining} bytes left')
+                self._remaining -= len(data)
+                self.received += len(data)
+                yield data
+        self.complete = True
+
+    async def read(self):
+        return b''.join([chunk async for chunk in self.iter_chunks()])
+
+
+async def _iterate(body):
+    if hasattr(body, '__aiter__'):
+        async for chunk in body:
+            yield chunk
+    else:
+        for chunk in body:
+            yield chunk
+
+
+class HttpPool:
+    """Keep-alive connection pool for one server
+
+    limit caps the number of open connections; tasks wait for a free one.
+    """
+
+    def __init__(self, base_url, limit=64, timeout=DEFAULT_TIMEOUT, headers=None):
+        parts = urlsplit(base_url.rstrip('/'))
+        self.base_url = base_url.rstrip('/')
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.prefix = parts.path
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self._ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        self._host_header = parts.netloc
+        self._limit = limit
+        self._slots = None
+        self._idle = []
+
+    def url(self, path, params=None):
+        """Request target for path (relative to the base URL) and query parameters"""
+        target = self.prefix + quote(path, safe="/:@!$'()*+,;=-._~")
+        if params:
+            target += '?' + urlencode({key: value for key, value in params.items() if value is not None})
+        return target
+
+    async def _connect(self):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=self._ssl, limit=CHUNK_SIZE * 4),
+            self.timeout
+        )
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return reader, writer
+
+    async def _acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._limit)
+        await self._slots.acquire()
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        try:
+            return (*await self._connect(), False)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, connection, reusable):
+        reader, writer = connection
+        if reusable and not writer.is_closing():
+            self._idle.append(connection)
+        else:
+            writer.close()
+        self._slots.release()
+
+    async def _send(self, writer, method, target, headers, body):
+        lines = [f'{method} {target} HTTP/1.1', f'Host: {self._host_header}']
+        merged = {'Accept': '*/*', **self.headers, **(headers or {})}
+        streaming = body is not None and not isinstance(body, (bytes, bytearray, memoryview))
+        if body is None:
+            if method in ('POST', 'PUT', 'PATCH'):
+                merged.setdefault('Content-Length', '0')
+        elif streaming:
+            if 'Content-Length' not in merged:
+                merged['Transfer-Encoding'] = 'chunked'
+        else:
+            merged['Content-Length'] = str(len(body))
+        lines.extend(f'{key}: {value}' for key, value in merged.items())
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        if not streaming:
+            # Head and body in one write, so the request leaves in as few segments as possible
+            writer.write(head + bytes(body or b''))
+        else:
+            writer.write(head)
+            chunked = 'Transfer-Encoding' in merged
+            async for chunk in _iterate(body):
+                if not chunk:
+                    continue
+                writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+                await asyncio.wait_for(writer.drain(), self.timeout)
+            if chunked:
+                writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def _read_head(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Connection closed before a response')
+        _, status, *reason = status_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        return int(status), (reason[0] if reason else ''), headers
+
+    @asynccontextmanager
+    async def open(self, method, path, params=None, headers=None, body=None):
+        """Send a request and yield a StreamResponse; the connection is reused if the body was consumed
+
+        A request on a reused keep-alive connection that the server had
+        already closed is retried once on a new connection, when its body
+        can be sent again. The timeout applies to the whole send of a bytes
+        body but to each chunk of a streamed one, so large uploads can take
+        as long as they need while a stalled connection still fails.
+        """
+        target = self.url(path, params)
+        replayable = body is None or isinstance(body, (bytes, bytearray, memoryview))
+        for attempt in range(2):
+            reader, writer, reused = await self._acquire()
+            try:
+                sending = self._send(writer, method, target, headers, body)
+                await (asyncio.wait_for(sending, self.timeout) if replayable else sending)
+                status, reason, response_headers = await asyncio.wait_for(self._read_head(reader), self.timeout)
+                break
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                self._release((reader, writer), False)
+                if reused and replayable and attempt == 0:
+                    continue
+                raise ConnectionResetError(f'{method} {target}: {e}') from e
+            except BaseException:
+                self._release((reader, writer), False)
+                raise
+
+        chunked = 'chunked' in response_headers.get('transfer-encoding', '').lower()
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            length = 0
+        elif chunked:
+            length = None
+        elif 'content-length' in response_headers:
+            length = int(response_headers['content-length'])
+        else:
+            length = None
+        keep_alive = response_headers.get('connection', '').lower() != 'close' and (length is not None or chunked)
+
+        response = StreamResponse(status, reason, response_headers, reader, length, chunked)
+        try:
+            yield response
+        finally:
+            self._release((reader, writer), keep_alive and response.complete)
+
+    async def request(self, method, path, params=None, headers=None, body=None, json_body=None):
+        """Send a request and return a Response with the whole body read"""
+        if json_body is not None:
+            body = json.dumps(json_body).encode('utf-8')
+            headers = {'Content-Type': 'application/json', **(headers or {})}
+        async with self.open(method, path, params, headers, body) as response:
+            data = await asyncio.wait_for(response.read(), self.timeout)
+        return Response(response.status, response.reason, response.headers, data)
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
@@ -0,0 +1,440 @@
+"""
+Local SQLite index of the AFS server's filesystem
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m afs_tools.index crawl / --username internal1 --password password123
+    PYTHONPATH=scripts python3 -m afs_tools.index find '*.pdf' --under /projects --min-size 100MB
+    PYTHONPATH=scripts python3 -m afs_tools.index find --text budget --newer 2024-01-01 --sort size
+    PYTHONPATH=scripts python3 -m afs_tools.index ls /projects
+    PYTHONPATH=scripts python3 -m afs_tools.index stats
+
+crawl walks /api/filesystem/list from a directory with --jobs listings in
+flight (the root's own row comes from /api/filesystem/metadata) and stores
+path, size, mtime, owner, group, permissions and MIME type per entry in
+afs-index.sqlite. Names are also indexed in an FTS5 table with the trigram
+tokenizer, so name globs and substring searches use the index instead of
+scanning every row; '*.ext' patterns go through an (extension, size) index.
+
+Later crawls are incremental. A directory whose mtime equals the one stored
+from the last crawl is not listed again; only its subdirectories' metadata
+is fetched, so an unchanged tree costs one small request per directory
+instead of its full listings. With --prune the subtree below an unchanged
+directory is skipped outright, which is only safe on servers that bump a
+directory's mtime when anything beneath it changes. A directory's mtime
+moves when entries are added, removed or renamed in it, not when a file
+inside is rewritten, so run `crawl --full` now and then to pick up size and
+mtime changes of existing files.
+"""
+
+import argparse
+import asyncio
+import os
+import posixpath
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+
+from .http import HttpError, HttpPool
+from .openapi import DEFAULT_SPEC, load_api
+from .progress import format_bytes, format_duration
+from .session import AfsSession, parse_timestamp
+
+DEFAULT_DATABASE = 'afs-index.sqlite'
+COMMIT_EVERY = 2.0  # seconds between commits during a crawl
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    directory INTEGER NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    "group" TEXT,
+    permissions TEXT,
+    mime_type TEXT,
+    extension TEXT NOT NULL DEFAULT '',  -- lower-cased, so '*.pdf over 100 MB' is one index range
+    crawled INTEGER  -- when a directory's listing was stored; NULL until it is
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent);
+CREATE INDEX IF NOT EXISTS entries_size ON entries(size);
+CREATE INDEX IF NOT EXISTS entries_mtime ON entries(mtime);
+CREATE INDEX IF NOT EXISTS entries_extension ON entries(extension, size);
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(
+    name, content='entries', content_rowid='rowid', tokenize='trigram'
+);
+-- Inserts reach names in bulk from Crawler.upsert, which is several times faster
+-- than a trigger per row; a path's name never changes, so updates need nothing
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO names(names, rowid, name) VALUES ('delete', old.rowid, old.name);
+END;
+'''
+
+COLUMNS = 'path, parent, name, directory, size, mtime, owner, "group", permissions, mime_type, extension'
+
+UPSERT = f'''
+INSERT INTO entries ({COLUMNS})
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(path) DO UPDATE SET
+    directory = excluded.directory, size = excluded.size, owner = excluded.owner, "group" = excluded."group",
+    permissions = excluded.permissions, mime_type = excluded.mime_type, extension = excluded.extension,
+    -- A directory whose mtime moved has to be listed again
+    crawled = CASE WHEN entries.mtime = excluded.mtime THEN entries.crawled ELSE NULL END,
+    mtime = excluded.mtime
+'''
+
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def connect(database):
+    connection = sqlite3.connect(database)
+    connection.row_factory = sqlite3.Row
+    connection.execute('PRAGMA journal_mode=WAL')
+    connection.execute('PRAGMA synchronous=NORMAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def subtree_bounds(path):
+    """(low, high) such that low <= p < high selects every path strictly below path"""
+    prefix = path.rstrip('/') + '/'
+    return prefix, prefix[:-1] + '0'  # '0' sorts right after '/'
+
+
+def parse_size(text):
+    match = re.fullmatch(r'\s*([\d.]+)\s*([KMGT]?)i?B?\s*', text.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f'not a size: {text}')
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def parse_date(text):
+    moment = datetime.fromisoformat(text)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def entry_row(entry, parent):
+    """UPSERT parameters for one listing entry (FileInfoResponse fields)"""
+    name = entry.get('name') or posixpath.basename(entry.get('path', '').rstrip('/'))
+    path = entry.get('path') or posixpath.join(parent, name)
+    directory = bool(entry.get('directory') or entry.get('type') == 'directory')
+    return (path, parent, name, int(directory), int(entry.get('size') or 0),
+            parse_timestamp(entry.get('modifiedAt') or entry.get('lastModified')),
+            entry.get('owner'), entry.get('group'), entry.get('permissions'), entry.get('mimeType'),
+            '' if directory else posixpath.splitext(name)[1][1:].lower())
+
+
+def listing_entries(data):
+    """Entries of a /api/filesystem/list body, which the spec leaves untyped"""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for key in ('entries', 'files', 'children', 'items'):
+            if isinstance(data.get(key), list):
+                return data[key]
+    return []
+
+
+class Crawler:
+    def __init__(self, session, connection, jobs=8, full=False, prune=False):
+        self.session = session
+        self.db = connection
+        self.jobs = jobs
+        self.full = full
+        self.prune = prune
+        self.listed = 0
+        self.checked = 0
+        self.skipped = 0
+        self.entries = 0
+        self.errors = []
+        self.last_commit = time.monotonic()
+
+    def stored(self, path):
+        return self.db.execute('SELECT mtime, crawled FROM entries WHERE path = ?', (path,)).fetchone()
+
+    def unchanged(self, path, mtime):
+        row = self.stored(path)
+        return not self.full and row is not None and row['crawled'] is not None and row['mtime'] == mtime
+
+    def delete_subtree(self, path):
+        low, high = subtree_bounds(path)
+        self.db.execute('DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)', (path, low, high))
+
+    def upsert(self, rows):
+        """Store rows and add the names of new ones to the full-text index"""
+        last = self.db.execute('SELECT max(rowid) FROM entries').fetchone()[0] or 0
+        self.db.executemany(UPSERT, rows)
+        # New rows get rowids above the previous maximum; updated ones keep theirs
+        self.db.execute('INSERT INTO names(rowid, name) SELECT rowid, name FROM entries WHERE rowid > ?', (last,))
+
+    def stored_directories(self, directory):
+        return [path for (path,) in self.db.execute(
+            'SELECT path FROM entries WHERE parent = ? AND directory = 1', (directory,)).fetchall()]
+
+    async def check(self, directory, root=False):
+        """Compare a directory's mtime from /api/filesystem/metadata with the index; returns whether to list it"""
+        response = await self.session.call('getMetadata', path=directory)
+        self.checked += 1
+        if response.status == 404 and not root:
+            self.delete_subtree(directory)
+            return False
+        if not response.ok:
+            raise HttpError(response.status, f'metadata of {directory}', response.body)
+        row = entry_row(response.json() or {}, posixpath.dirname(directory) if directory != '/' else '')
+        row = (directory,) + row[1:3] + (1,) + row[4:]
+        if self.unchanged(directory, row[5]):
+            return False
+        self.upsert([row])
+        return True
+
+    def store_listing(self, directory, entries):
+        """Replace directory's children; returns (child directories to list, unchanged ones)"""
+        rows = [entry_row(entry, directory) for entry in entries]
+        stored = {row[0]: tuple(row) for row in self.db.execute(f'SELECT {COLUMNS} FROM entries WHERE parent = ?',
+                                                               (directory,))}
+        present = {row[0] for row in rows}
+        for path in stored:
+            if path not in present:
+                self.delete_subtree(path)
+        changed, unchanged = [], []
+        for row in rows:
+            if row[3]:
+                (unchanged if self.unchanged(row[0], row[5]) else changed).append(row[0])
+        # Only rows that differ from the index are written, so relisting a huge directory is cheap
+        self.upsert([row for row in rows if stored.get(row[0]) != row])
+        self.db.execute('UPDATE entries SET crawled = ? WHERE path = ?', (int(time.time()), directory))
+        self.entries += len(rows)
+        if time.monotonic() - self.last_commit >= COMMIT_EVERY:
+            self.db.commit()
+            self.last_commit = time.monotonic()
+        return changed, unchanged
+
+    async def run(self, root):
+        root = posixpath.normpath('/' + root.strip('/'))
+        # Items are (action, directory): 'list' fetches the listing, 'check' asks for the
+        # directory's metadata first and 'descend' goes on to the stored subdirectories
+        queue = asyncio.Queue()
+        queue.put_nowait(('list' if await self.check(root, root=True) else 'descend', root))
+
+        def descend(directory):
+            self.skipped += 1
+            if not self.prune:
+                for path in self.stored_directories(directory):
+                    queue.put_nowait(('check', path))
+
+        async def worker():
+            while True:
+                action, directory = await queue.get()
+                try:
+                    if action == 'check':
+                        action = 'list' if await self.check(directory) else 'descend'
+                    if action == 'descend':
+                        descend(directory)
+                        continue
+                    response = await self.session.call('listDirectory_1', directory=directory)
+                    if not response.ok:
+                        self.errors.append((directory, f'HTTP {response.status}'))
+                        continue
+                    self.listed += 1
+                    changed, unchanged = self.store_listing(directory, listing_entries(response.json()))
+                    for path in changed:
+                        queue.put_nowait(('list', path))
+                    for path in unchanged:
+                        descend(path)
+                except (HttpError, OSError, asyncio.TimeoutError, ValueError) as e:
+                    self.errors.append((directory, str(e)))
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.jobs)]
+        try:
+            await queue.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            self.db.commit()
+
+
+async def run_crawl(args, api, connection):
+    pool = HttpPool(args.base_url or api.base_url, limit=args.jobs, timeout=args.timeout)
+    session = AfsSession(pool, api, token=args.token)
+    try:
+        if not args.token:
+            await session.login(args.username, args.password, args.otp)
+        crawler = Crawler(session, connection, args.jobs, args.full, args.prune)
+        await crawler.run(args.root)
+        return crawler
+    finally:
+        await pool.close()
+
+
+def find(connection, pattern=None, text=None, under='/', min_size=None, max_size=None, newer=None, older=None,
+         owner=None, group=None, kind=None, ignore_case=False, sort='path', limit=100):
+    """Rows of entries matching every given filter"""
+    clauses, params = [], []
+    matches, match_params = [], []
+    extension = re.fullmatch(r'\*\.([^*?\[\]/.]+)', pattern or '')
+    if extension:
+        clauses.append('extension = ?')
+        params.append(extension.group(1).lower())
+        if not ignore_case:
+            clauses.append('name GLOB ?')
+            params.append(pattern)
+    elif pattern and ignore_case:
+        # The trigram tokenizer makes LIKE case-insensitive; * and ? map to % and _
+        matches.append('name LIKE ?')
+        match_params.append(pattern.replace('*', '%').replace('?', '_'))
+    elif pattern:
+        matches.append('name GLOB ?')
+        match_params.append(pattern)
+    if text:
+        matches.append('names MATCH ?')
+        match_params.append('"%s"' % text.replace('"', '""'))
+    if matches:
+        # As a subquery the name index drives the search; in a join the planner may
+        # probe it once per row of the path range instead
+        clauses.append(f"rowid IN (SELECT rowid FROM names WHERE {' AND '.join(matches)})")
+        params += match_params
+    if under and under != '/':
+        low, high = subtree_bounds(under)
+        clauses.append('path >= ? AND path < ?')
+        params += [low, high]
+    for column, operator, value in (('size', '>=', min_size), ('size', '<=', max_size),
+                                    ('mtime', '>=', newer), ('mtime', '<', older),
+                                    ('owner', '=', owner), ('"group"', '=', group)):
+        if value is not None:
+            clauses.append(f'{column} {operator} ?')
+            params.append(value)
+    if kind:
+        clauses.append('directory = ?')
+        params.append(int(kind == 'd'))
+    order = {'path': 'path', 'size': 'size DESC', 'mtime': 'mtime DESC', 'name': 'name'}[sort]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    query = f'SELECT * FROM entries {where} ORDER BY {order} LIMIT ?'
+    return connection.execute(query, params + [limit]).fetchall()
+
+
+def print_rows(rows, long=True):
+    for row in rows:
+        if not long:
+            print(row['path'])
+            continue
+        modified = time.strftime('%Y-%m-%d %H:%M', time.gmtime(row['mtime']))
+        size = '-' if row['directory'] else format_bytes(row['size'])
+        print(f"{row['permissions'] or '':<10} {row['owner'] or '':<10} {row['group'] or '':<10} "
+              f"{size:>10}  {modified}  {row['path']}{'/' if row['directory'] else ''}")
+
+
+def command_crawl(args, connection):
+    api = load_api(args.spec)
+    started = time.monotonic()
+    try:
+        crawler = asyncio.run(run_crawl(args, api, connection))
+    except (HttpError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+    except KeyboardInterrupt:
+        connection.commit()
+        print("\nInterrupted; directories listed so far are stored and will be skipped next time")
+        return 130
+    total = connection.execute('SELECT count(*) FROM entries').fetchone()[0]
+    print(f"Listed {crawler.listed} directories ({crawler.entries} entries), {crawler.skipped} unchanged, in "
+          f"{format_duration(time.monotonic() - started)}; {total} entries indexed")
+    for directory, error in crawler.errors[:20]:
+        print(f"  ❌ {directory}: {error}")
+    return 1 if crawler.errors else 0
+
+
+def command_find(args, connection):
+    if args.pattern and not any(c in args.pattern for c in '*?['):
+        # A bare word finds names containing it, like the SPA's filter box
+        args.pattern = f'*{args.pattern}*'
+    started = time.perf_counter()
+    rows = find(connection, args.pattern, args.text, args.under, args.min_size, args.max_size,
+                args.newer, args.older, args.owner, args.group, args.type, args.ignore_case,
+                args.sort, args.limit)
+    elapsed = time.perf_counter() - started
+    print_rows(rows, not args.paths)
+    if not args.paths:
+        print(f"{len(rows)} entries in {elapsed * 1000:.1f} ms{' (limit reached)' if len(rows) == args.limit else ''}",
+              file=sys.stderr)
+    return 0 if rows else 1
+
+
+def command_ls(args, connection):
+    directory = posixpath.normpath('/' + args.directory.strip('/'))
+    rows = connection.execute(
+        'SELECT * FROM entries WHERE parent = ? ORDER BY directory DESC, name', (directory,)).fetchall()
+    print_rows(rows)
+    return 0 if rows else 1
+
+
+def command_stats(args, connection):
+    files, directories, size, crawled = connection.execute(
+        'SELECT sum(directory = 0), sum(directory = 1), sum(size), max(crawled) FROM entries').fetchone()
+    print(f"{files or 0} files, {directories or 0} directories, {format_bytes(size or 0)}")
+    if crawled:
+        print(f"Last crawl stored a listing at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(crawled))}")
+    print(f"Database {args.database}: {format_bytes(os.path.getsize(args.database))}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Index the AFS filesystem in SQLite and search it locally')
+    parser.add_argument('--database', default=DEFAULT_DATABASE, help='SQLite file of the index')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    crawl = commands.add_parser('crawl', help='Crawl the server into the index (incremental)')
+    crawl.add_argument('root', nargs='?', default='/', help='Directory to crawl from')
+    crawl.add_argument('--spec', default=DEFAULT_SPEC, help='OpenAPI document of the server')
+    crawl.add_argument('--base-url', help="Server URL, defaults to the spec's first server")
+    crawl.add_argument('--username', default='internal1')
+    crawl.add_argument('--password', default='password123')
+    crawl.add_argument('--otp', help='One-time code for users that need one')
+    crawl.add_argument('--token', help='Use this bearer token instead of logging in')
+    crawl.add_argument('--jobs', type=int, default=8, help='Directory listings in flight')
+    crawl.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds')
+    crawl.add_argument('--full', action='store_true', help='List every directory, even unchanged ones')
+    crawl.add_argument('--prune', action='store_true',
+                       help="Skip whole subtrees below unchanged directories (servers that propagate mtimes)")
+
+    query = commands.add_parser('find', help='Search the index')
+    query.add_argument('pattern', nargs='?', help="Name glob such as '*.pdf'; a bare word matches inside names")
+    query.add_argument('--text', help='Substring anywhere in the name (full-text index)')
+    query.add_argument('-i', '--ignore-case', action='store_true', help='Match the pattern case-insensitively')
+    query.add_argument('--under', default='/', help='Only below this directory')
+    query.add_argument('--min-size', type=parse_size, help='e.g. 100MB')
+    query.add_argument('--max-size', type=parse_size)
+    query.add_argument('--newer', type=parse_date, help='Modified at or after this ISO date')
+    query.add_argument('--older', type=parse_date, help='Modified before this ISO date')
+    query.add_argument('--owner')
+    query.add_argument('--group')
+    query.add_argument('--type', choices=('f', 'd'), help='f: files, d: directories')
+    query.add_argument('--sort', choices=('path', 'size', 'mtime', 'name'), default='path')
+    query.add_argument('--limit', type=int, default=100)
+    query.add_argument('--paths', action='store_true', help='Print paths only')
+
+    listing = commands.add_parser('ls', help='List a directory from the index')
+    listing.add_argument('directory', nargs='?', default='/')
+
+    commands.add_parser('stats', help='Summarize the index')
+    args = parser.parse_args()
+
+    if args.command != 'crawl' and not os.path.exists(args.database):
+        print(f"❌ No index at {args.database}; run the crawl command first")
+        return 2
+    connection = connect(args.database)
+    try:
+        handler = {'crawl': command_crawl, 'find': command_find, 'ls': command_ls, 'stats': command_stats}
+        return handler[args.command](args, connection)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
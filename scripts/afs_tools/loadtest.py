@@ -0,0 +1,419 @@
+"""
+Asyncio load generator for the AFS file API
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m afs_tools.loadtest --base-url http://localhost:8080/api \\
+        --username internal1 --password password123 --users 2000 --duration 60 \\
+        --scenario browse=3 --scenario browse-upload-rename=1 --output run.json --hdr-dir hgrm/
+    PYTHONPATH=scripts python3 -m afs_tools.loadtest ... --compare previous-run.json
+
+Operations come from project_docs/afs-srv/api-docs.json, so requests use the
+method, path and parameters the server documents. Each virtual user logs in,
+then repeats its scenario until the test ends, pausing --think-time between
+iterations; tokens are refreshed through /auth/refresh when the server's
+refresh window opens (or every --refresh-interval seconds). All users share
+one keep-alive pool of --connections sockets.
+
+Scenarios are the built-in names in SCENARIOS, weighted with name=weight, or
+`path/to/file.py:function` for an `async def function(user)` of your own
+that calls the VirtualUser helpers. The report lists per-operation
+throughput, errors and p50/p95/p99/max latency; --output saves the HDR
+histograms as JSON for --compare, and --hdr-dir writes one .hgrm
+percentile distribution per operation.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import posixpath
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .histogram import Histogram
+from .http import HttpError, HttpPool
+from .openapi import DEFAULT_SPEC, load_api
+from .session import AfsSession
+
+DEFAULT_SCENARIO = 'browse-upload-rename'
+DEFAULT_WORKDIR = '/loadtest'
+
+
+class Stats:
+    """Per-operation histograms, status counts and bytes for a whole run"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.statuses = {}
+        self.bytes = {}
+
+    def observe(self, operation_id, status, seconds, bytes_in=0, bytes_out=0):
+        histogram = self.histograms.get(operation_id)
+        if histogram is None:
+            histogram = self.histograms[operation_id] = Histogram()
+        histogram.record(seconds)
+        statuses = self.statuses.setdefault(operation_id, {})
+        statuses[status] = statuses.get(status, 0) + 1
+        self.bytes[operation_id] = self.bytes.get(operation_id, 0) + bytes_in + bytes_out
+
+    def errors(self, operation_id):
+        return sum(count for status, count in self.statuses.get(operation_id, {}).items()
+                   if status == 0 or status >= 400)
+
+    def rows(self, elapsed):
+        rows = []
+        for operation_id, histogram in sorted(self.histograms.items()):
+            rows.append({
+                'operation': operation_id,
+                'requests': histogram.total,
+                'errors': self.errors(operation_id),
+                'rps': histogram.total / elapsed if elapsed else 0.0,
+                'p50': histogram.percentile(50),
+                'p95': histogram.percentile(95),
+                'p99': histogram.percentile(99),
+                'max': histogram.max / 1_000_000,
+                'bytes': self.bytes.get(operation_id, 0)
+            })
+        return rows
+
+
+class VirtualUser:
+    """One simulated user; scenarios call these helpers
+
+    Failed calls are recorded by the session's observer and answered with
+    None or an empty listing, so a scenario carries on the way a user
+    clicking around would.
+    """
+
+    def __init__(self, number, session, rng, workdir, upload_size):
+        self.number = number
+        self.session = session
+        self.rng = rng
+        self.workdir = workdir
+        self.upload_size = upload_size
+        self.iteration = 0
+        self.known_files = []
+
+    async def list(self, path='/'):
+        response = await self.session.call('listDirectory', path=path)
+        if not response.ok:
+            return []
+        entries = (response.json() or {}).get('entries') or []
+        for entry in entries:
+            if not entry.get('directory'):
+                self.known_files.append(entry.get('path') or f"{path.rstrip('/')}/{entry.get('name')}")
+        del self.known_files[:-100]
+        return entries
+
+    async def info(self, path):
+        response = await self.session.call('getFileInfo', path=path)
+        return response.json() if response.ok else None
+
+    async def upload(self, directory, name, size=None):
+        data = os.urandom(self.upload_size if size is None else size)
+        response = await self.session.upload(directory, name, data)
+        return response.json() if response.ok else None
+
+    async def download(self, path):
+        """Stream a file and discard it; returns the number of bytes received"""
+        async with self.session.stream('download', tail=path) as response:
+            async for _ in response.iter_chunks():
+                pass
+            return response.received if response.ok else 0
+
+    async def rename(self, path, new_name):
+        return (await self.session.call('rename', path=path, newName=new_name)).ok
+
+    async def move(self, source, target):
+        return (await self.session.call('move', sourcePath=source, targetPath=target)).ok
+
+    async def delete(self, path):
+        return (await self.session.call('delete', path=path)).ok
+
+    async def refresh(self):
+        try:
+            await self.session.refresh()
+            return True
+        except HttpError:
+            return False
+
+    async def browse(self, depth=3):
+        """Walk down from the root through random subdirectories, then open one file's info"""
+        path = '/'
+        for _ in range(depth):
+            entries = await self.list(path)
+            directories = [entry for entry in entries if entry.get('directory')]
+            if not directories:
+                break
+            chosen = self.rng.choice(directories)
+            path = chosen.get('path') or f"{path.rstrip('/')}/{chosen.get('name')}"
+        if self.known_files:
+            await self.info(self.rng.choice(self.known_files))
+        return path
+
+
+async def scenario_browse(user):
+    await user.browse()
+
+
+async def scenario_browse_upload_rename(user):
+    """Browse, upload a file, rename it, then delete it so the workdir does not grow"""
+    await user.browse()
+    name = f'vu{user.number}-{user.iteration}.bin'
+    if await user.upload(user.workdir, name) is None:
+        return
+    path = f"{user.workdir.rstrip('/')}/{name}"
+    renamed = f'vu{user.number}-{user.iteration}-renamed.bin'
+    if await user.rename(path, renamed):
+        path = f"{user.workdir.rstrip('/')}/{renamed}"
+    await user.delete(path)
+
+
+async def scenario_download(user):
+    if not user.known_files:
+        await user.browse()
+    if user.known_files:
+        await user.download(user.rng.choice(user.known_files))
+
+
+async def scenario_refresh(user):
+    await user.list('/')
+    await user.refresh()
+
+
+SCENARIOS = {
+    'browse': scenario_browse,
+    'browse-upload-rename': scenario_browse_upload_rename,
+    'download': scenario_download,
+    'refresh': scenario_refresh
+}
+
+
+def load_scenario(spec):
+    """Resolve 'name', 'name=weight' or 'file.py:function[=weight]' to (function, weight)"""
+    name, _, weight = spec.partition('=')
+    weight = float(weight) if weight else 1.0
+    if name in SCENARIOS:
+        return SCENARIOS[name], weight
+    if ':' not in name:
+        raise ValueError(f"Unknown scenario '{name}'; built-in: {', '.join(SCENARIOS)}")
+
+    file_name, function_name = name.rsplit(':', 1)
+    module_spec = importlib.util.spec_from_file_location(Path(file_name).stem, file_name)
+    module = importlib.util.module_from_spec(module_spec)
+    module_spec.loader.exec_module(module)
+    return getattr(module, function_name), weight
+
+
+def credentials(args):
+    """Cycle through username,password[,otp] lines of --users-file, or the one --username"""
+    if args.users_file:
+        with open(args.users_file, 'r') as f:
+            rows = [line.strip().split(',') for line in f if line.strip() and not line.startswith('#')]
+        return itertools.cycle([(row[0], row[1], row[2] if len(row) > 2 else None) for row in rows])
+    return itertools.repeat((args.username, args.password, args.otp))
+
+
+async def run_user(number, args, pool, api, stats, scenarios, login, deadline, start_at):
+    await asyncio.sleep(max(0.0, start_at - time.monotonic()))
+    rng = random.Random(args.seed * 100003 + number if args.seed is not None else None)
+    session = AfsSession(pool, api, token=args.token, observer=stats.observe)
+    user = VirtualUser(number, session, rng, args.workdir, args.upload_size)
+
+    if not args.token:
+        username, password, otp = login
+        try:
+            await session.login(username, password, otp)
+        except (HttpError, OSError, asyncio.TimeoutError) as e:
+            if number == 0:
+                print(f"Login failed for {username}: {e}")
+            return
+
+    functions, weights = zip(*scenarios)
+    refreshed = time.monotonic()
+    while time.monotonic() < deadline:
+        scenario = rng.choices(functions, weights)[0]
+        try:
+            await scenario(user)
+        except (OSError, asyncio.TimeoutError):
+            # Recorded as status 0 by the session; back off briefly like a retrying client
+            await asyncio.sleep(0.5)
+        except (HttpError, ValueError):
+            # A failed refresh, or a 2xx whose body is not JSON (a proxy's error page, say):
+            # the call is already recorded, so only this iteration ends
+            pass
+        user.iteration += 1
+
+        if args.refresh_interval and time.monotonic() - refreshed >= args.refresh_interval:
+            await user.refresh()
+            refreshed = time.monotonic()
+        if args.think_time:
+            await asyncio.sleep(rng.uniform(0, 2 * args.think_time))
+
+
+async def prepare_workdir(args, pool, api, login):
+    """Create --workdir and its parents once before the users start; returns an error message or None"""
+    session = AfsSession(pool, api, token=args.token)
+    try:
+        if not args.token:
+            await session.login(*login)
+        directories = []
+        directory = posixpath.normpath('/' + args.workdir.strip('/'))
+        while directory != '/':
+            directories.append(directory)
+            directory = posixpath.dirname(directory)
+        for path in reversed(directories):
+            response = await session.call('createDirectory', path=path)
+            # 409: it exists already, which is what we want
+            if not response.ok and response.status != 409:
+                return f"createDirectory {path} returned HTTP {response.status}"
+    except (HttpError, OSError, asyncio.TimeoutError) as e:
+        return str(e) or type(e).__name__
+    return None
+
+
+async def run_load(args, api, stats, scenarios):
+    pool = HttpPool(args.base_url or api.base_url, limit=args.connections, timeout=args.timeout)
+    error = await prepare_workdir(args, pool, api, next(credentials(args)))
+    if error:
+        print(f"Could not create {args.workdir} ({error}); uploads into it will fail")
+    logins = credentials(args)
+    started = time.monotonic()
+    deadline = started + args.ramp_up + args.duration
+
+    users = [
+        run_user(number, args, pool, api, stats, scenarios, next(logins), deadline,
+                 started + args.ramp_up * number / max(1, args.users))
+        for number in range(args.users)
+    ]
+    try:
+        await asyncio.gather(*users)
+    finally:
+        await pool.close()
+    return time.monotonic() - started
+
+
+def print_report(rows, elapsed):
+    print(f"\n{'Operation':<22} {'Requests':>9} {'Errors':>7} {'Req/s':>9} {'p50':>9} {'p95':>9} "
+          f"{'p99':>9} {'Max':>9} {'MB':>8}")
+    for row in rows:
+        print(f"{row['operation']:<22} {row['requests']:>9} {row['errors']:>7} {row['rps']:>9.1f} "
+              f"{row['p50'] * 1000:>7.1f}ms {row['p95'] * 1000:>7.1f}ms {row['p99'] * 1000:>7.1f}ms "
+              f"{row['max'] * 1000:>7.1f}ms {row['bytes'] / 1e6:>8.2f}")
+    total = sum(row['requests'] for row in rows)
+    print(f"{total} requests in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.1f} req/s)")
+
+
+def print_comparison(previous, rows):
+    """Percent change of throughput and tail latency per operation against a saved run"""
+    before = {row['operation']: row for row in previous.get('summary', [])}
+    print(f"\n{'Operation':<22} {'Req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}  "
+          f"(change vs {previous.get('started', 'previous run')})")
+    for row in rows:
+        old = before.get(row['operation'])
+        if not old:
+            continue
+
+        def change(key):
+            return f"{(row[key] - old[key]) / old[key] * 100:+8.1f}%" if old[key] else f"{'n/a':>9}"
+
+        print(f"{row['operation']:<22} {change('rps')} {change('p50')} {change('p95')} {change('p99')}")
+
+
+def write_results(path, args, stats, rows, elapsed, started):
+    results = {
+        'started': started,
+        'elapsed': elapsed,
+        'users': args.users,
+        'scenarios': args.scenario or [DEFAULT_SCENARIO],
+        'summary': rows,
+        'statuses': {op: {str(k): v for k, v in statuses.items()} for op, statuses in stats.statuses.items()},
+        'histograms': {op: histogram.to_dict() for op, histogram in stats.histograms.items()}
+    }
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=1)
+    print(f"Results written to {path}")
+
+
+def write_hgrm(directory, stats):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for operation_id, histogram in stats.histograms.items():
+        (directory / f'{operation_id}.hgrm').write_text(histogram.percentile_distribution())
+    print(f"Percentile distributions written to {directory}/")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the AFS file API with asyncio virtual users')
+    parser.add_argument('--spec', default=DEFAULT_SPEC, help='OpenAPI document of the server')
+    parser.add_argument('--base-url', help="Server URL, defaults to the spec's first server")
+    parser.add_argument('--users', type=int, default=100, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run after ramp-up')
+    parser.add_argument('--ramp-up', type=float, default=5, help='Seconds over which users start')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Mean pause between iterations')
+    parser.add_argument('--scenario', action='append',
+                        help='name[=weight] or file.py:function[=weight]; repeat to mix scenarios')
+    parser.add_argument('--username', default='internal1')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--otp', help='One-time code for users that need one')
+    parser.add_argument('--users-file', help='username,password[,otp] per line, assigned round-robin')
+    parser.add_argument('--token', help='Use this bearer token instead of logging in')
+    parser.add_argument('--refresh-interval', type=float, default=0,
+                        help="Refresh each user's token this often (0: only when the server's window opens)")
+    parser.add_argument('--workdir', default=DEFAULT_WORKDIR, help='Directory scenarios upload into')
+    parser.add_argument('--upload-size', type=int, default=64 * 1024, help='Bytes per uploaded file')
+    parser.add_argument('--connections', type=int, default=256, help='Keep-alive connections shared by all users')
+    parser.add_argument('--timeout', type=float, default=30, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, help='Random seed for repeatable runs')
+    parser.add_argument('--output', help='Write the summary and HDR histograms to this JSON file')
+    parser.add_argument('--hdr-dir', help='Write one .hgrm percentile distribution per operation here')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare against')
+    args = parser.parse_args()
+
+    try:
+        scenarios = [load_scenario(spec) for spec in args.scenario or [DEFAULT_SCENARIO]]
+    except (ValueError, OSError, AttributeError) as e:
+        print(f"❌ {e}")
+        return 2
+
+    previous = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r') as f:
+                previous = json.load(f)
+            if not isinstance(previous, dict) or not isinstance(previous.get('summary'), list):
+                raise ValueError('no summary; expected a file written by --output')
+        except (OSError, ValueError) as e:
+            print(f"❌ Cannot compare against {args.compare}: {e}")
+            return 2
+
+    api = load_api(args.spec)
+    stats = Stats()
+    started = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    print(f"{args.users} users for {args.duration:.0f}s against {args.base_url or api.base_url}")
+    clock = time.monotonic()
+    try:
+        elapsed = asyncio.run(run_load(args, api, stats, scenarios))
+    except KeyboardInterrupt:
+        print("\nInterrupted, reporting what was measured")
+        elapsed = time.monotonic() - clock
+
+    rows = stats.rows(elapsed)
+    print_report(rows, elapsed)
+
+    if previous:
+        print_comparison(previous, rows)
+    if args.output:
+        write_results(args.output, args, stats, rows, elapsed, started)
+    if args.hdr_dir:
+        write_hgrm(args.hdr_dir, stats)
+    return 0 if rows else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
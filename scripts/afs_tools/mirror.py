@@ -0,0 +1,425 @@
+"""
+Resumable parallel mirror of a directory tree on the AFS server
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m afs_tools.mirror /projects/archive ./archive \\
+        --username internal1 --password password123 --jobs 8
+    PYTHONPATH=scripts python3 -m afs_tools.mirror /projects/archive ./archive ... --verify
+
+The tree is crawled through /files/list with --crawl-jobs listings in flight,
+and files are downloaded through /files/download/** by --jobs workers that
+start as soon as the first files are found. Each download streams to a part
+file named after the remote size and modification time, written in large
+buffers; an interrupted download resumes from where it stopped with a Range
+request, and If-Range makes the server send the whole file if it changed in
+between. Finished files take the remote modification time, so a re-run only
+transfers files whose size or mtime differ.
+
+The API publishes no checksums, so integrity is tracked on this side: every
+downloaded file is hashed with SHA-256 in a thread pool while transfers go
+on, and the digests are kept in .afs-mirror.sha256 (sha256sum format) in the
+destination. --verify re-hashes the unchanged files against it and fetches
+again any that no longer match.
+
+Entry names come from the server, so any entry whose local path would
+resolve outside the destination is refused and reported as a failure.
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import glob
+import hashlib
+import os
+import posixpath
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from typing import NamedTuple
+
+from .http import HttpError, HttpPool
+from .openapi import DEFAULT_SPEC, load_api
+from .progress import Progress, format_bytes, format_duration
+from .session import AfsSession, parse_timestamp
+
+MANIFEST = '.afs-mirror.sha256'
+PART_SUFFIX = '.afs-part'
+READ_SIZE = 256 * 1024
+WRITE_BUFFER = 4 * 1024 * 1024
+HASH_BLOCK = 1024 * 1024
+QUEUE_LIMIT = 10000
+# Status -> category for a failed listing or download
+ERRORS = {401: 'unauthorized', 403: 'forbidden', 404: 'not-found'}
+DONE = ('downloaded', 'resumed', 'unchanged', 'repaired')
+
+
+class RemoteFile(NamedTuple):
+    path: str  # on the server
+    relative: str  # below the mirrored directory
+    size: int
+    modified: int  # epoch seconds
+
+
+class Outcome(NamedTuple):
+    file: RemoteFile
+    category: str  # one of DONE or an error category
+    message: str
+
+
+class RetryDownload(Exception):
+    """A download stopped short and can be resumed"""
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while block := f.read(HASH_BLOCK):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    manifest = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                digest, _, relative = line.rstrip('\n').partition('  ')
+                if relative:
+                    manifest[relative] = digest
+    return manifest
+
+
+def write_manifest(path, manifest):
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        for relative in sorted(manifest):
+            f.write(f'{manifest[relative]}  {relative}\n')
+    os.replace(temporary, path)
+
+
+class Mirror:
+    def __init__(self, session, source, destination, jobs=8, crawl_jobs=8, hash_workers=4,
+                 retries=3, verify=False, excludes=(), dry_run=False):
+        self.session = session
+        self.source = posixpath.normpath('/' + source.strip('/'))
+        self.destination = destination
+        self.root = os.path.realpath(destination)
+        self.jobs = jobs
+        self.crawl_jobs = crawl_jobs
+        self.retries = retries
+        self.verify = verify
+        self.excludes = excludes
+        self.dry_run = dry_run
+        self.hash_pool = ThreadPoolExecutor(max_workers=hash_workers, thread_name_prefix='sha256')
+        self.manifest = load_manifest(os.path.join(destination, MANIFEST))
+        self.progress = Progress()
+        self.outcomes = []
+        self.hashing = set()
+
+    def local_path(self, file):
+        return os.path.join(self.destination, *file.relative.split('/'))
+
+    def part_path(self, file):
+        directory, name = os.path.split(self.local_path(file))
+        return os.path.join(directory, f'.{name}.{file.size}-{file.modified}{PART_SUFFIX}')
+
+    def inside_destination(self, relative):
+        """Whether relative, once symlinks and '..' are resolved, stays strictly below the destination"""
+        target = os.path.realpath(os.path.join(self.root, *relative.split('/')))
+        return target != self.root and os.path.commonpath([self.root, target]) == self.root
+
+    def excluded(self, name, relative):
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative, pattern) for pattern in self.excludes)
+
+    def finish(self, outcome):
+        self.outcomes.append(outcome)
+        if outcome.category in DONE:
+            self.progress.done += 1
+        else:
+            self.progress.failed += 1
+
+    # -- crawl ----------------------------------------------------------------------
+
+    async def crawl(self, files):
+        """List the tree breadth-first, feeding files to the download queue as they are found"""
+        directories = asyncio.Queue()
+        directories.put_nowait(self.source)
+
+        async def lister():
+            while True:
+                path = await directories.get()
+                try:
+                    await self.list_directory(path, directories, files)
+                except Exception as e:
+                    # A malformed listing fails this directory only; the lister keeps
+                    # going so the queue is drained and join() returns
+                    relative = posixpath.relpath(path, self.source)
+                    self.finish(Outcome(RemoteFile(path, relative, 0, 0), 'bad-listing', f'Listing failed: {e!r}'))
+                finally:
+                    directories.task_done()
+
+        listers = [asyncio.ensure_future(lister()) for _ in range(self.crawl_jobs)]
+        try:
+            await directories.join()
+        finally:
+            for task in listers:
+                task.cancel()
+            for _ in range(self.jobs):
+                await files.put(None)
+
+    async def list_directory(self, path, directories, files):
+        relative = posixpath.relpath(path, self.source)
+        placeholder = RemoteFile(path, relative, 0, 0)
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.session.call('listDirectory', path=path)
+            except (OSError, asyncio.TimeoutError) as e:
+                if attempt < self.retries:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                    continue
+                self.finish(Outcome(placeholder, 'network', f'Listing failed: {e}'))
+                return
+            break
+        if not response.ok:
+            self.finish(Outcome(placeholder, ERRORS.get(response.status, 'server-error'),
+                                f'Listing failed with HTTP {response.status}'))
+            return
+
+        for entry in (response.json() or {}).get('entries', []):
+            entry_path = entry.get('path') or posixpath.join(path, entry['name'])
+            relative = posixpath.relpath(entry_path, self.source)
+            if self.excluded(entry['name'], relative):
+                continue
+            if not self.inside_destination(relative):
+                self.finish(Outcome(RemoteFile(entry_path, relative, 0, 0), 'unsafe-path',
+                                    f'Refused: resolves outside {self.destination}'))
+                continue
+            if entry.get('directory') or entry.get('type') == 'directory':
+                directories.put_nowait(entry_path)
+            else:
+                self.progress.files += 1
+                await files.put(RemoteFile(entry_path, relative, int(entry.get('size') or 0),
+                                           parse_timestamp(entry.get('modifiedAt'))))
+
+    # -- download -------------------------------------------------------------------
+
+    def unchanged(self, file, local):
+        try:
+            stat = os.stat(local)
+        except FileNotFoundError:
+            return False
+        return stat.st_size == file.size and int(stat.st_mtime) == file.modified
+
+    async def handle(self, file):
+        local = self.local_path(file)
+        repair = False
+        if self.unchanged(file, local):
+            expected = self.manifest.get(file.relative)
+            if not (self.verify and expected):
+                return Outcome(file, 'unchanged', '')
+            digest = await asyncio.get_running_loop().run_in_executor(self.hash_pool, sha256_file, local)
+            if digest == expected:
+                return Outcome(file, 'unchanged', '')
+            repair = True
+        if self.dry_run:
+            self.progress.total_bytes += file.size
+            return Outcome(file, 'downloaded', 'dry run')
+
+        part = self.part_path(file)
+        self.progress.total_bytes += file.size - (os.path.getsize(part) if os.path.exists(part) else 0)
+        resumed = False
+        for attempt in range(self.retries + 1):
+            try:
+                resumed = await self.download(file, part) or resumed
+                break
+            except (OSError, asyncio.TimeoutError, RetryDownload) as e:
+                if attempt < self.retries:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                    continue
+                return Outcome(file, 'network', f'Download failed: {e}')
+            except HttpError as e:
+                return Outcome(file, ERRORS.get(e.status, 'server-error'), f'Download failed with HTTP {e.status}')
+
+        os.replace(part, local)
+        os.utime(local, (file.modified, file.modified))
+        task = asyncio.ensure_future(self.record_digest(file, local))
+        self.hashing.add(task)
+        task.add_done_callback(self.hashing.discard)
+        return Outcome(file, 'repaired' if repair else 'resumed' if resumed else 'downloaded', '')
+
+    async def record_digest(self, file, local):
+        digest = await asyncio.get_running_loop().run_in_executor(self.hash_pool, sha256_file, local)
+        self.manifest[file.relative] = digest
+
+    def remove_stale_parts(self, file, part):
+        directory, name = os.path.split(self.local_path(file))
+        for stale in glob.glob(os.path.join(glob.escape(directory), glob.escape(f'.{name}.') + '*' + PART_SUFFIX)):
+            if stale != part:
+                os.remove(stale)
+
+    async def download(self, file, part):
+        """Fetch file into part, resuming what is already there; returns whether it resumed"""
+        os.makedirs(os.path.dirname(part), exist_ok=True)
+        self.remove_stale_parts(file, part)
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        if offset > file.size:
+            os.remove(part)
+            offset = 0
+        if offset == file.size and offset:
+            return True
+
+        headers = {}
+        if offset:
+            headers = {'Range': f'bytes={offset}-', 'If-Range': formatdate(file.modified, usegmt=True)}
+        async with self.session.stream('download', tail=file.path, headers=headers) as response:
+            if response.status == 401:
+                await response.read()
+                await self.session.refresh()
+                raise RetryDownload('token refreshed')
+            if response.status == 416:
+                await response.read()
+                os.remove(part)
+                self.progress.total_bytes += offset
+                raise RetryDownload('range not satisfiable, starting over')
+            if response.status not in (200, 206):
+                await response.read()
+                raise HttpError(response.status, response.reason)
+            if response.status == 200 and offset:
+                # The server sent the whole file: the part was of another version
+                self.progress.total_bytes += offset
+                offset = 0
+            resumed = offset > 0
+            await self.write_body(response, part, 'ab' if resumed else 'wb')
+
+        if os.path.getsize(part) != file.size:
+            raise RetryDownload(f'got {os.path.getsize(part)} of {file.size} bytes')
+        return resumed
+
+    async def write_body(self, response, part, mode):
+        buffer = bytearray()
+        with open(part, mode, buffering=0) as f:
+            try:
+                async for chunk in response.iter_chunks(READ_SIZE):
+                    buffer += chunk
+                    self.progress.transferred += len(chunk)
+                    if len(buffer) >= WRITE_BUFFER:
+                        data, buffer = buffer, bytearray()
+                        await asyncio.to_thread(f.write, data)
+            finally:
+                # Keep what arrived so a retry or a later run resumes after it
+                if buffer:
+                    f.write(buffer)
+
+    # -- run ------------------------------------------------------------------------
+
+    async def run(self, report_every=1.0):
+        files = asyncio.Queue(maxsize=QUEUE_LIMIT)
+        pending = set()
+
+        async def worker():
+            while (file := await files.get()) is not None:
+                pending.add(file)
+                try:
+                    self.finish(await self.handle(file))
+                finally:
+                    pending.discard(file)
+
+        reporter = asyncio.ensure_future(self.progress.report(report_every))
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.jobs)]
+        crawler = asyncio.ensure_future(self.crawl(files))
+        try:
+            await asyncio.gather(crawler, *workers)
+            if self.hashing:
+                await asyncio.gather(*self.hashing)
+        except asyncio.CancelledError:
+            # Ctrl-C: part files stay for the next run to resume
+            interrupted = list(pending)
+            for task in [crawler, *workers, *self.hashing]:
+                task.cancel()
+            await asyncio.gather(crawler, *workers, return_exceptions=True)
+            self.outcomes.extend(Outcome(file, 'cancelled', 'Download cancelled by user') for file in interrupted)
+        finally:
+            reporter.cancel()
+            self.hash_pool.shutdown(wait=True)
+            if not self.dry_run and os.path.isdir(self.destination):
+                write_manifest(os.path.join(self.destination, MANIFEST), self.manifest)
+        self.progress.print(final=True)
+        return self.outcomes
+
+
+def print_summary(outcomes, elapsed, transferred, dry_run=False):
+    counts = Counter(outcome.category for outcome in outcomes)
+    sizes = Counter()
+    for outcome in outcomes:
+        sizes[outcome.category] += outcome.file.size
+    fetched = sum(sizes[category] for category in ('downloaded', 'resumed', 'repaired'))
+    files = sum(counts[category] for category in ('downloaded', 'resumed', 'repaired'))
+    verb = 'Would download' if dry_run else 'Downloaded'
+    print(f"\n{verb} {files} files ({format_bytes(fetched)}) in {format_duration(elapsed)}, "
+          f"{format_bytes(transferred)} transferred at {format_bytes(transferred / elapsed if elapsed else 0)}/s")
+    for category, count in counts.most_common():
+        if category != 'downloaded':
+            print(f"  {category:<22}{count:>8} files  {format_bytes(sizes[category])}")
+    failures = [outcome for outcome in outcomes if outcome.category not in DONE]
+    for outcome in failures[:20]:
+        print(f"  ❌ {outcome.file.path}: {outcome.message}")
+    if len(failures) > 20:
+        print(f"  ... and {len(failures) - 20} more")
+
+
+async def run_mirror(args, api):
+    pool = HttpPool(args.base_url or api.base_url, limit=args.connections or args.jobs + args.crawl_jobs,
+                    timeout=args.timeout)
+    session = AfsSession(pool, api, token=args.token)
+    try:
+        if not args.token:
+            await session.login(args.username, args.password, args.otp)
+        mirror = Mirror(session, args.source, args.destination, args.jobs, args.crawl_jobs, args.hash_workers,
+                        args.retries, args.verify, args.exclude, args.dry_run)
+        await mirror.run()
+        return mirror
+    finally:
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mirror a directory tree from the AFS server, resumably')
+    parser.add_argument('source', help='Remote directory to mirror')
+    parser.add_argument('destination', help='Local directory to mirror into')
+    parser.add_argument('--spec', default=DEFAULT_SPEC, help='OpenAPI document of the server')
+    parser.add_argument('--base-url', help="Server URL, defaults to the spec's first server")
+    parser.add_argument('--username', default='internal1')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--otp', help='One-time code for users that need one')
+    parser.add_argument('--token', help='Use this bearer token instead of logging in')
+    parser.add_argument('--jobs', type=int, default=8, help='Downloads in flight')
+    parser.add_argument('--crawl-jobs', type=int, default=8, help='Directory listings in flight')
+    parser.add_argument('--hash-workers', type=int, default=min(4, os.cpu_count() or 1),
+                        help='Threads computing SHA-256 digests')
+    parser.add_argument('--connections', type=int, help='Keep-alive connections (default: jobs + crawl jobs)')
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds without progress before a request fails')
+    parser.add_argument('--retries', type=int, default=3, help='Retries (resuming) after network errors')
+    parser.add_argument('--exclude', action='append', default=[], help='Glob of names or paths to leave out')
+    parser.add_argument('--verify', action='store_true',
+                        help='Re-hash unchanged files against the manifest and fetch mismatches again')
+    parser.add_argument('--dry-run', action='store_true', help='Crawl and report what would be downloaded')
+    args = parser.parse_args()
+
+    os.makedirs(args.destination, exist_ok=True)
+    api = load_api(args.spec)
+    print(f"Mirroring {args.source} to {args.destination}, {args.jobs} downloads in parallel")
+    started = time.monotonic()
+    try:
+        mirror = asyncio.run(run_mirror(args, api))
+    except (HttpError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_summary(mirror.outcomes, time.monotonic() - started, mirror.progress.transferred, args.dry_run)
+    return 0 if all(outcome.category in DONE for outcome in mirror.outcomes) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,955 @@
+"""
+Mock AFS backend generated from the server's OpenAPI document
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m afs_tools.mockserver --port 8080
+    PYTHONPATH=scripts python3 -m afs_tools.mockserver --profile slow-storage --huge /huge=2000000 \\
+        --latency listDirectory=300ms~100ms --bandwidth download=5MB
+
+afs-spa/proxy.conf.json and the development environment both point at
+localhost:8080, so `npx ng serve` talks to the mock unchanged. Log in as any
+user from docs/demo-users.md (password123; admins also need OTP 333666).
+
+Every operation in project_docs/afs-srv/api-docs.json is routed. The file
+operations (list, info, download, upload, rename, move, delete, create) run
+against a synthetic tree that is generated on demand from each path, so a
+directory of millions of entries costs no memory: listings are streamed as
+chunked JSON, downloads produce deterministic bytes with Range support, and
+uploads are parsed as they stream in. Uploads, renames, moves and deletes are
+kept in an in-memory overlay. Other operations answer with an example built
+from their response schema.
+
+Each operation can be given a latency (mean~jitter) and a bandwidth cap
+through --profile, --latency and --bandwidth to mimic a slow storage tier.
+"""
+
+import argparse
+import asyncio
+import json
+import posixpath
+import random
+import re
+import secrets
+import sys
+import time
+import zlib
+from hashlib import shake_128
+from typing import NamedTuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from .openapi import DEFAULT_SPEC, load_api
+
+PASSWORD = 'password123'
+OTP_CODE = '333666'
+ADMIN_PREFIX = 'admin'
+TOKEN_TTL = 15 * 60
+REFRESH_WINDOW = 5 * 60
+EPOCH = 1_735_689_600  # 2025-01-01, newest synthetic modification time
+SPAN = 3 * 365 * 86400  # synthetic modification times go back three years
+LIST_BATCH = 2000
+BLOCK_SIZE = 64 * 1024
+WRITE_SIZE = 256 * 1024
+UPLOAD_MEMORY = 256 * 1024 * 1024
+EXTENSIONS = (
+    ('.txt', 'text/plain'), ('.pdf', 'application/pdf'), ('.jpg', 'image/jpeg'),
+    ('.docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    ('.csv', 'text/csv'), ('.bin', 'application/octet-stream')
+)
+MIME_TYPES = dict(EXTENSIONS)
+DIR_NAME = re.compile(r'^dir-(\d+)$')
+FILE_NAME = re.compile(r'^file-(\d+)(\.\w+)$')
+REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 206: 'Partial Content', 400: 'Bad Request',
+           401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found', 405: 'Method Not Allowed',
+           409: 'Conflict', 413: 'Payload Too Large', 416: 'Range Not Satisfiable', 500: 'Internal Server Error'}
+
+
+class Profile(NamedTuple):
+    latency: float = 0.0  # seconds before the response starts
+    jitter: float = 0.0  # +/- seconds, uniformly distributed
+    bandwidth: float = None  # bytes per second for bodies, None for unlimited
+
+
+PROFILES = {
+    'instant': {},
+    'lan': {'*': Profile(0.002, 0.001, 100e6)},
+    'wan': {'*': Profile(0.08, 0.02, 2e6)},
+    'slow-storage': {
+        '*': Profile(0.01, 0.005),
+        'listDirectory': Profile(0.3, 0.2),
+        'getFileInfo': Profile(0.05, 0.03),
+        'download': Profile(0.1, 0.05, 5e6),
+        'upload': Profile(0.1, 0.05, 5e6)
+    }
+}
+
+
+def parse_duration(text):
+    """'250ms', '0.25s' or '0.25' to seconds"""
+    text = text.strip().lower()
+    if text.endswith('ms'):
+        return float(text[:-2]) / 1000
+    return float(text.rstrip('s'))
+
+
+def parse_rate(text):
+    """'5MB', '800K' or '1e6' (bytes per second) to bytes per second"""
+    text = text.strip().upper().rstrip('B').rstrip('/S')
+    for suffix, factor in (('K', 1e3), ('M', 1e6), ('G', 1e9)):
+        if text.endswith(suffix):
+            return float(text[:-1]) * factor
+    return float(text)
+
+
+def normalize(path):
+    return posixpath.normpath('/' + (path or '').strip().lstrip('/'))
+
+
+def _hash(path):
+    return zlib.crc32(path.encode('utf-8'))
+
+
+_dates = {}
+
+
+def _date(day):
+    """'YYYY-MM-DD' of a day number since the epoch, cached: listings format millions of timestamps"""
+    date = _dates.get(day)
+    if date is None:
+        date = _dates[day] = time.strftime('%Y-%m-%d', time.gmtime(day * 86400))
+    return date
+
+
+_clocks = [None] * 86400
+
+
+def _clock(seconds):
+    """'HH:MM:SS' of a second of the day, cached like _date()"""
+    clock = _clocks[seconds]
+    if clock is None:
+        hours, rest = divmod(seconds, 3600)
+        clock = _clocks[seconds] = f'{hours:02d}:{rest // 60:02d}:{rest % 60:02d}'
+    return clock
+
+
+def _iso(timestamp):
+    day, seconds = divmod(int(timestamp), 86400)
+    return f'{_date(day)}T{_clock(seconds)}Z'
+
+
+class SyntheticTree:
+    """A deterministic directory tree computed from paths, never stored
+
+    The root holds `dirs` directories named dir-NN, each of those holds
+    `dirs` more, down to `depth` levels; every directory also holds `files`
+    files named file-NNNNNN.ext. Huge directories from `huge` ({path: file
+    count}) hold only files and appear in their parent's listing.
+    """
+
+    def __init__(self, depth=3, dirs=8, files=50, huge=None):
+        self.depth = depth
+        self.dirs = dirs
+        self.files = files
+        self.huge = {normalize(path): count for path, count in (huge or {}).items()}
+
+    def is_dir(self, path):
+        if path == '/' or path in self.huge:
+            return True
+        parts = path.strip('/').split('/')
+        if len(parts) > self.depth:
+            return False
+        for part in parts:
+            match = DIR_NAME.match(part)
+            if not match or int(match.group(1)) >= self.dirs:
+                return False
+        return True
+
+    def file_count(self, directory):
+        return self.huge.get(directory, self.files)
+
+    def subdirectories(self, directory):
+        names = []
+        if directory not in self.huge and (directory == '/' or directory.count('/') < self.depth):
+            names = [f'dir-{index:02d}' for index in range(self.dirs)]
+        names += [posixpath.basename(path) for path in self.huge if posixpath.dirname(path) == directory]
+        return names
+
+    @staticmethod
+    def file(seed, index):
+        """(name, size, modification time) of file number index in the directory whose _hash() is seed"""
+        h = (seed ^ (index * 2654435761)) & 0xFFFFFFFF
+        h = ((h ^ (h >> 15)) * 2246822519) & 0xFFFFFFFF
+        h ^= h >> 13
+        # Mostly small documents with a long tail up to tens of megabytes
+        size = (h % 1000 + 1) << ((h >> 10) % 16)
+        return f'file-{index:06d}{EXTENSIONS[(h >> 28) % len(EXTENSIONS)][0]}', size, EPOCH - h % SPAN
+
+    def lookup_file(self, path):
+        """(size, modification time) of a synthetic file, or None when path is not one"""
+        directory, name = posixpath.split(path)
+        match = FILE_NAME.match(name)
+        if not match or not self.is_dir(directory):
+            return None
+        index = int(match.group(1))
+        if index >= self.file_count(directory):
+            return None
+        expected, size, modified = self.file(_hash(directory), index)
+        return (size, modified) if expected == name else None
+
+    @staticmethod
+    def modified(path):
+        return EPOCH - _hash(path) % SPAN
+
+
+class Node(NamedTuple):
+    path: str
+    directory: bool
+    size: int
+    modified: float
+    source: str  # synthetic path whose content this node serves, or None for uploads
+    data: bytes  # uploaded content, or None when only the size was kept
+
+
+class MockFileSystem:
+    """SyntheticTree plus an in-memory overlay of uploads, renames, moves, deletes and new directories"""
+
+    def __init__(self, tree, upload_memory=UPLOAD_MEMORY):
+        self.tree = tree
+        self.upload_memory = upload_memory
+        self.stored = 0
+        self.added = {}  # path -> Node for uploads, new directories and moved entries
+        self.hidden = set()  # synthetic paths deleted or moved away
+        self.children_added = {}  # directory -> names added by the overlay
+        self.touched = {}  # directory -> time its entries last changed, like a real directory mtime
+
+    def resolve(self, path):
+        """(synthetic path that path shows, root of the mapping) or (None, None) inside an overlay-only directory
+
+        Below a moved directory the synthetic source keeps serving its children,
+        so hidden paths are only checked below the mapping root.
+        """
+        parent, tail = path, ''
+        while parent != '/':
+            node = self.added.get(parent)
+            if node is not None and node.directory and parent != path:
+                if node.source is None:
+                    return None, None
+                return normalize(node.source + tail), node.source
+            parent, name = posixpath.split(parent)
+            tail = f'/{name}{tail}'
+        return path, '/'
+
+    def _hidden(self, source, root):
+        while source != root:
+            if source in self.hidden:
+                return True
+            source = posixpath.dirname(source)
+        return False
+
+    def lookup(self, path):
+        path = normalize(path)
+        node = self.added.get(path)
+        if node is not None:
+            return node._replace(modified=self.touched[path]) if path in self.touched else node
+        source, root = self.resolve(path)
+        if source is None or self._hidden(source, root):
+            return None
+        if self.tree.is_dir(source):
+            return Node(path, True, 0, self.touched.get(path) or self.tree.modified(source), source, None)
+        attributes = self.tree.lookup_file(source)
+        if attributes:
+            return Node(path, False, attributes[0], attributes[1], source, None)
+        return None
+
+    def iter_children(self, directory):
+        """Yield (name, Node, None) per entry, or (name, None, (size, modified)) for a synthetic file
+
+        Synthetic files skip building a Node so that huge listings stay cheap.
+        """
+        node = self.lookup(directory)
+        if node is None or not node.directory:
+            return
+        source = node.source
+        if source and self.tree.is_dir(source):
+            for name in self.tree.subdirectories(source):
+                child = posixpath.join(source, name)
+                if child not in self.hidden:
+                    path = posixpath.join(directory, name)
+                    modified = self.touched.get(path) or self.tree.modified(child)
+                    yield name, Node(path, True, 0, modified, child, None), None
+            removed, seed, file = self.hidden, _hash(source), self.tree.file
+            for index in range(self.tree.file_count(source)):
+                name, size, modified = file(seed, index)
+                if not removed or posixpath.join(source, name) not in removed:
+                    yield name, None, (size, modified)
+        for name in sorted(self.children_added.get(directory, ())):
+            child = self.added.get(posixpath.join(directory, name))
+            if child:
+                yield name, child._replace(modified=self.touched.get(child.path, child.modified)), None
+
+    def _add(self, node):
+        self.added[node.path] = node
+        parent, name = posixpath.split(node.path)
+        self.children_added.setdefault(parent, set()).add(name)
+        self.touched[parent] = time.time()
+
+    def _drop(self, path):
+        node = self.lookup(path)
+        if node is None:
+            return
+        if node.directory:
+            for child in [p for p in self.added if p.startswith(path + '/')]:
+                self._drop(child)
+        self.touched.pop(node.path, None)
+        self.touched[posixpath.dirname(node.path)] = time.time()
+        if self.added.pop(path, None) is not None:
+            parent, name = posixpath.split(path)
+            self.children_added.get(parent, set()).discard(name)
+            if node.data:
+                self.stored -= len(node.data)
+        elif node.source:
+            self.hidden.add(node.source)
+
+    def create_directory(self, path):
+        self._add(Node(normalize(path), True, 0, time.time(), None, None))
+
+    def store_upload(self, path, size, data):
+        """Record an upload; its bytes are kept while the overlay is under upload_memory"""
+        path = normalize(path)
+        self._drop(path)
+        if data is not None and self.stored + len(data) <= self.upload_memory:
+            self.stored += len(data)
+        else:
+            data = None
+        self._add(Node(path, False, size, time.time(), None, data))
+        return self.added[path]
+
+    def move(self, source, target):
+        node = self.lookup(source)
+        children = [self.added[p] for p in self.added if p.startswith(node.path + '/')]
+        self._drop(node.path)
+        moved = node._replace(path=normalize(target), modified=time.time())
+        self._add(moved)
+        if moved.data:
+            self.stored += len(moved.data)
+        for child in children:
+            self._add(child._replace(path=moved.path + child.path[len(node.path):]))
+            if child.data:
+                self.stored += len(child.data)
+        return moved
+
+    def delete(self, path):
+        self._drop(normalize(path))
+
+    def content(self, node, start, end):
+        """Yield the bytes of node from start to end (exclusive)"""
+        if node.data is not None:
+            for offset in range(start, end, WRITE_SIZE):
+                yield node.data[offset:min(end, offset + WRITE_SIZE)]
+            return
+        block = _content_block(node.source or node.path)
+        doubled = block + block
+        offset = start
+        while offset < end:
+            length = min(end - offset, BLOCK_SIZE)
+            position = offset % BLOCK_SIZE
+            yield doubled[position:position + length]
+            offset += length
+
+
+_blocks = {}
+
+
+def _content_block(key):
+    """64 KiB of pseudo-random bytes that a file's content repeats; the same for the same path"""
+    block = _blocks.get(key)
+    if block is None:
+        if len(_blocks) > 256:
+            _blocks.clear()
+        block = _blocks[key] = shake_128(key.encode('utf-8')).digest(BLOCK_SIZE)
+    return block
+
+
+def file_info(node, owner='afs'):
+    name = posixpath.basename(node.path) or '/'
+    mime = 'inode/directory' if node.directory else MIME_TYPES.get(posixpath.splitext(name)[1], 'application/octet-stream')
+    return {
+        'name': name,
+        'path': node.path,
+        'type': 'directory' if node.directory else 'file',
+        'size': node.size,
+        'createdAt': _iso(node.modified - 86400),
+        'modifiedAt': _iso(node.modified),
+        'owner': owner,
+        'group': 'users',
+        'permissions': 'rwxr-x---' if node.directory else 'rw-r-----',
+        'mimeType': mime,
+        'directory': node.directory
+    }
+
+
+def example_for(schema, components, depth=0):
+    """A plausible example value for an OpenAPI schema"""
+    if depth > 6 or not isinstance(schema, dict):
+        return None
+    if '$ref' in schema:
+        return example_for(components.get(schema['$ref'].rsplit('/', 1)[-1], {}), components, depth + 1)
+    if 'example' in schema:
+        return schema['example']
+    if 'enum' in schema:
+        return schema['enum'][0]
+    kind = schema.get('type', 'object')
+    if kind == 'object':
+        return {name: example_for(prop, components, depth + 1) for name, prop in schema.get('properties', {}).items()}
+    if kind == 'array':
+        return [example_for(schema.get('items', {}), components, depth + 1)]
+    if kind == 'integer':
+        return 1
+    if kind == 'number':
+        return 1.0
+    if kind == 'boolean':
+        return True
+    if schema.get('format') == 'date-time':
+        return _iso(EPOCH)
+    return 'string'
+
+
+class UploadSink:
+    """Counts an upload's bytes and keeps them while they fit in limit"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.size = 0
+        self.data = bytearray()
+
+    def write(self, chunk):
+        self.size += len(chunk)
+        if self.data is not None:
+            if len(self.data) + len(chunk) <= self.limit:
+                self.data += chunk
+            else:
+                self.data = None
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: dict
+    headers: dict
+    reader: asyncio.StreamReader
+
+
+class HttpReply(Exception):
+    """Raised by handlers to answer with an error status"""
+
+    def __init__(self, status, body=None):
+        super().__init__(status)
+        self.status = status
+        self.body = body
+
+
+class MockAfsServer:
+    def __init__(self, api, spec, filesystem, profiles=None, require_auth=True, seed=None, max_upload=None):
+        self.api = api
+        self.max_upload = max_upload
+        self.components = spec.get('components', {}).get('schemas', {})
+        self.spec = spec
+        self.fs = filesystem
+        self.profiles = profiles or {}
+        self.require_auth = require_auth
+        self.tokens = {}  # token -> (username, expires)
+        self.rng = random.Random(seed)
+        self.prefix = urlsplit(api.base_url).path.rstrip('/')
+        self.routes = []
+        for operation in api.operations.values():
+            pattern = re.escape(operation.path).replace(r'/\*\*', '(?P<tail>/.*)?')
+            pattern = re.sub(r'\\\{(\w+)\\\}', r'(?P<\1>[^/]+)', pattern)
+            self.routes.append((operation.method, re.compile(f'^{pattern}$'), operation))
+        self.handlers = {
+            'login': self.login, 'otpLogin': self.otp_login, 'refreshToken': self.refresh, 'logout': self.logout,
+            'listDirectory': self.list_directory, 'listDirectory_1': self.list_directory,
+            'getFileInfo': self.file_info, 'getMetadata': self.file_info, 'download': self.download,
+            'upload': self.upload, 'rename': self.rename, 'move': self.move, 'delete': self.delete,
+            'createDirectory': self.create_directory
+        }
+
+    # -- profiles -----------------------------------------------------------------
+
+    def profile(self, operation_id):
+        return self.profiles.get(operation_id) or self.profiles.get('*') or Profile()
+
+    async def delay(self, profile):
+        if profile.latency or profile.jitter:
+            await asyncio.sleep(max(0.0, profile.latency + self.rng.uniform(-profile.jitter, profile.jitter)))
+
+    # -- HTTP plumbing --------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                keep_alive = await self.dispatch(request, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        parts = urlsplit(target)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        return Request(method.upper(), unquote(parts.path), query, headers, reader)
+
+    async def body_chunks(self, request, profile=None):
+        """Yield the request body as it arrives, paced to the profile's bandwidth"""
+        started, received = time.monotonic(), 0
+        bandwidth = profile.bandwidth if profile else None
+        if 'chunked' in request.headers.get('transfer-encoding', '').lower():
+            while True:
+                size = int((await request.reader.readline()).split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    while (await request.reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    return
+                remaining = size
+                while remaining:
+                    data = await request.reader.read(min(remaining, WRITE_SIZE))
+                    if not data:
+                        raise ConnectionResetError()
+                    remaining -= len(data)
+                    received += len(data)
+                    yield data
+                    if bandwidth:
+                        await asyncio.sleep(max(0.0, received / bandwidth - (time.monotonic() - started)))
+                await request.reader.readexactly(2)
+        else:
+            remaining = int(request.headers.get('content-length') or 0)
+            while remaining:
+                data = await request.reader.read(min(remaining, WRITE_SIZE))
+                if not data:
+                    raise ConnectionResetError()
+                remaining -= len(data)
+                received += len(data)
+                yield data
+                if bandwidth:
+                    await asyncio.sleep(max(0.0, received / bandwidth - (time.monotonic() - started)))
+
+    async def read_body(self, request):
+        return b''.join([chunk async for chunk in self.body_chunks(request)])
+
+    def _head(self, status, headers):
+        lines = [f'HTTP/1.1 {status} {REASONS.get(status, "Status")}',
+                 'Access-Control-Allow-Origin: *',
+                 'Access-Control-Allow-Headers: Authorization, Content-Type, Range',
+                 'Access-Control-Allow-Methods: GET, POST, PUT, PATCH, DELETE, OPTIONS',
+                 'Access-Control-Expose-Headers: Content-Range, Content-Length, ETag, Last-Modified']
+        lines.extend(f'{key}: {value}' for key, value in headers.items())
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    async def send(self, writer, status, body=b'', headers=None, content_type='application/json'):
+        if not isinstance(body, (bytes, bytearray)):
+            body = json.dumps(body).encode('utf-8')
+        headers = {'Content-Type': content_type, 'Content-Length': str(len(body)), **(headers or {})}
+        writer.write(self._head(status, headers) + body)
+        await writer.drain()
+
+    async def send_stream(self, writer, status, chunks, headers, profile, length=None):
+        """Send an iterable of byte chunks, chunked unless length is given, paced to the profile"""
+        headers = dict(headers)
+        if length is None:
+            headers['Transfer-Encoding'] = 'chunked'
+        else:
+            headers['Content-Length'] = str(length)
+        writer.write(self._head(status, headers))
+        started, sent = time.monotonic(), 0
+        for chunk in chunks:
+            if not chunk:
+                continue
+            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if length is None else chunk)
+            sent += len(chunk)
+            await writer.drain()
+            if profile.bandwidth:
+                await asyncio.sleep(max(0.0, sent / profile.bandwidth - (time.monotonic() - started)))
+        if length is None:
+            writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    def route(self, method, path):
+        if not path.startswith(self.prefix + '/') and path != self.prefix:
+            return None, {}
+        path = path[len(self.prefix):] or '/'
+        allowed = False
+        for route_method, pattern, operation in self.routes:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return operation, {key: value for key, value in match.groupdict().items() if value is not None}
+                allowed = True
+        return ('method-not-allowed' if allowed else None), {}
+
+    async def dispatch(self, request, writer):
+        """Answer one request; returns whether the connection can be kept open"""
+        keep_alive = request.headers.get('connection', '').lower() != 'close'
+        if request.method == 'OPTIONS':
+            await self.send(writer, 204, b'', {'Access-Control-Max-Age': '600'})
+            return keep_alive
+
+        operation, path_params = self.route(request.method, request.path)
+        try:
+            if operation is None or operation == 'method-not-allowed':
+                await self.read_body(request)
+                raise HttpReply(404 if operation is None else 405, {'message': f'No route for {request.path}'})
+
+            profile = self.profile(operation.operation_id)
+            await self.delay(profile)
+            if operation.operation_id not in ('login', 'otpLogin', 'refreshToken'):
+                try:
+                    self.authenticate(request)
+                except HttpReply:
+                    await self.read_body(request)
+                    raise
+
+            handler = self.handlers.get(operation.operation_id)
+            if handler:
+                await handler(request, writer, path_params, profile)
+            else:
+                await self.read_body(request)
+                await self.send(writer, *self.example_response(operation))
+        except HttpReply as reply:
+            await self.send(writer, reply.status, reply.body if reply.body is not None else b'')
+        return keep_alive
+
+    def example_response(self, operation):
+        details = self.spec['paths'][operation.path][operation.method.lower()]
+        for status in sorted(details.get('responses', {})):
+            if status.startswith('2'):
+                content = details['responses'][status].get('content', {})
+                schema = next(iter(content.values()), {}).get('schema', {}) if content else {}
+                return int(status), example_for(schema, self.components) if schema else b''
+        return 200, b''
+
+    # -- authentication -----------------------------------------------------------
+
+    def issue_token(self, username):
+        token = secrets.token_urlsafe(24)
+        now = time.time()
+        self.tokens[token] = (username, now + TOKEN_TTL)
+        user_type = 'ADMIN' if username.startswith(ADMIN_PREFIX) else \
+            'EXTERNAL' if username.startswith('external') else 'INTERNAL'
+        return {
+            'token': token, 'username': username, 'userType': user_type,
+            'refreshWindowStart': int((now + TOKEN_TTL - REFRESH_WINDOW) * 1000),
+            'refreshWindowEnd': int((now + TOKEN_TTL) * 1000),
+            'otpRequired': False
+        }
+
+    def authenticate(self, request):
+        if not self.require_auth:
+            return 'anonymous'
+        header = request.headers.get('authorization', '')
+        token = header[7:] if header.lower().startswith('bearer ') else ''
+        username, expires = self.tokens.get(token, (None, 0))
+        if not username or expires < time.time():
+            raise HttpReply(401, {'message': 'Invalid or expired token'})
+        return username
+
+    async def login(self, request, writer, params, profile):
+        body = json.loads(await self.read_body(request) or b'{}')
+        if not body.get('username') or body.get('password') != PASSWORD:
+            raise HttpReply(401, {'message': 'Invalid credentials'})
+        if body['username'].startswith(ADMIN_PREFIX):
+            await self.send(writer, 201, {'username': body['username'], 'otpRequired': True})
+        else:
+            await self.send(writer, 200, self.issue_token(body['username']))
+
+    async def otp_login(self, request, writer, params, profile):
+        body = json.loads(await self.read_body(request) or b'{}')
+        if body.get('password') != PASSWORD or body.get('otpCode') != OTP_CODE:
+            raise HttpReply(401, {'message': 'Invalid credentials or OTP code'})
+        await self.send(writer, 200, self.issue_token(body['username']))
+
+    async def refresh(self, request, writer, params, profile):
+        await self.read_body(request)
+        username = self.authenticate(request)
+        self.tokens.pop(request.headers.get('authorization', '')[7:], None)
+        await self.send(writer, 200, self.issue_token(username))
+
+    async def logout(self, request, writer, params, profile):
+        await self.read_body(request)
+        self.tokens.pop(request.headers.get('authorization', '')[7:], None)
+        await self.send(writer, 200, {'message': 'Logged out'})
+
+    # -- files ----------------------------------------------------------------------
+
+    def existing(self, path, directory=None):
+        node = self.fs.lookup(path)
+        if node is None or (directory is not None and node.directory != directory):
+            raise HttpReply(404, {'message': f'Not found: {path}'})
+        return node
+
+    async def list_directory(self, request, writer, params, profile):
+        await self.read_body(request)
+        path = normalize(request.query.get('path') or request.query.get('directory') or '/')
+        self.existing(path, directory=True)
+        await self.send_stream(writer, 200, self._listing_json(path), {'Content-Type': 'application/json'}, profile)
+
+    def _listing_json(self, directory):
+        """FileListResponse as JSON chunks, rendering synthetic files without building dicts"""
+        prefix = '' if directory == '/' else json.dumps(directory)[1:-1]
+        yield f'{{"path":{json.dumps(directory)},"entries":['.encode('utf-8')
+        batch, first = [], True
+        total_size = files = directories = 0
+        for name, node, attributes in self.fs.iter_children(directory):
+            if node is None:
+                size, modified = attributes
+                files += 1
+                total_size += size
+                day, seconds = divmod(modified, 86400)
+                clock = _clock(seconds)
+                entry = (f'{{"name":"{name}","path":"{prefix}/{name}","type":"file","size":{size},'
+                         f'"createdAt":"{_date(day - 1)}T{clock}Z","modifiedAt":"{_date(day)}T{clock}Z",'
+                         f'"owner":"afs","group":"users","permissions":"rw-r-----",'
+                         f'"mimeType":"{MIME_TYPES[name[name.rindex("."):]]}","directory":false}}')
+            else:
+                node = node._replace(path=posixpath.join(directory, name))
+                if node.directory:
+                    directories += 1
+                else:
+                    files += 1
+                    total_size += node.size
+                entry = json.dumps(file_info(node), separators=(',', ':'))
+            batch.append(entry if first else ',' + entry)
+            first = False
+            if len(batch) >= LIST_BATCH:
+                yield ''.join(batch).encode('utf-8')
+                batch = []
+        batch.append(f'],"totalSize":{total_size},"totalFiles":{files},"totalDirectories":{directories}}}')
+        yield ''.join(batch).encode('utf-8')
+
+    async def file_info(self, request, writer, params, profile):
+        await self.read_body(request)
+        node = self.existing(request.query.get('path', '/'))
+        await self.send(writer, 200, file_info(node))
+
+    async def download(self, request, writer, params, profile):
+        await self.read_body(request)
+        node = self.existing(params.get('tail') or request.query.get('path', '/'), directory=False)
+        size = node.size
+        headers = {
+            'Content-Type': MIME_TYPES.get(posixpath.splitext(node.path)[1], 'application/octet-stream'),
+            'Accept-Ranges': 'bytes',
+            'ETag': f'"{_hash(node.path):08x}-{size:x}-{int(node.modified):x}"',
+            'Last-Modified': time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(node.modified)),
+            'Content-Disposition': f'attachment; filename="{posixpath.basename(node.path)}"'
+        }
+        start, end, status = 0, size, 200
+        match = re.match(r'bytes=(\d*)-(\d*)$', request.headers.get('range', '').strip())
+        if_range = request.headers.get('if-range')
+        if if_range and if_range not in (headers['ETag'], headers['Last-Modified']):
+            # The client's copy is of another version: send the whole file
+            match = None
+        if match and size:
+            first, last = match.groups()
+            if first:
+                start, end = int(first), min(size, int(last) + 1) if last else size
+            elif last:
+                start, end = max(0, size - int(last)), size
+            if start >= size or start >= end:
+                raise HttpReply(416, {'message': f'Range not satisfiable, size {size}'})
+            status = 206
+            headers['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+        await self.send_stream(writer, status, self.fs.content(node, start, end), headers, profile, end - start)
+
+    async def upload(self, request, writer, params, profile):
+        content_type = request.headers.get('content-type', '')
+        match = re.search(r'boundary="?([^";]+)"?', content_type)
+        directory = request.query.get('path')
+        if not match:
+            # A raw body is accepted too: path names the file itself
+            sink = UploadSink(self.fs.upload_memory - self.fs.stored)
+            async for chunk in self.body_chunks(request, profile):
+                sink.write(chunk)
+            target = normalize(directory or '/upload.bin')
+            fields, filename = {}, None
+        else:
+            sink = UploadSink(self.fs.upload_memory - self.fs.stored)
+            fields, filename = await self._read_multipart(request, match.group(1).encode('latin-1'), sink, profile)
+            directory = normalize(directory or fields.get('path') or '/')
+            if filename is None:
+                raise HttpReply(400, {'message': 'Missing file part'})
+            target = normalize(f'{directory}/{posixpath.basename(filename)}')
+
+        if self.max_upload is not None and sink.size > self.max_upload:
+            raise HttpReply(413, {'message': f'Maximum upload size is {self.max_upload} bytes'})
+        parent = self.fs.lookup(posixpath.dirname(target))
+        if parent is None or not parent.directory:
+            raise HttpReply(404, {'message': f'Directory not found: {posixpath.dirname(target)}'})
+        if self.fs.lookup(target) is not None and request.query.get('overwrite', 'false') != 'true':
+            raise HttpReply(409, {'message': f'File already exists: {target}'})
+        node = self.fs.store_upload(target, sink.size, sink.data and bytes(sink.data))
+        await self.send(writer, 200, file_info(node))
+
+    async def _read_multipart(self, request, boundary, sink, profile):
+        """Parse a multipart body as it streams in, writing the file part to sink; returns (fields, filename)"""
+        delimiter = b'\r\n--' + boundary
+        buffer = b'\r\n'
+        fields, filename = {}, None
+        part = None  # (name, filename) of the part being read
+        field = bytearray()
+        async for chunk in self.body_chunks(request, profile):
+            buffer += chunk
+            while True:
+                if part is None:
+                    start = buffer.find(delimiter)
+                    header_end = buffer.find(b'\r\n\r\n', start + len(delimiter)) if start != -1 else -1
+                    if header_end == -1:
+                        break
+                    head = buffer[start + len(delimiter):header_end].decode('utf-8', errors='replace')
+                    if head.startswith('--'):
+                        buffer = b''
+                        break
+                    name = re.search(r'name="([^"]*)"', head)
+                    file_match = re.search(r'filename="([^"]*)"', head)
+                    part = (name.group(1) if name else '', file_match.group(1) if file_match else None)
+                    buffer = buffer[header_end + 4:]
+                    field = bytearray()
+                    write = sink.write if part[1] is not None else field.extend
+                else:
+                    end = buffer.find(delimiter)
+                    if end == -1:
+                        # Keep enough of the tail to spot a delimiter split across chunks
+                        keep = len(delimiter) - 1
+                        if len(buffer) > keep:
+                            write(buffer[:-keep])
+                        buffer = buffer[-keep:] if len(buffer) > keep else buffer
+                        break
+                    write(buffer[:end])
+                    buffer = buffer[end:]
+                    if part[1] is not None:
+                        filename = part[1]
+                    else:
+                        fields[part[0]] = field.decode('utf-8', errors='replace')
+                    part = None
+        return fields, filename
+
+    async def rename(self, request, writer, params, profile):
+        await self.read_body(request)
+        node = self.existing(request.query.get('path', ''))
+        new_name = request.query.get('newName', '')
+        if not new_name or '/' in new_name:
+            raise HttpReply(400, {'message': 'Invalid name'})
+        target = normalize(f'{posixpath.dirname(node.path)}/{new_name}')
+        if self.fs.lookup(target) is not None:
+            raise HttpReply(409, {'message': f'Target name already exists: {target}'})
+        await self.send(writer, 200, file_info(self.fs.move(node.path, target)))
+
+    async def move(self, request, writer, params, profile):
+        await self.read_body(request)
+        node = self.existing(request.query.get('sourcePath', ''))
+        target = normalize(request.query.get('targetPath', ''))
+        destination = self.fs.lookup(target)
+        if destination is not None and destination.directory:
+            target = normalize(f'{target}/{posixpath.basename(node.path)}')
+        elif self.fs.lookup(posixpath.dirname(target)) is None:
+            raise HttpReply(404, {'message': f'Target directory not found: {posixpath.dirname(target)}'})
+        if self.fs.lookup(target) is not None:
+            raise HttpReply(409, {'message': f'Target already exists: {target}'})
+        await self.send(writer, 200, file_info(self.fs.move(node.path, target)))
+
+    async def delete(self, request, writer, params, profile):
+        await self.read_body(request)
+        node = self.existing(request.query.get('path', ''))
+        self.fs.delete(node.path)
+        await self.send(writer, 200, {'message': f'Deleted {node.path}'})
+
+    async def create_directory(self, request, writer, params, profile):
+        await self.read_body(request)
+        path = normalize(request.query.get('path', ''))
+        if self.fs.lookup(path) is not None:
+            raise HttpReply(409, {'message': f'Already exists: {path}'})
+        if self.fs.lookup(posixpath.dirname(path)) is None:
+            raise HttpReply(404, {'message': f'Parent not found: {posixpath.dirname(path)}'})
+        self.fs.create_directory(path)
+        await self.send(writer, 200, file_info(self.fs.lookup(path)))
+
+
+def parse_profiles(args):
+    profiles = dict(PROFILES[args.profile])
+    for spec in args.latency or []:
+        operation, _, value = spec.rpartition('=')
+        latency, _, jitter = value.partition('~')
+        current = profiles.get(operation or '*', profiles.get('*', Profile()))
+        profiles[operation or '*'] = current._replace(
+            latency=parse_duration(latency), jitter=parse_duration(jitter) if jitter else 0.0)
+    for spec in args.bandwidth or []:
+        operation, _, value = spec.rpartition('=')
+        current = profiles.get(operation or '*', profiles.get('*', Profile()))
+        profiles[operation or '*'] = current._replace(bandwidth=parse_rate(value))
+    return profiles
+
+
+async def serve(server, host, port):
+    listener = await asyncio.start_server(server.handle_connection, host, port, backlog=4096,
+                                          limit=WRITE_SIZE * 2)
+    print(f"Mock AFS server on http://{host}:{port}{server.prefix} "
+          f"({len(server.routes)} operations, Ctrl-C to stop)")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a mock AFS backend generated from its OpenAPI document')
+    parser.add_argument('--spec', default=DEFAULT_SPEC, help='OpenAPI document of the server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--depth', type=int, default=3, help='Levels of synthetic directories')
+    parser.add_argument('--dirs', type=int, default=8, help='Subdirectories per directory')
+    parser.add_argument('--files', type=int, default=50, help='Files per directory')
+    parser.add_argument('--huge', action='append', default=[],
+                        help='PATH=COUNT: a directory holding COUNT files, e.g. /huge=2000000')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='instant', help='Latency/bandwidth preset')
+    parser.add_argument('--latency', action='append',
+                        help='[operationId=]MEAN[~JITTER], e.g. listDirectory=300ms~100ms; no id means all')
+    parser.add_argument('--bandwidth', action='append',
+                        help='[operationId=]RATE in bytes/s, e.g. download=5MB; no id means all')
+    parser.add_argument('--upload-memory', type=parse_rate, default=UPLOAD_MEMORY,
+                        help='Keep uploaded bytes up to this total; beyond it only sizes are kept')
+    parser.add_argument('--max-upload-size', type=parse_rate,
+                        help='Answer 413 to larger uploads, like a multipart size limit')
+    parser.add_argument('--no-auth', action='store_true', help='Accept requests without a bearer token')
+    parser.add_argument('--seed', type=int, help='Seed for latency jitter')
+    args = parser.parse_args()
+
+    with open(args.spec, 'r') as f:
+        spec = json.load(f)
+    huge = {}
+    for item in args.huge:
+        path, _, count = item.partition('=')
+        huge[path] = int(count or 1_000_000)
+
+    tree = SyntheticTree(args.depth, args.dirs, args.files, huge)
+    server = MockAfsServer(load_api(args.spec), spec, MockFileSystem(tree, args.upload_memory),
+                           parse_profiles(args), require_auth=not args.no_auth, seed=args.seed,
+                           max_upload=args.max_upload_size)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
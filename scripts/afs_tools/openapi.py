@@ -0,0 +1,86 @@
+"""
+Operations of the AFS server read from its OpenAPI document
+
+project_docs/afs-srv/api-docs.json is the springdoc output of the file
+server. load_api() turns it into Operation records keyed by operationId, so
+the tools call the API by name ('listDirectory', 'upload', 'refreshToken')
+and get the method, path and parameter locations the server documents.
+"""
+
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+DEFAULT_SPEC = 'project_docs/afs-srv/api-docs.json'
+
+
+class Operation(NamedTuple):
+    operation_id: str
+    method: str
+    path: str
+    tag: str
+    query: tuple  # names of query parameters
+    headers: tuple  # names of header parameters
+    required: tuple  # names of required parameters
+    responses: tuple  # documented status codes
+
+    def target(self, path_params=None, tail=''):
+        """Path with {name} parameters filled in and a '/**' wildcard replaced by tail"""
+        path = self.path
+        for name, value in (path_params or {}).items():
+            path = path.replace('{%s}' % name, str(value))
+        if path.endswith('/**'):
+            path = path[:-3] + '/' + tail.lstrip('/')
+        return path
+
+    def split_params(self, params):
+        """Split keyword arguments into (query, headers) the way the spec places them
+
+        Raises ValueError when a required query or header parameter is missing.
+        """
+        missing = [name for name in self.required if name in self.query + self.headers and name not in params]
+        if missing:
+            raise ValueError(f"{self.operation_id} needs {', '.join(missing)}")
+        query = {name: value for name, value in params.items() if name in self.query}
+        headers = {name: value for name, value in params.items() if name in self.headers}
+        return query, headers
+
+
+class Api(NamedTuple):
+    title: str
+    base_url: str
+    operations: dict  # operationId -> Operation
+
+    def __getitem__(self, operation_id):
+        return self.operations[operation_id]
+
+    def by_path(self, method, path):
+        for operation in self.operations.values():
+            if operation.method == method.upper() and operation.path == path:
+                return operation
+        raise KeyError(f'{method.upper()} {path}')
+
+
+def load_api(spec_file=DEFAULT_SPEC):
+    """Read an OpenAPI 3 document into an Api"""
+    with open(Path(spec_file), 'r') as f:
+        spec = json.load(f)
+
+    operations = {}
+    for path, methods in spec.get('paths', {}).items():
+        for method, details in methods.items():
+            parameters = details.get('parameters', [])
+            operation = Operation(
+                operation_id=details.get('operationId') or f'{method}:{path}',
+                method=method.upper(),
+                path=path,
+                tag=(details.get('tags') or [''])[0],
+                query=tuple(p['name'] for p in parameters if p.get('in') == 'query'),
+                headers=tuple(p['name'] for p in parameters if p.get('in') == 'header'),
+                required=tuple(p['name'] for p in parameters if p.get('required')),
+                responses=tuple(sorted(details.get('responses', {})))
+            )
+            operations[operation.operation_id] = operation
+
+    servers = spec.get('servers') or [{}]
+    return Api(spec.get('info', {}).get('title', ''), servers[0].get('url', ''), operations)
@@ -0,0 +1,76 @@
+"""
+Progress, throughput and ETA readout for the transfer tools
+
+Progress counts files and bytes as transfers run; its rate is taken over
+the last few seconds, so the ETA follows the current speed rather than the
+average since the start. On a terminal the status line is redrawn in place;
+when stderr is a log, a line is written every ten reporting intervals.
+"""
+
+import asyncio
+import sys
+import time
+from collections import deque
+
+
+def format_bytes(count):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if count < 1024 or unit == 'GB':
+            return f'{count:.0f} {unit}' if unit == 'B' else f'{count:.1f} {unit}'
+        count /= 1024
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f'{seconds // 3600}h{seconds % 3600 // 60:02d}m'
+    return f'{seconds // 60}m{seconds % 60:02d}s' if seconds >= 60 else f'{seconds}s'
+
+
+class Progress:
+    """Files and bytes done out of a total that may still grow (e.g. while a crawl runs)"""
+
+    WINDOW = 5.0
+
+    def __init__(self, files=0, total_bytes=0):
+        self.files = files
+        self.total_bytes = total_bytes
+        self.transferred = 0
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.samples = deque([(self.started, 0)])
+
+    def rate(self):
+        now = time.monotonic()
+        self.samples.append((now, self.transferred))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.WINDOW:
+            self.samples.popleft()
+        (first, transferred), (last, latest) = self.samples[0], self.samples[-1]
+        return (latest - transferred) / (last - first) if last > first else 0.0
+
+    def line(self):
+        rate = self.rate()
+        remaining = self.total_bytes - self.transferred
+        eta = format_duration(remaining / rate) if rate > 0 else '--'
+        percent = self.transferred / self.total_bytes * 100 if self.total_bytes else 100.0
+        return (f'{self.done + self.failed}/{self.files} files, {format_bytes(self.transferred)}/'
+                f'{format_bytes(self.total_bytes)} ({percent:.1f}%), {format_bytes(rate)}/s, '
+                f'ETA {eta}, {self.failed} failed')
+
+    def print(self, final=False):
+        if sys.stderr.isatty():
+            print(f'\r\033[K{self.line()}', end='\n' if final else '', file=sys.stderr, flush=True)
+        elif final:
+            print(self.line(), file=sys.stderr)
+
+    async def report(self, every=1.0):
+        """Print the status until cancelled"""
+        last_line = time.monotonic()
+        while True:
+            await asyncio.sleep(every)
+            if sys.stderr.isatty():
+                self.print()
+            elif time.monotonic() - last_line >= 10 * every:
+                last_line = time.monotonic()
+                print(self.line(), file=sys.stderr, flush=True)
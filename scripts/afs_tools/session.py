@@ -0,0 +1,173 @@
+"""
+Authenticated calls to the AFS API by operationId
+
+An AfsSession logs in once, sends the JWT as a bearer token like the SPA's
+auth interceptor, and refreshes it through /auth/refresh as soon as the
+server's refresh window (refreshWindowStart..refreshWindowEnd) opens, or
+once after a 401. Every call can be reported to an observer with its
+latency, status and bytes, which is how the load tester builds histograms.
+"""
+
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+from .http import HttpError
+
+
+def _epoch_seconds(value):
+    """The server sends epoch milliseconds; accept seconds as well"""
+    if not value:
+        return None
+    return value / 1000 if value > 10 ** 11 else value
+
+
+def parse_timestamp(value):
+    """Epoch seconds of a FileInfoResponse timestamp (ISO 8601, with or without zone, or epoch ms)"""
+    if not value:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(_epoch_seconds(value))
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+
+def multipart_fields(fields, file_field, filename, content_type='application/octet-stream'):
+    """Return (head, tail, content type) framing a file part after plain form fields"""
+    boundary = f'afs-{uuid.uuid4().hex}'
+    head = b''.join(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+        for name, value in fields.items()
+    )
+    head += (f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; '
+             f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n').encode('utf-8')
+    tail = f'\r\n--{boundary}--\r\n'.encode('utf-8')
+    return head, tail, f'multipart/form-data; boundary={boundary}'
+
+
+class AfsSession:
+    """One user's session against the AFS server
+
+    observer, if given, is called as observer(operation_id, status, seconds,
+    bytes_in, bytes_out) after every call; status 0 means the call failed
+    without a response.
+    """
+
+    def __init__(self, pool, api, token=None, observer=None):
+        self.pool = pool
+        self.api = api
+        self.token = token
+        self.observer = observer
+        self.username = None
+        self.refresh_start = None
+        self.refresh_end = None
+        self._refreshing = None
+
+    def _observe(self, operation_id, status, started, bytes_in=0, bytes_out=0):
+        if self.observer:
+            self.observer(operation_id, status, time.perf_counter() - started, bytes_in, bytes_out)
+
+    def _accept(self, data):
+        self.token = data.get('token') or self.token
+        self.username = data.get('username') or self.username
+        self.refresh_start = _epoch_seconds(data.get('refreshWindowStart'))
+        self.refresh_end = _epoch_seconds(data.get('refreshWindowEnd'))
+
+    def in_refresh_window(self, now=None):
+        now = time.time() if now is None else now
+        return self.refresh_start is not None and self.refresh_start <= now < (self.refresh_end or float('inf'))
+
+    async def login(self, username, password, otp_code=None):
+        """Log in, using /auth/otp-login when the server asks for a one-time code"""
+        response = await self._send('login', json_body={'username': username, 'password': password},
+                                    authenticate=False)
+        data = response.raise_for_status().json() or {}
+        if data.get('otpRequired'):
+            if not otp_code:
+                raise HttpError(response.status, f'{username} needs an OTP code')
+            response = await self._send('otpLogin', authenticate=False, json_body={
+                'username': username, 'password': password, 'otpCode': otp_code})
+            data = response.raise_for_status().json() or {}
+        self._accept(data)
+        return data
+
+    async def refresh(self):
+        """Swap the token for a fresh one; concurrent callers share one refresh"""
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._refresh())
+        try:
+            return await asyncio.shield(self._refreshing)
+        finally:
+            if self._refreshing is not None and self._refreshing.done():
+                self._refreshing = None
+
+    async def _refresh(self):
+        response = await self._send('refreshToken', authenticate=False,
+                                    Authorization=f'Bearer {self.token}')
+        data = response.raise_for_status().json() or {}
+        self._accept(data)
+        return data
+
+    async def _prepare(self, operation_id, path_params, tail, params, headers, authenticate):
+        operation = self.api[operation_id]
+        query, header_params = operation.split_params(params)
+        merged = {**header_params, **(headers or {})}
+        if authenticate and self.token:
+            if self.in_refresh_window():
+                try:
+                    await self.refresh()
+                except HttpError:
+                    # The current token is still valid; a 401 later retries the refresh
+                    self.refresh_start = None
+            merged['Authorization'] = f'Bearer {self.token}'
+        return operation, operation.target(path_params, tail), query, merged
+
+    async def _send(self, operation_id, path_params=None, tail='', body=None, json_body=None, headers=None,
+                    authenticate=True, **params):
+        operation, path, query, merged = await self._prepare(
+            operation_id, path_params, tail, params, headers, authenticate)
+        started = time.perf_counter()
+        try:
+            response = await self.pool.request(operation.method, path, query, merged, body, json_body)
+        except (OSError, asyncio.TimeoutError):
+            self._observe(operation_id, 0, started)
+            raise
+        sent = len(body) if isinstance(body, (bytes, bytearray)) else 0
+        self._observe(operation_id, response.status, started, len(response.body), sent)
+        return response
+
+    async def call(self, operation_id, path_params=None, tail='', body=None, json_body=None, headers=None,
+                   **params):
+        """Call an operation and return its Response, refreshing the token once on a 401"""
+        response = await self._send(operation_id, path_params, tail, body, json_body, headers, **params)
+        replayable = body is None or isinstance(body, (bytes, bytearray))
+        if response.status == 401 and self.token and replayable:
+            await self.refresh()
+            response = await self._send(operation_id, path_params, tail, body, json_body, headers, **params)
+        return response
+
+    @asynccontextmanager
+    async def stream(self, operation_id, path_params=None, tail='', body=None, headers=None, **params):
+        """Open an operation as a StreamResponse, e.g. to write a download to disk as it arrives"""
+        operation, path, query, merged = await self._prepare(
+            operation_id, path_params, tail, params, headers, True)
+        started = time.perf_counter()
+        response = None
+        try:
+            async with self.pool.open(operation.method, path, query, merged, body) as response:
+                yield response
+        finally:
+            if response is None:
+                self._observe(operation_id, 0, started)
+            else:
+                self._observe(operation_id, response.status, started, response.received)
+
+    async def upload(self, directory, filename, data, content_type='application/octet-stream'):
+        """Upload bytes as a multipart form, the way the SPA's FileOperationService does"""
+        head, tail, form_type = multipart_fields({'path': directory}, 'file', filename, content_type)
+        return await self.call('upload', body=head + data + tail, headers={'Content-Type': form_type},
+                               path=directory)
@@ -0,0 +1,3 @@
+"""
+Benchmarks for the kiro_sync workflow helpers
+"""
@@ -0,0 +1,705 @@
+"""
+End-to-end runs of the generated workflows against the offline GitHub API emulator
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m benchmarks.e2e
+    PYTHONPATH=scripts python3 -m benchmarks.e2e --tasks 10,100 --profile github --fail issues.create=2%:502
+
+Starts benchmarks.fakegithub on a free port and builds a throwaway origin
+repository: a synthetic spec on main and a task branch `--commits` commits
+ahead of it. The `run:` steps of .github/workflows/kiro-integration.yml and
+auto-pr-creation.yml then run as Actions would run them, each job in its own
+checkout (shallow, from file://origin), with scripts/ linked in so the steps
+run the code under test and scripts/benchmarks/bin first on PATH so `gh` is
+the fake one. Each scale runs four scenarios in order:
+
+    integration       first sync: milestone, epic and every task issue
+    integration:noop  the same dispatch again with nothing changed
+    auto-pr           first push of the task branch: precheck, then the PR
+    auto-pr:noop      second push: the precheck finds the open PR and stops
+
+and reports the wall time of every job and the API calls each scenario made,
+read from the emulator's /_emulator/stats.
+
+The runner covers the part of Actions these workflows use: job needs,
+outputs and `if:` conditions, step outputs through GITHUB_OUTPUT, `${{ }}`
+expressions with the status functions and hashFiles(), and
+actions/cache/restore and save backed by a local directory. The other
+`uses:` steps (setup-python, upload-artifact) are no-ops, and concurrency
+groups are ignored.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+from .synthetic import generate_history, generate_spec
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent
+WORKFLOWS_DIR = SCRIPTS_DIR.parent / '.github' / 'workflows'
+FAKE_GH_DIR = Path(__file__).resolve().parent / 'bin'
+REPOSITORY = 'offline/kiro-benchmark'
+SPEC = 'benchmark'
+TASK_BRANCH = 'feature/task-02'  # task 1 of the synthetic spec is complete, so its issue is closed
+DEFAULT_TASK_SCALES = '10,200'
+
+MAPPING_ENTRY = re.compile(r'''^([^\s:#'"][^:]*?|"[^"]*"|'[^']*'):(?:\s+(.*))?$''')
+EXPRESSION = re.compile(r'\$\{\{\s*(.*?)\s*\}\}', re.DOTALL)
+EXPRESSION_TOKEN = re.compile(r"""\s*(?:
+    (?P<string>'(?:[^']|'')*')
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<op>==|!=|<=|>=|&&|\|\||[!<>()\[\],.])
+  | (?P<name>[A-Za-z_][\w-]*)
+)""", re.VERBOSE)
+STATUS_FUNCTION = re.compile(r'\b(?:always|cancelled|success|failure)\s*\(')
+
+
+# -- workflow files -------------------------------------------------------------------
+
+
+def _scalar(text):
+    text = text.strip()
+    if text[:1] in ('"', "'"):
+        end = text.rfind(text[0])
+        return text[1:end].replace("''", "'") if text[0] == "'" else json.loads(text[:end + 1])
+    text = re.sub(r'\s+#.*$', '', text)
+    return {'true': True, 'false': False, 'null': None, '~': None}.get(text, text)
+
+
+def _is_item(text):
+    return text == '-' or text.startswith('- ')
+
+
+class _YamlReader:
+    """Indentation-based reader for the block-style YAML the generated workflows are written in"""
+
+    def __init__(self, text):
+        self.lines = text.splitlines()
+        self.position = 0
+
+    def peek(self):
+        while self.position < len(self.lines):
+            line = self.lines[self.position]
+            stripped = line.strip()
+            if stripped and not stripped.startswith('#'):
+                return len(line) - len(line.lstrip(' ')), stripped
+            self.position += 1
+        return None, None
+
+    def node(self):
+        indent, text = self.peek()
+        if indent is None:
+            return None
+        return self.sequence(indent) if _is_item(text) else self.mapping(indent)
+
+    def sequence(self, indent):
+        items = []
+        while True:
+            current, text = self.peek()
+            if current != indent or not _is_item(text):
+                return items
+            rest = text[1:].lstrip(' ')
+            if not rest:
+                self.position += 1
+                items.append(self.node())
+            elif MAPPING_ENTRY.match(rest):
+                # "- key: value" opens a mapping indented to where its first key starts
+                content = indent + len(text) - len(rest)
+                self.lines[self.position] = ' ' * content + rest
+                items.append(self.mapping(content))
+            else:
+                self.position += 1
+                items.append(_scalar(rest))
+
+    def mapping(self, indent):
+        result = {}
+        while True:
+            current, text = self.peek()
+            if current != indent or _is_item(text):
+                return result
+            match = MAPPING_ENTRY.match(text)
+            if not match:
+                raise ValueError(f"Unsupported YAML on line {self.position + 1}: {text}")
+            key, value = _scalar(match.group(1)), (match.group(2) or '').strip()
+            self.position += 1
+            if value[:1] in ('|', '>'):
+                result[key] = self.block_scalar(indent, value)
+            elif value:
+                result[key] = _scalar(value)
+            else:
+                # A nested block is indented further, except a sequence, which may sit at the key's indent
+                following, text = self.peek()
+                nested = following is not None and (following > indent or (following == indent and _is_item(text)))
+                result[key] = self.node() if nested else None
+
+    def block_scalar(self, indent, style):
+        lines = []
+        while self.position < len(self.lines):
+            line = self.lines[self.position]
+            if line.strip() and len(line) - len(line.lstrip(' ')) <= indent:
+                break
+            lines.append(line)
+            self.position += 1
+        while lines and not lines[-1].strip():
+            lines.pop()
+        if not lines:
+            return ''
+        first = next(line for line in lines if line.strip())
+        margin = len(first) - len(first.lstrip(' '))
+        text = '\n'.join(line[margin:] for line in lines)
+        if style.startswith('>'):
+            text = re.sub(r'(?<!\n)\n(?!\n)', ' ', text)
+        return text if style.endswith('-') else text + '\n'
+
+
+def load_workflow(path):
+    """Parse a workflow file into dicts and lists; every scalar stays a string except true/false/null"""
+    return _YamlReader(Path(path).read_text()).node() or {}
+
+
+# -- expressions ------------------------------------------------------------------------
+
+
+def _truthy(value):
+    return value not in (None, False, 0, '')
+
+
+def _text(value):
+    """How Actions renders a value inside ${{ }}"""
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _equal(left, right):
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)) and not isinstance(left, bool):
+        return left == right
+    return _text(left).lower() == _text(right).lower()
+
+
+class _Expression:
+    """Recursive-descent evaluator for the ${{ }} expression language"""
+
+    def __init__(self, source, context, functions):
+        self.tokens = []
+        position = 0
+        source = source.strip()
+        while position < len(source):
+            match = EXPRESSION_TOKEN.match(source, position)
+            if not match or match.end() == position:
+                raise ValueError(f"Cannot parse expression {source!r} at {source[position:]!r}")
+            position = match.end()
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        self.position = 0
+        self.context = context
+        self.functions = functions
+
+    def peek(self):
+        return self.tokens[self.position][1] if self.position < len(self.tokens) else None
+
+    def take(self, expected=None):
+        kind, token = self.tokens[self.position]
+        if expected and token != expected:
+            raise ValueError(f"Expected {expected!r}, found {token!r}")
+        self.position += 1
+        return kind, token
+
+    def evaluate(self):
+        value = self.either()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected {self.peek()!r} in expression")
+        return value
+
+    def either(self):
+        value = self.both()
+        while self.peek() == '||':
+            self.take()
+            right = self.both()
+            value = value if _truthy(value) else right
+        return value
+
+    def both(self):
+        value = self.comparison()
+        while self.peek() == '&&':
+            self.take()
+            right = self.comparison()
+            value = right if _truthy(value) else value
+        return value
+
+    def comparison(self):
+        value = self.unary()
+        while self.peek() in ('==', '!=', '<', '>', '<=', '>='):
+            _, operator = self.take()
+            right = self.unary()
+            if operator in ('==', '!='):
+                value = _equal(value, right) == (operator == '==')
+            else:
+                left, right = float(value or 0), float(right or 0)
+                value = {'<': left < right, '>': left > right, '<=': left <= right, '>=': left >= right}[operator]
+        return value
+
+    def unary(self):
+        if self.peek() == '!':
+            self.take()
+            return not _truthy(self.unary())
+        return self.primary()
+
+    def primary(self):
+        kind, token = self.take()
+        if token == '(':
+            value = self.either()
+            self.take(')')
+            return value
+        if kind == 'string':
+            return token[1:-1].replace("''", "'")
+        if kind == 'number':
+            return float(token) if '.' in token else int(token)
+        if token in ('true', 'false', 'null'):
+            return {'true': True, 'false': False, 'null': None}[token]
+        if self.peek() == '(':
+            self.take()
+            args = []
+            while self.peek() != ')':
+                args.append(self.either())
+                if self.peek() == ',':
+                    self.take()
+            self.take(')')
+            function = self.functions.get(token.lower())
+            if function is None:
+                raise ValueError(f"Unknown function {token}()")
+            return function(*args)
+
+        value = self.context.get(token)
+        while self.peek() in ('.', '['):
+            if self.take()[1] == '.':
+                key = self.take()[1]
+            else:
+                key = self.either()
+                self.take(']')
+            value = value.get(key) if isinstance(value, dict) else None
+        return value
+
+
+def evaluate(source, context, functions=None):
+    return _Expression(source, context, functions or {}).evaluate()
+
+
+def interpolate(text, context, functions=None):
+    """Replace every ${{ expression }} in text"""
+    return EXPRESSION.sub(lambda match: _text(evaluate(match.group(1), context, functions)), text)
+
+
+def condition(source, context, functions):
+    """Evaluate an `if:`; without a status function it implies success() &&"""
+    if source is None:
+        source = 'success()'
+    source = str(source).strip()
+    match = EXPRESSION.fullmatch(source)
+    source = match.group(1) if match else source
+    if not STATUS_FUNCTION.search(source):
+        source = f'success() && ({source})'
+    return _truthy(evaluate(source, context, functions))
+
+
+# -- running workflows -------------------------------------------------------------------
+
+
+class StepResult(NamedTuple):
+    name: str
+    outcome: str  # success, failure or skipped
+    seconds: float
+
+
+class JobResult(NamedTuple):
+    name: str
+    result: str  # success, failure or skipped
+    seconds: float
+    outputs: dict
+    steps: list
+
+
+def _read_outputs(path):
+    """Parse a GITHUB_OUTPUT file: key=value lines and key<<DELIMITER blocks"""
+    outputs = {}
+    lines = Path(path).read_text().splitlines() if Path(path).exists() else []
+    position = 0
+    while position < len(lines):
+        line = lines[position]
+        position += 1
+        if '<<' in line and ('=' not in line or line.index('<<') < line.index('=')):
+            key, delimiter = line.split('<<', 1)
+            value = []
+            while position < len(lines) and lines[position] != delimiter:
+                value.append(lines[position])
+                position += 1
+            position += 1
+            outputs[key] = '\n'.join(value)
+        elif '=' in line:
+            key, value = line.split('=', 1)
+            outputs[key] = value
+    return outputs
+
+
+class LocalCache:
+    """actions/cache backed by a directory: entries are never overwritten, restore-keys pick the newest"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.entries = {}  # key -> entry directory, in save order
+
+    def save(self, key, paths, workspace):
+        if key in self.entries:
+            print(f"    cache: {key} already exists, not saving")
+            return False
+        entry = self.directory / f'entry-{len(self.entries)}'
+        saved = False
+        for path in paths:
+            source = workspace / path
+            if source.is_dir():
+                shutil.copytree(source, entry / path, symlinks=True)
+                saved = True
+            elif source.is_file():
+                (entry / path).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(source, entry / path)
+                saved = True
+        if saved:
+            self.entries[key] = entry
+        return saved
+
+    def restore(self, key, restore_keys, workspace):
+        matched = key if key in self.entries else None
+        for prefix in restore_keys if matched is None else ():
+            candidates = [name for name in self.entries if name.startswith(prefix)]
+            if candidates:
+                matched = candidates[-1]
+                break
+        if matched:
+            shutil.copytree(self.entries[matched], workspace, dirs_exist_ok=True, symlinks=True)
+        return matched
+
+
+class WorkflowRunner:
+    """Runs the jobs of one workflow in order, each in a fresh workspace"""
+
+    def __init__(self, origin, api_url, token, cache, work_dir, verbose=False):
+        self.origin = Path(origin)
+        self.api_url = api_url
+        self.token = token
+        self.cache = cache
+        self.work_dir = Path(work_dir)
+        self.verbose = verbose
+        self.run_id = 1000
+
+    def base_env(self, github, workspace, output_file):
+        env = {key: value for key, value in os.environ.items()
+               if not key.startswith(('GITHUB_', 'GH_', 'KIRO_', 'RUNNER_'))}
+        env.update({
+            'CI': 'true',
+            'GITHUB_ACTIONS': 'true',
+            'GITHUB_REPOSITORY': github['repository'],
+            'GITHUB_REF': github['ref'],
+            'GITHUB_REF_NAME': github['ref_name'],
+            'GITHUB_EVENT_NAME': github['event_name'],
+            'GITHUB_RUN_ID': github['run_id'],
+            'GITHUB_RUN_ATTEMPT': github['run_attempt'],
+            'GITHUB_WORKSPACE': str(workspace),
+            'GITHUB_API_URL': self.api_url,
+            'GITHUB_GRAPHQL_URL': f'{self.api_url}/graphql',
+            'GITHUB_OUTPUT': str(output_file),
+            'RUNNER_TEMP': str(self.work_dir),
+            'PATH': f"{FAKE_GH_DIR}{os.pathsep}{os.environ.get('PATH', '')}"
+        })
+        return env
+
+    def run(self, workflow_file, event_name, ref_name, inputs=None, event=None):
+        """Run a workflow for one event and return [JobResult] in run order"""
+        workflow = load_workflow(workflow_file)
+        self.run_id += 1
+        triggers = workflow.get('on') or {}
+        dispatch = (triggers.get('workflow_dispatch') or {}) if isinstance(triggers, dict) else {}
+        values = {}
+        if event_name == 'workflow_dispatch':
+            for name, spec in (dispatch.get('inputs') or {}).items():
+                value = (inputs or {}).get(name, (spec or {}).get('default', ''))
+                if (spec or {}).get('type') == 'boolean':
+                    value = _truthy(value) and str(value).lower() != 'false'
+                values[name] = value
+        github = {
+            'repository': REPOSITORY, 'repository_owner': REPOSITORY.split('/')[0],
+            'ref': f'refs/heads/{ref_name}', 'ref_name': ref_name, 'event_name': event_name,
+            'run_id': str(self.run_id), 'run_attempt': '1', 'api_url': self.api_url,
+            'server_url': 'https://github.com', 'event': {**(event or {}), 'inputs': values}
+        }
+        context = {'github': github, 'inputs': values, 'secrets': {'GITHUB_TOKEN': self.token},
+                   'env': dict(workflow.get('env') or {}), 'needs': {}}
+
+        results = {}
+        for name, job in (workflow.get('jobs') or {}).items():
+            needs = job.get('needs') or []
+            needs = [needs] if isinstance(needs, str) else needs
+            context['needs'] = {need: {'result': results[need].result, 'outputs': results[need].outputs}
+                                for need in needs}
+            dependencies_ok = all(results[need].result == 'success' for need in needs)
+            functions = self.functions(None, failed=not dependencies_ok)
+            if condition(job.get('if'), context, functions):
+                results[name] = self.run_job(name, job, context, ref_name)
+            else:
+                results[name] = JobResult(name, 'skipped', 0.0, {}, [])
+            if self.verbose or results[name].result == 'failure':
+                print(f"  job {name}: {results[name].result} ({results[name].seconds:.2f}s)")
+        return list(results.values())
+
+    def functions(self, workspace, failed):
+        def hash_files(*patterns):
+            digest = hashlib.sha256()
+            found = False
+            for pattern in patterns:
+                for path in sorted((workspace or Path('.')).glob(pattern)):
+                    if path.is_file():
+                        digest.update(hashlib.sha256(path.read_bytes()).digest())
+                        found = True
+            return digest.hexdigest() if found else ''
+
+        return {
+            'always': lambda: True,
+            'cancelled': lambda: False,
+            'success': lambda: not failed,
+            'failure': lambda: failed,
+            'hashfiles': hash_files,
+            'contains': lambda haystack, needle: (_text(needle).lower() in _text(haystack).lower()
+                                                  if not isinstance(haystack, list)
+                                                  else any(_equal(item, needle) for item in haystack)),
+            'startswith': lambda text, prefix: _text(text).lower().startswith(_text(prefix).lower()),
+            'endswith': lambda text, suffix: _text(text).lower().endswith(_text(suffix).lower()),
+            'format': lambda template, *args: re.sub(r'\{(\d+)\}', lambda m: _text(args[int(m.group(1))]), template),
+            'tojson': lambda value: json.dumps(value, indent=2),
+            'fromjson': lambda text: json.loads(text)
+        }
+
+    def run_job(self, name, job, context, ref_name):
+        started = time.monotonic()
+        workspace = Path(tempfile.mkdtemp(prefix=f'{name}-', dir=self.work_dir))
+        context = {**context, 'steps': {}, 'job': {'status': 'success'},
+                   'env': {**context['env'], **(job.get('env') or {})}}
+        failed = False
+        steps = []
+        for index, step in enumerate(job.get('steps') or []):
+            label = step.get('name') or step.get('uses') or f'step {index + 1}'
+            functions = self.functions(workspace, failed)
+            if not condition(step.get('if'), context, functions):
+                steps.append(StepResult(label, 'skipped', 0.0))
+                continue
+
+            step_started = time.monotonic()
+            output_file = self.work_dir / f'output-{self.run_id}-{name}-{index}'
+            output_file.write_text('')
+            try:
+                if 'uses' in step:
+                    outputs = self.run_action(step, context, functions, workspace, ref_name)
+                else:
+                    outputs = self.run_script(step, context, functions, workspace, output_file, label)
+                outcome = 'success'
+            except subprocess.CalledProcessError:
+                outputs, outcome = _read_outputs(output_file), 'failure'
+                failed = True
+                context['job']['status'] = 'failure'
+            if step.get('id'):
+                context['steps'][step['id']] = {'outputs': outputs, 'outcome': outcome, 'conclusion': outcome}
+            steps.append(StepResult(label, outcome, time.monotonic() - step_started))
+            if self.verbose:
+                print(f"    {label}: {outcome} ({steps[-1].seconds:.2f}s)")
+
+        outputs = {key: interpolate(str(value), context, self.functions(workspace, failed))
+                   for key, value in (job.get('outputs') or {}).items()}
+        return JobResult(name, 'failure' if failed else 'success', time.monotonic() - started, outputs, steps)
+
+    def run_action(self, step, context, functions, workspace, ref_name):
+        action = step['uses'].split('@', 1)[0]
+        options = {key: interpolate(_text(value), context, functions) for key, value in (step.get('with') or {}).items()}
+        paths = [line.strip() for line in options.get('path', '').splitlines() if line.strip()]
+
+        if action == 'actions/checkout':
+            depth = int(options.get('fetch-depth') or 1)
+            command = ['git', 'clone', '--quiet', '--branch', ref_name, f'file://{self.origin}', str(workspace)]
+            if depth:
+                command[2:2] = ['--depth', str(depth)]
+            shutil.rmtree(workspace)
+            subprocess.run(command, check=True)
+            # The steps import kiro_sync from scripts/; link the tree under test into the checkout
+            (workspace / 'scripts').mkdir(exist_ok=True)
+            for package in SCRIPTS_DIR.iterdir():
+                if not (workspace / 'scripts' / package.name).exists():
+                    (workspace / 'scripts' / package.name).symlink_to(package)
+            return {}
+        if action == 'actions/cache/restore':
+            restore_keys = [line.strip() for line in options.get('restore-keys', '').splitlines() if line.strip()]
+            matched = self.cache.restore(options['key'], restore_keys, workspace)
+            return {'cache-hit': _text(matched == options['key']), 'cache-matched-key': matched or '',
+                    'cache-primary-key': options['key']}
+        if action == 'actions/cache/save':
+            self.cache.save(options['key'], paths, workspace)
+            return {}
+        # setup-python and upload-artifact: the interpreter is already here and traces stay in the workspace
+        return {}
+
+    def run_script(self, step, context, functions, workspace, output_file, label):
+        env = self.base_env(context['github'], workspace, output_file)
+        for scope in (context['env'], step.get('env') or {}):
+            env.update({key: interpolate(_text(value), context, functions) for key, value in scope.items()})
+        script = self.work_dir / f'{output_file.name}.sh'
+        script.write_text(interpolate(step['run'], context, functions))
+        log = self.work_dir / f'{output_file.name}.log'
+        with open(log, 'w') as f:
+            result = subprocess.run(['bash', '--noprofile', '--norc', '-eo', 'pipefail', str(script)],
+                                    cwd=workspace, env=env, stdout=None if self.verbose else f,
+                                    stderr=subprocess.STDOUT)
+        if result.returncode != 0:
+            if not self.verbose:
+                tail = log.read_text().splitlines()[-20:]
+                print(f"    step '{label}' failed with status {result.returncode}:")
+                print('\n'.join(f'      {line}' for line in tail))
+            raise subprocess.CalledProcessError(result.returncode, str(script))
+        return _read_outputs(output_file)
+
+
+# -- emulator and scenarios -------------------------------------------------------------
+
+
+def start_emulator(options):
+    """Start benchmarks.fakegithub on a free port; return (process, base URL)"""
+    env = dict(os.environ, PYTHONPATH=str(SCRIPTS_DIR))
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.fakegithub', '--port', '0', *options],
+                               env=env, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    match = re.search(r'http://\S+', line)
+    if not match:
+        process.kill()
+        raise RuntimeError(f"The emulator did not start: {line.strip() or 'no output'}")
+    return process, match.group()
+
+
+def emulator_call(api_url, path, method='GET'):
+    request = urllib.request.Request(f'{api_url}{path}', method=method)
+    with urllib.request.urlopen(request) as response:
+        body = response.read()
+    return json.loads(body) if body else None
+
+
+def prepare_origin(directory, tasks, commits):
+    """Create the origin repository: the spec committed on main, TASK_BRANCH `commits` ahead"""
+    origin = generate_history(directory, commits, branch=TASK_BRANCH)
+    git = ['git', '-C', str(origin), '-c', 'user.name=Bench', '-c', 'user.email=bench@example.com']
+    subprocess.run([*git, 'checkout', '--quiet', 'main'], check=True)
+    generate_spec(origin / '.kiro' / 'specs' / SPEC, tasks)
+    subprocess.run([*git, 'add', '.kiro'], check=True)
+    subprocess.run([*git, 'commit', '--quiet', '-m', f'Add the {SPEC} spec'], check=True)
+    return origin
+
+
+def scenarios(tasks, workers):
+    spec_dir = f'.kiro/specs/{SPEC}'
+    inputs = {
+        'requirements_file': f'{spec_dir}/requirements.md', 'design_file': f'{spec_dir}/design.md',
+        'tasks_file': f'{spec_dir}/tasks.md', 'project_name': 'Benchmark Feature',
+        'milestone_name': 'Offline Benchmark', 'issue_workers': str(workers), 'sync_mode': 'sync'
+    }
+    integration = WORKFLOWS_DIR / 'kiro-integration.yml'
+    auto_pr = WORKFLOWS_DIR / 'auto-pr-creation.yml'
+    push = {'ref': f'refs/heads/{TASK_BRANCH}', 'deleted': False, 'created': True}
+    return [
+        ('integration', integration, 'workflow_dispatch', 'main', inputs, {}),
+        ('integration:noop', integration, 'workflow_dispatch', 'main', inputs, {}),
+        ('auto-pr', auto_pr, 'push', TASK_BRANCH, None, push),
+        ('auto-pr:noop', auto_pr, 'push', TASK_BRANCH, None, {**push, 'created': False})
+    ]
+
+
+def call_delta(before, after):
+    calls = Counter(after['calls'])
+    calls.subtract(before['calls'])
+    return {route: count for route, count in sorted(calls.items()) if count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the generated workflows end to end against the GitHub emulator')
+    parser.add_argument('--tasks', default=DEFAULT_TASK_SCALES, help='Comma-separated task counts')
+    parser.add_argument('--commits', type=int, default=200, help='Commits on the task branch')
+    parser.add_argument('--workers', type=int, default=4, help='issue_workers input of the integration workflow')
+    parser.add_argument('--profile', default='instant', help='Emulator latency preset')
+    parser.add_argument('--latency', action='append', default=[], help='Passed to the emulator')
+    parser.add_argument('--fail', action='append', default=[], help='Passed to the emulator')
+    parser.add_argument('--rate-limit', action='append', default=[], help='Passed to the emulator')
+    parser.add_argument('--secondary-limit', help='Passed to the emulator')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for emulator jitter and failures')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--keep', action='store_true', help='Keep the work directory for inspection')
+    parser.add_argument('--verbose', action='store_true', help='Show every step and its output')
+    args = parser.parse_args()
+
+    options = ['--profile', args.profile, '--seed', str(args.seed)]
+    for flag, values in (('--latency', args.latency), ('--fail', args.fail), ('--rate-limit', args.rate_limit)):
+        for value in values:
+            options += [flag, value]
+    if args.secondary_limit:
+        options += ['--secondary-limit', args.secondary_limit]
+
+    process, api_url = start_emulator(options)
+    work_dir = Path(tempfile.mkdtemp(prefix='kiro-e2e-'))
+    results = []
+    failed = False
+    try:
+        print(f"Emulator at {api_url}, work directory {work_dir}\n")
+        print(f"{'scenario':<18} {'tasks':>6}  {'result':<8} {'wall':>9}  {'calls':>6}  jobs")
+        for tasks in [int(scale) for scale in args.tasks.split(',') if scale.strip()]:
+            emulator_call(api_url, '/_emulator/reset', 'POST')
+            scale_dir = work_dir / f'tasks-{tasks}'
+            origin = prepare_origin(scale_dir / 'origin', tasks, args.commits)
+            runner = WorkflowRunner(origin, api_url, 'offline-token', LocalCache(scale_dir / 'cache'), scale_dir,
+                                    args.verbose)
+            for name, workflow, event_name, ref, inputs, event in scenarios(tasks, args.workers):
+                before = emulator_call(api_url, '/_emulator/stats')
+                started = time.monotonic()
+                jobs = runner.run(workflow, event_name, ref, inputs, event)
+                wall = time.monotonic() - started
+                calls = call_delta(before, emulator_call(api_url, '/_emulator/stats'))
+                result = 'failure' if any(job.result == 'failure' for job in jobs) else 'success'
+                failed = failed or result == 'failure'
+                summary = ', '.join(f'{job.name} {job.seconds:.2f}s' if job.result != 'skipped'
+                                    else f'{job.name} skipped' for job in jobs)
+                print(f"{name:<18} {tasks:>6}  {result:<8} {wall:8.2f}s  {sum(calls.values()):>6}  {summary}")
+                results.append({'scenario': name, 'tasks': tasks, 'result': result, 'wall': wall, 'calls': calls,
+                                'jobs': [{'name': job.name, 'result': job.result, 'seconds': job.seconds,
+                                          'steps': [step._asdict() for step in job.steps]} for job in jobs]})
+    finally:
+        process.terminate()
+        process.wait()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'emulator': options, 'commits': args.commits, 'workers': args.workers, 'runs': results}, f,
+                      indent=2)
+        print(f"\nResults written to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
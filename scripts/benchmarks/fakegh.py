@@ -0,0 +1,463 @@
+"""
+Drop-in `gh` CLI for the offline GitHub API emulator
+
+Usage:
+    PATH="$PWD/scripts/benchmarks/bin:$PATH" GITHUB_API_URL=http://127.0.0.1:8787 GH_TOKEN=offline \\
+        gh pr list --head feature/task-1 --json number --jq '.[0].number // empty'
+
+scripts/benchmarks/bin/gh runs this module, so workflow steps that shell out
+to gh talk to benchmarks.fakegithub through GITHUB_API_URL instead of
+github.com. It covers the commands the generated workflows and helper
+scripts use, with gh's flags and output: `api` (REST and graphql, -f/-F
+fields, --paginate, --jq), `pr list|view|create`, `issue
+list|view|create|close|reopen|comment`, `workflow run`, `repo view` and
+`auth status|token`. --jq runs jq when it is installed and otherwise
+understands plain paths with `// default`, such as `.[0].number // empty`.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+from kiro_sync.client import GitHubApiError, GitHubClient
+from kiro_sync.watch import detect_repository
+
+VERSION = 'gh version 2.0.0-offline (benchmarks.fakegh)'
+JQ_PATH = re.compile(r'\.(\w+)|\[(-?\d+)\]|\.')
+PR_FIELDS = {
+    'number': lambda pull: pull['number'],
+    'title': lambda pull: pull['title'],
+    'body': lambda pull: pull.get('body') or '',
+    'url': lambda pull: pull['html_url'],
+    'state': lambda pull: pull['state'].upper(),
+    'headRefName': lambda pull: pull['head']['ref'],
+    'baseRefName': lambda pull: pull['base']['ref'],
+    'isDraft': lambda pull: pull.get('draft', False),
+    'labels': lambda pull: [{'name': label['name']} for label in pull.get('labels', [])],
+    'createdAt': lambda pull: pull['created_at']
+}
+ISSUE_FIELDS = {
+    'number': lambda issue: issue['number'],
+    'title': lambda issue: issue['title'],
+    'body': lambda issue: issue.get('body') or '',
+    'url': lambda issue: issue['html_url'],
+    'state': lambda issue: issue['state'].upper(),
+    'labels': lambda issue: [{'name': label['name']} for label in issue.get('labels', [])],
+    'milestone': lambda issue: {'title': issue['milestone']['title']} if issue.get('milestone') else None,
+    'createdAt': lambda issue: issue['created_at'],
+    'closedAt': lambda issue: issue['closed_at']
+}
+
+
+class CommandError(Exception):
+    """Printed to stderr as `gh` would, exiting with status 1"""
+
+
+def _simple_jq(expression, data):
+    """Evaluate '.a.b', '.[0].c' or either with '// default' without jq"""
+    path, _, default = expression.partition('//')
+    value = data
+    for key, index in JQ_PATH.findall(path.strip()):
+        if value is None:
+            break
+        if key:
+            value = value.get(key) if isinstance(value, dict) else None
+        elif index:
+            value = value[int(index)] if isinstance(value, list) and -len(value) <= int(index) < len(value) else None
+    if (value is None or value is False) and default.strip():
+        default = default.strip()
+        return [] if default == 'empty' else [json.loads(default)]
+    return [value]
+
+
+def apply_jq(expression, data):
+    """Return the text gh prints for --jq: raw strings, one result per line"""
+    if shutil.which('jq'):
+        result = subprocess.run(['jq', '-r', expression], input=json.dumps(data), capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(result.stderr.strip() or f'jq failed on {expression!r}')
+        return result.stdout
+    lines = []
+    for value in _simple_jq(expression, data):
+        lines.append(value if isinstance(value, str) else json.dumps(value))
+    return ''.join(f'{line}\n' for line in lines)
+
+
+def emit(data, jq=None):
+    """Print JSON output, filtered by --jq when given"""
+    if jq:
+        sys.stdout.write(apply_jq(jq, data))
+    else:
+        print(json.dumps(data, indent=2 if sys.stdout.isatty() else None))
+
+
+def select_fields(items, fields, table):
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in table]
+    if unknown:
+        raise CommandError(f"Unknown JSON field: {unknown[0]!r}\nAvailable fields:\n  " + '\n  '.join(table))
+    return [{name: table[name](item) for name in names} for item in items]
+
+
+def resolve_repo(args):
+    repo = getattr(args, 'repo', None) or os.environ.get('GH_REPO') or detect_repository()
+    if not repo:
+        raise CommandError('could not determine the repository; pass --repo OWNER/NAME')
+    return repo.split('github.com/')[-1]
+
+
+def make_client(args):
+    token = os.environ.get('GH_TOKEN') or os.environ.get('GITHUB_TOKEN')
+    if not token:
+        raise CommandError('To get started with GitHub CLI, please run:  gh auth login\n'
+                           'Alternatively, populate the GH_TOKEN environment variable with a GitHub API token.')
+    return GitHubClient(resolve_repo(args) if getattr(args, 'needs_repo', True) else '', token=token)
+
+
+def parse_fields(pairs, typed):
+    """-f key=value (strings) and -F key=value (numbers, booleans, null, @file) into a dict"""
+    fields = {}
+    for pair in pairs or ():
+        key, _, value = pair.partition('=')
+        if typed:
+            if value.startswith('@'):
+                with open(value[1:], 'r') as f:
+                    value = f.read()
+            elif value in ('true', 'false', 'null') or re.fullmatch(r'-?\d+', value):
+                value = json.loads(value)
+        fields[key] = value
+    return fields
+
+
+# -- commands -------------------------------------------------------------------------
+
+
+def cmd_api(args):
+    args.needs_repo = '{owner}' in args.endpoint or '{repo}' in args.endpoint
+    client = make_client(args)
+    endpoint = args.endpoint
+    if args.needs_repo:
+        owner, name = client.repo.split('/', 1)
+        endpoint = endpoint.replace('{owner}', owner).replace('{repo}', name)
+
+    fields = {**parse_fields(args.raw_field, False), **parse_fields(args.field, True)}
+    if endpoint == 'graphql':
+        query = fields.pop('query', '')
+        response = client.request('POST', client.graphql_url, {'query': query, 'variables': fields})
+        if (response.data or {}).get('errors'):
+            emit(response.data, args.jq)
+            messages = '\n'.join(error.get('message', '') for error in response.data['errors'])
+            raise CommandError(f'GraphQL: {messages}')
+        emit(response.data, args.jq)
+        return 0
+
+    method = (args.method or ('POST' if fields or args.input else 'GET')).upper()
+    payload = None
+    params = None
+    if args.input:
+        with open(args.input, 'r') if args.input != '-' else sys.stdin as f:
+            payload = json.load(f)
+    elif fields and method == 'GET':
+        params = fields
+    elif fields:
+        payload = fields
+
+    if args.paginate and method == 'GET':
+        data = list(client.paginate(endpoint, params))
+    else:
+        data = client.request(method, endpoint, payload, params).data
+    if not args.silent and data is not None:
+        emit(data, args.jq)
+    return 0
+
+
+def cmd_pr_list(args):
+    client = make_client(args)
+    state = 'closed' if args.state == 'merged' else args.state
+    params = {'state': state, **_pr_filters(client, args)}
+    pulls = [pull for pull in client.paginate(f'repos/{client.repo}/pulls', params)
+             if not args.label or args.label in (label['name'] for label in pull.get('labels', []))]
+    pulls = pulls[:args.limit]
+    if args.json:
+        emit(select_fields(pulls, args.json, PR_FIELDS), args.jq)
+    else:
+        for pull in pulls:
+            print(f"{pull['number']}\t{pull['title']}\t{pull['head']['ref']}\t{pull['state'].upper()}")
+    return 0
+
+
+def _pr_filters(client, args):
+    filters = {}
+    if args.head:
+        filters['head'] = args.head if ':' in args.head else f"{client.repo.split('/')[0]}:{args.head}"
+    if args.base:
+        filters['base'] = args.base
+    return filters
+
+
+def cmd_pr_view(args):
+    client = make_client(args)
+    target = args.target or os.environ.get('GITHUB_HEAD_REF') or os.environ.get('GITHUB_REF_NAME')
+    if target and target.isdigit():
+        pull = client.request('GET', f'repos/{client.repo}/pulls/{target}').data
+    else:
+        pulls = list(client.paginate(f'repos/{client.repo}/pulls',
+                                     {'state': 'all', 'head': f"{client.repo.split('/')[0]}:{target}"}))
+        if not pulls:
+            raise CommandError(f'no pull requests found for branch "{target}"')
+        pull = pulls[0]
+    if args.json:
+        emit(select_fields([pull], args.json, PR_FIELDS)[0], args.jq)
+    else:
+        print(f"{pull['title']} #{pull['number']}")
+        print(f"{pull['state']} • {pull['head']['ref']} into {pull['base']['ref']}")
+        print(f"\n{pull.get('body') or ''}\n\nView this pull request on GitHub: {pull['html_url']}")
+    return 0
+
+
+def cmd_pr_create(args):
+    client = make_client(args)
+    head = args.head or os.environ.get('GITHUB_REF_NAME')
+    if not head:
+        raise CommandError('could not determine the head branch; pass --head')
+    pull = client.request('POST', f'repos/{client.repo}/pulls', {
+        'title': args.title, 'body': args.body or '', 'base': args.base or 'main', 'head': head}).data
+    if args.label:
+        client.add_labels(pull['number'], _split_labels(args.label))
+    print(pull['html_url'])
+    return 0
+
+
+def _split_labels(values):
+    return [label.strip() for value in values or () for label in value.split(',') if label.strip()]
+
+
+def cmd_issue_list(args):
+    client = make_client(args)
+    if args.search:
+        state = '' if args.state == 'all' else f' state:{args.state}'
+        query = f'repo:{client.repo} is:issue{state} {args.search}'
+        issues = client.paginate('search/issues', {'q': query})
+    else:
+        params = {'state': args.state}
+        if args.label:
+            params['labels'] = ','.join(_split_labels(args.label))
+        issues = client.paginate(f'repos/{client.repo}/issues', params)
+    issues = [issue for issue in issues if 'pull_request' not in issue][:args.limit]
+    if args.json:
+        emit(select_fields(issues, args.json, ISSUE_FIELDS), args.jq)
+    else:
+        for issue in issues:
+            labels = ', '.join(label['name'] for label in issue.get('labels', []))
+            print(f"{issue['number']}\t{issue['state'].upper()}\t{issue['title']}\t{labels}\t{issue['updated_at']}")
+    return 0
+
+
+def cmd_issue_view(args):
+    client = make_client(args)
+    issue = client.request('GET', f'repos/{client.repo}/issues/{args.number}').data
+    if args.json:
+        emit(select_fields([issue], args.json, ISSUE_FIELDS)[0], args.jq)
+    else:
+        print(f"{issue['title']} #{issue['number']}\n{issue['state']}\n\n{issue.get('body') or ''}")
+    return 0
+
+
+def cmd_issue_create(args):
+    client = make_client(args)
+    milestone = None
+    if args.milestone:
+        matches = [item for item in client.list_milestones() if item.title == args.milestone]
+        if not matches:
+            raise CommandError(f"could not add to milestone '{args.milestone}': not found")
+        milestone = matches[0].number
+    issue = client.create_issue(args.title, args.body or '', _split_labels(args.label), milestone)
+    print(issue.url)
+    return 0
+
+
+def cmd_issue_state(args, state):
+    client = make_client(args)
+    fields = {'state': state}
+    if state == 'closed' and args.reason:
+        fields['state_reason'] = args.reason.replace(' ', '_')
+    issue = client.update_issue(args.number, **fields)
+    verb = 'Closed' if state == 'closed' else 'Reopened'
+    print(f"✓ {verb} issue #{issue.number} ({issue.title})", file=sys.stderr)
+    return 0
+
+
+def cmd_issue_comment(args):
+    client = make_client(args)
+    comment = client.comment_on_issue(args.number, args.body)
+    print(comment.get('html_url', ''))
+    return 0
+
+
+def cmd_workflow_run(args):
+    client = make_client(args)
+    inputs = {**parse_fields(args.raw_field, False), **parse_fields(args.field, False)}
+    client.request('POST', f'repos/{client.repo}/actions/workflows/{args.workflow}/dispatches',
+                   {'ref': args.ref or 'main', 'inputs': inputs})
+    print(f"✓ Created workflow_dispatch event for {args.workflow} at {args.ref or 'main'}", file=sys.stderr)
+    return 0
+
+
+def cmd_repo_view(args):
+    client = make_client(args)
+    repo = client.request('GET', f'repos/{client.repo}').data
+    if args.json:
+        table = {'nameWithOwner': lambda data: data['full_name'], 'name': lambda data: data['name'],
+                 'url': lambda data: data['html_url'], 'id': lambda data: data['node_id'],
+                 'defaultBranchRef': lambda data: {'name': data['default_branch']}}
+        emit(select_fields([repo], args.json, table)[0], args.jq)
+    else:
+        print(f"name:\t{repo['full_name']}\n")
+    return 0
+
+
+def cmd_auth(args):
+    token = os.environ.get('GH_TOKEN') or os.environ.get('GITHUB_TOKEN')
+    if args.auth_command == 'token':
+        if not token:
+            raise CommandError('no oauth token found for github.com')
+        print(token)
+        return 0
+    if not token:
+        print('You are not logged into any GitHub hosts. To log in, run: gh auth login', file=sys.stderr)
+        return 1
+    print(f"github.com (offline emulator at {os.environ.get('GITHUB_API_URL', 'GITHUB_API_URL unset')})\n"
+          f"  ✓ Logged in to github.com using token from the environment", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='gh', description='Offline gh for the GitHub API emulator')
+    parser.add_argument('--version', action='version', version=VERSION)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def output_options(sub):
+        sub.add_argument('--json', help='Comma-separated fields to output as JSON')
+        sub.add_argument('-q', '--jq', help='Filter JSON output with a jq expression')
+
+    api = commands.add_parser('api')
+    api.add_argument('endpoint')
+    api.add_argument('-X', '--method')
+    api.add_argument('-f', '--raw-field', action='append')
+    api.add_argument('-F', '--field', action='append')
+    api.add_argument('-H', '--header', action='append', help='Accepted and ignored')
+    api.add_argument('-q', '--jq')
+    api.add_argument('--paginate', action='store_true')
+    api.add_argument('--input')
+    api.add_argument('--silent', action='store_true')
+    api.add_argument('--hostname', help='Accepted and ignored; GITHUB_API_URL selects the server')
+    api.set_defaults(handler=cmd_api)
+
+    pr = commands.add_parser('pr').add_subparsers(dest='pr_command', required=True)
+    pr_list = pr.add_parser('list')
+    pr_list.add_argument('-R', '--repo')
+    pr_list.add_argument('-H', '--head')
+    pr_list.add_argument('-B', '--base')
+    pr_list.add_argument('-s', '--state', choices=('open', 'closed', 'merged', 'all'), default='open')
+    pr_list.add_argument('-l', '--label')
+    pr_list.add_argument('-L', '--limit', type=int, default=30)
+    output_options(pr_list)
+    pr_list.set_defaults(handler=cmd_pr_list)
+
+    pr_view = pr.add_parser('view')
+    pr_view.add_argument('target', nargs='?')
+    pr_view.add_argument('-R', '--repo')
+    output_options(pr_view)
+    pr_view.set_defaults(handler=cmd_pr_view)
+
+    pr_create = pr.add_parser('create')
+    pr_create.add_argument('-R', '--repo')
+    pr_create.add_argument('-t', '--title', required=True)
+    pr_create.add_argument('-b', '--body')
+    pr_create.add_argument('-B', '--base')
+    pr_create.add_argument('-H', '--head')
+    pr_create.add_argument('-l', '--label', action='append')
+    pr_create.set_defaults(handler=cmd_pr_create)
+
+    issue = commands.add_parser('issue').add_subparsers(dest='issue_command', required=True)
+    issue_list = issue.add_parser('list')
+    issue_list.add_argument('-R', '--repo')
+    issue_list.add_argument('-l', '--label', action='append')
+    issue_list.add_argument('-s', '--state', choices=('open', 'closed', 'all'), default='open')
+    issue_list.add_argument('-S', '--search')
+    issue_list.add_argument('-L', '--limit', type=int, default=30)
+    output_options(issue_list)
+    issue_list.set_defaults(handler=cmd_issue_list)
+
+    issue_view = issue.add_parser('view')
+    issue_view.add_argument('number', type=int)
+    issue_view.add_argument('-R', '--repo')
+    output_options(issue_view)
+    issue_view.set_defaults(handler=cmd_issue_view)
+
+    issue_create = issue.add_parser('create')
+    issue_create.add_argument('-R', '--repo')
+    issue_create.add_argument('-t', '--title', required=True)
+    issue_create.add_argument('-b', '--body')
+    issue_create.add_argument('-l', '--label', action='append')
+    issue_create.add_argument('-m', '--milestone')
+    issue_create.set_defaults(handler=cmd_issue_create)
+
+    for name, state in (('close', 'closed'), ('reopen', 'open')):
+        sub = issue.add_parser(name)
+        sub.add_argument('number', type=int)
+        sub.add_argument('-R', '--repo')
+        if name == 'close':
+            sub.add_argument('-r', '--reason', choices=('completed', 'not planned'))
+        sub.set_defaults(handler=lambda args, state=state: cmd_issue_state(args, state))
+
+    issue_comment = issue.add_parser('comment')
+    issue_comment.add_argument('number', type=int)
+    issue_comment.add_argument('-R', '--repo')
+    issue_comment.add_argument('-b', '--body', required=True)
+    issue_comment.set_defaults(handler=cmd_issue_comment)
+
+    workflow = commands.add_parser('workflow').add_subparsers(dest='workflow_command', required=True)
+    workflow_run = workflow.add_parser('run')
+    workflow_run.add_argument('workflow')
+    workflow_run.add_argument('-R', '--repo')
+    workflow_run.add_argument('-r', '--ref')
+    workflow_run.add_argument('-f', '--raw-field', action='append')
+    workflow_run.add_argument('-F', '--field', action='append')
+    workflow_run.set_defaults(handler=cmd_workflow_run)
+
+    repo = commands.add_parser('repo').add_subparsers(dest='repo_command', required=True)
+    repo_view = repo.add_parser('view')
+    repo_view.add_argument('repo', nargs='?')
+    output_options(repo_view)
+    repo_view.set_defaults(handler=cmd_repo_view)
+
+    auth = commands.add_parser('auth')
+    auth.add_argument('auth_command', choices=('status', 'token'))
+    auth.add_argument('--hostname', help='Accepted and ignored')
+    auth.set_defaults(handler=cmd_auth)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except GitHubApiError as e:
+        if e.status == 0:
+            print(f'error connecting to {os.environ.get("GITHUB_API_URL", "api.github.com")}: {e.message}',
+                  file=sys.stderr)
+        else:
+            print(f'gh: {e.message} (HTTP {e.status})', file=sys.stderr)
+        return 1
+    except CommandError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1285 @@
+"""
+Offline GitHub API emulator for end-to-end runs of the workflow scripts
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m benchmarks.fakegithub --port 8787
+    PYTHONPATH=scripts python3 -m benchmarks.fakegithub --profile github --fail issues.create=5%:502 \\
+        --rate-limit core=1000/3600 --secondary-limit 80/60
+
+    export GITHUB_API_URL=http://127.0.0.1:8787 GITHUB_TOKEN=offline PATH="$PWD/scripts/benchmarks/bin:$PATH"
+
+Implements the part of the API the generated workflows touch. Over REST that
+is issues (list, get, create, update), comments, labels, milestones, pull
+requests, issue search, workflow dispatches and /rate_limit. Over GraphQL it
+is the repository, issue, pull request, label and search queries plus the
+issue state, label, sub-issue, comment, issue and pull request mutations
+(benchmarks.graphql). Repositories are created empty on first use and live
+in memory; issues and pull requests share one numbering per repository, as
+on GitHub. scripts/benchmarks/bin/gh is a drop-in `gh` for the same server,
+and benchmarks.e2e runs the generated workflows against it.
+
+Each route can be given a latency (mean~jitter) and a failure rate through
+--profile, --latency and --fail. Every response carries x-ratelimit-*
+headers from per-resource budgets (--rate-limit): a spent budget answers 403
+"API rate limit exceeded" until its reset, and content-creating calls (REST
+writes and GraphQL mutation fields) beyond --secondary-limit get a 403 with
+retry-after, like GitHub's secondary limits. GET /_emulator/stats returns
+call counts per route and POST /_emulator/reset empties the store.
+
+Responses go out as a single write of headers and body. A split write on a
+keep-alive connection lets Nagle's algorithm hold the body back until the
+client's delayed ACK of the headers, which adds 40 ms to every call.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from collections import Counter, deque
+from typing import NamedTuple
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+
+from .graphql import GraphQLError, execute, parse
+
+REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 401: 'Unauthorized', 403: 'Forbidden',
+           404: 'Not Found', 422: 'Unprocessable Entity', 500: 'Internal Server Error', 502: 'Bad Gateway',
+           503: 'Service Unavailable'}
+DEFAULT_PER_PAGE = 30
+MAX_PER_PAGE = 100
+SUB_ISSUE_LIMIT = 100
+WEB_URL = 'https://github.com'
+SEARCH_TOKEN = re.compile(r'(-?)(\w+):("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+WORD = re.compile(r'\w+')
+
+
+class Profile(NamedTuple):
+    latency: float = 0.0  # seconds before the response starts
+    jitter: float = 0.0  # +/- seconds, uniformly distributed
+
+
+# Rough medians of github.com seen from a hosted runner; writes are the slow calls
+PROFILES = {
+    'instant': {},
+    'github': {
+        '*': Profile(0.06, 0.02),
+        'issues.create': Profile(0.3, 0.1),
+        'issues.update': Profile(0.2, 0.06),
+        'pulls.create': Profile(0.5, 0.15),
+        'search.issues': Profile(0.2, 0.08),
+        'graphql': Profile(0.15, 0.05)
+    }
+}
+
+# resource -> (limit, window in seconds), as for a GITHUB_TOKEN
+RATE_LIMITS = {'core': (5000, 3600), 'search': (30, 60), 'graphql': (5000, 3600)}
+
+
+class Fault(NamedTuple):
+    rate: float  # fraction of calls that fail
+    status: int  # 0 drops the connection without an answer
+
+
+def parse_duration(text):
+    """'250ms', '0.25s' or '0.25' to seconds"""
+    text = text.strip().lower()
+    if text.endswith('ms'):
+        return float(text[:-2]) / 1000
+    return float(text.rstrip('s'))
+
+
+def parse_fraction(text):
+    """'5%' or '0.05' to 0.05"""
+    text = text.strip()
+    return float(text[:-1]) / 100 if text.endswith('%') else float(text)
+
+
+def _now():
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+class HttpReply(Exception):
+    """Raised by handlers to answer with an error status"""
+
+    def __init__(self, status, message, headers=None, **extra):
+        super().__init__(message)
+        self.status = status
+        self.body = {'message': message, **extra}
+        self.headers = headers or {}
+
+
+def validation_failed(resource, code, field=None, message=None):
+    error = {'resource': resource, 'code': code}
+    if field:
+        error['field'] = field
+    if message:
+        error['message'] = message
+    return HttpReply(422, 'Validation Failed', errors=[error])
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: dict
+    headers: dict
+    body: object
+
+
+class Budget:
+    """Primary rate limit of one resource: `limit` calls per fixed window"""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.used = 0
+        self.reset = time.time() + window
+
+    def spend(self, cost=1):
+        now = time.time()
+        if now >= self.reset:
+            self.used, self.reset = 0, now + self.window
+        if self.used + cost > self.limit:
+            return False
+        self.used += cost
+        return True
+
+    def snapshot(self):
+        return {'limit': self.limit, 'used': self.used, 'remaining': max(0, self.limit - self.used),
+                'reset': int(self.reset)}
+
+    def headers(self, resource):
+        state = self.snapshot()
+        return {'X-RateLimit-Limit': state['limit'], 'X-RateLimit-Remaining': state['remaining'],
+                'X-RateLimit-Used': state['used'], 'X-RateLimit-Reset': state['reset'],
+                'X-RateLimit-Resource': resource}
+
+
+class SecondaryLimit:
+    """Sliding window over content-creating calls; returns the retry-after of a call over the limit"""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.calls = deque()
+
+    def check(self, cost=1):
+        now = time.monotonic()
+        while self.calls and self.calls[0] <= now - self.window:
+            self.calls.popleft()
+        if len(self.calls) + cost > self.limit:
+            return max(1, int(self.calls[0] + self.window - now) + 1) if self.calls else int(self.window)
+        self.calls.extend([now] * cost)
+        return None
+
+
+class Repository:
+    """In-memory state of one repository; issues and pull requests share the numbering"""
+
+    def __init__(self, owner, name, database_id):
+        self.owner = owner
+        self.name = name
+        self.full_name = f'{owner}/{name}'
+        self.database_id = database_id
+        self.node_id = f'R_{database_id}'
+        self.issues = {}  # number -> issue or pull request record
+        self.labels = {}  # lower-case name -> label record
+        self.milestones = {}  # number -> milestone record
+        self.dispatches = []
+        self.next_number = 1
+        self.next_comment = 1
+        self.next_label = 1
+        self.next_milestone = 1
+
+    @property
+    def url(self):
+        return f'{WEB_URL}/{self.full_name}'
+
+    # Labels
+
+    def label(self, name, create=False):
+        label = self.labels.get(name.lower())
+        if label is None and create:
+            label = self.create_label(name)
+        return label
+
+    def create_label(self, name, color='ededed', description=''):
+        label = {'id': self.next_label, 'node_id': f'LA_{self.database_id}_{self.next_label}', 'name': name,
+                 'color': color.lstrip('#'), 'description': description or None}
+        self.next_label += 1
+        self.labels[name.lower()] = label
+        return label
+
+    def label_by_node(self, node_id):
+        return next((label for label in self.labels.values() if label['node_id'] == node_id), None)
+
+    # Issues and pull requests
+
+    def create_issue(self, title, body='', labels=(), milestone=None, pull=None):
+        number = self.next_number
+        self.next_number += 1
+        now = _now()
+        prefix = 'PR' if pull else 'I'
+        record = {
+            'number': number, 'node_id': f'{prefix}_{self.database_id}_{number}', 'title': title, 'body': body or '',
+            'state': 'open', 'state_reason': None, 'labels': [], 'milestone': milestone,
+            'created_at': now, 'updated_at': now, 'closed_at': None, 'comments': [],
+            'pull': pull, 'parent': None, 'children': []
+        }
+        self.set_labels(record, labels)
+        self.issues[number] = record
+        return record
+
+    def set_labels(self, record, names):
+        record['labels'] = list(dict.fromkeys(self.label(name, create=True)['name'] for name in names))
+
+    def set_state(self, record, state, reason=None):
+        if state == record['state']:
+            return
+        record['state'] = state
+        record['state_reason'] = (reason or 'completed') if state == 'closed' else 'reopened'
+        record['closed_at'] = _now() if state == 'closed' else None
+
+    def issue(self, number, pulls=False):
+        record = self.issues.get(int(number))
+        if record is None or bool(record['pull']) != pulls:
+            return None
+        return record
+
+    def add_comment(self, record, body):
+        comment = {'id': self.next_comment, 'node_id': f'IC_{self.database_id}_{self.next_comment}', 'body': body,
+                   'created_at': _now(), 'issue': record['number']}
+        self.next_comment += 1
+        record['comments'].append(comment)
+        record['updated_at'] = comment['created_at']
+        return comment
+
+    def open_pull(self, head, base):
+        return next((record for record in self.issues.values()
+                     if record['pull'] and record['state'] == 'open'
+                     and record['pull']['head'] == head and record['pull']['base'] == base), None)
+
+    def add_sub_issue(self, parent, child, replace_parent=False):
+        if parent is child:
+            raise GraphQLError('An issue cannot be a sub-issue of itself', 'UNPROCESSABLE')
+        if child['parent'] == parent['number']:
+            return
+        if child['parent'] and not replace_parent:
+            raise GraphQLError('Issue may not contain duplicate sub-issues and a sub-issue can only have one parent',
+                               'UNPROCESSABLE')
+        if len(parent['children']) >= SUB_ISSUE_LIMIT:
+            raise GraphQLError(f'Parent cannot have more than {SUB_ISSUE_LIMIT} sub-issues', 'UNPROCESSABLE')
+        if child['parent']:
+            self.issues[child['parent']]['children'].remove(child['number'])
+        child['parent'] = parent['number']
+        parent['children'].append(child['number'])
+
+    def remove_sub_issue(self, parent, child):
+        if child['parent'] != parent['number']:
+            raise GraphQLError(f"Issue #{child['number']} is not a sub-issue of #{parent['number']}", 'UNPROCESSABLE')
+        child['parent'] = None
+        parent['children'].remove(child['number'])
+
+    # Milestones
+
+    def create_milestone(self, title, description='', state='open'):
+        milestone = {'number': self.next_milestone, 'node_id': f'MI_{self.database_id}_{self.next_milestone}',
+                     'title': title, 'description': description or None, 'state': state, 'created_at': _now()}
+        self.milestones[self.next_milestone] = milestone
+        self.next_milestone += 1
+        return milestone
+
+
+# -- JSON renderings ----------------------------------------------------------------
+
+
+def repository_json(repo, api_url):
+    return {'id': repo.database_id, 'node_id': repo.node_id, 'name': repo.name, 'full_name': repo.full_name,
+            'owner': {'login': repo.owner}, 'private': False, 'default_branch': 'main', 'html_url': repo.url,
+            'url': f'{api_url}/repos/{repo.full_name}'}
+
+
+def label_json(label):
+    return {'id': label['id'], 'node_id': label['node_id'], 'name': label['name'], 'color': label['color'],
+            'description': label['description'], 'default': False}
+
+
+def milestone_json(repo, milestone):
+    if milestone is None:
+        return None
+    counts = Counter(record['state'] for record in repo.issues.values() if record['milestone'] == milestone['number'])
+    return {'number': milestone['number'], 'node_id': milestone['node_id'], 'title': milestone['title'],
+            'description': milestone['description'], 'state': milestone['state'],
+            'open_issues': counts['open'], 'closed_issues': counts['closed'], 'created_at': milestone['created_at'],
+            'html_url': f"{repo.url}/milestone/{milestone['number']}"}
+
+
+def issue_json(repo, record, api_url):
+    kind = 'pull' if record['pull'] else 'issues'
+    data = {
+        'id': repo.database_id * 1_000_000 + record['number'], 'node_id': record['node_id'],
+        'number': record['number'], 'title': record['title'], 'body': record['body'],
+        'state': record['state'], 'state_reason': record['state_reason'],
+        'labels': [label_json(repo.label(name)) for name in record['labels']],
+        'milestone': milestone_json(repo, repo.milestones.get(record['milestone'])),
+        'comments': len(record['comments']), 'user': {'login': repo.owner},
+        'created_at': record['created_at'], 'updated_at': record['updated_at'], 'closed_at': record['closed_at'],
+        'html_url': f"{repo.url}/{kind}/{record['number']}",
+        'url': f"{api_url}/repos/{repo.full_name}/issues/{record['number']}"
+    }
+    if record['pull']:
+        data['pull_request'] = {'url': f"{api_url}/repos/{repo.full_name}/pulls/{record['number']}",
+                                'html_url': data['html_url']}
+    return data
+
+
+def pull_json(repo, record, api_url):
+    data = issue_json(repo, record, api_url)
+    data.pop('pull_request')
+    data['url'] = f"{api_url}/repos/{repo.full_name}/pulls/{record['number']}"
+    data.update(merged=False, draft=False,
+                head={'ref': record['pull']['head'], 'label': f"{repo.owner}:{record['pull']['head']}"},
+                base={'ref': record['pull']['base'], 'label': f"{repo.owner}:{record['pull']['base']}"})
+    return data
+
+
+def comment_json(repo, comment):
+    return {'id': comment['id'], 'node_id': comment['node_id'], 'body': comment['body'],
+            'created_at': comment['created_at'], 'user': {'login': repo.owner},
+            'html_url': f"{repo.url}/issues/{comment['issue']}#issuecomment-{comment['id']}"}
+
+
+# -- search ---------------------------------------------------------------------------
+
+
+def _words(text):
+    return WORD.findall((text or '').lower())
+
+
+def _contains_phrase(words, phrase):
+    if not phrase:
+        return True
+    return any(words[start:start + len(phrase)] == phrase for start in range(len(words) - len(phrase) + 1))
+
+
+def parse_search(query):
+    """Split an issue search into qualifiers [(negated, name, value)] and phrases [[word, ...]]
+
+    Text is matched word by word, ignoring punctuation, the way GitHub's
+    search does: "Task 1:" also finds "Task 1.2: ...".
+    """
+    qualifiers, phrases = [], []
+    for negated, name, value, quoted, bare in SEARCH_TOKEN.findall(query):
+        if name:
+            qualifiers.append((bool(negated), name.lower(), value.strip('"')))
+        else:
+            phrases.append(_words(quoted or bare))
+    return qualifiers, [phrase for phrase in phrases if phrase]
+
+
+def search_matches(repo, record, qualifiers, phrases):
+    fields = []
+    for negated, name, value in qualifiers:
+        value_lower = value.lower()
+        if name == 'repo':
+            matched = value_lower == repo.full_name.lower()
+        elif name in ('is', 'type', 'state'):
+            if value_lower in ('issue', 'pr', 'pull-request'):
+                matched = bool(record['pull']) == (value_lower != 'issue')
+            elif value_lower in ('open', 'closed'):
+                matched = record['state'] == value_lower
+            else:
+                matched = True
+        elif name == 'label':
+            matched = value_lower in (label.lower() for label in record['labels'])
+        elif name == 'in':
+            fields.extend(value_lower.split(','))
+            matched = True
+        elif name == 'milestone':
+            milestone = repo.milestones.get(record['milestone'])
+            matched = bool(milestone) and milestone['title'].lower() == value_lower
+        else:
+            matched = True
+        if matched == negated:
+            return False
+
+    fields = fields or ['title', 'body']
+    haystacks = [_words(record[field]) for field in ('title', 'body') if field in fields]
+    return all(any(_contains_phrase(words, phrase) for words in haystacks) for phrase in phrases)
+
+
+def search_issues(repos, query):
+    qualifiers, phrases = parse_search(query)
+    targets = [value.lower() for negated, name, value in qualifiers if name == 'repo' and not negated]
+    hits = []
+    for repo in repos:
+        if targets and repo.full_name.lower() not in targets:
+            continue
+        hits.extend((repo, record) for record in repo.issues.values()
+                    if search_matches(repo, record, qualifiers, phrases))
+    # Best match for equal relevance is roughly newest first
+    return sorted(hits, key=lambda hit: hit[1]['created_at'] + f"{hit[1]['number']:012d}", reverse=True)
+
+
+# -- GraphQL schema -------------------------------------------------------------------
+
+
+class Node(NamedTuple):
+    repo: Repository
+    record: dict
+
+
+class Page(NamedTuple):
+    nodes: list
+    total: int
+    start: int
+    has_next: bool
+
+
+def paginate_nodes(items, args):
+    """Slice items by the first/after arguments of a connection field"""
+    first = min(int(args.get('first') or DEFAULT_PER_PAGE), MAX_PER_PAGE)
+    start = int(args['after']) if str(args.get('after') or '').isdigit() else 0
+    return Page(items[start:start + first], len(items), start, start + first < len(items))
+
+
+def _key(name):
+    return lambda parent, args, context: parent[name] if isinstance(parent, dict) else getattr(parent, name)
+
+
+def _record(name, transform=None):
+    def resolve(parent, args, context):
+        value = parent.record[name]
+        return transform(value) if transform else value
+    return resolve
+
+
+def _connection(node_type):
+    return {
+        'nodes': (f'[{node_type}]', lambda page, args, context: page.nodes),
+        'edges': (f'[{node_type}Edge]', lambda page, args, context: [
+            {'cursor': str(page.start + index + 1), 'node': node} for index, node in enumerate(page.nodes)]),
+        'totalCount': (None, lambda page, args, context: page.total),
+        'pageInfo': ('PageInfo', lambda page, args, context: {
+            'hasNextPage': page.has_next, 'hasPreviousPage': page.start > 0,
+            'startCursor': str(page.start + 1) if page.nodes else None,
+            'endCursor': str(page.start + len(page.nodes)) if page.nodes else None})
+    }
+
+
+def _edge(node_type):
+    return {'cursor': (None, _key('cursor')), 'node': (node_type, _key('node'))}
+
+
+def _labels(node, args, context):
+    return paginate_nodes([Node(node.repo, node.repo.label(name)) for name in node.record['labels']], args)
+
+
+def _order(records, args):
+    order = args.get('orderBy') or {}
+    field = {'CREATED_AT': 'created_at', 'UPDATED_AT': 'updated_at'}.get(order.get('field'), 'created_at')
+    reverse = order.get('direction', 'ASC') == 'DESC'
+    return sorted(records, key=lambda record: (record[field], record['number']), reverse=reverse)
+
+
+def _issue_fields(kind):
+    fields = {
+        'id': (None, _record('node_id')),
+        'number': (None, _record('number')),
+        'title': (None, _record('title')),
+        'body': (None, _record('body')),
+        'state': (None, _record('state', str.upper)),
+        'closed': (None, _record('state', lambda state: state == 'closed')),
+        'url': (None, lambda node, args, context: f"{node.repo.url}/{kind}/{node.record['number']}"),
+        'createdAt': (None, _record('created_at')),
+        'updatedAt': (None, _record('updated_at')),
+        'closedAt': (None, _record('closed_at')),
+        'labels': ('LabelConnection', _labels),
+        'milestone': ('Milestone', lambda node, args, context: (
+            Node(node.repo, node.repo.milestones[node.record['milestone']]) if node.record['milestone'] else None)),
+        'comments': ('IssueCommentConnection', lambda node, args, context: paginate_nodes(
+            [Node(node.repo, comment) for comment in node.record['comments']], args)),
+        'repository': ('Repository', lambda node, args, context: node.repo)
+    }
+    if kind == 'issues':
+        fields.update({
+            'stateReason': (None, _record('state_reason', lambda reason: reason.upper() if reason else None)),
+            'parent': ('Issue', lambda node, args, context: (
+                Node(node.repo, node.repo.issues[node.record['parent']]) if node.record['parent'] else None)),
+            'subIssues': ('IssueConnection', lambda node, args, context: paginate_nodes(
+                [Node(node.repo, node.repo.issues[number]) for number in node.record['children']], args))
+        })
+    else:
+        fields.update({
+            'headRefName': (None, lambda node, args, context: node.record['pull']['head']),
+            'baseRefName': (None, lambda node, args, context: node.record['pull']['base']),
+            'merged': (None, lambda node, args, context: False),
+            'isDraft': (None, lambda node, args, context: False)
+        })
+    return fields
+
+
+def _node_type(value):
+    if isinstance(value, Repository):
+        return 'Repository'
+    record = value.record
+    if 'pull' in record:
+        return 'PullRequest' if record['pull'] else 'Issue'
+    if 'color' in record:
+        return 'Label'
+    if 'issue' in record:
+        return 'IssueComment'
+    return 'Milestone'
+
+
+def _payload(**fields):
+    """Object type of a mutation payload: every field is a key of the resolver's dict"""
+    fields = {name: (type_name, _key(name)) for name, type_name in fields.items()}
+    fields['clientMutationId'] = (None, lambda payload, args, context: payload.get('clientMutationId'))
+    return fields
+
+
+def build_schema(emulator):
+    """The subset of GitHub's GraphQL schema the workflow scripts use"""
+
+    def repository(parent, args, context):
+        return emulator.repository(args['owner'], args['name'])
+
+    def issue(repo, args, context):
+        record = repo.issue(args['number'])
+        if record is None:
+            raise GraphQLError(f"Could not resolve to an Issue with the number of {args['number']}.", 'NOT_FOUND')
+        return Node(repo, record)
+
+    def pull_request(repo, args, context):
+        record = repo.issue(args['number'], pulls=True)
+        if record is None:
+            raise GraphQLError(f"Could not resolve to a PullRequest with the number of {args['number']}.",
+                               'NOT_FOUND')
+        return Node(repo, record)
+
+    def issues(repo, args, context, pulls=False):
+        states = {state.lower() for state in args.get('states') or ('OPEN', 'CLOSED', 'MERGED')}
+        labels = {label.lower() for label in args.get('labels') or ()}
+        records = [record for record in repo.issues.values()
+                   if bool(record['pull']) == pulls and record['state'] in states
+                   and (not labels or labels & {name.lower() for name in record['labels']})
+                   and (not pulls or args.get('headRefName') in (None, record['pull']['head']))
+                   and (not pulls or args.get('baseRefName') in (None, record['pull']['base']))]
+        return paginate_nodes([Node(repo, record) for record in _order(records, args)], args)
+
+    def label(repo, args, context):
+        record = repo.label(args['name'])
+        return Node(repo, record) if record else None
+
+    def milestone(repo, args, context):
+        record = repo.milestones.get(int(args['number']))
+        return Node(repo, record) if record else None
+
+    def search(parent, args, context):
+        if args.get('type') != 'ISSUE':
+            raise GraphQLError(f"Search type {args.get('type')} is not emulated", 'UNPROCESSABLE')
+        return paginate_nodes([Node(repo, record) for repo, record in search_issues(emulator.repos.values(),
+                                                                                    args['query'])], args)
+
+    def node(parent, args, context):
+        return emulator.node(args['id'])
+
+    def issue_input(args, key, pulls=False):
+        target = emulator.node(args['input'][key])
+        if not isinstance(target, Node) or 'pull' not in target.record or (bool(target.record['pull']) and not pulls):
+            raise GraphQLError(f"Could not resolve to an Issue with the global id of '{args['input'][key]}'",
+                               'NOT_FOUND')
+        return target
+
+    def close_issue(parent, args, context):
+        target = issue_input(args, 'issueId')
+        target.repo.set_state(target.record, 'closed', (args['input'].get('stateReason') or 'COMPLETED').lower())
+        return {'issue': target, 'clientMutationId': args['input'].get('clientMutationId')}
+
+    def reopen_issue(parent, args, context):
+        target = issue_input(args, 'issueId')
+        target.repo.set_state(target.record, 'open')
+        return {'issue': target, 'clientMutationId': args['input'].get('clientMutationId')}
+
+    def change_labels(add):
+        def resolve(parent, args, context):
+            target = issue_input(args, 'labelableId', pulls=True)
+            names = []
+            for label_id in args['input'].get('labelIds') or ():
+                record = target.repo.label_by_node(label_id)
+                if record is None:
+                    raise GraphQLError(f"Could not resolve to a node with the global id of '{label_id}'", 'NOT_FOUND')
+                names.append(record['name'])
+            if add:
+                target.repo.set_labels(target.record, target.record['labels'] + names)
+            else:
+                remove = {name.lower() for name in names}
+                target.record['labels'] = [name for name in target.record['labels'] if name.lower() not in remove]
+            return {'labelable': target, 'clientMutationId': args['input'].get('clientMutationId')}
+        return resolve
+
+    def add_sub_issue(parent, args, context):
+        target, child = issue_input(args, 'issueId'), issue_input(args, 'subIssueId')
+        target.repo.add_sub_issue(target.record, child.record, bool(args['input'].get('replaceParent')))
+        return {'issue': target, 'subIssue': child, 'clientMutationId': args['input'].get('clientMutationId')}
+
+    def remove_sub_issue(parent, args, context):
+        target, child = issue_input(args, 'issueId'), issue_input(args, 'subIssueId')
+        target.repo.remove_sub_issue(target.record, child.record)
+        return {'issue': target, 'subIssue': child, 'clientMutationId': args['input'].get('clientMutationId')}
+
+    def add_comment(parent, args, context):
+        target = issue_input(args, 'subjectId', pulls=True)
+        comment = target.repo.add_comment(target.record, args['input']['body'])
+        return {'commentEdge': {'cursor': str(len(target.record['comments'])), 'node': Node(target.repo, comment)},
+                'subject': target, 'clientMutationId': args['input'].get('clientMutationId')}
+
+    def create_issue(parent, args, context):
+        values = args['input']
+        repo = emulator.node(values['repositoryId'])
+        if not isinstance(repo, Repository):
+            raise GraphQLError(f"Could not resolve to a node with the global id of '{values['repositoryId']}'",
+                               'NOT_FOUND')
+        labels = [repo.label_by_node(label_id)['name'] for label_id in values.get('labelIds') or ()
+                  if repo.label_by_node(label_id)]
+        milestone = emulator.node(values['milestoneId']) if values.get('milestoneId') else None
+        record = repo.create_issue(values['title'], values.get('body'), labels,
+                                   milestone.record['number'] if milestone else None)
+        return {'issue': Node(repo, record), 'clientMutationId': values.get('clientMutationId')}
+
+    def update_issue(parent, args, context):
+        target = issue_input(args, 'id')
+        values = args['input']
+        for field in ('title', 'body'):
+            if values.get(field) is not None:
+                target.record[field] = values[field]
+        if values.get('state'):
+            target.repo.set_state(target.record, values['state'].lower())
+        target.record['updated_at'] = _now()
+        return {'issue': target, 'clientMutationId': values.get('clientMutationId')}
+
+    def create_pull_request(parent, args, context):
+        values = args['input']
+        repo = emulator.node(values['repositoryId'])
+        if not isinstance(repo, Repository):
+            raise GraphQLError(f"Could not resolve to a node with the global id of '{values['repositoryId']}'",
+                               'NOT_FOUND')
+        if repo.open_pull(values['headRefName'], values['baseRefName']):
+            raise GraphQLError(f"A pull request already exists for {repo.owner}:{values['headRefName']}.",
+                               'UNPROCESSABLE')
+        record = repo.create_issue(values['title'], values.get('body'),
+                                   pull={'head': values['headRefName'], 'base': values['baseRefName']})
+        return {'pullRequest': Node(repo, record), 'clientMutationId': values.get('clientMutationId')}
+
+    def rate_limit(parent, args, context):
+        state = emulator.budgets['graphql'].snapshot()
+        return {'limit': state['limit'], 'remaining': state['remaining'], 'used': state['used'], 'cost': 1,
+                'resetAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(state['reset']))}
+
+    schema = {
+        'Query': {
+            'repository': ('Repository', repository),
+            'search': ('SearchResultItemConnection', search),
+            'node': ('Node', node),
+            'viewer': ('User', lambda parent, args, context: {'login': emulator.login}),
+            'rateLimit': ('RateLimit', rate_limit)
+        },
+        'Mutation': {
+            'closeIssue': ('CloseIssuePayload', close_issue),
+            'reopenIssue': ('ReopenIssuePayload', reopen_issue),
+            'addLabelsToLabelable': ('AddLabelsToLabelablePayload', change_labels(True)),
+            'removeLabelsFromLabelable': ('RemoveLabelsFromLabelablePayload', change_labels(False)),
+            'addSubIssue': ('AddSubIssuePayload', add_sub_issue),
+            'removeSubIssue': ('RemoveSubIssuePayload', remove_sub_issue),
+            'addComment': ('AddCommentPayload', add_comment),
+            'createIssue': ('CreateIssuePayload', create_issue),
+            'updateIssue': ('UpdateIssuePayload', update_issue),
+            'createPullRequest': ('CreatePullRequestPayload', create_pull_request)
+        },
+        'Repository': {
+            'id': (None, lambda repo, args, context: repo.node_id),
+            'name': (None, lambda repo, args, context: repo.name),
+            'nameWithOwner': (None, lambda repo, args, context: repo.full_name),
+            'url': (None, lambda repo, args, context: repo.url),
+            'issue': ('Issue', issue),
+            'issues': ('IssueConnection', issues),
+            'pullRequest': ('PullRequest', pull_request),
+            'pullRequests': ('PullRequestConnection', lambda repo, args, context: issues(repo, args, context, True)),
+            'label': ('Label', label),
+            'labels': ('LabelConnection', lambda repo, args, context: paginate_nodes(
+                [Node(repo, record) for record in repo.labels.values()], args)),
+            'milestone': ('Milestone', milestone),
+            'milestones': ('MilestoneConnection', lambda repo, args, context: paginate_nodes(
+                [Node(repo, record) for record in repo.milestones.values()
+                 if record['state'].upper() in (args.get('states') or ('OPEN', 'CLOSED'))], args))
+        },
+        'Issue': _issue_fields('issues'),
+        'PullRequest': _issue_fields('pull'),
+        'Label': {
+            'id': (None, _record('node_id')),
+            'name': (None, _record('name')),
+            'color': (None, _record('color')),
+            'description': (None, _record('description'))
+        },
+        'Milestone': {
+            'id': (None, _record('node_id')),
+            'number': (None, _record('number')),
+            'title': (None, _record('title')),
+            'description': (None, _record('description')),
+            'state': (None, _record('state', str.upper))
+        },
+        'IssueComment': {
+            'id': (None, _record('node_id')),
+            'body': (None, _record('body')),
+            'createdAt': (None, _record('created_at'))
+        },
+        'User': {'login': (None, _key('login'))},
+        'RateLimit': {name: (None, _key(name)) for name in ('limit', 'remaining', 'used', 'cost', 'resetAt')},
+        'PageInfo': {name: (None, _key(name)) for name in ('hasNextPage', 'hasPreviousPage', 'startCursor',
+                                                           'endCursor')},
+        'SearchResultItemConnection': {**_connection('SearchResultItem'),
+                                       'issueCount': (None, lambda page, args, context: page.total)},
+        'SearchResultItem': _node_type,
+        'Node': _node_type,
+        'Labelable': _node_type,
+        'CloseIssuePayload': _payload(issue='Issue'),
+        'ReopenIssuePayload': _payload(issue='Issue'),
+        'AddLabelsToLabelablePayload': _payload(labelable='Labelable'),
+        'RemoveLabelsFromLabelablePayload': _payload(labelable='Labelable'),
+        'AddSubIssuePayload': _payload(issue='Issue', subIssue='Issue'),
+        'RemoveSubIssuePayload': _payload(issue='Issue', subIssue='Issue'),
+        'AddCommentPayload': _payload(commentEdge='IssueCommentEdge', subject='Node'),
+        'CreateIssuePayload': _payload(issue='Issue'),
+        'UpdateIssuePayload': _payload(issue='Issue'),
+        'CreatePullRequestPayload': _payload(pullRequest='PullRequest')
+    }
+    for node_type in ('Issue', 'PullRequest', 'Label', 'Milestone', 'IssueComment', 'SearchResultItem'):
+        schema[f'{node_type}Connection'] = {**_connection(node_type), **schema.get(f'{node_type}Connection', {})}
+        schema[f'{node_type}Edge'] = _edge(node_type)
+    return schema
+
+
+# -- REST routes ------------------------------------------------------------------------
+
+ROUTES = [
+    ('GET', r'/rate_limit', 'rate_limit', 'rate_limit'),
+    ('GET', r'/user', 'users.me', 'user'),
+    ('POST', r'/graphql', 'graphql', 'graphql'),
+    ('GET', r'/search/issues', 'search.issues', 'search'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)', 'repos.get', 'get_repository'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/issues', 'issues.list', 'list_issues'),
+    ('POST', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/issues', 'issues.create', 'create_issue'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/issues/(?P<number>\d+)', 'issues.get', 'get_issue'),
+    ('PATCH', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/issues/(?P<number>\d+)', 'issues.update', 'update_issue'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/issues/(?P<number>\d+)/comments', 'comments.list',
+     'list_comments'),
+    ('POST', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/issues/(?P<number>\d+)/comments', 'comments.create',
+     'create_comment'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/issues/(?P<number>\d+)/labels', 'labels.list_for_issue',
+     'list_issue_labels'),
+    ('POST', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/issues/(?P<number>\d+)/labels', 'labels.add',
+     'add_labels'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/labels', 'labels.list', 'list_labels'),
+    ('POST', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/labels', 'labels.create', 'create_label'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/labels/(?P<name>[^/]+)', 'labels.get', 'get_label'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/milestones', 'milestones.list', 'list_milestones'),
+    ('POST', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/milestones', 'milestones.create', 'create_milestone'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/pulls', 'pulls.list', 'list_pulls'),
+    ('POST', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/pulls', 'pulls.create', 'create_pull'),
+    ('GET', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/pulls/(?P<number>\d+)', 'pulls.get', 'get_pull'),
+    ('PATCH', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/pulls/(?P<number>\d+)', 'pulls.update', 'update_pull'),
+    ('POST', r'/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)/actions/workflows/(?P<workflow>[^/]+)/dispatches',
+     'actions.dispatch', 'dispatch_workflow')
+]
+
+
+class FakeGitHub:
+    def __init__(self, profiles=None, faults=None, rate_limits=None, secondary=None, require_auth=True, seed=None,
+                 login='offline-user'):
+        self.profiles = profiles or {}
+        self.faults = faults or {}
+        self.require_auth = require_auth
+        self.login = login
+        self.rng = random.Random(seed)
+        self.rate_limits = dict(RATE_LIMITS, **(rate_limits or {}))
+        self.secondary_limit = secondary
+        self.routes = [(method, re.compile(f'^{pattern}$'), operation, getattr(self, handler))
+                       for method, pattern, operation, handler in ROUTES]
+        self.schema = build_schema(self)
+        self.reset()
+
+    def reset(self):
+        self.repos = {}
+        self.budgets = {resource: Budget(*limit) for resource, limit in self.rate_limits.items()}
+        self.secondary = SecondaryLimit(*self.secondary_limit) if self.secondary_limit else None
+        self.calls = Counter()
+        self.failures = Counter()
+        self.started = time.monotonic()
+
+    def repository(self, owner, name):
+        key = f'{owner}/{name}'.lower()
+        if key not in self.repos:
+            self.repos[key] = Repository(owner, name, len(self.repos) + 1)
+        return self.repos[key]
+
+    def node(self, node_id):
+        """Resolve a global node id to a Repository or a Node"""
+        prefix, _, rest = str(node_id).partition('_')
+        parts = rest.split('_')
+        repo = next((repo for repo in self.repos.values() if str(repo.database_id) == parts[0]), None)
+        if repo is not None:
+            if prefix == 'R' and len(parts) == 1:
+                return repo
+            if prefix in ('I', 'PR') and len(parts) == 2 and parts[1].isdigit():
+                record = repo.issues.get(int(parts[1]))
+                if record and record['node_id'] == node_id:
+                    return Node(repo, record)
+            if prefix == 'LA':
+                record = repo.label_by_node(node_id)
+                if record:
+                    return Node(repo, record)
+            if prefix == 'MI' and len(parts) == 2 and parts[1].isdigit() and int(parts[1]) in repo.milestones:
+                return Node(repo, repo.milestones[int(parts[1])])
+        raise GraphQLError(f"Could not resolve to a node with the global id of '{node_id}'", 'NOT_FOUND')
+
+    # -- profiles, faults and limits ---------------------------------------------
+
+    def profile(self, operation):
+        return self.profiles.get(operation) or self.profiles.get('*') or Profile()
+
+    async def delay(self, operation):
+        profile = self.profile(operation)
+        if profile.latency or profile.jitter:
+            await asyncio.sleep(max(0.0, profile.latency + self.rng.uniform(-profile.jitter, profile.jitter)))
+
+    def fault(self, operation):
+        fault = self.faults.get(operation) or self.faults.get('*')
+        if fault and self.rng.random() < fault.rate:
+            self.failures[operation] += 1
+            return fault
+        return None
+
+    def charge(self, resource, writes):
+        """Spend the call's budget; raise the 403 GitHub sends once a limit is hit"""
+        budget = self.budgets[resource]
+        if not budget.spend():
+            raise HttpReply(403, f'API rate limit exceeded for {self.login}.', budget.headers(resource),
+                            documentation_url='https://docs.github.com/rest/overview/rate-limits-for-the-rest-api')
+        if writes and self.secondary:
+            retry_after = self.secondary.check(writes)
+            if retry_after is not None:
+                raise HttpReply(403, 'You have exceeded a secondary rate limit. Please wait a few minutes '
+                                     'before you try again.', {'Retry-After': retry_after, **budget.headers(resource)})
+        return budget.headers(resource)
+
+    # -- HTTP plumbing ---------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                if not await self.dispatch(request, writer):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get('content-length') or 0)
+        raw = await reader.readexactly(length) if length else b''
+        try:
+            body = json.loads(raw) if raw else None
+        except json.JSONDecodeError:
+            body = raw
+        parts = urlsplit(target)
+        return Request(method.upper(), unquote(parts.path).rstrip('/') or '/',
+                       dict(parse_qsl(parts.query, keep_blank_values=True)), headers, body)
+
+    async def send(self, writer, status, body=None, headers=None):
+        payload = b'' if body is None else json.dumps(body).encode('utf-8')
+        lines = [f'HTTP/1.1 {status} {REASONS.get(status, "Status")}',
+                 f'Content-Length: {len(payload)}', 'Server: fake-github']
+        if payload:
+            lines.append('Content-Type: application/json; charset=utf-8')
+        lines.extend(f'{key}: {value}' for key, value in (headers or {}).items())
+        # Headers and body in one write; see the module docstring
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        await writer.drain()
+
+    def route(self, method, path):
+        allowed = False
+        for route_method, pattern, operation, handler in self.routes:
+            match = pattern.match(path)
+            if match:
+                if route_method == method:
+                    return operation, handler, match.groupdict()
+                allowed = True
+        return ('method-not-allowed' if allowed else None), None, {}
+
+    async def dispatch(self, request, writer):
+        """Answer one request; returns whether the connection can be kept open"""
+        keep_alive = request.headers.get('connection', '').lower() != 'close'
+        if request.path.startswith('/_emulator/'):
+            await self.send(writer, *self.control(request))
+            return keep_alive
+
+        operation, handler, params = self.route(request.method, request.path)
+        self.calls[operation or 'unknown'] += 1
+        try:
+            if handler is None:
+                raise HttpReply(404 if operation is None else 405, 'Not Found')
+            await self.delay(operation)
+            fault = self.fault(operation)
+            if fault and fault.status == 0:
+                return False
+            if fault:
+                raise HttpReply(fault.status, 'Server Error (injected)')
+            if self.require_auth and not request.headers.get('authorization') and operation != 'rate_limit':
+                raise HttpReply(401, 'Requires authentication')
+            status, body, headers = handler(request, params)
+        except HttpReply as reply:
+            status, body, headers = reply.status, reply.body, reply.headers
+        await self.send(writer, status, body, headers)
+        return keep_alive
+
+    def control(self, request):
+        if request.path == '/_emulator/stats':
+            return 200, {'uptime': round(time.monotonic() - self.started, 3), 'calls': dict(self.calls),
+                         'failures': dict(self.failures),
+                         'rate_limits': {name: budget.snapshot() for name, budget in self.budgets.items()},
+                         'repositories': {repo.full_name: {'issues': len(repo.issues), 'labels': len(repo.labels),
+                                                           'milestones': len(repo.milestones),
+                                                           'dispatches': repo.dispatches}
+                                          for repo in self.repos.values()}}, {}
+        if request.path == '/_emulator/reset' and request.method == 'POST':
+            self.reset()
+            return 204, None, {}
+        return 404, {'message': 'Not Found'}, {}
+
+    # -- helpers for handlers -----------------------------------------------------
+
+    def api_url(self, request):
+        return f"http://{request.headers.get('host', 'localhost')}"
+
+    def page(self, request, items, headers):
+        """Slice a list endpoint by page/per_page and add its Link header"""
+        per_page = min(int(request.query.get('per_page') or DEFAULT_PER_PAGE), MAX_PER_PAGE)
+        page = max(1, int(request.query.get('page') or 1))
+        last = max(1, -(-len(items) // per_page))
+        links = []
+        for rel, number in (('next', page + 1), ('last', last)):
+            if page < last:
+                query = urlencode({**request.query, 'page': number})
+                links.append(f'<{self.api_url(request)}{request.path}?{query}>; rel="{rel}"')
+        if links:
+            headers['Link'] = ', '.join(links)
+        return items[(page - 1) * per_page:page * per_page]
+
+    def _repo(self, params):
+        return self.repository(params['owner'], params['repo'])
+
+    def _issue(self, repo, params, pulls=False):
+        record = repo.issues.get(int(params['number']))
+        if record is None or (pulls and not record['pull']):
+            raise HttpReply(404, 'Not Found')
+        return record
+
+    def _labels_field(self, body):
+        labels = body.get('labels') if isinstance(body, dict) else body
+        return [label['name'] if isinstance(label, dict) else str(label) for label in labels or ()]
+
+    def _milestone(self, repo, value):
+        if value is None:
+            return None
+        if int(value) not in repo.milestones:
+            raise validation_failed('Issue', 'invalid', 'milestone')
+        return int(value)
+
+    @staticmethod
+    def _object(body):
+        if not isinstance(body, dict):
+            raise HttpReply(400, 'Problems parsing JSON')
+        return body
+
+    # -- REST handlers ---------------------------------------------------------------
+
+    def rate_limit(self, request, params):
+        resources = {name: budget.snapshot() for name, budget in self.budgets.items()}
+        return 200, {'resources': resources, 'rate': resources['core']}, {}
+
+    def user(self, request, params):
+        return 200, {'login': self.login, 'type': 'User'}, self.charge('core', 0)
+
+    def get_repository(self, request, params):
+        return 200, repository_json(self._repo(params), self.api_url(request)), self.charge('core', 0)
+
+    def list_issues(self, request, params):
+        headers = self.charge('core', 0)
+        repo = self._repo(params)
+        state = request.query.get('state', 'open')
+        labels = {label.strip().lower() for label in request.query.get('labels', '').split(',') if label.strip()}
+        records = [record for record in repo.issues.values()
+                   if state in ('all', record['state'])
+                   and labels <= {name.lower() for name in record['labels']}]
+        records.sort(key=lambda record: record['number'], reverse=request.query.get('direction', 'desc') == 'desc')
+        api_url = self.api_url(request)
+        return 200, [issue_json(repo, record, api_url) for record in self.page(request, records, headers)], headers
+
+    def create_issue(self, request, params):
+        body = self._object(request.body)
+        headers = self.charge('core', 1)
+        repo = self._repo(params)
+        if not body.get('title'):
+            raise validation_failed('Issue', 'missing_field', 'title')
+        record = repo.create_issue(str(body['title']), body.get('body'), self._labels_field(body),
+                                   self._milestone(repo, body.get('milestone')))
+        return 201, issue_json(repo, record, self.api_url(request)), headers
+
+    def get_issue(self, request, params):
+        headers = self.charge('core', 0)
+        repo = self._repo(params)
+        return 200, issue_json(repo, self._issue(repo, params), self.api_url(request)), headers
+
+    def update_issue(self, request, params, pulls=False):
+        body = self._object(request.body)
+        headers = self.charge('core', 1)
+        repo = self._repo(params)
+        record = self._issue(repo, params, pulls)
+        for field in ('title', 'body'):
+            if field in body:
+                record[field] = body[field] or ''
+        if 'labels' in body:
+            repo.set_labels(record, self._labels_field(body))
+        if 'milestone' in body:
+            record['milestone'] = self._milestone(repo, body['milestone'])
+        if body.get('state') in ('open', 'closed'):
+            repo.set_state(record, body['state'], body.get('state_reason'))
+        record['updated_at'] = _now()
+        render = pull_json if pulls else issue_json
+        return 200, render(repo, record, self.api_url(request)), headers
+
+    def list_comments(self, request, params):
+        headers = self.charge('core', 0)
+        repo = self._repo(params)
+        comments = self._issue(repo, params)['comments']
+        return 200, [comment_json(repo, comment) for comment in self.page(request, comments, headers)], headers
+
+    def create_comment(self, request, params):
+        body = self._object(request.body)
+        headers = self.charge('core', 1)
+        repo = self._repo(params)
+        record = self._issue(repo, params)
+        if not body.get('body'):
+            raise validation_failed('IssueComment', 'missing_field', 'body')
+        return 201, comment_json(repo, repo.add_comment(record, body['body'])), headers
+
+    def list_issue_labels(self, request, params):
+        headers = self.charge('core', 0)
+        repo = self._repo(params)
+        record = self._issue(repo, params)
+        return 200, [label_json(repo.label(name)) for name in record['labels']], headers
+
+    def add_labels(self, request, params):
+        headers = self.charge('core', 1)
+        repo = self._repo(params)
+        record = self._issue(repo, params)
+        repo.set_labels(record, record['labels'] + self._labels_field(request.body))
+        return 200, [label_json(repo.label(name)) for name in record['labels']], headers
+
+    def list_labels(self, request, params):
+        headers = self.charge('core', 0)
+        repo = self._repo(params)
+        labels = [label_json(label) for label in repo.labels.values()]
+        return 200, self.page(request, labels, headers), headers
+
+    def create_label(self, request, params):
+        body = self._object(request.body)
+        headers = self.charge('core', 1)
+        repo = self._repo(params)
+        if not body.get('name'):
+            raise validation_failed('Label', 'missing_field', 'name')
+        if repo.label(body['name']):
+            raise validation_failed('Label', 'already_exists', 'name')
+        label = repo.create_label(body['name'], body.get('color') or 'ededed', body.get('description') or '')
+        return 201, label_json(label), headers
+
+    def get_label(self, request, params):
+        headers = self.charge('core', 0)
+        label = self._repo(params).label(params['name'])
+        if label is None:
+            raise HttpReply(404, 'Not Found')
+        return 200, label_json(label), headers
+
+    def list_milestones(self, request, params):
+        headers = self.charge('core', 0)
+        repo = self._repo(params)
+        state = request.query.get('state', 'open')
+        milestones = [milestone_json(repo, milestone) for milestone in repo.milestones.values()
+                      if state in ('all', milestone['state'])]
+        return 200, self.page(request, milestones, headers), headers
+
+    def create_milestone(self, request, params):
+        body = self._object(request.body)
+        headers = self.charge('core', 1)
+        repo = self._repo(params)
+        if not body.get('title'):
+            raise validation_failed('Milestone', 'missing_field', 'title')
+        if any(milestone['title'] == body['title'] for milestone in repo.milestones.values()):
+            raise validation_failed('Milestone', 'already_exists', 'title')
+        milestone = repo.create_milestone(body['title'], body.get('description'), body.get('state') or 'open')
+        return 201, milestone_json(repo, milestone), headers
+
+    def list_pulls(self, request, params):
+        headers = self.charge('core', 0)
+        repo = self._repo(params)
+        state = request.query.get('state', 'open')
+        head = request.query.get('head', '')
+        head = head.split(':', 1)[1] if ':' in head else head
+        base = request.query.get('base')
+        records = [record for record in repo.issues.values()
+                   if record['pull'] and state in ('all', record['state'])
+                   and (not head or record['pull']['head'] == head)
+                   and (not base or record['pull']['base'] == base)]
+        records.sort(key=lambda record: record['number'], reverse=True)
+        api_url = self.api_url(request)
+        return 200, [pull_json(repo, record, api_url) for record in self.page(request, records, headers)], headers
+
+    def create_pull(self, request, params):
+        body = self._object(request.body)
+        headers = self.charge('core', 1)
+        repo = self._repo(params)
+        for field in ('title', 'head', 'base'):
+            if not body.get(field):
+                raise validation_failed('PullRequest', 'missing_field', field)
+        head = body['head'].split(':', 1)[1] if ':' in body['head'] else body['head']
+        if repo.open_pull(head, body['base']):
+            raise validation_failed('PullRequest', 'custom',
+                                    message=f'A pull request already exists for {repo.owner}:{head}.')
+        record = repo.create_issue(body['title'], body.get('body'), pull={'head': head, 'base': body['base']})
+        return 201, pull_json(repo, record, self.api_url(request)), headers
+
+    def get_pull(self, request, params):
+        headers = self.charge('core', 0)
+        repo = self._repo(params)
+        return 200, pull_json(repo, self._issue(repo, params, pulls=True), self.api_url(request)), headers
+
+    def update_pull(self, request, params):
+        return self.update_issue(request, params, pulls=True)
+
+    def dispatch_workflow(self, request, params):
+        body = self._object(request.body)
+        headers = self.charge('core', 1)
+        if not body.get('ref'):
+            raise validation_failed('Workflow', 'missing_field', 'ref')
+        self._repo(params).dispatches.append({'workflow': params['workflow'], 'ref': body['ref'],
+                                              'inputs': body.get('inputs') or {}, 'created_at': _now()})
+        return 204, None, headers
+
+    def search(self, request, params):
+        headers = self.charge('search', 0)
+        query = request.query.get('q', '')
+        hits = search_issues(self.repos.values(), query)
+        api_url = self.api_url(request)
+        items = [issue_json(repo, record, api_url) for repo, record in self.page(request, hits, headers)]
+        return 200, {'total_count': len(hits), 'incomplete_results': False, 'items': items}, headers
+
+    def graphql(self, request, params):
+        body = self._object(request.body)
+        try:
+            operation = parse(body.get('query') or '')
+        except GraphQLError as e:
+            return 200, {'errors': [e.as_dict()]}, self.charge('graphql', 0)
+        # Every mutation field counts against the secondary limit, so batching does not hide writes
+        writes = len(operation.selections) if operation.kind == 'mutation' else 0
+        headers = self.charge('graphql', writes)
+        return 200, execute(self.schema, operation, body.get('variables'), self), headers
+
+
+def parse_profiles(args):
+    profiles = dict(PROFILES[args.profile])
+    for spec in args.latency or []:
+        operation, _, value = spec.rpartition('=')
+        latency, _, jitter = value.partition('~')
+        profiles[operation or '*'] = Profile(parse_duration(latency), parse_duration(jitter) if jitter else 0.0)
+    return profiles
+
+
+def parse_faults(specs):
+    faults = {}
+    for spec in specs or []:
+        operation, _, value = spec.rpartition('=')
+        rate, _, status = value.partition(':')
+        faults[operation or '*'] = Fault(parse_fraction(rate), int(status) if status else 502)
+    return faults
+
+
+def parse_rate_limits(specs):
+    limits = {}
+    for spec in specs or []:
+        resource, _, value = spec.partition('=')
+        limit, _, window = value.partition('/')
+        if resource not in RATE_LIMITS:
+            raise argparse.ArgumentTypeError(f"unknown rate limit resource {resource!r}")
+        limits[resource] = (int(limit), float(window) if window else RATE_LIMITS[resource][1])
+    return limits
+
+
+def parse_secondary(value):
+    limit, _, window = value.partition('/')
+    return int(limit), float(window or 60)
+
+
+async def serve(server, host, port):
+    listener = await asyncio.start_server(server.handle_connection, host, port, backlog=4096)
+    port = listener.sockets[0].getsockname()[1]
+    # benchmarks.e2e reads the URL from this line when it starts the emulator on port 0
+    print(f"Fake GitHub API on http://{host}:{port} ({len(server.routes)} REST routes and GraphQL, "
+          f"Ctrl-C to stop)", flush=True)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve an offline emulation of the GitHub API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787, help='0 picks a free port')
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='instant', help='Latency preset')
+    parser.add_argument('--latency', action='append',
+                        help='[route=]MEAN[~JITTER], e.g. issues.create=300ms~100ms; no route means all')
+    parser.add_argument('--fail', action='append',
+                        help='[route=]RATE[:STATUS], e.g. graphql=5%%:502; status 0 drops the connection')
+    parser.add_argument('--rate-limit', action='append',
+                        help='RESOURCE=LIMIT[/SECONDS] for core, search or graphql, e.g. core=1000/3600')
+    parser.add_argument('--secondary-limit', type=parse_secondary,
+                        help='LIMIT[/SECONDS] content-creating calls, e.g. 80/60')
+    parser.add_argument('--no-auth', action='store_true', help='Accept requests without a token')
+    parser.add_argument('--seed', type=int, help='Seed for latency jitter and injected failures')
+    args = parser.parse_args()
+
+    server = FakeGitHub(parse_profiles(args), parse_faults(args.fail), parse_rate_limits(args.rate_limit),
+                        args.secondary_limit, require_auth=not args.no_auth, seed=args.seed)
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""
+Minimal GraphQL parser and executor for the GitHub API emulator
+
+Covers what the workflow scripts send: one query or mutation with variable
+definitions, aliases, arguments (variables, scalars, enums, lists and input
+objects), nested selections and inline fragments. Named fragments,
+directives and subscriptions are rejected.
+
+A schema is a dict of type name to either {field name: (return type,
+resolver)} for an object type, or a callable mapping a value to its object
+type name for an interface or union. A return type is a type name, '[Name]'
+for a list, or None for a scalar; a resolver is called as
+resolver(parent, args, context). As on GitHub, a document that names an
+unknown field fails validation before anything runs, while a resolver that
+raises GraphQLError nulls out only its own field and is reported with its
+path, so one failing alias does not void its siblings.
+"""
+
+import json
+import re
+from typing import NamedTuple
+
+TOKEN = re.compile(r'''
+    (?P<skip>[\s,]+|\#[^\n]*)
+  | (?P<spread>\.\.\.)
+  | (?P<punct>[{}()\[\]:!$=@|&])
+  | (?P<string>"(?:[^"\\\n]|\\.)*")
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<name>[_A-Za-z][_0-9A-Za-z]*)
+''', re.VERBOSE)
+
+
+class GraphQLError(Exception):
+    """A parse, validation or field error; type is GitHub's error type, e.g. NOT_FOUND"""
+
+    def __init__(self, message, type=None):
+        super().__init__(message)
+        self.message = message
+        self.type = type
+
+    def as_dict(self, path=None):
+        error = {'message': self.message}
+        if self.type:
+            error['type'] = self.type
+        if path:
+            error['path'] = list(path)
+        return error
+
+
+class Variable(NamedTuple):
+    name: str
+
+
+class Field(NamedTuple):
+    alias: str
+    name: str
+    args: dict
+    selections: tuple
+
+    @property
+    def key(self):
+        return self.alias or self.name
+
+
+class InlineFragment(NamedTuple):
+    type_condition: str
+    selections: tuple
+
+
+class Operation(NamedTuple):
+    kind: str
+    variables: dict  # name -> (type, default)
+    selections: tuple
+
+
+class _Parser:
+    def __init__(self, source):
+        self.tokens = []
+        position = 0
+        while position < len(source):
+            match = TOKEN.match(source, position)
+            if not match:
+                raise GraphQLError(f"Parse error on {source[position:position + 10]!r} at offset {position}")
+            position = match.end()
+            if match.lastgroup != 'skip':
+                self.tokens.append((match.lastgroup, match.group()))
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token_kind, token_value = self.peek()
+        if token_kind is None or (kind and token_kind != kind) or (value and token_value != value):
+            expected = value or kind or 'a token'
+            raise GraphQLError(f"Parse error on {token_value or 'end of document'!r}, expected {expected!r}")
+        self.position += 1
+        return token_value
+
+    def accept(self, value):
+        if self.peek()[1] == value:
+            self.position += 1
+            return True
+        return False
+
+    def document(self):
+        if self.peek()[1] == '{':
+            operation = Operation('query', {}, self.selection_set())
+        else:
+            kind = self.take('name')
+            if kind not in ('query', 'mutation'):
+                raise GraphQLError(f"Unsupported operation type {kind!r}")
+            if self.peek()[0] == 'name':
+                self.take('name')
+            variables = self.variable_definitions() if self.peek()[1] == '(' else {}
+            operation = Operation(kind, variables, self.selection_set())
+        if self.peek()[0] is not None:
+            raise GraphQLError("Only one operation per document is supported")
+        return operation
+
+    def variable_definitions(self):
+        variables = {}
+        self.take(value='(')
+        while not self.accept(')'):
+            self.take(value='$')
+            name = self.take('name')
+            self.take(value=':')
+            type_name = self.type_reference()
+            default = self.value(const=True) if self.accept('=') else None
+            variables[name] = (type_name, default)
+        return variables
+
+    def type_reference(self):
+        if self.accept('['):
+            type_name = f'[{self.type_reference()}]'
+            self.take(value=']')
+        else:
+            type_name = self.take('name')
+        return type_name + '!' if self.accept('!') else type_name
+
+    def selection_set(self):
+        selections = []
+        self.take(value='{')
+        while not self.accept('}'):
+            if self.accept('...'):
+                if self.peek()[1] != 'on':
+                    raise GraphQLError("Named fragments are not supported")
+                self.take('name')
+                selections.append(InlineFragment(self.take('name'), self.selection_set()))
+            else:
+                selections.append(self.field())
+        return tuple(selections)
+
+    def field(self):
+        alias, name = None, self.take('name')
+        if self.accept(':'):
+            alias, name = name, self.take('name')
+        args = {}
+        if self.accept('('):
+            while not self.accept(')'):
+                argument = self.take('name')
+                self.take(value=':')
+                args[argument] = self.value()
+        if self.peek()[1] == '@':
+            raise GraphQLError("Directives are not supported")
+        selections = self.selection_set() if self.peek()[1] == '{' else ()
+        return Field(alias, name, args, selections)
+
+    def value(self, const=False):
+        kind, token = self.peek()
+        if token == '$' and not const:
+            self.take()
+            return Variable(self.take('name'))
+        if kind == 'string':
+            self.take()
+            return json.loads(token)
+        if kind == 'number':
+            self.take()
+            return float(token) if any(c in token for c in '.eE') else int(token)
+        if kind == 'name':
+            self.take()
+            return {'true': True, 'false': False, 'null': None}.get(token, token)
+        if self.accept('['):
+            items = []
+            while not self.accept(']'):
+                items.append(self.value(const))
+            return items
+        if self.accept('{'):
+            fields = {}
+            while not self.accept('}'):
+                name = self.take('name')
+                self.take(value=':')
+                fields[name] = self.value(const)
+            return fields
+        raise GraphQLError(f"Parse error on {token or 'end of document'!r}, expected a value")
+
+
+def parse(source):
+    """Parse a document holding one operation, raising GraphQLError on syntax errors"""
+    return _Parser(source).document()
+
+
+def _list_item_type(type_name):
+    return type_name[1:-1] if type_name and type_name.startswith('[') else None
+
+
+def validate(schema, type_name, selections):
+    """Return the messages of every unknown field or fragment type, GitHub style"""
+    messages = []
+    fields = schema[type_name]
+    for selection in selections:
+        if isinstance(selection, InlineFragment):
+            if selection.type_condition not in schema or callable(schema[selection.type_condition]):
+                messages.append(f"No such type {selection.type_condition}, so it can't be a fragment condition")
+            else:
+                messages.extend(validate(schema, selection.type_condition, selection.selections))
+            continue
+        if selection.name == '__typename':
+            continue
+        if callable(fields) or selection.name not in fields:
+            messages.append(f"Field '{selection.name}' doesn't exist on type '{type_name}'")
+            continue
+        return_type = fields[selection.name][0]
+        return_type = _list_item_type(return_type) or return_type
+        if return_type is None:
+            if selection.selections:
+                messages.append(f"Selections can't be made on scalars (field '{selection.name}')")
+        elif not selection.selections:
+            messages.append(f"Field must have selections (field '{selection.name}' returns {return_type})")
+        else:
+            messages.extend(validate(schema, return_type, selection.selections))
+    return messages
+
+
+def _argument(value, variables):
+    if isinstance(value, Variable):
+        return variables.get(value.name)
+    if isinstance(value, list):
+        return [_argument(item, variables) for item in value]
+    if isinstance(value, dict):
+        return {key: _argument(item, variables) for key, item in value.items()}
+    return value
+
+
+class _Executor:
+    def __init__(self, schema, variables, context):
+        self.schema = schema
+        self.variables = variables
+        self.context = context
+        self.errors = []
+
+    def selections(self, type_name, parent, selections, path):
+        result = {}
+        for selection in selections:
+            if isinstance(selection, InlineFragment):
+                if selection.type_condition == type_name:
+                    result.update(self.selections(type_name, parent, selection.selections, path))
+                continue
+            if selection.name == '__typename':
+                result[selection.key] = type_name
+                continue
+            return_type, resolver = self.schema[type_name][selection.name]
+            field_path = path + [selection.key]
+            try:
+                value = resolver(parent, _argument(selection.args, self.variables), self.context)
+            except GraphQLError as e:
+                self.errors.append(e.as_dict(field_path))
+                result[selection.key] = None
+                continue
+            result[selection.key] = self.complete(return_type, value, selection.selections, field_path)
+        return result
+
+    def complete(self, type_name, value, selections, path):
+        if value is None or type_name is None:
+            return value
+        item_type = _list_item_type(type_name)
+        if item_type:
+            return [self.complete(item_type, item, selections, path + [index]) for index, item in enumerate(value)]
+        definition = self.schema[type_name]
+        if callable(definition):
+            type_name = definition(value)
+        return self.selections(type_name, value, selections, path)
+
+
+def execute(schema, operation, variables, context):
+    """Run a parsed operation and return the response document ({data, errors})"""
+    root = 'Mutation' if operation.kind == 'mutation' else 'Query'
+    messages = validate(schema, root, operation.selections)
+    if messages:
+        return {'errors': [{'message': message, 'type': 'VALIDATION'} for message in messages]}
+
+    values = {}
+    for name, (type_name, default) in operation.variables.items():
+        value = (variables or {}).get(name, default)
+        if value is None and type_name.endswith('!'):
+            return {'errors': [{'message': f"Variable ${name} of type {type_name} was provided invalid value",
+                                'type': 'VALIDATION'}]}
+        values[name] = value
+
+    # Mutation fields run one after another, in document order, like on GitHub
+    executor = _Executor(schema, values, context)
+    response = {'data': executor.selections(root, None, operation.selections, [])}
+    if executor.errors:
+        response['errors'] = executor.errors
+    return response
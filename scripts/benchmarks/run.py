@@ -0,0 +1,173 @@
+"""
+Benchmark suite for the spec-parsing and body-generation hot paths
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m benchmarks.run
+    PYTHONPATH=scripts python3 -m benchmarks.run --tasks 10,1000 --commits 10,1000 --compare
+
+Every run appends an entry to the results file (wall time and peak traced
+memory per benchmark and scale, tagged with the current git revision) so
+results can be compared across changes with --compare.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from kiro_sync.bodies import epic_issue_body, pull_request_body, task_issue_body
+from kiro_sync.git import get_commit_summary
+from kiro_sync.sections import load_section_index, read_file_section, scan_sections
+from kiro_sync.tasks import parse_tasks_file
+from kiro_sync.traceability import acceptance_criteria, build_traceability
+
+from .synthetic import generate_history, generate_spec, requirement_count
+
+DEFAULT_RESULTS = 'benchmark-results.json'
+DEFAULT_TASK_SCALES = '10,1000,100000'
+DEFAULT_COMMIT_SCALES = '10,10000,50000'
+
+
+def measure(func, repeats):
+    """Return (best wall time, mean wall time, peak traced memory in KiB)"""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    # Memory is traced in a separate pass so tracing overhead does not skew timings
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(timings), statistics.mean(timings), peak / 1024
+
+
+def spec_benchmarks(spec_dir, tasks):
+    """Yield (name, callable) pairs for a generated spec"""
+    requirements_file = str(spec_dir / 'requirements.md')
+    design_file = str(spec_dir / 'design.md')
+    tasks_file = str(spec_dir / 'tasks.md')
+    parsed = list(parse_tasks_file(tasks_file))
+    last_requirement = f'### Requirement {requirement_count(tasks)}'
+
+    requirements_summary = read_file_section(requirements_file, '## Requirements', '### Requirement 1')
+    architecture_overview = read_file_section(design_file, '## Architecture', '### Component Structure')
+
+    design_bytes = Path(design_file).read_bytes()
+    traceability = build_traceability('benchmark', requirements_file, design_file, tasks_file)
+
+    yield 'parse_tasks_file', lambda: sum(1 for _ in parse_tasks_file(tasks_file))
+    # Cold scan of a document versus a lookup on the cached index
+    yield 'scan_sections:design', lambda: scan_sections(design_bytes)
+    yield 'load_section_index:cached', lambda: load_section_index(design_file, cache_dir=spec_dir / 'cache')
+    yield 'read_file_section:requirements', lambda: read_file_section(
+        requirements_file, '## Requirements', '### Requirement 1')
+    yield 'read_file_section:architecture', lambda: read_file_section(
+        design_file, '## Architecture', '### Component Structure')
+    yield 'read_file_section:last_requirement', lambda: read_file_section(
+        requirements_file, last_requirement, '#### Acceptance Criteria')
+    yield 'epic_issue_body', lambda: epic_issue_body(
+        'Benchmark Feature', requirements_summary, architecture_overview,
+        'https://example.com/requirements.md', 'https://example.com/design.md', 'https://example.com/tasks.md')
+    yield 'task_issue_body:all_tasks', lambda: [task_issue_body(task, 1) for task in parsed]
+    yield 'build_traceability', lambda: build_traceability('benchmark', requirements_file, design_file, tasks_file)
+    yield 'acceptance_criteria:last_task', lambda: acceptance_criteria(traceability, parsed[-1].number)
+
+
+def history_benchmarks(repo_dir):
+    """Yield (name, callable) pairs for a generated git history"""
+    commits = get_commit_summary('main', 'feature/task-01', cwd=repo_dir)
+
+    yield 'get_commit_summary', lambda: get_commit_summary('main', 'feature/task-01', cwd=repo_dir)
+    yield 'pull_request_body', lambda: pull_request_body('1', 'Benchmark task', 2, 1, commits)
+
+
+def git_revision():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def load_results(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {'runs': []}
+
+
+def print_comparison(previous, current):
+    """Print wall-time change of each benchmark against the previous run"""
+    before = {(r['name'], r['scale']): r for r in previous['results']}
+    print(f"\nCompared with {previous['revision']} ({previous['timestamp']}):")
+    for result in current['results']:
+        old = before.get((result['name'], result['scale']))
+        if not old or not old['wall_best']:
+            continue
+        change = (result['wall_best'] - old['wall_best']) / old['wall_best'] * 100
+        print(f"  {result['name']:<36} {result['scale']:>8}  {change:+7.1f}% wall  "
+              f"{result['peak_kib'] - old['peak_kib']:+10.1f} KiB peak")
+
+
+def parse_scales(value):
+    return [int(scale) for scale in value.split(',') if scale.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark kiro_sync parsing and body generation')
+    parser.add_argument('--tasks', default=DEFAULT_TASK_SCALES, help='Comma-separated task counts')
+    parser.add_argument('--commits', default=DEFAULT_COMMIT_SCALES, help='Comma-separated commit counts')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed repetitions per benchmark')
+    parser.add_argument('--output', default=DEFAULT_RESULTS, help='JSON results file to append to')
+    parser.add_argument('--compare', action='store_true', help='Compare with the previous run in the results file')
+    args = parser.parse_args()
+
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'results': []
+    }
+
+    def record(name, scale, func):
+        best, mean, peak = measure(func, args.repeats)
+        run['results'].append({'name': name, 'scale': scale, 'wall_best': best, 'wall_mean': mean, 'peak_kib': peak})
+        print(f"{name:<36} {scale:>8}  {best * 1000:10.2f} ms  {peak:10.1f} KiB")
+
+    print(f"{'benchmark':<36} {'scale':>8}  {'best wall':>13}  {'peak mem':>14}")
+    with tempfile.TemporaryDirectory(prefix='kiro-bench-') as workdir:
+        for tasks in parse_scales(args.tasks):
+            spec_dir = generate_spec(Path(workdir) / f'spec-{tasks}', tasks)
+            for name, func in spec_benchmarks(spec_dir, tasks):
+                record(name, tasks, func)
+
+        for commits in parse_scales(args.commits):
+            repo_dir = generate_history(Path(workdir) / f'history-{commits}', commits)
+            for name, func in history_benchmarks(repo_dir):
+                record(name, commits, func)
+
+    results = load_results(args.output)
+    if args.compare and results['runs']:
+        print_comparison(results['runs'][-1], run)
+
+    results['runs'].append(run)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults appended to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Throughput and latency of the sync service (kiro_sync.service) against the offline GitHub API emulator
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m benchmarks.service
+    PYTHONPATH=scripts python3 -m benchmarks.service --branches 20 --burst 10 --profile github
+
+Builds the same synthetic origin as benchmarks.e2e, with --branches task
+branches, clones it and starts the service in the clone on a free port. It
+then sends signed push webhooks in phases and waits for the service to go
+idle after each one:
+
+    initial sync  the startup sync of every spec (milestone, epic, issues)
+    first push    one push per task branch: each opens its PR
+    repeat push   the same pushes again: each finds its PR open
+    burst         --burst pushes per branch at once: later ones merge into the waiting one
+    spec edit     a push to main that ticks a checkbox in tasks.md
+
+For each phase it reports the events sent, the runs they turned into, the
+wall time until idle, throughput, latency percentiles from webhook to done,
+and the API calls the emulator served. Compare with benchmarks.e2e, which
+runs the same work as one workflow run per event.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from .e2e import (REPOSITORY, SCRIPTS_DIR, SPEC, TASK_BRANCH, call_delta, emulator_call, prepare_origin,
+                  start_emulator)
+
+SECRET = 'benchmark'
+STARTUP_TIMEOUT = 30
+IDLE_POLL_SECONDS = 0.02
+
+
+def start_service(clone, api_url, log_path, concurrency, workers):
+    """Start kiro_sync.service in the clone on a free port; return (process, base URL)"""
+    env = dict(os.environ, PYTHONPATH=str(SCRIPTS_DIR), GITHUB_TOKEN='offline-token', GITHUB_API_URL=api_url,
+               GITHUB_GRAPHQL_URL=f'{api_url}/graphql')
+    log = open(log_path, 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'kiro_sync.service', '--port', '0', '--repo', REPOSITORY, '--secret', SECRET,
+         '--concurrency', str(concurrency), '--workers', str(workers)],
+        cwd=clone, env=env, stdout=log, stderr=subprocess.STDOUT, text=True)
+    log.close()
+
+    # The service keeps printing to the log, so the URL is read from the file rather than a pipe
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        match = re.search(r'on (http://\S+)', Path(log_path).read_text())
+        if match:
+            return process, match.group(1)
+        if process.poll() is not None:
+            break
+        time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"The service did not start; see {log_path}")
+
+
+def send_push(service_url, branch, sha, paths=()):
+    payload = {
+        'ref': f'refs/heads/{branch}', 'after': sha, 'deleted': False,
+        'repository': {'full_name': REPOSITORY},
+        'commits': [{'id': sha, 'added': [], 'modified': list(paths), 'removed': []}] if paths else []
+    }
+    body = json.dumps(payload).encode('utf-8')
+    signature = 'sha256=' + hmac.new(SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    request = urllib.request.Request(f'{service_url}/webhook', data=body, method='POST', headers={
+        'Content-Type': 'application/json', 'X-GitHub-Event': 'push', 'X-Hub-Signature-256': signature})
+    with urllib.request.urlopen(request) as response:
+        response.read()
+
+
+def wait_idle(service_url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = emulator_call(service_url, '/status')
+        if not status['running'] and not status['waiting']:
+            return status
+        time.sleep(IDLE_POLL_SECONDS)
+    raise RuntimeError(f"The service was still busy after {timeout}s")
+
+
+def git(repository, *args):
+    return subprocess.run(['git', '-C', str(repository), '-c', 'user.name=Bench', '-c', 'user.email=bench@example.com',
+                           *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sync service against the GitHub API emulator')
+    parser.add_argument('--tasks', type=int, default=200, help='Tasks in the synthetic spec')
+    parser.add_argument('--commits', type=int, default=200, help='Commits on each task branch')
+    parser.add_argument('--branches', type=int, default=10, help='Task branches pushed in each phase')
+    parser.add_argument('--burst', type=int, default=5, help='Pushes per branch in the burst phase')
+    parser.add_argument('--concurrency', type=int, default=4, help='--concurrency of the service')
+    parser.add_argument('--workers', type=int, default=4, help='--workers of the service')
+    parser.add_argument('--profile', default='instant', help='Emulator latency preset')
+    parser.add_argument('--latency', action='append', default=[], help='Passed to the emulator')
+    parser.add_argument('--fail', action='append', default=[], help='Passed to the emulator')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for emulator jitter and failures')
+    parser.add_argument('--timeout', type=float, default=600, help='Seconds to wait for each phase')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    parser.add_argument('--keep', action='store_true', help='Keep the work directory for inspection')
+    args = parser.parse_args()
+
+    options = ['--profile', args.profile, '--seed', str(args.seed)]
+    for flag, values in (('--latency', args.latency), ('--fail', args.fail)):
+        for value in values:
+            options += [flag, value]
+
+    work_dir = Path(tempfile.mkdtemp(prefix='kiro-service-'))
+    emulator, api_url = start_emulator(options)
+    service = None
+    results = []
+    try:
+        origin = prepare_origin(work_dir / 'origin', args.tasks, args.commits)
+        head = git(origin, 'rev-parse', TASK_BRANCH)
+        branches = [f'feature/task-{number:02d}' for number in range(2, 2 + args.branches)]
+        for branch in branches:
+            if branch != TASK_BRANCH:
+                git(origin, 'branch', branch, head)
+        subprocess.run(['git', 'clone', '--quiet', f'file://{origin}', str(work_dir / 'clone')], check=True)
+
+        log_path = work_dir / 'service.log'
+        started = time.monotonic()
+        service, service_url = start_service(work_dir / 'clone', api_url, log_path, args.concurrency, args.workers)
+        print(f"Emulator at {api_url}, service at {service_url}, log {log_path}\n")
+        print(f"{'phase':<13} {'events':>6} {'runs':>5} {'wall':>8} {'events/s':>9} "
+              f"{'p50':>8} {'p95':>8} {'max':>8} {'calls':>6}")
+
+        tasks_file = f'.kiro/specs/{SPEC}/tasks.md'
+
+        def spec_edit():
+            path = origin / tasks_file
+            path.write_text(path.read_text().replace('- [ ] ', '- [x] ', 1))
+            git(origin, 'commit', '--quiet', '-am', 'Complete a task')
+            send_push(service_url, 'main', git(origin, 'rev-parse', 'HEAD'), [tasks_file])
+            return 1
+
+        def pushes(count):
+            def send():
+                for _ in range(count):
+                    for branch in branches:
+                        send_push(service_url, branch, head)
+                return count * len(branches)
+            return send
+
+        phases = [('initial sync', None), ('first push', pushes(1)), ('repeat push', pushes(1)),
+                  ('burst', pushes(args.burst)), ('spec edit', spec_edit)]
+        completed, before = 0, {'calls': {}}
+        for name, send in phases:
+            phase_started = started if send is None else time.monotonic()
+            sent = send() if send else 1
+            status = wait_idle(service_url, args.timeout)
+            wall = time.monotonic() - phase_started
+            stats = emulator_call(api_url, '/_emulator/stats')
+            calls = call_delta(before, stats)
+            before = stats
+
+            runs = [event for event in status['recent'] if event['seq'] > completed]
+            completed = status['completed']
+            latencies = sorted(event['latency'] for event in runs) or [0.0]
+            failed = sum(1 for event in runs if not event['ok'])
+            p50, p95 = latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{name:<13} {sent:>6} {len(runs):>5} {wall:7.2f}s {sent / wall:9.1f} {p50 * 1000:6.0f}ms "
+                  f"{p95 * 1000:6.0f}ms {latencies[-1] * 1000:6.0f}ms {sum(calls.values()):>6}"
+                  + (f"  {failed} failed" if failed else ''))
+            results.append({'phase': name, 'events': sent, 'runs': len(runs), 'failed': failed, 'wall': wall,
+                            'latency': {'p50': p50, 'p95': p95, 'max': latencies[-1]}, 'calls': calls})
+    finally:
+        if service:
+            service.terminate()
+            service.wait()
+        emulator.terminate()
+        emulator.wait()
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'emulator': options, 'tasks': args.tasks, 'branches': args.branches,
+                       'concurrency': args.concurrency, 'phases': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 1 if any(result['failed'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Synthetic Kiro specs and git histories for benchmarking
+
+Usage:
+    python3 -m benchmarks.synthetic spec <directory> --tasks 1000
+    python3 -m benchmarks.synthetic history <directory> --commits 10000
+
+Output is deterministic for a given size and seed, so results from
+different runs are comparable.
+"""
+
+import argparse
+import random
+import subprocess
+from pathlib import Path
+
+WORDS = (
+    'file action bar selection permission upload download rename move delete directory '
+    'progress dialog breadcrumb navigation service component template error retry cancel '
+    'state model interface toolbar snackbar validation cache listing metadata'
+).split()
+
+COMMIT_TYPES = ('feat', 'fix', 'refactor', 'test', 'docs', 'chore', 'perf', 'style')
+COMMIT_PATHS = (
+    'afs-spa/src/app/pages/files', 'afs-spa/src/app/core/services',
+    'afs-spa/src/app/shared/components', 'scripts', 'docs', '.github/workflows'
+)
+
+
+def _phrase(rng, low=3, high=8):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).capitalize()
+
+
+def requirement_count(tasks):
+    """Number of requirements generated alongside a tasks.md of the given size"""
+    return max(2, tasks // 10)
+
+
+def generate_requirements(rng, requirements):
+    """Render a requirements.md with user stories and numbered acceptance criteria"""
+    lines = ['# Requirements Document', '', '## Introduction', '', _phrase(rng, 20, 40) + '.', '',
+             '## Requirements', '']
+    for number in range(1, requirements + 1):
+        lines += [
+            f'### Requirement {number}', '',
+            f'**User Story:** As a user, I want {_phrase(rng).lower()}, so that {_phrase(rng).lower()}.', '',
+            '#### Acceptance Criteria', ''
+        ]
+        for criterion in range(1, rng.randint(3, 7)):
+            lines.append(f'{criterion}. WHEN {_phrase(rng).lower()} THEN the system SHALL {_phrase(rng).lower()}')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def generate_design(rng, components):
+    """Render a design.md with architecture, component and testing sections"""
+    lines = ['# Design Document', '', '## Overview', '', _phrase(rng, 20, 40) + '.', '',
+             '## Architecture', '', _phrase(rng, 20, 40) + '.', '',
+             '### Component Structure', '', '```', 'FilesComponent', '├── FileActionBarComponent', '```', '',
+             '## Components and Interfaces', '']
+    for number in range(1, components + 1):
+        lines += [f'### Component{number}', '', _phrase(rng, 15, 30) + '.', '', '```typescript',
+                  f'interface Component{number} {{', '  id: string;', '}', '```', '']
+    lines += ['## Testing Strategy', '', '### Unit Tests', '', '- ' + _phrase(rng), '',
+              '### Integration Tests', '', '- ' + _phrase(rng), '', '### E2E Tests', '', '- ' + _phrase(rng), '']
+    return '\n'.join(lines)
+
+
+def generate_tasks(rng, tasks, requirements):
+    """Render a tasks.md with blank lines, nested bullets and requirement references"""
+    lines = ['# Implementation Plan', '']
+    for number in range(1, tasks + 1):
+        state = 'x' if rng.random() < 0.3 else ' '
+        lines.append(f'- [{state}] {number}. {_phrase(rng)}')
+        if rng.random() < 0.2:
+            lines += ['', '']
+        for _ in range(rng.randint(2, 5)):
+            lines.append(f'  - {_phrase(rng, 5, 12)}')
+            if rng.random() < 0.2:
+                lines.append(f'    - {_phrase(rng, 5, 12)}')
+        refs = sorted({f'{rng.randint(1, requirements)}.{rng.randint(1, 5)}' for _ in range(rng.randint(1, 5))})
+        lines += [f"  - _Requirements: {', '.join(refs)}_", '']
+    return '\n'.join(lines)
+
+
+def generate_spec(directory, tasks, seed=0):
+    """Write requirements.md, design.md and tasks.md for a spec of the given size"""
+    rng = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    requirements = requirement_count(tasks)
+
+    (directory / 'requirements.md').write_text(generate_requirements(rng, requirements))
+    (directory / 'design.md').write_text(generate_design(rng, max(2, tasks // 20)))
+    (directory / 'tasks.md').write_text(generate_tasks(rng, tasks, requirements))
+    return directory
+
+
+def generate_history(directory, commits, base_branch='main', branch='feature/task-01', seed=0):
+    """Create a git repository whose branch is `commits` commits ahead of base_branch
+
+    Commits are streamed through `git fast-import`, which is orders of magnitude
+    faster than running `git commit` in a loop.
+    """
+    rng = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    subprocess.run(['git', 'init', '-q', str(directory)], check=True)
+
+    importer = subprocess.Popen(['git', 'fast-import', '--quiet'], cwd=directory, stdin=subprocess.PIPE)
+    stream = importer.stdin
+    timestamp = 1700000000
+
+    def commit(ref, mark, parent, message, path):
+        data = message.encode('utf-8')
+        content = f'{message}\n'.encode('utf-8')
+        stream.write(f'commit refs/heads/{ref}\nmark :{mark}\n'.encode('utf-8'))
+        stream.write(f'committer Bench <bench@example.com> {timestamp + mark} +0000\n'.encode('utf-8'))
+        stream.write(f'data {len(data)}\n'.encode('utf-8') + data + b'\n')
+        if parent:
+            stream.write(f'from :{parent}\n'.encode('utf-8'))
+        stream.write(f'M 644 inline {path}\ndata {len(content)}\n'.encode('utf-8') + content + b'\n')
+
+    commit(base_branch, 1, None, 'Initial commit', 'README.md')
+    for mark in range(2, commits + 2):
+        kind = rng.choice(COMMIT_TYPES)
+        path = f'{rng.choice(COMMIT_PATHS)}/file{rng.randint(1, 50)}.ts'
+        commit(branch, mark, mark - 1, f'{kind}: {_phrase(rng).lower()}', path)
+
+    stream.close()
+    if importer.wait() != 0:
+        raise RuntimeError('git fast-import failed')
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic Kiro specs and git histories')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    spec_parser = subparsers.add_parser('spec', help='Generate requirements.md, design.md and tasks.md')
+    spec_parser.add_argument('directory')
+    spec_parser.add_argument('--tasks', type=int, default=1000)
+    spec_parser.add_argument('--seed', type=int, default=0)
+
+    history_parser = subparsers.add_parser('history', help='Generate a git repository with a long branch')
+    history_parser.add_argument('directory')
+    history_parser.add_argument('--commits', type=int, default=10000)
+    history_parser.add_argument('--seed', type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'spec':
+        print(generate_spec(args.directory, args.tasks, args.seed))
+    else:
+        print(generate_history(args.directory, args.commits, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,21 @@
 # Create a branch for a specific task
 
 if [ $# -eq 0 ]; then
-    echo "Usage: $0 <task_number> [base_branch]"
-    echo "Example: $0 04 main"
+    echo "Usage: $0 <task_number> [base_branch] [spec]"
+    echo "Example: $0 04 main file-action-bar"
+    echo "Name the spec when more than one spec has a task with this number"
     exit 1
 fi
 
 TASK_NUMBER=$(printf "%02d" $1)
 BASE_BRANCH=${2:-main}
+SPEC=$3
 
-BRANCH_NAME="feature/task-$TASK_NUMBER"
+if [ -n "$SPEC" ]; then
+    BRANCH_NAME="feature/$SPEC/task-$TASK_NUMBER"
+else
+    BRANCH_NAME="feature/task-$TASK_NUMBER"
+fi
 
 echo "Creating branch $BRANCH_NAME from $BASE_BRANCH..."
 
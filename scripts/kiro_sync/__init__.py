@@ -0,0 +1,4 @@
+"""
+Kiro to GitHub sync helpers
+Shared code imported by the workflows generated by kiro-github-setup.py
+"""
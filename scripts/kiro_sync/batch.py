@@ -0,0 +1,59 @@
+"""
+Aliased GraphQL mutations sent in batches, shared by the state and sub-issue syncs
+
+Each change is one aliased mutation field; up to MUTATION_BATCH of them go in
+one request, and a field's outcome is read back by its alias, so one failed
+field does not fail the rest of its batch.
+"""
+
+from . import trace
+from .client import GitHubApiError
+
+QUERY_BATCH = 100
+MUTATION_BATCH = 100
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def apply_mutations(client, aliased_fields, chunk_size=MUTATION_BATCH, span='batch.mutate'):
+    """Send (alias, key, mutation field) tuples in batches; return {key: error or None}
+
+    Several fields may share a key (a close and a label for one task); the key
+    reports the first error among them.
+    """
+    outcome = {}
+    for batch in chunks(aliased_fields, chunk_size):
+        mutation = 'mutation {\n  %s\n}' % '\n  '.join(field for _, _, field in batch)
+        with trace.span(span, fields=len(batch)) as attrs:
+            try:
+                data, errors = client.graphql(mutation, partial=True)
+            except GitHubApiError as e:
+                data, errors = {}, [{'message': str(e)}]
+            attrs['errors'] = len(errors)
+
+        messages = {}
+        for error in errors:
+            path = error.get('path') or []
+            messages[path[0] if path else None] = error.get('message', str(error))
+        for alias, key, _ in batch:
+            if data.get(alias) is None:
+                error = messages.get(alias) or messages.get(None) or 'mutation failed'
+                outcome[key] = outcome.get(key) or error
+            else:
+                outcome.setdefault(key, None)
+    return outcome
+
+
+def operation_result(action, task, number, latency, error, attempts=1):
+    """One issue change in the shape print_latency_report() expects"""
+    return {
+        'action': action,
+        'task': task,
+        'number': number,
+        'latency': latency,
+        'attempts': attempts,
+        'error': error
+    }
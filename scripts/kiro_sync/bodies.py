@@ -0,0 +1,136 @@
+"""
+Markdown bodies for the epic issue, task issues and task pull requests
+"""
+
+from .index import issue_metadata
+
+
+def epic_issue_body(project_name, requirements_summary, architecture_overview,
+                    requirements_url, design_url, tasks_url):
+    """Build the epic issue body from the spec summaries and document links"""
+    return f"""## Epic: {project_name}
+
+### Overview
+This epic tracks the implementation of the {project_name} feature based on Kiro-generated planning documents.
+
+### Requirements Summary
+{requirements_summary}
+
+### Architecture Overview
+{architecture_overview}
+
+### Related Documents
+- [Requirements]({requirements_url})
+- [Design]({design_url})
+- [Tasks]({tasks_url})
+
+### Acceptance Criteria
+- [ ] All task items completed
+- [ ] Requirements validated
+- [ ] Code reviewed and approved
+- [ ] Tests passing
+
+*Auto-generated from Kiro planning documents*"""
+
+
+def task_issue_body(task, epic_number, spec=None):
+    """Build the issue body for a task; spec names the spec the task belongs to in the hidden metadata"""
+    description = task.description or 'Implementation details to be determined during development.'
+    # Flat tasks render exactly as before, so their issues are not rewritten
+    hierarchy = ''
+    if task.parent:
+        hierarchy += f"\n### Parent Task\nSub-task of Task {task.parent}\n"
+    if task.subtasks:
+        hierarchy += "\n### Sub-tasks\n" + '\n'.join(
+            f"- [{'x' if completed else ' '}] {number} {title}" for number, title, completed in task.subtasks) + "\n"
+
+    metadata = {'kind': 'task', 'task': task.number, 'epic': str(epic_number)}
+    if spec:
+        metadata['spec'] = spec
+
+    return f"""## Task #{task.number}: {task.title}
+
+### Description
+{description}
+
+### Requirements Covered
+{task.requirements}
+{hierarchy}
+### Related Epic
+Part of epic #{epic_number}
+
+### Definition of Done
+- [ ] Implementation completed
+- [ ] Unit tests written and passing
+- [ ] Code reviewed
+- [ ] Requirements validated
+- [ ] Documentation updated
+
+*Auto-generated from Kiro tasks*
+{issue_metadata(**metadata)}
+"""
+
+
+def pull_request_body(task_number, pr_title, issue_number, epic_number, commits, testing_requirements=(),
+                      acceptance_criteria=()):
+    """Build the body of an auto-generated task pull request
+
+    testing_requirements lists the test levels from the spec's design, e.g.
+    'Unit Tests Required', as returned by sections.testing_requirements.
+    acceptance_criteria holds the (id, text) pairs the task covers, as
+    returned by traceability.acceptance_criteria.
+    """
+    pr_body = f"""## Task {task_number}: {pr_title}
+
+### Description
+This PR implements the changes for Task {task_number} as part of the Kiro-planned feature development.
+
+### Related Issues"""
+
+    if issue_number:
+        pr_body += f"\n- Resolves #{issue_number}"
+    if epic_number:
+        pr_body += f"\n- Related to Epic #{epic_number}"
+
+    pr_body += f"""
+
+### Changes Made
+{commits}
+"""
+
+    if acceptance_criteria:
+        pr_body += "\n### Requirements Validation\n" + '\n'.join(
+            f"- [ ] **{criterion}** {text}" for criterion, text in acceptance_criteria) + "\n"
+
+    if testing_requirements:
+        pr_body += "\n### Testing Requirements\n" + '\n'.join(f"- [ ] {test}" for test in testing_requirements) + "\n"
+
+    pr_body += """
+### Testing Checklist
+- [ ] Unit tests added/updated
+- [ ] Integration tests pass
+- [ ] Manual testing completed
+- [ ] Edge cases tested
+- [ ] Error handling tested
+
+### Code Quality Checklist
+- [ ] Code follows project standards
+- [ ] TypeScript types properly defined
+- [ ] Error handling implemented
+- [ ] Loading states implemented
+- [ ] No console.log statements left in code
+
+### Review Checklist
+- [ ] Functionality matches requirements
+- [ ] Code is readable and maintainable
+- [ ] Performance considerations addressed
+- [ ] Security considerations addressed
+- [ ] Accessibility requirements met
+
+### Deployment Notes
+<!-- Add any special deployment considerations -->
+
+---
+*This PR was auto-generated from Kiro task tracking*"""
+
+    return pr_body
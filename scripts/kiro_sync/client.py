@@ -0,0 +1,291 @@
+"""
+In-process GitHub REST client with a pool of keep-alive connections
+
+Replaces spawning `gh` for every call: one process, one TLS handshake per
+pooled connection, JSON in and out. The API root defaults to GITHUB_API_URL
+(set by Actions, and pointing at the right host on GitHub Enterprise) and can
+be overridden with base_url, e.g. to talk to a local fake server in tests.
+"""
+
+import http.client
+import json
+import os
+import queue
+import re
+from typing import NamedTuple
+from urllib.parse import urlencode, urlsplit
+
+from . import trace
+
+DEFAULT_API_URL = 'https://api.github.com'
+API_VERSION = '2022-11-28'
+LINK_NEXT_PATTERN = re.compile(r'<([^>]+)>;\s*rel="next"')
+ROUTE_ID_PATTERN = re.compile(r'/\d+(?=/|$)')
+
+
+class GitHubApiError(Exception):
+    """Raised when a GitHub API call does not return a success status"""
+
+    def __init__(self, status, headers, message):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.headers = headers
+        self.message = message
+
+
+class Response(NamedTuple):
+    status: int
+    headers: dict
+    data: object
+
+
+class Issue(NamedTuple):
+    number: int
+    title: str
+    body: str
+    state: str
+    url: str
+    labels: tuple
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(
+            number=data['number'],
+            title=data['title'],
+            body=data.get('body') or '',
+            state=data.get('state', 'open'),
+            url=data.get('html_url', ''),
+            labels=tuple(label['name'] if isinstance(label, dict) else label for label in data.get('labels', []))
+        )
+
+
+class PullRequest(NamedTuple):
+    number: int
+    title: str
+    url: str
+    state: str
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['number'], data['title'], data.get('html_url', ''), data.get('state', 'open'))
+
+
+class Milestone(NamedTuple):
+    number: int
+    title: str
+    state: str
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['number'], data['title'], data.get('state', 'open'))
+
+
+class GitHubClient:
+    """GitHub REST client for one repository, safe to share between threads"""
+
+    def __init__(self, repo, token=None, base_url=None, pool_size=8, timeout=30):
+        self.repo = repo
+        self.token = token or os.environ.get('GITHUB_TOKEN') or os.environ.get('GH_TOKEN')
+        self.base_url = (base_url or os.environ.get('GITHUB_API_URL') or DEFAULT_API_URL).rstrip('/')
+        self.timeout = timeout
+
+        parts = urlsplit(self.base_url)
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._prefix = parts.path.rstrip('/')
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+        # GHES serves GraphQL at /api/graphql next to the REST root at /api/v3
+        if self.base_url.endswith('/v3'):
+            self.graphql_url = self.base_url[:-len('/v3')] + '/graphql'
+        else:
+            self.graphql_url = self.base_url + '/graphql'
+        if not base_url and os.environ.get('GITHUB_GRAPHQL_URL'):
+            self.graphql_url = os.environ['GITHUB_GRAPHQL_URL']
+
+    # Connection pool
+
+    def _new_connection(self):
+        if self._scheme == 'https':
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _checkout(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _checkin(self, connection):
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self):
+        """Close every pooled connection"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    # Requests
+
+    def _headers(self, has_body):
+        headers = {
+            'Accept': 'application/vnd.github+json',
+            'X-GitHub-Api-Version': API_VERSION,
+            'User-Agent': 'kiro-sync'
+        }
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if has_body:
+            headers['Content-Type'] = 'application/json'
+        return headers
+
+    def _url(self, path, params=None):
+        if path.startswith('http'):
+            parts = urlsplit(path)
+            url = parts.path + (f'?{parts.query}' if parts.query else '')
+        else:
+            url = f"{self._prefix}/{path.lstrip('/')}"
+        if params:
+            url += ('&' if '?' in url else '?') + urlencode(params)
+        return url
+
+    def _route(self, url):
+        """Group URLs for tracing: /repos/o/r/issues/12?x=1 -> /repos/{repo}/issues/{n}"""
+        route = url.split('?', 1)[0]
+        if self._prefix and route.startswith(self._prefix + '/'):
+            route = route[len(self._prefix):]
+        return ROUTE_ID_PATTERN.sub('/{n}', route.replace(f'/repos/{self.repo}/', '/repos/{repo}/'))
+
+    def request(self, method, path, payload=None, params=None):
+        """Send one request and return a Response, raising GitHubApiError on failure"""
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        url = self._url(path, params)
+        headers = self._headers(body is not None)
+
+        with trace.span(f'http {method} {self._route(url)}', bytes_out=len(body or b'')) as attrs:
+            response, response_headers, raw = self._send(method, url, body, headers)
+            attrs.update(status=response.status, bytes_in=len(raw))
+
+        try:
+            data = json.loads(raw) if raw else None
+        except json.JSONDecodeError:
+            data = raw.decode('utf-8', errors='replace')
+
+        if response.status >= 400:
+            message = data.get('message', '') if isinstance(data, dict) else str(data or response.reason)
+            raise GitHubApiError(response.status, response_headers, message)
+
+        return Response(response.status, response_headers, data)
+
+    def _send(self, method, url, body, headers):
+        """Send on a pooled connection and return (response, headers, raw body)"""
+        # A pooled connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            connection, reused = self._checkout()
+            try:
+                connection.request(method, url, body=body, headers=headers)
+                response = connection.getresponse()
+                raw = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                connection.close()
+                if reused and attempt == 0:
+                    continue
+                raise GitHubApiError(0, {}, f'{type(e).__name__}: {e}') from e
+
+            response_headers = {name.lower(): value for name, value in response.getheaders()}
+            if response.will_close:
+                connection.close()
+            else:
+                self._checkin(connection)
+            return response, response_headers, raw
+
+    def graphql(self, query, variables=None, partial=False):
+        """Run a GraphQL query or mutation and return its data, raising GitHubApiError on errors
+
+        With partial=True, return (data, errors) instead so a batch of aliased
+        fields can keep the results of the fields that succeeded.
+        """
+        response = self.request('POST', self.graphql_url, {'query': query, 'variables': variables or {}})
+        data = response.data or {}
+        errors = data.get('errors') or []
+        if partial:
+            return data.get('data') or {}, errors
+        if errors:
+            message = '; '.join(error.get('message', str(error)) for error in errors)
+            raise GitHubApiError(response.status, response.headers, message)
+        return data.get('data') or {}
+
+    def paginate(self, path, params=None):
+        """Yield every item of a paginated list endpoint, following Link headers"""
+        params = dict(params or {}, per_page=100)
+        response = self.request('GET', path, params=params)
+        while True:
+            data = response.data
+            yield from (data.get('items', []) if isinstance(data, dict) else data)
+            match = LINK_NEXT_PATTERN.search(response.headers.get('link', ''))
+            if not match:
+                return
+            response = self.request('GET', match.group(1))
+
+    # Typed helpers
+
+    def create_issue(self, title, body, labels=(), milestone=None):
+        payload = {'title': title, 'body': body, 'labels': list(labels)}
+        if milestone:
+            payload['milestone'] = int(milestone)
+        return Issue.from_json(self.request('POST', f'repos/{self.repo}/issues', payload).data)
+
+    def update_issue(self, number, **fields):
+        return Issue.from_json(self.request('PATCH', f'repos/{self.repo}/issues/{number}', fields).data)
+
+    def list_issues(self, labels=None, state='open'):
+        params = {'state': state}
+        if labels:
+            params['labels'] = labels
+        return [
+            Issue.from_json(item)
+            for item in self.paginate(f'repos/{self.repo}/issues', params)
+            if 'pull_request' not in item
+        ]
+
+    def search_issues(self, query):
+        items = self.paginate('search/issues', {'q': f'repo:{self.repo} is:issue {query}'})
+        return [Issue.from_json(item) for item in items]
+
+    def comment_on_issue(self, number, body):
+        return self.request('POST', f'repos/{self.repo}/issues/{number}/comments', {'body': body}).data
+
+    def add_labels(self, number, labels):
+        return self.request('POST', f'repos/{self.repo}/issues/{number}/labels', {'labels': list(labels)}).data
+
+    def list_pulls(self, head=None, base=None, state='open'):
+        params = {'state': state}
+        if head:
+            # The API filters by "owner:branch"
+            params['head'] = head if ':' in head else f"{self.repo.split('/')[0]}:{head}"
+        if base:
+            params['base'] = base
+        return [PullRequest.from_json(item) for item in self.paginate(f'repos/{self.repo}/pulls', params)]
+
+    def create_pull(self, title, body, base, head):
+        payload = {'title': title, 'body': body, 'base': base, 'head': head}
+        return PullRequest.from_json(self.request('POST', f'repos/{self.repo}/pulls', payload).data)
+
+    def create_label(self, name, color, description=''):
+        """Create a label and return its GraphQL node id"""
+        payload = {'name': name, 'color': color, 'description': description}
+        return self.request('POST', f'repos/{self.repo}/labels', payload).data['node_id']
+
+    def list_milestones(self, state='all'):
+        items = self.paginate(f'repos/{self.repo}/milestones', {'state': state})
+        return [Milestone.from_json(item) for item in items]
+
+    def create_milestone(self, title, description=''):
+        payload = {'title': title, 'description': description}
+        return Milestone.from_json(self.request('POST', f'repos/{self.repo}/milestones', payload).data)
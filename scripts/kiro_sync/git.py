@@ -0,0 +1,178 @@
+"""
+Git history helpers for the auto-PR workflow
+
+The auto-PR job starts from a shallow clone. fetch_until_merge_base() fetches
+the base and task branches shallowly and deepens them step by step until
+their merge-base is present, so a long-lived monorepo never needs a full
+clone. get_commit_summary() then reads the newest commits of `git log
+base..branch` as a stream, up to MAX_LOGGED_COMMITS, and renders a bounded
+summary grouped by commit type or path.
+"""
+
+import re
+import subprocess
+from collections import OrderedDict
+
+from . import trace
+
+INITIAL_DEPTH = 50
+MAX_DEEPEN_ROUNDS = 6
+# Up to this many commits are listed flat, one line per commit, as before
+FLAT_LIMIT = 20
+MAX_PER_GROUP = 10
+# Only the newest commits are logged with their paths; older ones are just counted
+MAX_LOGGED_COMMITS = 200
+# Stay well inside GitHub's 65536 character PR body limit
+MAX_SUMMARY_CHARS = 20000
+NO_COMMITS = '- Initial commit for this task'
+
+CONVENTIONAL_SUBJECT = re.compile(r'^(?P<type>[a-z]+)(?:\([^)]*\))?!?:\s')
+RECORD_SEPARATOR = '\x1e'
+
+
+def _git(args, cwd=None):
+    with trace.span(f'git {args[0]}', args=' '.join(args[1:])) as attrs:
+        result = subprocess.run(['git', *args], capture_output=True, text=True, cwd=cwd)
+        attrs['status'] = result.returncode
+    return result
+
+
+def has_merge_base(base_ref, head_ref, cwd=None):
+    return _git(['merge-base', base_ref, head_ref], cwd).returncode == 0
+
+
+def fetch_until_merge_base(base_branch, current_branch, remote='origin', cwd=None,
+                           initial_depth=INITIAL_DEPTH, max_rounds=MAX_DEEPEN_ROUNDS):
+    """Fetch both branches shallowly, deepening until they share a merge-base
+
+    Each round doubles the deepening step; if that is still not enough the
+    history is unshallowed. Returns the (base, head) refs to compare, which
+    are remote-tracking refs so a missing local base branch does not matter.
+    """
+    base_ref, head_ref = f'{remote}/{base_branch}', f'{remote}/{current_branch}'
+    refspecs = [f'+refs/heads/{branch}:refs/remotes/{remote}/{branch}' for branch in (base_branch, current_branch)]
+    shallow = _git(['rev-parse', '--is-shallow-repository'], cwd).stdout.strip() == 'true'
+
+    fetch = ['fetch', '--no-tags', '--quiet']
+    depth_args = [f'--depth={initial_depth}'] if shallow else []
+    _git(fetch + depth_args + [remote] + refspecs, cwd)
+
+    step = initial_depth
+    for _ in range(max_rounds):
+        if has_merge_base(base_ref, head_ref, cwd) or not shallow:
+            return base_ref, head_ref
+        print(f"No merge-base of {base_branch} and {current_branch} yet, deepening by {step}")
+        _git(fetch + [f'--deepen={step}', remote] + refspecs, cwd)
+        step *= 2
+
+    if not has_merge_base(base_ref, head_ref, cwd):
+        print("Merge-base still not found, fetching full history")
+        _git(fetch + ['--unshallow', remote] + refspecs, cwd)
+
+    return base_ref, head_ref
+
+
+def fast_forward(branch, remote='origin', cwd=None):
+    """Fetch branch and fast-forward the checkout to it; False if that fails or would not fast-forward"""
+    if _git(['fetch', '--no-tags', '--quiet', remote, branch], cwd).returncode:
+        return False
+    return _git(['merge', '--ff-only', '--quiet', 'FETCH_HEAD'], cwd).returncode == 0
+
+
+def commit_group(subject, paths):
+    """Group a commit by its conventional type, else by the top-level directory it touches"""
+    match = CONVENTIONAL_SUBJECT.match(subject)
+    if match:
+        return match.group('type')
+    if not paths:
+        return 'other'
+    return f"{paths[0].split('/', 1)[0]}/" if '/' in paths[0] else 'root'
+
+
+def _stream_commits(cmd, cwd):
+    """Yield (subject, paths) for each commit in a streamed `git log` run"""
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+                          errors='replace', cwd=cwd) as process:
+        subject, paths = None, []
+        for line in process.stdout:
+            line = line.rstrip('\n')
+            if line.startswith(RECORD_SEPARATOR):
+                if subject is not None:
+                    yield subject, paths
+                subject, paths = line[1:], []
+            elif line and subject is not None:
+                paths.append(line)
+        if subject is not None:
+            yield subject, paths
+
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, cmd)
+
+
+def _bounded(lines, limit=MAX_SUMMARY_CHARS):
+    summary, size = [], 0
+    for line in lines:
+        if size + len(line) + 1 > limit:
+            summary.append('- … (summary truncated)')
+            break
+        summary.append(line)
+        size += len(line) + 1
+    return '\n'.join(summary)
+
+
+def count_commits(base_branch, current_branch, cwd=None):
+    """Count the non-merge commits of base..branch without diffing them, or None if git fails"""
+    result = _git(['rev-list', '--count', '--no-merges', f'{base_branch}..{current_branch}'], cwd)
+    return int(result.stdout) if result.returncode == 0 else None
+
+
+def get_commit_summary(base_branch, current_branch, cwd=None, max_commits=MAX_LOGGED_COMMITS):
+    """Get commit summary since branching
+
+    Short branches list every subject. Longer ones are grouped by commit type
+    (feat, fix, ...) or top-level path, showing the first few subjects of
+    each group and a count of the rest. Only the newest max_commits commits
+    are read with their paths; the rest of the range is only counted.
+    """
+    cmd = ['git', 'log', '--no-merges', '--no-renames', '--name-only', f'--max-count={max_commits}',
+           f'--format={RECORD_SEPARATOR}%s', f'{base_branch}..{current_branch}']
+
+    groups = OrderedDict()
+    flat = []
+    total = 0
+    try:
+        with trace.span('git log', range=f'{base_branch}..{current_branch}') as attrs:
+            for subject, paths in _stream_commits(cmd, cwd):
+                total += 1
+                if total <= FLAT_LIMIT:
+                    flat.append(subject)
+                group = groups.setdefault(commit_group(subject, paths), [0, []])
+                group[0] += 1
+                if len(group[1]) < MAX_PER_GROUP:
+                    group[1].append(subject)
+            attrs['commits'] = total
+    except (OSError, subprocess.CalledProcessError):
+        return NO_COMMITS
+
+    if not total:
+        return NO_COMMITS
+    if total <= FLAT_LIMIT:
+        return _bounded(f'- {subject}' for subject in flat)
+
+    logged = total
+    if total == max_commits:
+        total = max(total, count_commits(base_branch, current_branch, cwd) or 0)
+
+    def lines():
+        if total > logged:
+            yield f'{total} commits; the latest {logged} in {len(groups)} groups'
+        else:
+            yield f'{total} commits in {len(groups)} groups'
+        for name, (count, subjects) in sorted(groups.items(), key=lambda item: -item[1][0]):
+            yield ''
+            yield f'**{name}** ({count})'
+            yield from (f'- {subject}' for subject in subjects)
+            if count > len(subjects):
+                yield f'- … and {count - len(subjects)} more'
+
+    return _bounded(lines())
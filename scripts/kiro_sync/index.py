@@ -0,0 +1,96 @@
+"""
+Task to issue to epic index shared between the integration and auto-PR workflows
+
+The integration workflow writes the index after every sync and the Actions
+cache carries it to later runs, so the auto-PR job can resolve a branch's task
+to its issue and epic with a dict lookup instead of a search API call. Every
+spec numbers its tasks from 1, so entries are kept per spec; a task number
+that several specs use only resolves when the branch names the spec
+(feature/<spec>/task-1). Each issue body also carries the same mapping as
+hidden metadata so a search fallback can verify it found the right issue.
+"""
+
+import json
+import re
+
+from .manifest import MANIFEST_DIR, write_json
+
+INDEX_PATH = f'{MANIFEST_DIR}/index.json'
+INDEX_VERSION = 2
+METADATA_PATTERN = re.compile(r'<!-- kiro-sync (\{.*?\}) -->')
+
+
+def issue_metadata(**fields):
+    """Render metadata as an HTML comment that GitHub does not display"""
+    return f"<!-- kiro-sync {json.dumps(fields, sort_keys=True)} -->"
+
+
+def parse_issue_metadata(body):
+    """Return the metadata dict embedded in an issue body, or {}"""
+    match = METADATA_PATTERN.search(body or '')
+    if not match:
+        return {}
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return {}
+
+
+def normalize_task_number(task_number):
+    """Map '04' and '4' to the same key"""
+    task_number = str(task_number).strip()
+    return str(int(task_number)) if task_number.isdigit() else task_number
+
+
+def load_index(path=INDEX_PATH):
+    """Load the index, returning an empty one if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            index = json.load(f)
+        if index.get('version') == INDEX_VERSION:
+            return index
+    except (OSError, json.JSONDecodeError):
+        pass
+    return {'version': INDEX_VERSION, 'specs': {}}
+
+
+def update_index(spec, manifest, epic_number, path=INDEX_PATH):
+    """Replace the index entries for one spec with the tasks in its manifest"""
+    index = load_index(path)
+    index['specs'][spec] = {
+        normalize_task_number(number): {
+            'issue': entry['issue'],
+            'title': entry.get('title', f'Task {number}'),
+            'epic': int(epic_number) if str(epic_number).isdigit() else None,
+            'spec': spec
+        }
+        for number, entry in manifest['tasks'].items()
+        if not entry.get('closed') and entry.get('issue')
+    }
+    write_json(path, index)
+    return index
+
+
+def spec_from_branch(branch, specs):
+    """The spec a branch names as a path segment, e.g. feature/file-action-bar/task-2, or None"""
+    segments = set(branch.split('/'))
+    named = [spec for spec in specs if spec in segments]
+    return named[0] if len(named) == 1 else None
+
+
+def lookup_task(index, task_number, branch=''):
+    """Return the index entry for a task, or None
+
+    When several specs have the task and the branch does not name one of
+    them, there is no entry to trust: the caller falls back to the search.
+    """
+    key = normalize_task_number(task_number)
+    entries = {spec: tasks[key] for spec, tasks in index['specs'].items() if key in tasks}
+    if len(entries) <= 1:
+        return next(iter(entries.values()), None)
+
+    spec = spec_from_branch(branch, entries)
+    if spec:
+        return entries[spec]
+    print(f"Task {key} is in specs {', '.join(sorted(entries))} and {branch or 'the branch'} names none of them")
+    return None
@@ -0,0 +1,391 @@
+"""
+Concurrent creation and incremental sync of GitHub issues for Kiro tasks
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import trace
+from .batch import operation_result
+from .bodies import task_issue_body
+from .client import GitHubApiError
+from .index import issue_metadata, parse_issue_metadata
+from .journal import apply_entry
+from .manifest import content_hash, task_hash
+from .ratelimit import RateLimiter, is_rate_limited
+from .states import sync_task_states
+from .subissues import sync_sub_issues
+from .tasks import Task
+
+MAX_ATTEMPTS = 5
+TASK_TITLE_PATTERN = re.compile(r'^Task (\d+(?:\.\d+)*): ')
+
+
+def task_issue_payload(task, epic_number, milestone_number, spec=None):
+    """Build the REST payload for a new task issue"""
+    labels = ['task', 'enhancement']
+    if task.completed:
+        labels.append('completed')
+
+    payload = {
+        'title': f"Task {task.number}: {task.title}",
+        'body': task_issue_body(task, epic_number, spec),
+        'labels': labels
+    }
+    if milestone_number and milestone_number != 'null':
+        payload['milestone'] = int(milestone_number)
+    return payload
+
+
+def call_with_retry(client, limiter, method, path, payload, label, recover=None):
+    """Run one API call through the shared limiter, retrying rate limits, 5xx and dropped connections
+
+    A POST that failed with a 5xx or a dropped connection may still have been
+    applied, so it is only sent again once recover() - called before each
+    retry - has found nothing; without recover it is not retried at all.
+    Rate-limited requests were refused outright and are always retried.
+
+    Returns (data, attempts, error).
+    """
+    unsure = False
+    for attempt in range(MAX_ATTEMPTS):
+        limiter.acquire()
+        try:
+            if unsure:
+                data = recover()
+                if data:
+                    print(f"Found {label} already applied after a failed attempt")
+                    return data, attempt + 1, None
+                unsure = False
+                limiter.acquire()
+            response = client.request(method, path, payload)
+        except GitHubApiError as e:
+            if is_rate_limited(e.status, e.headers, e.message):
+                delay = limiter.backoff(e.headers, attempt)
+            elif (e.status == 0 or e.status >= 500) and (method != 'POST' or recover):
+                unsure = unsure or method == 'POST'
+                delay = limiter.retry_delay(attempt)
+                time.sleep(delay)
+            else:
+                return None, attempt + 1, str(e)
+            print(f"Retrying {label} after HTTP {e.status}, backing off {delay:.1f}s")
+            continue
+
+        limiter.update(response.headers)
+        return response.data, attempt + 1, None
+
+    return None, MAX_ATTEMPTS, f'Gave up after {MAX_ATTEMPTS} attempts'
+
+
+def find_created_issue(client, payload):
+    """Return the newest issue carrying the same hidden metadata as a create payload, or None
+
+    Looks through the most recently created task issues, which is where a
+    create that failed in flight but still went through would be.
+    """
+    metadata = parse_issue_metadata(payload['body'])
+    response = client.request('GET', f'repos/{client.repo}/issues', params={
+        'labels': 'task', 'state': 'all', 'sort': 'created', 'direction': 'desc', 'per_page': 100})
+    return next((item for item in response.data
+                 if 'pull_request' not in item and parse_issue_metadata(item.get('body')) == metadata), None)
+
+
+def apply_task_operation(client, operation, limiter):
+    """Create, update or close the issue for one task and return a result dict"""
+    action, task, issue_number, payload = operation
+    label = f"task {task.number}"
+    started = time.monotonic()
+
+    if action == 'create':
+        data, attempts, error = call_with_retry(
+            client, limiter, 'POST', f'repos/{client.repo}/issues', payload, label,
+            recover=lambda: find_created_issue(client, payload)
+        )
+        if data:
+            issue_number = data['number']
+    else:
+        data, attempts, error = call_with_retry(
+            client, limiter, 'PATCH', f'repos/{client.repo}/issues/{issue_number}', payload, label
+        )
+
+    if error:
+        print(f"Failed to {action} issue for task {task.number}: {error}")
+        issue_number = issue_number if action != 'create' else None
+    else:
+        print(f"{action.capitalize()}d issue #{issue_number} for task {task.number}: {task.title}")
+
+    latency = time.monotonic() - started
+    trace.record(f'task.{action}', latency, task=task.number, attempts=attempts, error=bool(error))
+
+    return operation_result(action, task, issue_number, latency, error, attempts)
+
+
+def run_operations(client, operations, workers, on_success=None):
+    """Run task operations on a bounded worker pool, returning results in input order
+
+    operations may be a generator; each one is submitted as soon as it is produced.
+    on_success, if given, is called from the worker with each successful result.
+
+    Creates run concurrently too, so GitHub's issue numbers need not follow
+    task order; each result carries the number its create returned, and that
+    is what the manifest records for the task.
+    """
+    limiter = RateLimiter()
+
+    def run(operation):
+        result = apply_task_operation(client, operation, limiter)
+        if on_success and not result['error']:
+            on_success(result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(run, operation) for operation in operations]
+        return [future.result() for future in futures]
+
+
+def journal_results(journal, epic_number, milestone_number):
+    """Return an on_success callback that journals each completed operation, or None"""
+    if journal is None:
+        return None
+    return lambda result: journal.record(result_entry(result, epic_number, milestone_number))
+
+
+def create_task_issues(client, tasks, epic_number, milestone_number, workers=4, journal=None, spec=None):
+    """Create issues for all tasks concurrently, returning results in file order"""
+    operations = (
+        ('create', task, None, task_issue_payload(task, epic_number, milestone_number, spec))
+        for task in tasks
+    )
+    return run_operations(client, operations, workers, journal_results(journal, epic_number, milestone_number))
+
+
+def index_existing_issues(client, spec=None, epic_number=None):
+    """Map task numbers to the task issues of one spec that already exist on GitHub
+
+    Every spec numbers its tasks from 1, so issues are matched by the spec in
+    their hidden metadata, or by their epic if they predate it. Issues with no
+    metadata at all fall back to the task number in their title.
+    """
+    by_metadata, by_title = {}, {}
+    for issue in client.list_issues(labels='task', state='all'):
+        metadata = parse_issue_metadata(issue.body)
+        if not metadata:
+            match = TASK_TITLE_PATTERN.match(issue.title)
+            if match:
+                by_title.setdefault(match.group(1), issue)
+            continue
+        if spec and 'spec' in metadata:
+            owned = metadata['spec'] == spec
+        else:
+            owned = str(metadata.get('epic')) == str(epic_number)
+        if owned and metadata.get('task'):
+            by_metadata.setdefault(metadata['task'], issue)
+    return {**by_title, **by_metadata}
+
+
+def adopt_existing_issue(task, issue, epic_number, milestone_number, manifest, spec=None):
+    """Record an existing task issue in the manifest instead of creating a duplicate
+
+    Used when no manifest was restored. Issues whose title and body already
+    match are recorded as unchanged.
+    """
+    payload = task_issue_payload(task, epic_number, milestone_number, spec)
+    unchanged = issue.title == payload['title'] and issue.body == payload['body']
+    manifest['tasks'][task.number] = {
+        'issue': issue.number,
+        'title': payload['title'],
+        'hash': task_hash(task, epic_number, milestone_number) if unchanged else None
+    }
+
+
+def plan_task_operation(task, epic_number, milestone_number, manifest, spec=None):
+    """Return the (action, task, issue_number, payload) needed for one task, or None"""
+    entry = manifest['tasks'].get(task.number)
+    payload = task_issue_payload(task, epic_number, milestone_number, spec)
+
+    if not entry:
+        return ('create', task, None, payload)
+    # Labels are only set on create; the completed label belongs to sync_task_states
+    del payload['labels']
+    entry['completed'] = task.completed
+    if task.parent:
+        entry['parent'] = task.parent
+    else:
+        entry.pop('parent', None)
+    if entry.get('closed'):
+        # Task came back after being removed from tasks.md
+        return ('update', task, entry['issue'], dict(payload, state='open'))
+    if entry['hash'] != task_hash(task, epic_number, milestone_number):
+        return ('update', task, entry['issue'], payload)
+    return None
+
+
+def plan_task_sync(tasks, epic_number, milestone_number, manifest, existing=None, counts=None, spec=None):
+    """Diff parsed tasks against the manifest, yielding operations as tasks stream in
+
+    Operations for tasks come in task order and are followed by closes for
+    tasks that disappeared from tasks.md, which are only known at the end.
+    """
+    existing = existing or {}
+    counts = counts if counts is not None else {}
+    seen = set()
+
+    for task in tasks:
+        seen.add(task.number)
+        if task.number not in manifest['tasks'] and task.number in existing:
+            adopt_existing_issue(task, existing[task.number], epic_number, milestone_number, manifest, spec)
+
+        operation = plan_task_operation(task, epic_number, milestone_number, manifest, spec)
+        action = operation[0] if operation else 'unchanged'
+        counts[action] = counts.get(action, 0) + 1
+        if operation:
+            yield operation
+
+    for number, entry in list(manifest['tasks'].items()):
+        if number not in seen and not entry.get('closed'):
+            counts['close'] = counts.get('close', 0) + 1
+            removed = Task(number, '(removed from tasks.md)')
+            yield ('close', removed, entry['issue'], {'state': 'closed', 'state_reason': 'not_planned'})
+
+
+def sync_task_issues(client, tasks, epic_number, milestone_number, manifest, workers=4, journal=None, adopt=False,
+                     spec=None):
+    """Create, update or close only the task issues whose content changed
+
+    tasks may be a generator: operations are submitted to the worker pool
+    while the rest of the file is still being parsed. Updates manifest in
+    place with the outcome of every successful operation. Existing issues
+    are adopted when there is no manifest, or when adopt is set.
+    """
+    existing = index_existing_issues(client, spec, epic_number) if adopt or not manifest['tasks'] else {}
+    counts = {}
+
+    operations = plan_task_sync(tasks, epic_number, milestone_number, manifest, existing, counts, spec)
+    results = run_operations(client, operations, workers, journal_results(journal, epic_number, milestone_number))
+
+    print(f"Sync plan: {counts.get('create', 0)} to create, {counts.get('update', 0)} to update, "
+          f"{counts.get('close', 0)} to close, {counts.get('unchanged', 0)} unchanged")
+
+    record_results(manifest, results, epic_number, milestone_number)
+    return results
+
+
+def result_entry(result, epic_number, milestone_number):
+    """Describe a successful operation as a manifest and journal entry"""
+    task = result['task']
+    entry = {
+        'action': result['action'],
+        'task': task.number,
+        'issue': result['number'],
+        'title': f"Task {task.number}: {task.title}",
+        'hash': task_hash(task, epic_number, milestone_number),
+        'completed': task.completed
+    }
+    if task.parent:
+        entry['parent'] = task.parent
+    if result['action'] == 'create':
+        # A new issue is open; its labels come from the create payload
+        entry['issue_state'] = 'open'
+    return entry
+
+
+def record_results(manifest, results, epic_number, milestone_number):
+    """Store the outcome of every successful operation in the manifest"""
+    for result in results:
+        if not result['error']:
+            apply_entry(manifest, result_entry(result, epic_number, milestone_number))
+
+
+def run_task_sync(client, tasks, epic_number, milestone_number, manifest, journal, recreate=False, workers=4,
+                  spec=None):
+    """Create (recreate) or sync task issues, resuming from the journal of an interrupted run
+
+    Operations the journal shows as completed are skipped: sync finds their
+    hashes already up to date, and recreate only creates tasks not yet
+    created by an earlier attempt of the same workflow run. Issue state is
+    then brought in line with the checkboxes, and sub-task issues are linked
+    to their parents.
+    """
+    resumed = journal.resume(manifest, recreate=recreate)
+
+    if recreate:
+        pending = (task for task in tasks if task.number not in manifest['tasks'])
+        results = create_task_issues(client, pending, epic_number, milestone_number, workers, journal, spec)
+        record_results(manifest, results, epic_number, milestone_number)
+    else:
+        # Creates still in flight when the last run died reached GitHub but not the journal;
+        # adopting existing issues by their metadata keeps them from being created twice
+        results = sync_task_issues(client, tasks, epic_number, milestone_number, manifest, workers, journal,
+                                   adopt=bool(resumed), spec=spec)
+
+    # Close and reopen issues whose checkbox changed, then link sub-issues, in a few batched GraphQL requests
+    return results + sync_task_states(client, manifest) + sync_sub_issues(client, manifest)
+
+
+def ensure_milestone(client, title):
+    """Return the number of the milestone with this title, creating it if needed"""
+    for milestone in client.list_milestones():
+        if milestone.title == title:
+            print(f"Found existing milestone: {title} (#{milestone.number})")
+            return milestone.number
+
+    milestone = client.create_milestone(title, 'Auto-generated milestone from Kiro planning')
+    print(f"Created new milestone: {title} (#{milestone.number})")
+    return milestone.number
+
+
+def sync_epic_issue(client, title, body, milestone_number, manifest, recreate=False, run_id=None):
+    """Create the epic issue, or update it only when its title or body changed
+
+    run_id identifies the workflow run; a re-run attempt of a recreate run
+    keeps the epic its first attempt created. Returns the epic issue number.
+    """
+    labels = ['epic', 'enhancement']
+    body = f"{body}\n{issue_metadata(kind='epic')}"
+    epic_hash = content_hash(title, body, str(milestone_number or ''))
+
+    if recreate and run_id and (manifest.get('epic') or {}).get('run') == run_id:
+        print("Epic was already recreated by an earlier attempt of this run")
+        recreate = False
+    entry = None if recreate else manifest.get('epic')
+
+    if entry is None and not recreate:
+        for issue in client.list_issues(labels='epic', state='open'):
+            if issue.title == title:
+                entry = {'issue': issue.number, 'hash': epic_hash if issue.body == body else None}
+                print(f"Adopted existing epic issue #{issue.number}")
+                break
+
+    if entry is None:
+        epic_number = client.create_issue(title, body, labels, milestone_number).number
+        print(f"Created epic issue #{epic_number}")
+    elif entry['hash'] != epic_hash:
+        epic_number = entry['issue']
+        fields = {'title': title, 'body': body, 'labels': labels}
+        if milestone_number:
+            fields['milestone'] = int(milestone_number)
+        client.update_issue(epic_number, **fields)
+        print(f"Updated epic issue #{epic_number}")
+    else:
+        epic_number = entry['issue']
+        print(f"Epic issue #{epic_number} is up to date")
+
+    manifest['epic'] = {'issue': epic_number, 'hash': epic_hash, 'run': run_id}
+    return epic_number
+
+
+def print_latency_report(results):
+    """Print per-task latency and a short summary"""
+    if not results:
+        return
+
+    print("\nTask  Action    Issue   Attempts  Latency")
+    for result in results:
+        issue = f"#{result['number']}" if result['number'] else 'failed'
+        print(f"{result['task'].number:>4}  {result['action']:<8}  {issue:<7} "
+              f"{result['attempts']:>8}  {result['latency']:6.2f}s")
+
+    latencies = sorted(result['latency'] for result in results)
+    median = latencies[len(latencies) // 2]
+    print(f"Latency: median {median:.2f}s, max {latencies[-1]:.2f}s, total {sum(latencies):.2f}s")
@@ -0,0 +1,118 @@
+"""
+Append-only journal of completed task issue operations
+
+The manifest is only written once a sync finishes. Every successful create,
+update or close is also appended to the spec's journal and flushed at once,
+so if a run dies halfway (API outage, rate limit, runner timeout) the next
+run replays the journal into the manifest and only redoes what did not
+complete. The journal lives next to the manifest in .kiro/.sync and travels
+with it in the Actions cache; it is removed once the manifest is saved.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+from .manifest import MANIFEST_DIR, save_manifest, spec_name
+
+
+def journal_path(tasks_file):
+    """Return the journal path for the spec that owns tasks_file"""
+    return Path(MANIFEST_DIR) / f'{spec_name(tasks_file)}.journal.jsonl'
+
+
+def apply_entry(manifest, entry):
+    """Apply one journaled operation to the manifest"""
+    if entry['action'] == 'close':
+        if entry['task'] in manifest['tasks']:
+            manifest['tasks'][entry['task']]['closed'] = True
+    else:
+        previous = manifest['tasks'].get(entry['task']) or {}
+        updated = {key: entry[key]
+                   for key in ('issue', 'title', 'hash', 'completed', 'issue_state', 'parent') if key in entry}
+        # An entry for the issue the task already has leaves its open/closed state and
+        # sub-issue link as they were: those were recorded by the state and sub-issue
+        # syncs, after the entry, so checkpoint() replaying a create must not reopen it
+        if previous.get('issue') == entry['issue']:
+            for key in ('issue_state', 'linked'):
+                if key in previous:
+                    updated[key] = previous[key]
+        manifest['tasks'][entry['task']] = updated
+
+
+class Journal:
+    """Thread-safe journal for one spec; record() is called from the worker threads"""
+
+    def __init__(self, path, run_id=None):
+        self.path = Path(path)
+        self.run_id = run_id or os.environ.get('GITHUB_RUN_ID', 'local')
+        self._lock = threading.Lock()
+        self._file = None
+
+    def entries(self):
+        """Read every complete entry; a line torn by a killed process is skipped"""
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return entries
+
+    def resume(self, manifest, recreate=False):
+        """Replay an interrupted run into the manifest and return how many operations it had completed
+
+        A recreate run starts from an empty manifest and only trusts issues
+        created by an earlier attempt of the same workflow run.
+        """
+        entries = self.entries()
+        if recreate:
+            manifest['tasks'] = {}
+            current = [entry for entry in entries if entry.get('run') == self.run_id]
+            if len(current) != len(entries):
+                self._rewrite(current)
+            entries = current
+
+        for entry in entries:
+            apply_entry(manifest, entry)
+
+        if entries:
+            print(f"Resuming from {self.path}: {len(entries)} operations already completed")
+        return len(entries)
+
+    def record(self, entry):
+        """Append one completed operation and flush it straight away"""
+        line = json.dumps(dict(entry, run=self.run_id), sort_keys=True) + '\n'
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a')
+            self._file.write(line)
+            self._file.flush()
+
+    def checkpoint(self, manifest, manifest_file):
+        """Fold the journal into the manifest, save the manifest and drop the journal"""
+        self.close()
+        for entry in self.entries():
+            apply_entry(manifest, entry)
+        save_manifest(manifest_file, manifest)
+        self.path.unlink(missing_ok=True)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _rewrite(self, entries):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            f.writelines(json.dumps(entry, sort_keys=True) + '\n' for entry in entries)
+        os.replace(tmp_path, self.path)
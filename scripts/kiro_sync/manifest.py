@@ -0,0 +1,78 @@
+"""
+Sync manifest: what was pushed to GitHub on the previous run
+
+The manifest maps each task number to its issue and a hash of the task
+content, plus the epic issue and a hash of its body. It is restored from the
+workflow cache so a rerun only touches issues whose content changed.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_DIR = '.kiro/.sync'
+MANIFEST_VERSION = 1
+# Bump when the rendered issue body changes so existing issues are rewritten
+BODY_FORMAT = 4
+
+
+def spec_name(tasks_file):
+    """Name a spec after the directory holding its tasks.md"""
+    return Path(tasks_file).parent.name or 'default'
+
+
+def manifest_path(tasks_file):
+    """Return the manifest path for the spec that owns tasks_file"""
+    return Path(MANIFEST_DIR) / f'{spec_name(tasks_file)}.json'
+
+
+def content_hash(*parts):
+    """Stable SHA-256 over JSON-serialisable parts"""
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def task_hash(task, epic_number, milestone_number):
+    """Hash everything that ends up in a task issue's title and body
+
+    Checkbox state is left out: closing, reopening and the completed label
+    are reconciled separately by states.sync_task_states. The parent and
+    sub-task list only count when present, so flat tasks keep their hashes.
+    """
+    hierarchy = (task.parent, task.subtasks) if task.parent or task.subtasks else ()
+    return content_hash(
+        BODY_FORMAT, task.number, task.title, task.description, task.requirements,
+        str(epic_number), str(milestone_number or ''), *hierarchy
+    )
+
+
+def load_manifest(path):
+    """Load a manifest, returning an empty one if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+        print(f"Ignoring manifest {path} with unsupported version {manifest.get('version')}")
+    except FileNotFoundError:
+        pass
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Ignoring unreadable manifest {path}: {e}")
+
+    return {'version': MANIFEST_VERSION, 'epic': None, 'tasks': {}}
+
+
+def write_json(path, data):
+    """Write JSON atomically so an interrupted run never leaves half a file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def save_manifest(path, manifest):
+    """Write the manifest atomically"""
+    write_json(path, manifest)
@@ -0,0 +1,246 @@
+"""
+Batched GraphQL lookups and mutations for the auto-PR workflow
+
+Opening a task PR needs the open PR for the branch (if any), the task issue
+and the epic. fetch_pr_context() asks for all three in one GraphQL query,
+using the task index entry when there is one and a title search otherwise,
+along with the ids of the PR labels. A searched issue names its epic in its
+hidden metadata; without that the PR links no epic. open_task_pull_request() then creates
+the PR, and one follow-up mutation posts the issue back-link with the PR's
+URL and applies the labels: three round-trips per new PR. Labels that do
+not exist yet are added by a REST call instead, which creates them.
+
+create_task_pull_request() is the whole push handler on top of those two,
+shared by the auto-PR workflow and the sync service (kiro_sync.service).
+
+Once a branch has a PR, save_pr_record() writes its number to .kiro/.pr,
+which the workflow caches per branch. The workflow's precheck job reads it
+on later pushes and stops before checkout when that PR is still open.
+"""
+
+import json
+import re
+from contextlib import nullcontext
+from typing import NamedTuple
+
+from .bodies import pull_request_body
+from .client import PullRequest
+from .git import fetch_until_merge_base, get_commit_summary
+from .index import lookup_task, normalize_task_number, parse_issue_metadata, spec_from_branch
+from .manifest import write_json
+from .sections import testing_requirements
+from .traceability import acceptance_criteria, load_traceability
+
+ISSUE_FIELDS = 'id number title body state'
+PR_RECORD_PATH = '.kiro/.pr/pull.json'
+SEARCH_LIMIT = 20
+TASK_NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)*')
+PR_LABELS = ('task', 'kiro-generated')
+
+
+class LinkedIssue(NamedTuple):
+    id: str
+    number: int
+    title: str
+
+
+class PullRequestContext(NamedTuple):
+    repository_id: str
+    existing_pr: PullRequest
+    issue: LinkedIssue
+    epic_number: int  # or None
+    label_ids: dict  # label name -> node id, for the labels that exist
+
+
+def _linked_issue(node):
+    return LinkedIssue(node['id'], node['number'], node['title']) if node else None
+
+
+def _pull_request(node):
+    return PullRequest(node['number'], node['title'], node['url'], node['state'].lower())
+
+
+def build_context_query(entry, labels=PR_LABELS):
+    """Return the GraphQL query for one task, narrowed to known issue numbers when indexed"""
+    if entry:
+        issue_fields = f'task: issue(number: $issue) {{ {ISSUE_FIELDS} }}'
+        epic_fields = f'epic: issue(number: $epic) {{ {ISSUE_FIELDS} }}' if entry.get('epic') else ''
+        search_fields = ''
+        extra_variables = ', $issue: Int!' + (', $epic: Int!' if entry.get('epic') else '')
+    else:
+        issue_fields = ''
+        epic_fields = ''
+        search_fields = (f'search(query: $search, type: ISSUE, first: {SEARCH_LIMIT}) '
+                         f'{{ nodes {{ ... on Issue {{ {ISSUE_FIELDS} }} }} }}')
+        extra_variables = ', $search: String!'
+    label_fields = ' '.join(f'label_{index}: label(name: {json.dumps(name)}) {{ id }}'
+                            for index, name in enumerate(labels))
+
+    return f"""query($owner: String!, $name: String!, $head: String!, $base: String!{extra_variables}) {{
+  repository(owner: $owner, name: $name) {{
+    id
+    pullRequests(headRefName: $head, baseRefName: $base, states: [OPEN], first: 1) {{
+      nodes {{ number title url state }}
+    }}
+    {issue_fields}
+    {epic_fields}
+    {label_fields}
+  }}
+  {search_fields}
+}}"""
+
+
+def _match_task_issue(nodes, number, branch=''):
+    """Pick the search hit for this task only, so "Task 1:" never picks "Task 12:"
+
+    When the hits belong to several specs, only a spec named by the branch
+    picks one; otherwise there is no hit to trust.
+    """
+    matches = []
+    for node in nodes:
+        if not node:
+            continue
+        metadata = parse_issue_metadata(node.get('body'))
+        if metadata.get('task') == number or node['title'].startswith(f'Task {number}: '):
+            matches.append((metadata.get('spec'), node))
+
+    specs = {spec for spec, _ in matches}
+    if len(specs) > 1:
+        named = spec_from_branch(branch, specs - {None})
+        if not named:
+            print(f"Issues for task {number} belong to several specs and {branch or 'the branch'} names none of them")
+            return None
+        matches = [match for match in matches if match[0] == named]
+    return matches[0][1] if matches else None
+
+
+def fetch_pr_context(client, head, base, task_number, entry=None, labels=PR_LABELS):
+    """Fetch the open PR for head, the task issue and the epic in one GraphQL query
+
+    entry is the task index entry for task_number, or None on an index miss.
+    """
+    owner, name = client.repo.split('/', 1)
+    number = normalize_task_number(task_number)
+    variables = {'owner': owner, 'name': name, 'head': head, 'base': base}
+    if entry:
+        variables['issue'] = int(entry['issue'])
+        if entry.get('epic'):
+            variables['epic'] = int(entry['epic'])
+    else:
+        variables['search'] = f'repo:{client.repo} is:issue is:open in:title "Task {number}:"'
+
+    data = client.graphql(build_context_query(entry, labels), variables)
+    repository = data.get('repository') or {}
+
+    pulls = repository.get('pullRequests', {}).get('nodes') or []
+    existing_pr = _pull_request(pulls[0]) if pulls else None
+
+    if entry:
+        task = repository.get('task')
+        issue = task if task and task['state'] == 'OPEN' else None
+        epic_number = (repository.get('epic') or {}).get('number')
+    else:
+        issue = _match_task_issue((data.get('search') or {}).get('nodes') or [], number, head)
+        # The epic of the issue's own spec; there is no reliable way to tell otherwise
+        epic = str(parse_issue_metadata(issue['body']).get('epic', '')) if issue else ''
+        epic_number = int(epic) if epic.isdigit() else None
+
+    label_ids = {name: (repository.get(f'label_{index}') or {}).get('id') for index, name in enumerate(labels)}
+    return PullRequestContext(repository.get('id'), existing_pr, _linked_issue(issue), epic_number,
+                              {name: label_id for name, label_id in label_ids.items() if label_id})
+
+
+CREATE_PULL_MUTATION = """mutation($repository: ID!, $base: String!, $head: String!, $title: String!, $body: String!) {
+  pull: createPullRequest(input: {repositoryId: $repository, baseRefName: $base, headRefName: $head,
+                                  title: $title, body: $body}) {
+    pullRequest { id number title url state }
+  }
+}"""
+
+BACKLINK_FIELDS = 'backlink: addComment(input: {subjectId: $issue, body: $comment}) { clientMutationId }'
+LABEL_FIELDS = 'labels: addLabelsToLabelable(input: {labelableId: $pull, labelIds: $labels}) { clientMutationId }'
+
+
+def open_task_pull_request(client, context, title, body, base, head, labels=PR_LABELS):
+    """Create the PR, then comment on its task issue and label the PR in one follow-up mutation"""
+    data = client.graphql(CREATE_PULL_MUTATION, {'repository': context.repository_id, 'base': base,
+                                                 'head': head, 'title': title, 'body': body})
+    node = data['pull']['pullRequest']
+    pull = _pull_request(node)
+
+    # The back-link needs the PR's URL, so it can only follow the createPullRequest mutation
+    definitions, fields, variables = [], [], {}
+    if context.issue:
+        definitions.append('$issue: ID!, $comment: String!')
+        fields.append(BACKLINK_FIELDS)
+        variables.update(issue=context.issue.id, comment=f'🔗 Pull Request created: {pull.url}')
+    missing = [label for label in labels if label not in context.label_ids]
+    if labels and not missing:
+        definitions.append('$pull: ID!, $labels: [ID!]!')
+        fields.append(LABEL_FIELDS)
+        variables.update(pull=node['id'], labels=[context.label_ids[label] for label in labels])
+    if fields:
+        selection = '\n  '.join(fields)
+        client.graphql(f"mutation({', '.join(definitions)}) {{\n  {selection}\n}}", variables)
+
+    if labels and missing:
+        # The REST call creates labels that do not exist yet
+        client.add_labels(pull.number, labels)
+    return pull
+
+
+def save_pr_record(pull, head, base, path=PR_RECORD_PATH):
+    """Record the branch's PR for the workflow's checkout-free precheck"""
+    write_json(path, {'number': pull.number, 'url': pull.url, 'head': head, 'base': base})
+
+
+def task_number_from_branch(branch):
+    """The task number in a branch name's last segment, e.g. feature/v2-api/task-2.1 -> '2.1', or ''"""
+    match = TASK_NUMBER_PATTERN.search(branch.rsplit('/', 1)[-1])
+    return match.group() if match else ''
+
+
+def create_task_pull_request(client, task_number, branch, base, task_index, git_lock=None):
+    """Open the PR for a task branch unless one is already open; returns (pull, created)
+
+    git_lock serialises the history fetch when several branches share one
+    clone. Raises GitHubApiError when the lookup or the mutation fails.
+    """
+    # One GraphQL query for the open PR, the task issue and the epic
+    entry = lookup_task(task_index, task_number, branch)
+    if entry:
+        print(f"Resolved task {task_number} from index: #{entry['issue']}")
+    context = fetch_pr_context(client, branch, base, task_number, entry)
+    if context.existing_pr:
+        print(f"PR already exists: #{context.existing_pr.number}")
+        return context.existing_pr, False
+
+    if context.issue:
+        issue_number, issue_title = context.issue.number, context.issue.title
+        print(f"Found issue #{issue_number}: {issue_title}")
+    else:
+        print(f"No open issue found for task {task_number}")
+        print("Creating PR without linked issue...")
+        issue_number, issue_title = None, f"Task {task_number}"
+    epic_number = context.epic_number
+
+    # Get commit summary, fetching only as much history as the merge-base needs
+    with git_lock or nullcontext():
+        base_ref, head_ref = fetch_until_merge_base(base, branch)
+        commits = get_commit_summary(base_ref, head_ref)
+
+    title = issue_title.replace(f'Task {normalize_task_number(task_number)}: ', '')
+
+    # Acceptance criteria and test levels come from the traceability index cached by the
+    # integration workflow; the design is only read if that index is missing
+    traceability = load_traceability(entry['spec']) if entry else None
+    criteria = acceptance_criteria(traceability, task_number)
+    if traceability:
+        tests = traceability['testing']
+    else:
+        tests = testing_requirements(f".kiro/specs/{entry['spec']}/design.md") if entry else []
+
+    body = pull_request_body(task_number, title, issue_number, epic_number, commits, tests, criteria)
+
+    # One mutation creates the PR, a second posts the issue back-link and applies the labels
+    return open_task_pull_request(client, context, title, body, base, branch), True
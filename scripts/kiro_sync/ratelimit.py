@@ -0,0 +1,98 @@
+"""
+Adaptive pacing for concurrent GitHub API callers
+
+GitHub enforces a primary limit (reported in the x-ratelimit-* headers) and
+secondary limits on bursts of content-creating requests. Every worker goes
+through one shared RateLimiter so a limit hit by one pauses all of them.
+"""
+
+import random
+import threading
+import time
+
+# Start spreading requests out once fewer than this many calls remain
+LOW_REMAINING = 50
+
+
+def is_rate_limited(status, headers, message=''):
+    """Return True if a failed response was caused by a primary or secondary rate limit"""
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    return (
+        'retry-after' in headers
+        or headers.get('x-ratelimit-remaining') == '0'
+        or 'rate limit' in message.lower()
+    )
+
+
+class RateLimiter:
+    """Shared gate that spaces requests and pauses all workers after a limit is hit"""
+
+    def __init__(self, min_interval=0.0, max_interval=30.0, max_backoff=120.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_backoff = max_backoff
+        self.interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self._resume_at = 0.0
+
+    def acquire(self):
+        """Block until the caller may send its next request"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot, self._resume_at)
+            self._next_slot = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def update(self, headers):
+        """Adjust pacing from the rate-limit headers of a successful response"""
+        remaining = headers.get('x-ratelimit-remaining')
+        reset = headers.get('x-ratelimit-reset')
+
+        with self._lock:
+            # Recover gradually after a secondary limit widened the spacing
+            self.interval = max(self.min_interval, self.interval * 0.9)
+
+            if remaining is None or reset is None:
+                return
+
+            remaining = int(remaining)
+            reset_in = max(0.0, int(reset) - time.time())
+            if remaining <= 0:
+                self._resume_at = max(self._resume_at, time.monotonic() + reset_in + 1)
+            elif remaining < LOW_REMAINING:
+                # Spread what is left of the budget over the rest of the window
+                self.interval = min(self.max_interval, max(self.interval, reset_in / remaining))
+
+    def retry_delay(self, attempt):
+        """Capped exponential backoff with jitter, so workers that failed together do not retry in lockstep"""
+        ceiling = min(self.max_backoff, 2.0 ** (attempt + 1))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def backoff(self, headers, attempt):
+        """Pause every worker after a rate-limited response and return the delay in seconds
+
+        Only for rate limits: a 5xx or dropped connection says nothing about
+        how fast we are sending, so its caller just waits retry_delay() alone.
+        """
+        retry_after = headers.get('retry-after')
+        reset = headers.get('x-ratelimit-reset')
+
+        if retry_after:
+            delay = float(retry_after)
+        elif headers.get('x-ratelimit-remaining') == '0' and reset:
+            delay = max(1.0, int(reset) - time.time() + 1)
+        else:
+            # Secondary limit without guidance
+            delay = self.retry_delay(attempt)
+
+        with self._lock:
+            # Secondary limits mean we are sending too fast, so widen the spacing
+            self.interval = min(self.max_interval, max(1.0, self.interval * 2))
+            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+
+        return delay
@@ -0,0 +1,285 @@
+"""
+Extraction of sections from Kiro markdown documents
+
+A document is scanned once into a SectionIndex: the offset, level and heading
+path of every heading outside code fences. Any section is then a dict lookup
+and a slice. Large documents are memory-mapped rather than read into memory,
+and the heading offsets are cached in memory and under .kiro/.sync/sections
+of the document's repository, keyed by the file's git blob SHA, so the epic step, issue step and PR-body
+generation share one scan of each document revision.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import NamedTuple
+
+from . import trace
+from .manifest import MANIFEST_DIR, write_json
+
+# Relative to the root of the repository the document belongs to, not the working directory
+SECTION_CACHE_DIR = f'{MANIFEST_DIR}/sections'
+SECTION_CACHE_VERSION = 1
+# Keep this many cached document revisions on disk
+SECTION_CACHE_LIMIT = 64
+# Documents at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 256 * 1024
+
+# ATX headings and code fence delimiters; everything else is skipped by the regex engine
+HEADING_OR_FENCE = re.compile(
+    rb'^(?: {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*\r?$| {0,3}(```|~~~))',
+    re.MULTILINE
+)
+
+
+class Section(NamedTuple):
+    level: int
+    title: str
+    path: tuple
+    start: int  # offset of the heading line
+    body: int  # offset just past the heading line
+    end: int  # offset of the next heading at the same or a higher level
+    next_heading: int  # offset of the next heading at any level
+
+
+def blob_sha(data):
+    """Git blob SHA-1 of a document, the same id `git hash-object` prints"""
+    digest = hashlib.sha1(b'blob %d\0' % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def scan_sections(data):
+    """Walk a document once and return its sections in document order"""
+    headings = []
+    in_fence = None
+    for match in HEADING_OR_FENCE.finditer(data):
+        fence = match.group(3)
+        if fence:
+            if in_fence is None:
+                in_fence = fence
+            elif fence == in_fence:
+                in_fence = None
+        elif in_fence is None:
+            title = match.group(2).decode('utf-8', errors='replace').strip()
+            headings.append((len(match.group(1)), title, match.start(), min(match.end() + 1, len(data))))
+
+    sections = []
+    stack = []
+    for position, (level, title, start, body) in enumerate(headings):
+        # Close every open section at this level or deeper
+        while stack and sections[stack[-1]].level >= level:
+            closed = stack.pop()
+            sections[closed] = sections[closed]._replace(end=start)
+
+        path = tuple(sections[i].title for i in stack) + (title,)
+        next_heading = headings[position + 1][2] if position + 1 < len(headings) else len(data)
+        sections.append(Section(level, title, path, start, body, len(data), next_heading))
+        stack.append(len(sections) - 1)
+
+    return sections
+
+
+class SectionIndex:
+    """Heading index over one document revision
+
+    find() accepts any trailing part of a heading path, so
+    find('Requirement 1') and find('Requirements', 'Requirement 1') both
+    resolve in one dict lookup; the first match in document order wins.
+    """
+
+    def __init__(self, sha, data, sections):
+        self.sha = sha
+        self.data = data
+        self.sections = sections
+        self._starts = [section.start for section in sections]
+        self._by_path = {}
+        self._by_heading = {}
+
+        for section in sections:
+            for depth in range(len(section.path)):
+                self._by_path.setdefault(section.path[depth:], section)
+            self._by_heading.setdefault(f"{'#' * section.level} {section.title}", []).append(section)
+        # Repeated headings (every '#### Acceptance Criteria') are searched by offset
+        self._heading_starts = {
+            marker: [section.start for section in matches] for marker, matches in self._by_heading.items()
+        }
+
+    def find(self, *path):
+        """Return the section whose heading path ends with path, or None"""
+        return self._by_path.get(path)
+
+    def heading(self, marker, after=0):
+        """Return the first section whose heading line is marker, e.g. '## Architecture'"""
+        marker = marker.strip()
+        matches = self._by_heading.get(marker)
+        if not matches:
+            return None
+        position = bisect_left(self._heading_starts[marker], after)
+        return matches[position] if position < len(matches) else None
+
+    def text(self, start, end):
+        return self.data[start:end].decode('utf-8', errors='replace').strip()
+
+    def section_text(self, section, subsections=True):
+        """Body of a section, with or without its subsections"""
+        return self.text(section.body, section.end if subsections else section.next_heading)
+
+    def next_heading_after(self, offset):
+        """Offset of the first heading that starts after offset, or the end of the document"""
+        position = bisect_right(self._starts, offset)
+        return self._starts[position] if position < len(self._starts) else len(self.data)
+
+    def between(self, start_marker, end_marker=None):
+        """Text between two markers, or None if start_marker does not occur
+
+        Markers that are heading lines are resolved through the index; any
+        other marker falls back to a substring search. Without an end marker,
+        or if it does not occur, the text runs to the end of the section.
+        """
+        section = self.heading(start_marker)
+        if section:
+            start, default_end = section.body, section.end
+        else:
+            found = self.data.find(start_marker.encode('utf-8'))
+            if found == -1:
+                return None
+            start = found + len(start_marker.encode('utf-8'))
+            default_end = self.next_heading_after(start)
+
+        end = default_end
+        if end_marker:
+            end_section = self.heading(end_marker, after=start)
+            if end_section:
+                end = end_section.start
+            else:
+                found = self.data.find(end_marker.encode('utf-8'), start)
+                if found != -1:
+                    end = found
+
+        return self.text(start, end)
+
+
+_parsed_sections = {}  # blob SHA -> sections
+_open_indexes = {}  # absolute path -> ((mtime_ns, size), SectionIndex)
+_repository_roots = {}  # directory -> repository root or None
+_REPOSITORY_CACHE = object()
+
+
+def repository_root(path):
+    """The closest directory above path that holds .git, or None outside a repository"""
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in _repository_roots:
+        root = None
+        for candidate in (directory, *Path(directory).parents):
+            # .git is a file in worktrees and submodules
+            if os.path.exists(os.path.join(candidate, '.git')):
+                root = str(candidate)
+                break
+        _repository_roots[directory] = root
+    return _repository_roots[directory]
+
+
+def section_cache_dir(file_path):
+    """Section cache of the repository file_path belongs to, or None if it is not in one"""
+    root = repository_root(file_path)
+    return os.path.join(root, SECTION_CACHE_DIR) if root else None
+
+
+def _read_document(path, size):
+    with open(path, 'rb') as f:
+        if size >= MMAP_THRESHOLD:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+
+def _load_cached_sections(cache_dir, sha):
+    try:
+        with open(Path(cache_dir) / f'{sha}.json', 'r') as f:
+            cached = json.load(f)
+        if cached.get('version') == SECTION_CACHE_VERSION:
+            return [Section(level, title, tuple(path), *offsets)
+                    for level, title, path, *offsets in cached['sections']]
+    except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def _store_cached_sections(cache_dir, sha, sections):
+    cache_dir = Path(cache_dir)
+    try:
+        write_json(cache_dir / f'{sha}.json', {
+            'version': SECTION_CACHE_VERSION,
+            'sections': [[s.level, s.title, list(s.path), s.start, s.body, s.end, s.next_heading] for s in sections]
+        })
+        cached = sorted(cache_dir.glob('*.json'), key=lambda path: path.stat().st_mtime, reverse=True)
+        for stale in cached[SECTION_CACHE_LIMIT:]:
+            stale.unlink()
+    except OSError as e:
+        print(f"Could not cache section index for {sha}: {e}")
+
+
+def load_section_index(file_path, cache_dir=_REPOSITORY_CACHE):
+    """Return the SectionIndex for a document, scanning it only if this revision is new
+
+    The on-disk cache defaults to .kiro/.sync/sections in the document's
+    repository, wherever the process runs from, and is skipped for documents
+    outside a repository. Pass cache_dir=None to skip it always.
+    """
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+
+    cached = _open_indexes.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    if cache_dir is _REPOSITORY_CACHE:
+        cache_dir = section_cache_dir(path)
+
+    with trace.span('sections.load', file=file_path, bytes=stat.st_size) as attrs:
+        data = _read_document(path, stat.st_size)
+        sha = blob_sha(data)
+        sections = _parsed_sections.get(sha)
+        attrs['source'] = 'memory'
+        if sections is None and cache_dir:
+            sections = _load_cached_sections(cache_dir, sha)
+            attrs['source'] = 'disk'
+        if sections is None:
+            sections = scan_sections(data)
+            attrs['source'] = 'scan'
+            if cache_dir:
+                _store_cached_sections(cache_dir, sha, sections)
+        _parsed_sections[sha] = sections
+
+    index = SectionIndex(sha, data, sections)
+    _open_indexes[path] = (key, index)
+    return index
+
+
+def read_file_section(file_path, start_marker, end_marker=None):
+    """Read a section from a markdown file between markers"""
+    try:
+        text = load_section_index(file_path).between(start_marker, end_marker)
+    except Exception as e:
+        return f"Error reading file: {e}"
+
+    return "See attached document" if text is None else text
+
+
+def testing_requirements(file_path):
+    """Test levels the design's Testing Strategy asks for, e.g. ['Unit Tests Required']"""
+    try:
+        index = load_section_index(file_path)
+    except OSError:
+        return []
+
+    return [
+        f'{kind} Required'
+        for kind in ('Unit Tests', 'Integration Tests', 'E2E Tests')
+        if index.find('Testing Strategy', kind)
+    ]
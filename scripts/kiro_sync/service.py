@@ -0,0 +1,464 @@
+"""
+Sync service: one long-lived process handling push and sync events instead of a workflow run each
+
+Usage (from the root of a clone the service can own):
+    PYTHONPATH=scripts python3 -m kiro_sync.service --port 8765 --secret "$WEBHOOK_SECRET"
+    PYTHONPATH=scripts python3 -m kiro_sync.service --queue .kiro/.queue --milestone "Sprint 1"
+
+A workflow run pays for a runner, a checkout, setup-python and a cold API
+client before doing a few hundred milliseconds of work. The service keeps
+that state warm between events: one GitHubClient with its keep-alive
+connections, the parse of every spec (the WatchSession of watch mode), the
+task index, and a clone that only fetches what a push added.
+
+Events arrive as GitHub webhooks on POST /webhook (`push`; `ping` is
+answered) or as JSON files dropped into the --queue directory:
+    {"event": "push", "payload": {"ref": "refs/heads/feature/task-2", ...}}
+    {"event": "sync", "spec": "file-action-bar"}
+A push to a task branch opens its PR as the auto-PR workflow does. A push to
+the base branch fast-forwards the clone and re-syncs the specs its commits
+touched, and a sync event re-syncs one spec (or every spec without "spec"),
+as the integration workflow does. Events run concurrently across branches
+and one at a time per branch. An event that arrives while its branch is busy
+waits, merged with any event already waiting there: a newer push replaces
+an older one, and spec changes are combined.
+
+GET /status returns the queue, per-kind event counts with latency
+percentiles (from arrival to done) and the API calls made so far;
+`PYTHONPATH=scripts python3 -m benchmarks.service` measures throughput and
+latency against the offline GitHub API emulator.
+
+Needs GITHUB_TOKEN or GH_TOKEN (or a logged-in `gh`), and the repository
+from --repo, GITHUB_REPOSITORY or the origin remote.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+from . import trace
+from .client import GitHubApiError, GitHubClient
+from .git import fast_forward
+from .index import INDEX_PATH, load_index
+from .issues import ensure_milestone
+from .pulls import create_task_pull_request, task_number_from_branch
+from .specs import SPEC_FILES, SPECS_ROOT
+from .watch import WatchSession, changed_spec_files, detect_repository, detect_token, open_watcher
+
+DEFAULT_PORT = 8765
+# The branch filters of the auto-PR workflow
+# The auto-PR workflow's branch filters: feature/task-*, feature/*/task-*, task/*, feat/task-*, feat/*/task-*
+TASK_BRANCH_PATTERN = re.compile(r'(?:feature|feat)/(?:[^/]+/)?task-|task/[^/]+$')
+# GitHub caps webhook payloads at 25 MB
+MAX_BODY_BYTES = 25 * 1024 * 1024
+# Push payloads list at most 20 commits; a longer push re-syncs every spec
+MAX_PAYLOAD_COMMITS = 20
+QUEUE_POLL_SECONDS = 1.0
+RECENT_EVENTS = 1000
+
+REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+
+class Event(NamedTuple):
+    kind: str  # 'pull' (open a task PR) or 'specs' (sync specs)
+    key: str  # events with the same key run one at a time
+    data: dict
+    received: float  # time.monotonic() of the oldest event merged into this one
+    merged: int = 1
+
+
+def merge_events(waiting, newer):
+    """Fold newer into the event already waiting on its branch"""
+    if newer.kind == 'pull':
+        data = newer.data
+    else:
+        # None means every spec
+        changes = None
+        if waiting.data['changes'] is not None and newer.data['changes'] is not None:
+            changes = {name: set(files) for name, files in waiting.data['changes'].items()}
+            for name, files in newer.data['changes'].items():
+                changes.setdefault(name, set()).update(files)
+        data = {'changes': changes, 'fetch': waiting.data['fetch'] or newer.data['fetch']}
+    return Event(newer.kind, newer.key, data, waiting.received, waiting.merged + newer.merged)
+
+
+def verify_signature(secret, body, signature):
+    """Check GitHub's X-Hub-Signature-256 header against the raw body"""
+    expected = 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature or '')
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class IndexCache:
+    """The task index, re-read only when the integration side rewrote the file"""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = Path(path)
+        self._stamp = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        try:
+            stamp = self.path.stat().st_mtime_ns
+        except OSError:
+            stamp = None
+        with self._lock:
+            if self._index is None or stamp != self._stamp:
+                self._index, self._stamp = load_index(self.path), stamp
+            return self._index
+
+
+class _Lane:
+    def __init__(self):
+        self.waiting = None
+        self.task = None
+
+
+class SyncService:
+    """Routes events to per-branch lanes and runs them on a thread pool around warm state"""
+
+    def __init__(self, client, session, base_branch='main', concurrency=4):
+        self.client = client
+        self.session = session
+        self.base_branch = base_branch
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='event')
+        self.index = IndexCache()
+        # One clone serves every branch; fetches and merges must not overlap
+        self.git_lock = threading.Lock()
+        self.lanes = {}
+        self.started = time.monotonic()
+        self.counts = Counter()
+        self.latencies = {}
+        self.recent = deque(maxlen=RECENT_EVENTS)
+        self.completed = 0
+        self.api_calls = Counter()
+        self.api_seconds = 0.0
+
+    # Event intake
+
+    def push_event(self, payload):
+        """Turn a push payload into an Event, or None when the service does not act on it"""
+        ref = payload.get('ref') or ''
+        repository = (payload.get('repository') or {}).get('full_name')
+        if not ref.startswith('refs/heads/') or payload.get('deleted') or (repository and repository != self.client.repo):
+            return None
+        branch = ref[len('refs/heads/'):]
+        received = time.monotonic()
+
+        if TASK_BRANCH_PATTERN.match(branch):
+            return Event('pull', branch, {'branch': branch}, received)
+        if branch != self.base_branch:
+            return None
+
+        commits = payload.get('commits')
+        if commits is None or len(commits) >= MAX_PAYLOAD_COMMITS:
+            changes = None
+        else:
+            paths = [path for commit in commits
+                     for path in (*commit.get('added', ()), *commit.get('modified', ()), *commit.get('removed', ()))]
+            changes = changed_spec_files(paths, self.session.root)
+            if not changes:
+                return None
+        return Event('specs', branch, {'changes': changes, 'fetch': True}, received)
+
+    def sync_event(self, spec=None):
+        changes = {spec: set(SPEC_FILES)} if spec else None
+        return Event('specs', self.base_branch, {'changes': changes, 'fetch': False}, time.monotonic())
+
+    def submit(self, event):
+        """Queue an event on its lane; must be called on the event loop"""
+        self.counts[f'{event.kind}.received'] += 1
+        lane = self.lanes.setdefault(event.key, _Lane())
+        if lane.waiting:
+            self.counts[f'{event.kind}.merged'] += 1
+            lane.waiting = merge_events(lane.waiting, event)
+        else:
+            lane.waiting = event
+        if lane.task is None:
+            lane.task = asyncio.get_running_loop().create_task(self._drain(event.key, lane))
+
+    async def _drain(self, key, lane):
+        try:
+            while lane.waiting:
+                event, lane.waiting = lane.waiting, None
+                await self._run(event)
+        finally:
+            del self.lanes[key]
+
+    async def _run(self, event):
+        started = time.monotonic()
+        handler = self._open_pull if event.kind == 'pull' else self._sync_specs
+        try:
+            ok = await asyncio.get_running_loop().run_in_executor(self.executor, handler, event)
+        except Exception as e:
+            print(f"[{time.strftime('%H:%M:%S')}] {event.key}: {event.kind} failed: {type(e).__name__}: {e}")
+            ok = False
+
+        finished = time.monotonic()
+        self.counts[f"{event.kind}.{'done' if ok else 'failed'}"] += 1
+        self.latencies.setdefault(event.kind, deque(maxlen=RECENT_EVENTS)).append(finished - event.received)
+        self.completed += 1
+        self.recent.append({'seq': self.completed, 'kind': event.kind, 'key': event.key, 'ok': ok,
+                            'merged': event.merged, 'wait': started - event.received,
+                            'run': finished - started, 'latency': finished - event.received})
+        self._collect_spans()
+
+    def _collect_spans(self):
+        # Fold the spans into counters so a process that runs for weeks does not keep them all
+        for span in trace.drain():
+            if span['name'].startswith('http '):
+                self.api_calls[span['name'][len('http '):]] += 1
+                self.api_seconds += span['duration']
+
+    # Handlers; these run on the executor threads
+
+    def _open_pull(self, event):
+        branch = event.data['branch']
+        task_number = task_number_from_branch(branch)
+        if not task_number:
+            print(f"[{time.strftime('%H:%M:%S')}] {branch}: no task number in the branch name")
+            return False
+
+        started = time.perf_counter()
+        with trace.span('service.pull', branch=branch):
+            pull, created = create_task_pull_request(self.client, task_number, branch, self.base_branch,
+                                                     self.index.get(), self.git_lock)
+        outcome = 'opened' if created else 'already open'
+        print(f"[{time.strftime('%H:%M:%S')}] {branch}: PR #{pull.number} {outcome} "
+              f"in {time.perf_counter() - started:.2f}s")
+        return True
+
+    def _sync_specs(self, event):
+        if event.data['fetch']:
+            with self.git_lock:
+                if not fast_forward(self.base_branch):
+                    print(f"❌ Could not fast-forward to origin/{self.base_branch}; is the clone's checkout "
+                          f"on {self.base_branch} and unmodified?")
+                    return False
+
+        changes = event.data['changes']
+        if changes is None:
+            root = self.session.root
+            names = sorted(path.name for path in root.iterdir() if path.is_dir()) if root.is_dir() else []
+            changes = {name: set(SPEC_FILES) for name in names}
+
+        ok = True
+        for name, files in sorted(changes.items()):
+            summary = self.session.sync(name, files)
+            ok = ok and not (summary and (summary['error'] or summary['failures']))
+        return ok
+
+    # Status
+
+    def status(self):
+        events = {}
+        for kind in ('pull', 'specs'):
+            latencies = sorted(self.latencies.get(kind, ()))
+            events[kind] = {
+                name: self.counts[f'{kind}.{name}'] for name in ('received', 'merged', 'done', 'failed')
+            }
+            events[kind].update(p50=_percentile(latencies, 0.5), p95=_percentile(latencies, 0.95),
+                                max=latencies[-1] if latencies else 0.0)
+        return {
+            'uptime': time.monotonic() - self.started,
+            'running': sum(1 for lane in self.lanes.values() if lane.task),
+            'waiting': sum(1 for lane in self.lanes.values() if lane.waiting),
+            'completed': self.completed,
+            'events': events,
+            'api': {'calls': sum(self.api_calls.values()), 'seconds': self.api_seconds,
+                    'routes': dict(self.api_calls.most_common())},
+            'recent': list(self.recent)
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.client.close()
+
+
+class WebhookServer:
+    """HTTP/1.1 endpoint for GitHub webhooks and the status report"""
+
+    def __init__(self, service, secret=None):
+        self.service = service
+        self.secret = secret
+
+    def route(self, method, path, headers, body):
+        if path == '/status':
+            return (200, self.service.status()) if method == 'GET' else (405, {'message': 'Use GET'})
+        if path != '/webhook':
+            return 404, {'message': 'Not Found'}
+        if method != 'POST':
+            return 405, {'message': 'Use POST'}
+        if self.secret and not verify_signature(self.secret, body, headers.get('x-hub-signature-256')):
+            return 401, {'message': 'Bad signature'}
+
+        kind = headers.get('x-github-event', '')
+        if kind == 'ping':
+            return 200, {'message': 'pong'}
+        try:
+            payload = json.loads(body or b'{}')
+        except json.JSONDecodeError as e:
+            return 400, {'message': f'Invalid JSON: {e}'}
+
+        event = self.service.push_event(payload) if kind == 'push' else None
+        if event is None:
+            return 202, {'message': f'Ignored {kind or "unnamed"} event'}
+        self.service.submit(event)
+        return 202, {'message': f'Queued {event.kind} for {event.key}'}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_BYTES:
+                    status, payload, keep_alive = 413, {'message': 'Payload Too Large'}, False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, payload = self.route(method, target.split('?', 1)[0], headers, body)
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+
+                data = json.dumps(payload).encode('utf-8')
+                head = (f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\nContent-Type: application/json\r\n'
+                        f'Content-Length: {len(data)}\r\nConnection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+                # Head and body in one write, so a keep-alive client never waits on Nagle's algorithm
+                writer.write(head.encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def read_queue_file(service, path):
+    """Turn a queue file into an Event (or None) and remove it; unreadable files are set aside"""
+    try:
+        message = json.loads(path.read_text())
+        if message.get('event') == 'push':
+            event = service.push_event(message.get('payload') or {})
+        elif message.get('event') == 'sync':
+            event = service.sync_event(message.get('spec'))
+        else:
+            raise ValueError(f"unknown event {message.get('event')!r}")
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Skipping queue file {path.name}: {e}")
+        path.replace(path.with_suffix('.failed'))
+        return None
+    path.unlink()
+    return event
+
+
+async def watch_queue(service, directory):
+    """Submit every *.json file in directory, oldest name first, as it appears"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    watcher = open_watcher(directory)
+    try:
+        while True:
+            for path in sorted(directory.glob('*.json')):
+                event = read_queue_file(service, path)
+                if event:
+                    service.submit(event)
+            # Producers should write elsewhere and rename into the directory, so no file is read half-written
+            await loop.run_in_executor(None, watcher.read, QUEUE_POLL_SECONDS)
+    finally:
+        watcher.close()
+
+
+async def serve(service, host, port, secret=None, queue_dir=None, initial_sync=True):
+    server = await asyncio.start_server(WebhookServer(service, secret).handle, host, port)
+    bound_port = server.sockets[0].getsockname()[1]
+    print(f"Kiro sync service on http://{host}:{bound_port} for {service.client.repo}", flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    queue_task = loop.create_task(watch_queue(service, queue_dir)) if queue_dir else None
+    if initial_sync:
+        service.submit(service.sync_event())
+
+    async with server:
+        await stop.wait()
+        print("\nStopping: finishing the events already queued")
+        server.close()
+        if queue_task:
+            queue_task.cancel()
+        while service.lanes:
+            await asyncio.gather(*(lane.task for lane in list(service.lanes.values()) if lane.task))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve push and sync events from one long-lived process')
+    parser.add_argument('--repo', help='owner/name, defaults to GITHUB_REPOSITORY or the origin remote')
+    parser.add_argument('--host', default='127.0.0.1', help='Address for the webhook endpoint')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port for the webhook endpoint (0 picks one)')
+    parser.add_argument('--secret', default=os.environ.get('KIRO_WEBHOOK_SECRET'),
+                        help='Webhook secret; defaults to KIRO_WEBHOOK_SECRET, unsigned requests are refused when set')
+    parser.add_argument('--queue', help='Also take events from JSON files dropped into this directory')
+    parser.add_argument('--base', default='main', help='Base branch for PRs and spec syncs')
+    parser.add_argument('--milestone', help='Milestone title for new issues (created if missing)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Events handled at once, across branches')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent issue API calls per spec sync')
+    parser.add_argument('--root', default=SPECS_ROOT, help='Directory holding the spec directories')
+    parser.add_argument('--no-initial-sync', action='store_true', help='Do not sync every spec at startup')
+    args = parser.parse_args()
+
+    repo = args.repo or detect_repository()
+    token = detect_token()
+    if not repo or not token:
+        print("❌ Need a repository (--repo) and a token (GITHUB_TOKEN, GH_TOKEN or `gh auth login`)")
+        return 1
+
+    concurrency = max(args.concurrency, 1)
+    client = GitHubClient(repo, token=token, pool_size=concurrency * max(args.workers, 1))
+    try:
+        milestone_number = ensure_milestone(client, args.milestone) if args.milestone else None
+    except GitHubApiError as e:
+        print(f"❌ Could not resolve milestone: {e}")
+        return 1
+
+    session = WatchSession(client, milestone_number, f'https://github.com/{repo}/blob/{args.base}',
+                           args.workers, args.root)
+    service = SyncService(client, session, args.base, concurrency)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.secret, args.queue, not args.no_initial_sync))
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Discovery and batch processing of every feature spec under .kiro/specs
+
+A spec is any .kiro/specs/<name>/ directory holding requirements.md, design.md
+and tasks.md. Specs are parsed concurrently in a process pool; each spec is
+synced (epic, then task issues) as soon as its parse result arrives, and the
+run ends with a per-spec timing and result summary.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import NamedTuple
+
+from . import trace
+from .bodies import epic_issue_body
+from .client import GitHubApiError
+from .index import update_index
+from .issues import run_task_sync, sync_epic_issue
+from .journal import Journal, journal_path
+from .manifest import load_manifest, manifest_path
+from .sections import read_file_section, repository_root
+from .tasks import parse_tasks_file
+from .traceability import update_traceability
+
+SPECS_ROOT = '.kiro/specs'
+SPEC_FILES = ('requirements.md', 'design.md', 'tasks.md')
+
+
+class Spec(NamedTuple):
+    name: str
+    requirements_file: str
+    design_file: str
+    tasks_file: str
+
+    @property
+    def project_name(self):
+        """Human-readable feature name, e.g. file-action-bar -> File Action Bar"""
+        return self.name.replace('-', ' ').replace('_', ' ').title()
+
+
+def discover_specs(root=SPECS_ROOT):
+    """Return every complete spec under root, sorted by name"""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+
+    specs = []
+    for directory in sorted(path for path in root.iterdir() if path.is_dir()):
+        if all((directory / name).is_file() for name in SPEC_FILES):
+            specs.append(Spec(directory.name, *(str(directory / name) for name in SPEC_FILES)))
+    return specs
+
+
+def parse_spec(spec):
+    """Parse one spec; runs in a worker process, so it only returns picklable data"""
+    started = time.perf_counter()
+    tasks = list(parse_tasks_file(spec.tasks_file))
+    requirements_summary = read_file_section(spec.requirements_file, '## Requirements', '### Requirement 1')
+    architecture_overview = read_file_section(spec.design_file, '## Architecture', '### Component Structure')
+
+    return {
+        'spec': spec,
+        'tasks': tasks,
+        'requirements_summary': requirements_summary,
+        'architecture_overview': architecture_overview,
+        'parse_seconds': time.perf_counter() - started
+    }
+
+
+def iter_parsed_specs(specs, processes=None):
+    """Parse specs in a process pool, yielding each result as soon as it is ready"""
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = {pool.submit(parse_spec, spec): spec for spec in specs}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {'spec': futures[future], 'error': f'Parse failed: {e}', 'parse_seconds': 0.0}
+
+
+def document_url(docs_url, path):
+    """Blob URL of a spec document, from its path relative to the repository root
+
+    Paths outside a repository are used as given.
+    """
+    root = repository_root(path)
+    if root:
+        path = os.path.relpath(os.path.abspath(path), root)
+    return f'{docs_url}/{Path(path).as_posix()}'
+
+
+def sync_spec(client, parsed, milestone_number, docs_url, recreate=False, workers=4):
+    """Sync one parsed spec's epic and task issues and return its summary row"""
+    spec = parsed['spec']
+    summary = {'spec': spec.name, 'tasks': len(parsed['tasks']), 'epic': None,
+               'parse_seconds': parsed['parse_seconds'], 'sync_seconds': 0.0,
+               'changes': 0, 'failures': 0, 'error': None}
+    started = time.perf_counter()
+
+    epic_body = epic_issue_body(
+        spec.project_name, parsed['requirements_summary'], parsed['architecture_overview'],
+        *(document_url(docs_url, path) for path in (spec.requirements_file, spec.design_file, spec.tasks_file))
+    )
+
+    manifest_file = manifest_path(spec.tasks_file)
+    manifest = load_manifest(manifest_file)
+    journal = Journal(journal_path(spec.tasks_file))
+
+    try:
+        epic_number = sync_epic_issue(
+            client, f'Epic: {spec.project_name}', epic_body, milestone_number, manifest,
+            recreate=recreate, run_id=journal.run_id
+        )
+        summary['epic'] = epic_number
+
+        results = run_task_sync(
+            client, parsed['tasks'], epic_number, milestone_number, manifest, journal, recreate, workers,
+            spec=spec.name
+        )
+
+        summary['changes'] = len(results)
+        summary['failures'] = sum(1 for result in results if result['error'])
+        update_index(spec.name, manifest, epic_number)
+        update_traceability(spec.name, spec.requirements_file, spec.design_file, spec.tasks_file, manifest)
+    except GitHubApiError as e:
+        summary['error'] = str(e)
+    finally:
+        journal.checkpoint(manifest, manifest_file)
+        summary['sync_seconds'] = time.perf_counter() - started
+
+    return summary
+
+
+def sync_all_specs(client, specs, milestone_number, docs_url, recreate=False, workers=4, processes=None):
+    """Parse every spec concurrently and sync each one as its parse completes"""
+    summaries = []
+    for parsed in iter_parsed_specs(specs, processes):
+        spec = parsed['spec']
+        if parsed.get('error'):
+            print(f"❌ {spec.name}: {parsed['error']}")
+            summaries.append({'spec': spec.name, 'tasks': 0, 'epic': None, 'parse_seconds': 0.0,
+                              'sync_seconds': 0.0, 'changes': 0, 'failures': 0, 'error': parsed['error']})
+            continue
+
+        print(f"\n=== {spec.name}: {len(parsed['tasks'])} tasks parsed in {parsed['parse_seconds']:.2f}s ===")
+        # Parsing ran in a worker process, so its spans are recorded here from the returned timing
+        trace.record('parse.spec', parsed['parse_seconds'], spec=spec.name, tasks=len(parsed['tasks']))
+        summaries.append(sync_spec(client, parsed, milestone_number, docs_url, recreate, workers))
+
+    return sorted(summaries, key=lambda summary: summary['spec'])
+
+
+def print_spec_summary(summaries):
+    """Print one row per spec with timings and outcome"""
+    print(f"\n{'Spec':<30} {'Tasks':>6} {'Epic':>7} {'Changes':>8} {'Parse':>8} {'Sync':>8}  Result")
+    for summary in summaries:
+        epic = f"#{summary['epic']}" if summary['epic'] else '-'
+        if summary['error']:
+            outcome = f"failed: {summary['error']}"
+        elif summary['failures']:
+            outcome = f"{summary['failures']} issue changes failed"
+        else:
+            outcome = 'ok'
+        print(f"{summary['spec']:<30} {summary['tasks']:>6} {epic:>7} {summary['changes']:>8} "
+              f"{summary['parse_seconds']:7.2f}s {summary['sync_seconds']:7.2f}s  {outcome}")
@@ -0,0 +1,188 @@
+"""
+Batched reconciliation of task issue state with tasks.md checkboxes
+
+Checking a task off closes its issue as completed and adds the `completed`
+label; unchecking it reopens the issue and removes the label. The manifest
+remembers the checkbox state last applied to each issue, so only tasks whose
+checkbox changed are looked at. Their node ids and current state are read
+with aliased `issue(number:)` fields, QUERY_BATCH issues to a query, and the
+changes are sent as aliased closeIssue, reopenIssue, addLabelsToLabelable
+and removeLabelsFromLabelable fields, MUTATION_BATCH fields to a request:
+checking off 60 tasks costs one query and two mutations.
+
+An issue is only reopened when its box was unchecked after being checked.
+Issues closed on GitHub while their box was never checked (a merged PR that
+"Resolves #N", say) are left closed.
+"""
+
+import json
+import time
+
+from . import trace
+from .batch import QUERY_BATCH, apply_mutations, chunks, operation_result
+from .client import GitHubApiError
+from .tasks import Task
+
+COMPLETED_LABEL = 'completed'
+COMPLETED_COLOR = '0e8a16'
+
+ISSUE_STATE_FIELDS = 'id state labels(first: 50) { nodes { name } }'
+MUTATION_FIELDS = {
+    'close': '%s: closeIssue(input: {issueId: %s, stateReason: COMPLETED}) { clientMutationId }',
+    'reopen': '%s: reopenIssue(input: {issueId: %s}) { clientMutationId }',
+    'label': '%s: addLabelsToLabelable(input: {labelableId: %s, labelIds: [%s]}) { clientMutationId }',
+    'unlabel': '%s: removeLabelsFromLabelable(input: {labelableId: %s, labelIds: [%s]}) { clientMutationId }'
+}
+
+
+def state_candidates(manifest):
+    """Return the task numbers whose checkbox changed since their issue state was last applied
+
+    Unchecked tasks whose issue state was never applied need no call: they
+    are recorded as open without looking at the issue.
+    """
+    candidates = []
+    for number, entry in manifest['tasks'].items():
+        if 'completed' not in entry or entry.get('closed'):
+            continue
+        applied = entry.get('issue_state')
+        if entry['completed'] and applied != 'closed':
+            candidates.append(number)
+        elif not entry['completed'] and applied != 'open':
+            if applied == 'closed':
+                candidates.append(number)
+            else:
+                entry['issue_state'] = 'open'
+    return candidates
+
+
+def fetch_issue_states(client, issue_numbers, label=COMPLETED_LABEL):
+    """Return ({issue number: {id, state, labels}}, label node id or None) for the given issues
+
+    Issues that no longer exist are left out.
+    """
+    owner, name = client.repo.split('/', 1)
+    issues, label_id = {}, None
+    for chunk in chunks(sorted({int(number) for number in issue_numbers}), QUERY_BATCH):
+        fields = '\n    '.join(f'i{number}: issue(number: {number}) {{ {ISSUE_STATE_FIELDS} }}' for number in chunk)
+        query = f"""query($owner: String!, $name: String!, $label: String!) {{
+  repository(owner: $owner, name: $name) {{
+    label(name: $label) {{ id }}
+    {fields}
+  }}
+}}"""
+        with trace.span('state.query', issues=len(chunk)):
+            data, errors = client.graphql(query, {'owner': owner, 'name': name, 'label': label}, partial=True)
+        repository = data.get('repository')
+        if repository is None:
+            message = '; '.join(error.get('message', str(error)) for error in errors) or 'repository not found'
+            raise GitHubApiError(200, {}, message)
+
+        label_id = label_id or (repository.get('label') or {}).get('id')
+        for number in chunk:
+            node = repository.get(f'i{number}')
+            if node:
+                issues[number] = {
+                    'id': node['id'],
+                    'state': node['state'].lower(),
+                    'labels': {item['name'] for item in node['labels']['nodes']}
+                }
+    return issues, label_id
+
+
+def plan_state_change(entry, issue, label=COMPLETED_LABEL):
+    """Return the mutations ('close', 'reopen', 'label', 'unlabel') one issue needs"""
+    operations = []
+    if entry['completed']:
+        if issue['state'] != 'closed':
+            operations.append('close')
+        if label not in issue['labels']:
+            operations.append('label')
+    elif entry.get('issue_state') == 'closed':
+        if issue['state'] == 'closed':
+            operations.append('reopen')
+        if label in issue['labels']:
+            operations.append('unlabel')
+    return operations
+
+
+def ensure_completed_label(client, label_id, label=COMPLETED_LABEL):
+    """Return the label's node id, creating the label if the repository does not have it"""
+    if label_id:
+        return label_id
+    try:
+        return client.create_label(label, COMPLETED_COLOR, 'Task checked off in tasks.md')
+    except GitHubApiError as e:
+        print(f"Could not create the '{label}' label, issue states will be synced without it: {e}")
+        return None
+
+
+def sync_task_states(client, manifest, label=COMPLETED_LABEL):
+    """Close or reopen task issues whose checkbox changed, in batched GraphQL requests
+
+    Updates the applied state in manifest in place and returns one result per
+    changed issue, in the shape print_latency_report() expects.
+    """
+    candidates = state_candidates(manifest)
+    if not candidates:
+        return []
+
+    started = time.monotonic()
+    entries = manifest['tasks']
+    try:
+        issues, label_id = fetch_issue_states(client, [entries[number]['issue'] for number in candidates], label)
+    except GitHubApiError as e:
+        print(f"Could not read issue states: {e}")
+        issues, label_id, failure = {}, None, str(e)
+    else:
+        failure = None
+
+    planned = {}
+    for number in candidates:
+        entry = entries[number]
+        if failure:
+            planned[number] = (None, [])
+            continue
+        issue = issues.get(int(entry['issue']))
+        if issue is None:
+            print(f"Issue #{entry['issue']} for task {number} no longer exists, skipping its state")
+            continue
+        operations = plan_state_change(entry, issue, label)
+        if operations:
+            planned[number] = (issue['id'], operations)
+        else:
+            entry['issue_state'] = 'closed' if entry['completed'] else 'open'
+
+    if any('label' in operations for _, operations in planned.values()):
+        label_id = ensure_completed_label(client, label_id, label)
+
+    fields = []
+    for number, (node_id, operations) in planned.items():
+        for operation in operations:
+            alias = f'{operation}{len(fields)}'
+            if operation in ('label', 'unlabel'):
+                if not label_id:
+                    continue
+                field = MUTATION_FIELDS[operation] % (alias, json.dumps(node_id), json.dumps(label_id))
+            else:
+                field = MUTATION_FIELDS[operation] % (alias, json.dumps(node_id))
+            fields.append((alias, number, field))
+
+    outcome = apply_mutations(client, fields, span='state.mutate')
+    latency = time.monotonic() - started
+
+    results = []
+    for number in planned:
+        entry = entries[number]
+        error = failure or outcome.get(number)
+        action = 'complete' if entry['completed'] else 'reopen'
+        if error:
+            print(f"Failed to {action} issue #{entry['issue']} for task {number}: {error}")
+        else:
+            entry['issue_state'] = 'closed' if entry['completed'] else 'open'
+            print(f"{'Closed' if entry['completed'] else 'Reopened'} issue #{entry['issue']} for task {number}")
+        results.append(operation_result(action, Task(number, entry.get('title', '')), entry['issue'], latency, error))
+
+    print(f"State sync: {len(candidates)} checkbox changes, {len(planned)} issues to change, "
+          f"{len(fields)} mutations")
+    return results
@@ -0,0 +1,140 @@
+"""
+Batched linking of sub-task issues to their parent task issues
+
+A sub-task (2.1 under task 2 in tasks.md) gets its own issue, and its
+parent's body lists the sub-tasks as a checklist. The issues are also linked
+with GitHub's sub-issues: the manifest records the parent issue each child
+was linked to, so only new or re-parented children are looked at. Their node
+ids and current parent are read with aliased `issue(number:)` fields,
+QUERY_BATCH issues to a query, and the links are sent as aliased addSubIssue
+fields, MUTATION_BATCH to a request, shallow levels first. Linking 2000
+sub-tasks costs about 40 queries and 20 mutations instead of 2000 calls.
+
+GitHub allows SUB_ISSUE_LIMIT sub-issues per parent. Children beyond that are
+left unlinked and only appear in the parent's checklist; once the manifest
+records a full parent, its remaining children are no longer queried.
+"""
+
+import json
+import time
+
+from . import trace
+from .batch import MUTATION_BATCH, QUERY_BATCH, apply_mutations, chunks, operation_result
+from .client import GitHubApiError
+from .tasks import Task
+
+SUB_ISSUE_LIMIT = 100
+
+LINK_FIELDS = 'id parent { number } subIssues(first: 1) { totalCount }'
+LINK_MUTATION = ('%s: addSubIssue(input: {issueId: %s, subIssueId: %s, replaceParent: true}) '
+                 '{ clientMutationId }')
+
+
+def link_candidates(manifest):
+    """Return (task number, parent issue number) for open sub-tasks not yet linked to their parent's issue"""
+    entries = manifest['tasks']
+    linked = {}
+    for entry in entries.values():
+        if entry.get('linked'):
+            linked[entry['linked']] = linked.get(entry['linked'], 0) + 1
+
+    candidates = []
+    for number, entry in entries.items():
+        parent = entries.get(entry.get('parent') or '')
+        if not parent or entry.get('closed') or parent.get('closed') or not entry.get('issue'):
+            continue
+        # A parent known to be full is not queried again on every run
+        if entry.get('linked') != parent['issue'] and linked.get(parent['issue'], 0) < SUB_ISSUE_LIMIT:
+            candidates.append((number, parent['issue']))
+    # Parents are linked before their own children
+    return sorted(candidates, key=lambda candidate: candidate[0].count('.'))
+
+
+def fetch_link_state(client, issue_numbers):
+    """Return {issue number: {id, parent, children}} for the given issues; missing issues are left out"""
+    owner, name = client.repo.split('/', 1)
+    issues = {}
+    for chunk in chunks(sorted({int(number) for number in issue_numbers}), QUERY_BATCH):
+        fields = '\n    '.join(f'i{number}: issue(number: {number}) {{ {LINK_FIELDS} }}' for number in chunk)
+        query = f"""query($owner: String!, $name: String!) {{
+  repository(owner: $owner, name: $name) {{
+    {fields}
+  }}
+}}"""
+        with trace.span('subissue.query', issues=len(chunk)):
+            data, errors = client.graphql(query, {'owner': owner, 'name': name}, partial=True)
+        repository = data.get('repository')
+        if repository is None:
+            message = '; '.join(error.get('message', str(error)) for error in errors) or 'repository not found'
+            raise GitHubApiError(200, {}, message)
+
+        for number in chunk:
+            node = repository.get(f'i{number}')
+            if node:
+                issues[number] = {
+                    'id': node['id'],
+                    'parent': (node.get('parent') or {}).get('number'),
+                    'children': ((node.get('subIssues') or {}).get('totalCount') or 0)
+                }
+    return issues
+
+
+def sync_sub_issues(client, manifest):
+    """Link sub-task issues to their parents in batched GraphQL requests
+
+    Updates the linked parent in manifest in place and returns one result per
+    new link, in the shape print_latency_report() expects.
+    """
+    candidates = link_candidates(manifest)
+    if not candidates:
+        return []
+
+    started = time.monotonic()
+    entries = manifest['tasks']
+    try:
+        issues = fetch_link_state(
+            client, [entries[number]['issue'] for number, _ in candidates] + [parent for _, parent in candidates])
+    except GitHubApiError as e:
+        print(f"Could not read sub-issue links: {e}")
+        return []
+
+    fields = []
+    over_limit = {}
+    for number, parent_number in candidates:
+        entry = entries[number]
+        child, parent = issues.get(int(entry['issue'])), issues.get(int(parent_number))
+        if child is None or parent is None:
+            print(f"Issue #{entry['issue']} or its parent #{parent_number} no longer exists, not linking task {number}")
+            continue
+        if child['parent'] == int(parent_number):
+            entry['linked'] = parent_number
+            continue
+        if parent['children'] >= SUB_ISSUE_LIMIT:
+            over_limit[parent_number] = over_limit.get(parent_number, 0) + 1
+            continue
+        parent['children'] += 1
+        alias = f'link{len(fields)}'
+        fields.append((alias, number, LINK_MUTATION % (alias, json.dumps(parent['id']), json.dumps(child['id']))))
+
+    for parent_number, count in over_limit.items():
+        print(f"Issue #{parent_number} has {SUB_ISSUE_LIMIT} sub-issues already; "
+              f"{count} more are only listed in its Sub-tasks checklist")
+
+    outcome = apply_mutations(client, fields, span='subissue.mutate')
+    latency = time.monotonic() - started
+
+    results = []
+    for _, number, _ in fields:
+        entry = entries[number]
+        parent_number = entries[entry['parent']]['issue']
+        error = outcome.get(number)
+        if error:
+            print(f"Failed to link issue #{entry['issue']} for task {number} to #{parent_number}: {error}")
+        else:
+            entry['linked'] = parent_number
+            print(f"Linked issue #{entry['issue']} for task {number} as a sub-issue of #{parent_number}")
+        results.append(operation_result('link', Task(number, entry.get('title', '')), entry['issue'], latency, error))
+
+    print(f"Sub-issue sync: {len(candidates)} candidates, {len(fields)} links in "
+          f"{-(-len(fields) // MUTATION_BATCH)} mutations")
+    return results
@@ -0,0 +1,189 @@
+"""
+Streaming parser for Kiro tasks.md files
+
+The parser is a single-pass, line-oriented state machine: each line is looked
+at once, so run time is linear in the file size and memory is bounded by the
+top-level task currently being assembled, sub-tasks included. A top-level
+task and its sub-tasks are yielded, parent first, as soon as the next
+top-level line shows the subtree is complete, which lets issue creation
+start before the rest of the file has been read.
+
+Recognised layout:
+
+    - [ ] 1. Task title
+      - Description bullet
+        - Nested detail
+      - _Requirements: 1.1, 2.3_
+
+    - [ ] 2. Parent task
+      - [ ] 2.1 Sub-task title
+        - Sub-task detail
+        - _Requirements: 3.1_
+      - [ ] 2.2. Another sub-task
+
+Blank lines inside a task are allowed; a task ends at the next top-level
+checkbox or at any other non-indented line such as a heading. An indented
+checkbox with a dotted number (2.1, 2.1.3, ...) starts a sub-task of the
+nearest less-indented task; other indented lines belong to the deepest open
+task they are indented under. Un-numbered checklists stay in the description.
+"""
+
+import re
+import time
+
+from . import trace
+
+TASK_LINE = re.compile(r'- \[([ xX])\] (\d+(?:\.\d+)*)\.?\s+(.*)')
+REQUIREMENTS_PREFIX = '_Requirements:'
+
+
+class Task:
+    """One checklist item from tasks.md; sub-tasks name their parent's number"""
+
+    __slots__ = ('number', 'title', 'description', 'requirements', 'completed', 'parent', 'subtasks')
+
+    def __init__(self, number, title, description='', requirements='Not specified', completed=False,
+                 parent=None, subtasks=()):
+        self.number = number
+        self.title = title
+        self.description = description
+        self.requirements = requirements
+        self.completed = completed
+        self.parent = parent
+        # (number, title, completed) of the direct sub-tasks, in file order
+        self.subtasks = tuple(subtasks)
+
+    def __repr__(self):
+        state = 'x' if self.completed else ' '
+        return f"Task([{state}] {self.number}. {self.title!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Task):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+
+class _Node:
+    """A task whose lines are still being collected"""
+
+    __slots__ = ('match', 'indent', 'parent', 'body', 'children')
+
+    def __init__(self, match, indent, parent=None):
+        self.match = match
+        self.indent = indent
+        self.parent = parent
+        self.body = []
+        self.children = []
+
+
+def _build_task(match, body_lines, parent=None, subtasks=()):
+    """Turn a matched task line and its indented body lines into a Task"""
+    completed, number, title = match.groups()
+    requirements = 'Not specified'
+    description_lines = []
+    base_indent = None
+
+    for line in body_lines:
+        stripped = line.strip()
+        # Requirements and other _italic_ notes may be written bare or as a bullet
+        note = stripped[2:] if stripped.startswith('- _') else stripped
+        if note.startswith(REQUIREMENTS_PREFIX):
+            requirements = note[len(REQUIREMENTS_PREFIX):].strip().rstrip('_').strip()
+            continue
+        if note.startswith('_'):
+            continue
+
+        # Keep nesting relative to the first body line
+        indent = len(line) - len(line.lstrip())
+        if base_indent is None:
+            base_indent = indent
+        description_lines.append(' ' * max(0, indent - base_indent) + stripped)
+
+    return Task(
+        number=number,
+        title=title.strip(),
+        description='\n'.join(description_lines),
+        requirements=requirements,
+        completed=completed != ' ',
+        parent=parent,
+        subtasks=subtasks
+    )
+
+
+def _flatten(root):
+    """Yield the Tasks of a finished subtree, parents before their sub-tasks"""
+    pending = [(root, None)]
+    while pending:
+        node, parent = pending.pop()
+        subtasks = [(child.match.group(2), child.match.group(3).strip(), child.match.group(1) != ' ')
+                    for child in node.children]
+        task = _build_task(node.match, node.body, parent, subtasks)
+        yield task
+        pending.extend((child, task.number) for child in reversed(node.children))
+
+
+def iter_tasks(lines):
+    """Yield Task records from an iterable of tasks.md lines"""
+    root = None
+    # Open tasks of the current subtree, outermost first
+    stack = []
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        stripped = line.strip()
+
+        if not stripped:
+            continue
+
+        if line[0] not in ' \t':
+            if root:
+                yield from _flatten(root)
+                root = None
+
+            match = TASK_LINE.match(line)
+            if match:
+                root = _Node(match, -1)
+                stack = [root]
+            continue
+
+        if not root:
+            continue
+
+        line = line.expandtabs(4)
+        indent = len(line) - len(line.lstrip())
+        # Close every task this line is not indented under; the top-level task stays open
+        while len(stack) > 1 and stack[-1].indent >= indent:
+            stack.pop()
+
+        match = TASK_LINE.match(stripped)
+        if match and '.' in match.group(2):
+            node = _Node(match, indent, stack[-1])
+            stack[-1].children.append(node)
+            stack.append(node)
+        else:
+            stack[-1].body.append(line)
+
+    if root:
+        yield from _flatten(root)
+
+
+def parse_tasks_file(file_path):
+    """Stream Task records from a tasks.md file"""
+    # Only time spent parsing counts, not time the consumer spends between tasks
+    parse_time = 0.0
+    count = 0
+    try:
+        with open(file_path, 'r') as f:
+            tasks = iter_tasks(f)
+            while True:
+                started = time.perf_counter()
+                task = next(tasks, None)
+                parse_time += time.perf_counter() - started
+                if task is None:
+                    break
+                count += 1
+                yield task
+    except FileNotFoundError:
+        print(f"Tasks file not found: {file_path}")
+    finally:
+        trace.record('parse.tasks', parse_time, tasks=count, file=str(file_path))
@@ -0,0 +1,151 @@
+"""
+Lightweight spans and timers for the workflow scripts
+
+Every external call (REST, GraphQL, git) and parse phase is recorded as a
+span with its latency and attributes such as bytes and attempts. Recording
+is a perf_counter() pair and a list append, so it is always on. A workflow
+step calls start_trace() once; when the step's script exits the spans are
+written to .kiro/trace/<step>.json (uploaded as an artifact) and summarised
+as a table in GITHUB_STEP_SUMMARY.
+
+Set KIRO_PROFILE=1 to also run the step under cProfile and dump pstats to
+.kiro/trace/<step>.pstats for `python3 -m pstats` or snakeviz.
+"""
+
+import atexit
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_DIR = '.kiro/trace'
+
+_lock = threading.Lock()
+_local = threading.local()
+_spans = []
+_epoch = time.perf_counter()
+
+
+def record(name, duration, **attrs):
+    """Record a span that was timed by the caller, e.g. time spent inside a generator"""
+    parent = getattr(_local, 'stack', None)
+    span = {
+        'name': name,
+        'start': round(time.perf_counter() - _epoch - duration, 6),
+        'duration': round(duration, 6),
+        'thread': threading.current_thread().name,
+        'parent': parent[-1] if parent else None
+    }
+    if attrs:
+        span['attrs'] = attrs
+    with _lock:
+        _spans.append(span)
+
+
+@contextmanager
+def span(name, **attrs):
+    """Time a block; the yielded dict can be filled with attributes (bytes, status, attempts...)"""
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(name)
+    started = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs['error'] = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        stack.pop()
+        record(name, duration, **attrs)
+
+
+def spans():
+    with _lock:
+        return list(_spans)
+
+
+def drain():
+    """Return and forget the spans recorded so far, so a long-running process stays bounded"""
+    with _lock:
+        recorded = list(_spans)
+        _spans.clear()
+    return recorded
+
+
+def summarize(recorded):
+    """Aggregate spans by name: calls, total, mean, p95, max, bytes and retries"""
+    groups = {}
+    for item in recorded:
+        groups.setdefault(item['name'], []).append(item)
+
+    rows = []
+    for name, items in groups.items():
+        durations = sorted(item['duration'] for item in items)
+        attrs = [item.get('attrs', {}) for item in items]
+        rows.append({
+            'name': name,
+            'calls': len(items),
+            'total': sum(durations),
+            'mean': sum(durations) / len(durations),
+            'p95': durations[min(len(durations) - 1, int(len(durations) * 0.95))],
+            'max': durations[-1],
+            'bytes': sum(a.get('bytes_in', 0) + a.get('bytes_out', 0) + a.get('bytes', 0) for a in attrs),
+            'retries': sum(max(0, a.get('attempts', 1) - 1) for a in attrs),
+            'errors': sum(1 for a in attrs if a.get('error'))
+        })
+    return sorted(rows, key=lambda row: -row['total'])
+
+
+def render_summary(step, rows, wall):
+    """Markdown table for GITHUB_STEP_SUMMARY"""
+    lines = [
+        f'### Timing: {step} ({wall:.2f}s wall)', '',
+        '| Span | Calls | Total | Mean | p95 | Max | Bytes | Retries | Errors |',
+        '|---|---:|---:|---:|---:|---:|---:|---:|---:|'
+    ]
+    for row in rows:
+        lines.append(
+            f"| `{row['name']}` | {row['calls']} | {row['total']:.3f}s | {row['mean'] * 1000:.1f}ms | "
+            f"{row['p95'] * 1000:.1f}ms | {row['max'] * 1000:.1f}ms | {row['bytes']:,} | "
+            f"{row['retries']} | {row['errors']} |"
+        )
+    return '\n'.join(lines) + '\n\n'
+
+
+def _profiling_enabled():
+    return os.environ.get('KIRO_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+
+def start_trace(step, trace_dir=TRACE_DIR):
+    """Trace the rest of this process and write the results when it exits"""
+    started = time.perf_counter()
+    profiler = None
+    if _profiling_enabled():
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    def finish():
+        wall = time.perf_counter() - started
+        directory = Path(trace_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(directory / f'{step}.pstats')
+
+        recorded = spans()
+        rows = summarize(recorded)
+        with open(directory / f'{step}.json', 'w') as f:
+            json.dump({'step': step, 'wall': wall, 'summary': rows, 'spans': recorded}, f, indent=1)
+
+        summary_file = os.environ.get('GITHUB_STEP_SUMMARY')
+        if summary_file and rows:
+            with open(summary_file, 'a') as f:
+                f.write(render_summary(step, rows, wall))
+
+    atexit.register(finish)
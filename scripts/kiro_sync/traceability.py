@@ -0,0 +1,186 @@
+"""
+Requirement traceability index: requirement -> acceptance criteria -> tasks -> issues
+
+Every task in tasks.md names the acceptance criteria it covers
+(`_Requirements: 3.1, 3.2_`), and requirements.md numbers those criteria
+under each `### Requirement N` heading. The integration workflow joins the
+two once per spec revision and writes the result, with the test levels from
+the design's Testing Strategy, to .kiro/.sync/traceability/<spec>.json. That
+file travels with the Actions cache like the task index, so the auto-PR job
+fills its Requirements Validation checklist from one JSON lookup instead of
+parsing requirements.md and design.md on every push.
+
+A revision is the git blob SHAs of the three spec documents, so the index is
+only rebuilt when one of them changed; issue numbers are refreshed from the
+sync manifest on every write.
+"""
+
+import json
+import re
+from pathlib import Path
+
+from . import trace
+from .index import normalize_task_number
+from .manifest import MANIFEST_DIR, write_json
+from .sections import blob_sha, load_section_index, testing_requirements
+from .tasks import parse_tasks_file
+
+TRACEABILITY_DIR = f'{MANIFEST_DIR}/traceability'
+TRACEABILITY_VERSION = 1
+
+REQUIREMENT_HEADING = re.compile(r'Requirement\s+(\d+(?:\.\d+)*)')
+CRITERION_LINE = re.compile(r'(\d+)\.\s+(.*)')
+REQUIREMENT_ID = re.compile(r'\d+(?:\.\d+)+|\d+')
+
+
+def traceability_path(spec, directory=TRACEABILITY_DIR):
+    return Path(directory) / f'{spec}.json'
+
+
+def parse_requirement_ids(requirements):
+    """Requirement IDs in a task's `_Requirements:_` text, e.g. '3.1, 3.2' -> ['3.1', '3.2']"""
+    if not requirements or requirements == 'Not specified':
+        return []
+    return list(dict.fromkeys(REQUIREMENT_ID.findall(requirements)))
+
+
+def spec_revision(*files):
+    """Blob SHAs of the spec documents; the index is rebuilt when any of them changes"""
+    revision = {}
+    for file_path in files:
+        try:
+            revision[Path(file_path).name] = blob_sha(Path(file_path).read_bytes())
+        except OSError:
+            revision[Path(file_path).name] = None
+    return revision
+
+
+def _story(text):
+    match = re.search(r'\*\*User Story:\*\*\s*(.*)', text)
+    return match.group(1).strip() if match else ''
+
+
+def _criteria(text):
+    """Numbered items of an Acceptance Criteria section; continuation lines are joined"""
+    criteria = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        match = CRITERION_LINE.match(stripped)
+        if match:
+            criteria.append([match.group(1), match.group(2).strip()])
+        elif stripped and criteria and line[:1] in ' \t':
+            criteria[-1][1] += ' ' + stripped
+    return criteria
+
+
+def scan_requirements(requirements_file):
+    """Return {requirement id: {'title', 'story', 'criteria': {criterion id: text}}}"""
+    index = load_section_index(requirements_file)
+    requirements = {}
+    for section in index.sections:
+        match = REQUIREMENT_HEADING.fullmatch(section.title)
+        if not match:
+            continue
+        number = match.group(1)
+        acceptance = index.find(*section.path, 'Acceptance Criteria')
+        criteria = _criteria(index.section_text(acceptance)) if acceptance else []
+        requirements[number] = {
+            'title': section.title,
+            'story': _story(index.section_text(section, subsections=False)),
+            'criteria': {f'{number}.{item}': text for item, text in criteria}
+        }
+    return requirements
+
+
+def build_traceability(spec, requirements_file, design_file, tasks_file, manifest=None):
+    """Join requirements.md and tasks.md into the traceability index of one spec"""
+    with trace.span('traceability.build', spec=spec) as attrs:
+        requirements = scan_requirements(requirements_file)
+        criteria = {criterion: {'requirement': number, 'text': text, 'tasks': []}
+                    for number, requirement in requirements.items()
+                    for criterion, text in requirement['criteria'].items()}
+        tasks = {}
+        unknown = set()
+        for task in parse_tasks_file(tasks_file):
+            key = normalize_task_number(task.number)
+            ids = parse_requirement_ids(task.requirements)
+            tasks[key] = {'title': task.title, 'requirements': ids, 'issue': None}
+            for requirement_id in ids:
+                if requirement_id in criteria:
+                    criteria[requirement_id]['tasks'].append(key)
+                elif requirement_id in requirements:
+                    # A bare '3' covers every criterion of requirement 3
+                    for criterion in requirements[requirement_id]['criteria']:
+                        criteria[criterion]['tasks'].append(key)
+                else:
+                    unknown.add(requirement_id)
+        for entry in criteria.values():
+            entry['tasks'] = list(dict.fromkeys(entry['tasks']))
+
+        attrs.update(requirements=len(requirements), criteria=len(criteria), tasks=len(tasks))
+        if unknown:
+            print(f"Tasks of spec {spec} reference unknown requirements: {', '.join(sorted(unknown))}")
+
+        traceability = {
+            'version': TRACEABILITY_VERSION,
+            'spec': spec,
+            'revision': spec_revision(requirements_file, design_file, tasks_file),
+            'requirements': {number: {'title': requirement['title'], 'story': requirement['story'],
+                                      'criteria': list(requirement['criteria'])}
+                             for number, requirement in requirements.items()},
+            'criteria': criteria,
+            'tasks': tasks,
+            'testing': testing_requirements(design_file)
+        }
+    return link_issues(traceability, manifest)
+
+
+def link_issues(traceability, manifest):
+    """Fill in each task's issue number from the sync manifest"""
+    for number, entry in ((manifest or {}).get('tasks') or {}).items():
+        task = traceability['tasks'].get(normalize_task_number(number))
+        if task is not None:
+            task['issue'] = entry.get('issue')
+    return traceability
+
+
+def load_traceability(spec, directory=TRACEABILITY_DIR):
+    """Load a spec's traceability index, or None if it is missing or unreadable"""
+    try:
+        with open(traceability_path(spec, directory), 'r') as f:
+            traceability = json.load(f)
+        if traceability.get('version') == TRACEABILITY_VERSION:
+            return traceability
+    except (OSError, json.JSONDecodeError):
+        pass
+    return None
+
+
+def update_traceability(spec, requirements_file, design_file, tasks_file, manifest=None,
+                        directory=TRACEABILITY_DIR):
+    """Rebuild the index if the spec changed since it was written, and refresh its issue numbers"""
+    traceability = load_traceability(spec, directory)
+    if traceability and traceability['revision'] == spec_revision(requirements_file, design_file, tasks_file):
+        traceability = link_issues(traceability, manifest)
+    else:
+        traceability = build_traceability(spec, requirements_file, design_file, tasks_file, manifest)
+    write_json(traceability_path(spec, directory), traceability)
+    return traceability
+
+
+def acceptance_criteria(traceability, task_number):
+    """[(criterion id, text)] the task covers, in requirement order"""
+    if not traceability:
+        return []
+    task = traceability['tasks'].get(normalize_task_number(task_number))
+    if not task:
+        return []
+    covered = []
+    for requirement_id in task['requirements']:
+        if requirement_id in traceability['criteria']:
+            covered.append(requirement_id)
+        elif requirement_id in traceability['requirements']:
+            covered.extend(traceability['requirements'][requirement_id]['criteria'])
+    covered = sorted(dict.fromkeys(c for c in covered if c in traceability['criteria']),
+                     key=lambda criterion: tuple(int(part) for part in criterion.split('.')))
+    return [(criterion, traceability['criteria'][criterion]['text']) for criterion in covered]
@@ -0,0 +1,319 @@
+"""
+Watch mode: live-sync .kiro/specs edits to GitHub from a local checkout
+
+Usage (from the repository root):
+    PYTHONPATH=scripts python3 -m kiro_sync.watch [--milestone NAME] [--branch main]
+    ./scripts/setup-kiro-feature.sh --watch
+
+Every spec is synced once at startup; after that the process waits for
+file events under .kiro/specs (inotify on Linux, mtime polling elsewhere),
+lets a burst of saves settle for DEBOUNCE_SECONDS, re-parses only the files
+that changed and pushes only the issues whose content or checkbox changed,
+using the same manifests in .kiro/.sync as the workflow. An edit reaches
+GitHub in about a second instead of a workflow run.
+
+Needs GITHUB_TOKEN or GH_TOKEN (or a logged-in `gh`), and the repository
+from --repo, GITHUB_REPOSITORY or the origin remote.
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from . import trace
+from .client import GitHubApiError, GitHubClient
+from .issues import ensure_milestone
+from .sections import read_file_section
+from .specs import SPEC_FILES, SPECS_ROOT, Spec, parse_spec, sync_spec
+from .tasks import parse_tasks_file
+
+DEBOUNCE_SECONDS = 0.3
+POLL_SECONDS = 0.5
+
+# inotify(7) event bits
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+REMOTE_PATTERN = re.compile(r'github\.com[:/](?P<repo>[^/]+/[^/]+?)(?:\.git)?/?$')
+
+
+class InotifyWatcher:
+    """Directory watcher on Linux inotify through ctypes
+
+    Watches root and every directory below it, adding watches for spec
+    directories created while running. Editors that save by writing a
+    temporary file and renaming it show up as IN_MOVED_TO.
+    """
+
+    def __init__(self, root):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError('libc not found')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self._paths = {}
+        self.root = Path(root)
+        for directory in [self.root, *(path for path in self.root.rglob('*') if path.is_dir())]:
+            self._add(directory)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+        self._paths[wd] = Path(directory)
+
+    def read(self, timeout):
+        """Return the paths changed within timeout seconds (None waits for the next event)"""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+
+            directory = self._paths.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._paths[wd]
+                continue
+            path = directory / os.fsdecode(name) if name else directory
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add(path)
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Fallback for platforms without inotify: compare file mtimes every POLL_SECONDS"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for path in self.root.rglob('*.md'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def read(self, timeout):
+        time.sleep(POLL_SECONDS if timeout is None else min(timeout, POLL_SECONDS))
+        current = self._scan()
+        changed = {path for path in current.keys() | self._snapshot.keys()
+                   if current.get(path) != self._snapshot.get(path)}
+        self._snapshot = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_watcher(root):
+    try:
+        return InotifyWatcher(root)
+    except (OSError, AttributeError) as e:
+        print(f"inotify unavailable ({e}), polling every {POLL_SECONDS}s")
+        return PollingWatcher(root)
+
+
+def debounced_changes(watcher, debounce=DEBOUNCE_SECONDS):
+    """Yield sets of changed paths once no further event arrived for debounce seconds"""
+    pending = set()
+    while True:
+        changed = watcher.read(debounce if pending else None)
+        if changed:
+            pending |= changed
+        elif pending:
+            yield pending
+            pending = set()
+
+
+def changed_spec_files(paths, root=SPECS_ROOT):
+    """Map changed paths to {spec name: {changed spec file names}}, ignoring other files"""
+    root = Path(root).resolve()
+    changes = {}
+    for path in paths:
+        try:
+            relative = Path(path).resolve().relative_to(root)
+        except ValueError:
+            continue
+        if len(relative.parts) == 2 and relative.parts[1] in SPEC_FILES:
+            changes.setdefault(relative.parts[0], set()).add(relative.parts[1])
+        elif len(relative.parts) == 1:
+            # A spec directory was created, moved in or removed
+            changes.setdefault(relative.parts[0], set()).update(SPEC_FILES)
+    return changes
+
+
+class WatchSession:
+    """Keeps the last parse of every spec so an edit only re-parses the file that changed"""
+
+    def __init__(self, client, milestone_number, docs_url, workers=4, root=SPECS_ROOT):
+        self.client = client
+        self.milestone_number = milestone_number
+        self.docs_url = docs_url
+        self.workers = workers
+        self.root = Path(root)
+        self.parsed = {}
+
+    def spec(self, name):
+        directory = self.root / name
+        if not all((directory / file_name).is_file() for file_name in SPEC_FILES):
+            return None
+        return Spec(name, *(str(directory / file_name) for file_name in SPEC_FILES))
+
+    def reparse(self, spec, files):
+        """Update the cached parse of spec, re-reading only the files in files"""
+        previous = self.parsed.get(spec.name)
+        if previous is None:
+            parsed = parse_spec(spec)
+        else:
+            started = time.perf_counter()
+            parsed = dict(previous, spec=spec)
+            if 'tasks.md' in files:
+                parsed['tasks'] = list(parse_tasks_file(spec.tasks_file))
+            if 'requirements.md' in files:
+                parsed['requirements_summary'] = read_file_section(
+                    spec.requirements_file, '## Requirements', '### Requirement 1')
+            if 'design.md' in files:
+                parsed['architecture_overview'] = read_file_section(
+                    spec.design_file, '## Architecture', '### Component Structure')
+            parsed['parse_seconds'] = time.perf_counter() - started
+        self.parsed[spec.name] = parsed
+        return parsed
+
+    def sync(self, name, files=SPEC_FILES):
+        spec = self.spec(name)
+        if spec is None:
+            self.parsed.pop(name, None)
+            return None
+
+        started = time.perf_counter()
+        with trace.span('watch.sync', spec=name, files=','.join(sorted(files))) as attrs:
+            try:
+                parsed = self.reparse(spec, files)
+            except OSError as e:
+                # Usually a file caught halfway through an editor's save; the next event retries
+                print(f"Could not read {name}: {e}")
+                return None
+            summary = sync_spec(self.client, parsed, self.milestone_number, self.docs_url, workers=self.workers)
+            attrs['changes'] = summary['changes']
+
+        if summary['error']:
+            outcome = f"failed: {summary['error']}"
+        elif summary['failures']:
+            outcome = f"{summary['failures']} of {summary['changes']} issue changes failed"
+        else:
+            outcome = f"{summary['changes']} issue changes"
+        print(f"[{time.strftime('%H:%M:%S')}] {name}: {', '.join(sorted(files))} -> {outcome} "
+              f"in {time.perf_counter() - started:.2f}s")
+        return summary
+
+
+def detect_repository():
+    """owner/name from GITHUB_REPOSITORY or the origin remote, or None"""
+    if os.environ.get('GITHUB_REPOSITORY'):
+        return os.environ['GITHUB_REPOSITORY']
+    result = subprocess.run(['git', 'remote', 'get-url', 'origin'], capture_output=True, text=True)
+    match = REMOTE_PATTERN.search(result.stdout.strip())
+    return match.group('repo') if match else None
+
+
+def detect_token():
+    """GITHUB_TOKEN, GH_TOKEN or the token of a logged-in gh CLI, or None"""
+    token = os.environ.get('GITHUB_TOKEN') or os.environ.get('GH_TOKEN')
+    if token:
+        return token
+    try:
+        result = subprocess.run(['gh', 'auth', 'token'], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch .kiro/specs and live-sync edits to GitHub issues')
+    parser.add_argument('--repo', help='owner/name, defaults to GITHUB_REPOSITORY or the origin remote')
+    parser.add_argument('--milestone', help='Milestone title for new issues (created if missing)')
+    parser.add_argument('--branch', default='main', help='Branch the epic links to Kiro documents on')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent issue API calls')
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE_SECONDS,
+                        help='Seconds of quiet before a burst of saves is synced')
+    parser.add_argument('--root', default=SPECS_ROOT, help='Directory holding the spec directories')
+    args = parser.parse_args()
+
+    repo = args.repo or detect_repository()
+    token = detect_token()
+    if not repo or not token:
+        print("❌ Need a repository (--repo) and a token (GITHUB_TOKEN, GH_TOKEN or `gh auth login`)")
+        return 1
+    if not Path(args.root).is_dir():
+        print(f"❌ {args.root} does not exist")
+        return 1
+
+    client = GitHubClient(repo, token=token, pool_size=max(args.workers, 1))
+    try:
+        milestone_number = ensure_milestone(client, args.milestone) if args.milestone else None
+    except GitHubApiError as e:
+        print(f"❌ Could not resolve milestone: {e}")
+        return 1
+
+    session = WatchSession(client, milestone_number, f'https://github.com/{repo}/blob/{args.branch}',
+                           args.workers, args.root)
+    watcher = open_watcher(args.root)
+
+    print(f"Syncing every spec in {args.root} to {repo}")
+    for directory in sorted(path for path in Path(args.root).iterdir() if path.is_dir()):
+        session.sync(directory.name)
+
+    print(f"👀 Watching {args.root} (Ctrl-C to stop)")
+    try:
+        for changed in debounced_changes(watcher, args.debounce):
+            for name, files in sorted(changed_spec_files(changed, args.root).items()):
+                session.sync(name, files)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        watcher.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,28 +1,66 @@
 #!/bin/bash
 # Quick setup script for new Kiro features
+# Usage: setup-kiro-feature.sh [--all | --watch [--milestone NAME]]
 
 echo "🚀 Kiro Feature Setup"
 echo "===================="
 
-read -p "Enter project/feature name: " PROJECT_NAME
+# Discover every spec directory that has all three Kiro files
+SPECS=()
+for dir in .kiro/specs/*/; do
+    dir=${dir%/}
+    if [ -f "$dir/requirements.md" ] && [ -f "$dir/design.md" ] && [ -f "$dir/tasks.md" ]; then
+        SPECS+=("$(basename "$dir")")
+    fi
+done
+
+if [ ${#SPECS[@]} -eq 0 ]; then
+    echo "❌ No Kiro specs found in .kiro/specs/"
+    exit 1
+fi
+
+echo "Found specs: ${SPECS[*]}"
+
+if [ "$1" = "--watch" ]; then
+    # Live-sync edits from this checkout instead of dispatching the workflow
+    shift
+    PYTHONPATH=scripts exec python3 -m kiro_sync.watch "$@"
+fi
+
+if [ "$1" = "--all" ]; then
+    SPEC_NAME="all"
+else
+    read -p "Enter spec to sync (or 'all') [${SPECS[0]}]: " SPEC_NAME
+    SPEC_NAME=${SPEC_NAME:-${SPECS[0]}}
+fi
+
 read -p "Enter milestone name (optional): " MILESTONE_NAME
 
-echo "Setting up GitHub integration for: $PROJECT_NAME"
+ARGS=()
+if [ -n "$MILESTONE_NAME" ]; then
+    ARGS+=(-f milestone_name="$MILESTONE_NAME")
+fi
 
 # Trigger the GitHub workflow
-if [ -z "$MILESTONE_NAME" ]; then
-    gh workflow run kiro-integration.yml \
-      -f project_name="$PROJECT_NAME" \
-      -f requirements_file=".kiro/specs/file-action-bar/requirements.md" \
-      -f design_file=".kiro/specs/file-action-bar/design.md" \
-      -f tasks_file=".kiro/specs/file-action-bar/tasks.md"
+if [ "$SPEC_NAME" = "all" ]; then
+    echo "Setting up GitHub integration for all ${#SPECS[@]} specs"
+    gh workflow run kiro-integration.yml -f all_specs=true "${ARGS[@]}"
 else
+    SPEC_DIR=".kiro/specs/$SPEC_NAME"
+    if [ ! -f "$SPEC_DIR/tasks.md" ]; then
+        echo "❌ $SPEC_DIR is not a complete Kiro spec"
+        exit 1
+    fi
+
+    read -p "Enter project/feature name: " PROJECT_NAME
+    echo "Setting up GitHub integration for: $PROJECT_NAME"
+
     gh workflow run kiro-integration.yml \
       -f project_name="$PROJECT_NAME" \
-      -f milestone_name="$MILESTONE_NAME" \
-      -f requirements_file=".kiro/specs/file-action-bar/requirements.md" \
-      -f design_file=".kiro/specs/file-action-bar/design.md" \
-      -f tasks_file=".kiro/specs/file-action-bar/tasks.md"
+      -f requirements_file="$SPEC_DIR/requirements.md" \
+      -f design_file="$SPEC_DIR/design.md" \
+      -f tasks_file="$SPEC_DIR/tasks.md" \
+      "${ARGS[@]}"
 fi
 
 echo "✅ GitHub workflow triggered!"
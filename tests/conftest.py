@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+REPOSITORY_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPOSITORY_ROOT / 'scripts'))
+
+
+@pytest.fixture
+def spec_dir():
+    """The file-action-bar spec checked into this repository"""
+    return REPOSITORY_ROOT / '.kiro' / 'specs' / 'file-action-bar'
+
+
+@pytest.fixture
+def github():
+    """A GitHubClient for a fresh offline GitHub API emulator (benchmarks.fakegithub)"""
+    from benchmarks.e2e import REPOSITORY, start_emulator
+    from kiro_sync.client import GitHubClient
+
+    process, api_url = start_emulator([])
+    try:
+        yield GitHubClient(REPOSITORY, token='offline-token', base_url=api_url)
+    finally:
+        process.terminate()
+        process.wait()
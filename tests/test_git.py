@@ -0,0 +1,60 @@
+import subprocess
+
+import pytest
+
+from kiro_sync.git import NO_COMMITS, get_commit_summary
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-C', str(repo), '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *args],
+                   check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """main with one commit, and feature/task-1 branching off it"""
+    git(tmp_path, 'init', '--quiet', '--initial-branch=main')
+    (tmp_path / 'README.md').write_text('Readme\n')
+    git(tmp_path, 'add', '.')
+    git(tmp_path, 'commit', '--quiet', '-m', 'Initial commit')
+    git(tmp_path, 'checkout', '--quiet', '-b', 'feature/task-1')
+    return tmp_path
+
+
+def commit(repo, path, subject):
+    target = repo / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(subject)
+    git(repo, 'add', '.')
+    git(repo, 'commit', '--quiet', '-m', subject)
+
+
+def test_short_branch_lists_every_subject(repo):
+    commit(repo, 'src/a.py', 'feat: add a')
+    commit(repo, 'docs/a.md', 'Document a')
+
+    assert get_commit_summary('main', 'feature/task-1', cwd=repo) == '- Document a\n- feat: add a'
+    assert get_commit_summary('main', 'main', cwd=repo) == NO_COMMITS
+
+
+def test_long_branch_reads_only_the_newest_commits(repo):
+    for number in range(15):
+        commit(repo, f'src/{number}.py', f'fix: bug {number}')
+    for number in range(15):
+        commit(repo, f'docs/{number}.md', f'Document part {number}')
+
+    summary = get_commit_summary('main', 'feature/task-1', cwd=repo, max_commits=25)
+
+    lines = summary.splitlines()
+    assert lines[0] == '30 commits; the latest 25 in 2 groups'
+    assert '**docs/** (15)' in lines and '**fix** (10)' in lines
+    assert 'fix: bug 4' not in summary
+
+
+def test_whole_range_fits_the_log(repo):
+    for number in range(25):
+        commit(repo, f'src/{number}.py', f'feat: part {number}')
+
+    summary = get_commit_summary('main', 'feature/task-1', cwd=repo, max_commits=25)
+
+    assert summary.splitlines()[:3] == ['25 commits in 1 groups', '', '**feat** (25)']
@@ -0,0 +1,80 @@
+import json
+
+from kiro_sync.index import INDEX_VERSION, issue_metadata, load_index, lookup_task, update_index
+from kiro_sync.pulls import _match_task_issue, task_number_from_branch
+
+
+def manifest(*tasks):
+    return {'tasks': {number: {'issue': issue, 'title': f'Task {number}: {title}'} for number, issue, title in tasks}}
+
+
+def two_spec_index(path):
+    update_index('alpha', manifest(('1', 2, 'alpha first'), ('2', 3, 'alpha second')), 1, path)
+    return update_index('beta', manifest(('1', 5, 'beta first'), ('3', 6, 'beta third')), 4, path)
+
+
+def test_entries_are_kept_per_spec(tmp_path):
+    index = two_spec_index(tmp_path / 'index.json')
+
+    assert index['specs']['alpha']['1'] == {'issue': 2, 'title': 'Task 1: alpha first', 'epic': 1, 'spec': 'alpha'}
+    assert index['specs']['beta']['1'] == {'issue': 5, 'title': 'Task 1: beta first', 'epic': 4, 'spec': 'beta'}
+    assert load_index(tmp_path / 'index.json') == index
+
+
+def test_resync_replaces_only_that_spec(tmp_path):
+    path = tmp_path / 'index.json'
+    two_spec_index(path)
+    closed = manifest(('1', 5, 'beta first'))
+    closed['tasks']['1']['closed'] = True
+
+    index = update_index('beta', closed, 4, path)
+
+    assert index['specs']['beta'] == {}
+    assert set(index['specs']['alpha']) == {'1', '2'}
+
+
+def test_task_in_one_spec_resolves_from_any_branch(tmp_path):
+    index = two_spec_index(tmp_path / 'index.json')
+
+    assert lookup_task(index, '02', 'feature/task-02')['issue'] == 3
+    assert lookup_task(index, '3', 'task/3')['issue'] == 6
+    assert lookup_task(index, '4', 'task/4') is None
+
+
+def test_task_in_several_specs_needs_the_branch_to_name_one(tmp_path):
+    index = two_spec_index(tmp_path / 'index.json')
+
+    assert lookup_task(index, '1', 'feature/task-01') is None
+    assert lookup_task(index, '1', 'feature/beta/task-01')['issue'] == 5
+    assert lookup_task(index, '1', 'feature/alpha/task-01')['issue'] == 2
+    assert lookup_task(index, '1', 'feature/alphabet/task-01') is None
+
+
+def test_index_from_an_older_version_is_ignored(tmp_path):
+    path = tmp_path / 'index.json'
+    path.write_text(json.dumps({'version': INDEX_VERSION - 1, 'tasks': {'1': {'issue': 2}}}))
+
+    assert load_index(path)['specs'] == {}
+
+
+def test_task_number_comes_from_the_last_branch_segment():
+    assert task_number_from_branch('feature/task-2.1') == '2.1'
+    assert task_number_from_branch('feature/v2-api/task-07') == '07'
+    assert task_number_from_branch('task/05') == '05'
+    assert task_number_from_branch('main') == ''
+
+
+def search_hit(number, title, **metadata):
+    body = issue_metadata(kind='task', **metadata) if metadata else ''
+    return {'id': f'I_{number}', 'number': number, 'title': title, 'body': body, 'state': 'OPEN'}
+
+
+def test_search_fallback_does_not_guess_between_specs():
+    hits = [search_hit(12, 'Task 12: other', task='12', spec='alpha'),
+            search_hit(2, 'Task 1: alpha first', task='1', spec='alpha'),
+            search_hit(5, 'Task 1: beta first', task='1', spec='beta')]
+
+    assert _match_task_issue(hits, '1', 'feature/task-01') is None
+    assert _match_task_issue(hits, '1', 'feature/beta/task-01')['number'] == 5
+    assert _match_task_issue(hits[:2], '1', 'feature/task-01')['number'] == 2
+    assert _match_task_issue([search_hit(7, 'Task 1: by hand')], '1')['number'] == 7
@@ -0,0 +1,253 @@
+import threading
+
+from kiro_sync import issues
+from kiro_sync.client import GitHubApiError, Issue, Response
+from kiro_sync.index import issue_metadata
+from kiro_sync.issues import apply_task_operation, create_task_issues, index_existing_issues, plan_task_sync, task_issue_payload
+from kiro_sync.manifest import task_hash
+from kiro_sync.ratelimit import RateLimiter
+from kiro_sync.tasks import Task
+
+EPIC = 10
+MILESTONE = 2
+
+
+def make_tasks():
+    return [
+        Task('1', 'Models', '- Add interfaces', '2.1'),
+        Task('2', 'Service', '- Call the API', '3.1', subtasks=[('2.1', 'Retry', False)]),
+        Task('2.1', 'Retry', '- Back off', '3.2', parent='2'),
+    ]
+
+
+def synced_manifest(tasks):
+    """A manifest as a previous sync of tasks would have left it"""
+    return {'tasks': {
+        task.number: {'issue': 100 + index, 'title': f'Task {task.number}: {task.title}',
+                      'hash': task_hash(task, EPIC, MILESTONE), 'completed': task.completed}
+        for index, task in enumerate(tasks)
+    }}
+
+
+def plan(tasks, manifest, existing=None):
+    counts = {}
+    operations = list(plan_task_sync(tasks, EPIC, MILESTONE, manifest, existing, counts))
+    return operations, counts
+
+
+def test_first_sync_creates_every_task_in_order():
+    tasks = make_tasks()
+    operations, counts = plan(tasks, {'tasks': {}})
+
+    assert [(action, task.number, issue) for action, task, issue, _ in operations] == [
+        ('create', '1', None), ('create', '2', None), ('create', '2.1', None)]
+    assert operations[0][3] == task_issue_payload(tasks[0], EPIC, MILESTONE)
+    assert counts == {'create': 3}
+
+
+def test_unchanged_tasks_need_no_calls():
+    tasks = make_tasks()
+    operations, counts = plan(tasks, synced_manifest(tasks))
+
+    assert operations == []
+    assert counts == {'unchanged': 3}
+
+
+def test_checking_a_box_is_left_to_the_state_sync():
+    tasks = make_tasks()
+    manifest = synced_manifest(tasks)
+    tasks[0].completed = True
+
+    operations, counts = plan(tasks, manifest)
+
+    assert operations == []
+    assert manifest['tasks']['1']['completed'] is True
+
+
+def test_changed_task_is_updated_without_touching_labels():
+    tasks = make_tasks()
+    manifest = synced_manifest(tasks)
+    tasks[1].title = 'API service'
+
+    operations, counts = plan(tasks, manifest)
+
+    assert len(operations) == 1
+    action, task, issue, payload = operations[0]
+    assert (action, task.number, issue) == ('update', '2', 101)
+    assert payload['title'] == 'Task 2: API service'
+    assert 'labels' not in payload and 'state' not in payload
+    assert counts == {'unchanged': 2, 'update': 1}
+
+
+def test_removed_task_is_closed_after_the_remaining_tasks():
+    tasks = make_tasks()
+    manifest = synced_manifest(tasks)
+    remaining = [tasks[0], Task('3', 'Docs')]
+
+    operations, counts = plan(remaining, manifest)
+
+    assert [(action, task.number, issue) for action, task, issue, _ in operations] == [
+        ('create', '3', None), ('close', '2', 101), ('close', '2.1', 102)]
+    assert operations[-1][3] == {'state': 'closed', 'state_reason': 'not_planned'}
+    assert counts == {'unchanged': 1, 'create': 1, 'close': 2}
+
+
+def test_closed_task_that_comes_back_is_reopened():
+    tasks = make_tasks()
+    manifest = synced_manifest(tasks)
+    manifest['tasks']['1']['closed'] = True
+
+    operations, _ = plan(tasks, manifest)
+
+    assert [(action, task.number, payload.get('state')) for action, task, _, payload in operations] == [
+        ('update', '1', 'open')]
+
+
+def test_already_closed_task_is_not_closed_again():
+    tasks = make_tasks()
+    manifest = synced_manifest(tasks)
+    manifest['tasks']['9'] = {'issue': 109, 'title': 'Task 9: Gone', 'hash': None, 'closed': True}
+
+    operations, counts = plan(tasks, manifest)
+
+    assert operations == []
+    assert 'close' not in counts
+
+
+def test_existing_issues_are_adopted_instead_of_duplicated():
+    tasks = make_tasks()
+    matching = task_issue_payload(tasks[0], EPIC, MILESTONE)
+    existing = {
+        '1': Issue(7, matching['title'], matching['body'], 'open', '', ('task',)),
+        '2': Issue(8, 'Task 2: Service', 'An older body', 'open', '', ('task',)),
+    }
+    manifest = {'tasks': {}}
+
+    operations, counts = plan(tasks, manifest, existing)
+
+    assert [(action, task.number, issue) for action, task, issue, _ in operations] == [
+        ('update', '2', 8), ('create', '2.1', None)]
+    assert manifest['tasks']['1']['issue'] == 7
+    assert counts == {'unchanged': 1, 'update': 1, 'create': 1}
+
+
+class ListingClient:
+    def __init__(self, issues):
+        self.issues = issues
+
+    def list_issues(self, labels=None, state=None):
+        return iter(self.issues)
+
+
+def test_existing_issues_are_matched_to_their_own_spec():
+    def issue(number, title, **metadata):
+        body = f'Body\n{issue_metadata(kind="task", **metadata)}' if metadata else 'Written by hand'
+        return Issue(number, title, body, 'open', '', ('task',))
+
+    client = ListingClient([
+        issue(2, 'Task 1: alpha', task='1', epic='1', spec='alpha'),
+        issue(5, 'Task 1: beta', task='1', epic='4', spec='beta'),
+        issue(6, 'Task 2: beta, before specs were recorded', task='2', epic='4'),
+        issue(3, 'Task 2: alpha, before specs were recorded', task='2', epic='1'),
+        issue(7, 'Task 3: made by hand'),
+        issue(8, 'Task 1: also by hand'),
+    ])
+
+    existing = index_existing_issues(client, 'beta', 4)
+
+    assert {number: issue.number for number, issue in existing.items()} == {'1': 5, '2': 6, '3': 7}
+
+
+class FlakyClient:
+    """Fails each POST with the next status in failures; applied=True creates the issue anyway"""
+
+    def __init__(self, failures, applied):
+        self.repo = 'owner/name'
+        self.failures = list(failures)
+        self.applied = applied
+        self.issues = []
+        self.requests = []
+
+    def request(self, method, path, payload=None, params=None):
+        self.requests.append(method)
+        if method == 'GET':
+            return Response(200, {}, list(reversed(self.issues)))
+        if self.failures:
+            status = self.failures.pop(0)
+            if self.applied and status != 429:
+                self.issues.append(dict(payload, number=len(self.issues) + 1))
+            raise GitHubApiError(status, {}, 'Server Error')
+        self.issues.append(dict(payload, number=len(self.issues) + 1))
+        return Response(201, {}, self.issues[-1])
+
+
+def create(client, monkeypatch):
+    monkeypatch.setattr(issues.time, 'sleep', lambda seconds: None)
+    limiter = RateLimiter(max_backoff=0.0)
+    payload = task_issue_payload(make_tasks()[0], EPIC, MILESTONE, spec='alpha')
+    return apply_task_operation(client, ('create', make_tasks()[0], None, payload), limiter), limiter
+
+
+def test_create_that_went_through_before_a_502_is_not_sent_again(monkeypatch):
+    client = FlakyClient([502], applied=True)
+
+    result, limiter = create(client, monkeypatch)
+
+    assert (result['number'], result['error']) == (1, None)
+    assert client.requests == ['POST', 'GET'] and len(client.issues) == 1
+    # A server error is no sign of sending too fast
+    assert limiter.interval == 0.0
+
+
+def test_create_that_was_lost_is_sent_again(monkeypatch):
+    client = FlakyClient([0, 503], applied=False)
+
+    result, _ = create(client, monkeypatch)
+
+    assert (result['number'], result['attempts']) == (1, 3)
+    assert client.requests == ['POST', 'GET', 'POST', 'GET', 'POST']
+
+
+def test_rate_limited_create_is_retried_without_a_lookup(monkeypatch):
+    client = FlakyClient([429], applied=True)
+
+    result, limiter = create(client, monkeypatch)
+
+    assert result['number'] == 1 and client.requests == ['POST', 'POST']
+    # Widened to 1s by the limit, then eased back by the successful retry
+    assert limiter.interval == 0.9
+
+
+class SlowFirstClient:
+    """Holds the first task's create back until the others have been numbered"""
+
+    def __init__(self, others):
+        self.repo = 'owner/name'
+        self.created = []
+        self.lock = threading.Lock()
+        self.others_done = threading.Semaphore(0)
+        self.others = others
+
+    def request(self, method, path, payload=None, params=None):
+        if payload['title'].startswith('Task 1:'):
+            for _ in range(self.others):
+                self.others_done.acquire()
+        with self.lock:
+            self.created.append(payload['title'])
+            number = len(self.created)
+        if not payload['title'].startswith('Task 1:'):
+            self.others_done.release()
+        return Response(201, {}, {'number': number, 'title': payload['title']})
+
+
+def test_concurrent_creates_map_each_task_to_the_issue_it_created():
+    tasks = make_tasks()
+    client = SlowFirstClient(others=len(tasks) - 1)
+
+    results = create_task_issues(client, tasks, EPIC, MILESTONE, workers=len(tasks))
+
+    assert [result['task'].number for result in results] == ['1', '2', '2.1']
+    # Task 1 was numbered last, and its result says so
+    assert [result['number'] for result in results][0] == 3
+    assert all(client.created[result['number'] - 1] == f"Task {result['task'].number}: {result['task'].title}"
+               for result in results)
@@ -0,0 +1,123 @@
+import json
+
+from kiro_sync.issues import plan_task_sync, result_entry
+from kiro_sync.journal import Journal, apply_entry
+from kiro_sync.manifest import load_manifest
+from kiro_sync.tasks import Task
+
+EPIC = 10
+MILESTONE = 2
+
+
+def make_tasks():
+    return [Task(str(number), f'Task title {number}') for number in range(1, 6)]
+
+
+def created(task, issue):
+    return result_entry({'action': 'create', 'task': task, 'number': issue}, EPIC, MILESTONE)
+
+
+def test_resume_after_a_partial_run_only_plans_the_rest(tmp_path):
+    tasks = make_tasks()
+    first = Journal(tmp_path / 'spec.journal.jsonl', run_id='101')
+    for index, task in enumerate(tasks[:3]):
+        first.record(created(task, 200 + index))
+    first.close()
+
+    manifest = {'tasks': {}}
+    assert Journal(tmp_path / 'spec.journal.jsonl', run_id='102').resume(manifest) == 3
+    assert {number: entry['issue'] for number, entry in manifest['tasks'].items()} == {'1': 200, '2': 201, '3': 202}
+
+    operations = list(plan_task_sync(tasks, EPIC, MILESTONE, manifest))
+    assert [(action, task.number) for action, task, _, _ in operations] == [('create', '4'), ('create', '5')]
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / 'spec.journal.jsonl'
+    journal = Journal(path, run_id='101')
+    journal.record(created(Task('1', 'One'), 200))
+    journal.close()
+    with open(path, 'a') as f:
+        f.write('{"action": "create", "task": "2", "iss')
+
+    manifest = {'tasks': {}}
+    assert Journal(path).resume(manifest) == 1
+    assert list(manifest['tasks']) == ['1']
+
+
+def test_recreate_only_trusts_the_same_workflow_run(tmp_path):
+    path = tmp_path / 'spec.journal.jsonl'
+    earlier = Journal(path, run_id='101')
+    earlier.record(created(Task('1', 'One'), 200))
+    earlier.close()
+    retry = Journal(path, run_id='102')
+    retry.record(created(Task('2', 'Two'), 201))
+    retry.close()
+
+    manifest = {'tasks': {'9': {'issue': 1, 'title': 'stale', 'hash': None}}}
+    assert Journal(path, run_id='102').resume(manifest, recreate=True) == 1
+
+    assert list(manifest['tasks']) == ['2']
+    # The entries of the other run are dropped from the file as well
+    assert [json.loads(line)['run'] for line in path.read_text().splitlines()] == ['102']
+
+
+def test_replay_of_update_keeps_issue_state_and_link():
+    manifest = {'tasks': {'2': {'issue': 201, 'title': 'Task 2: Old', 'hash': 'a', 'issue_state': 'closed',
+                                'linked': 200}}}
+    update = result_entry({'action': 'update', 'task': Task('2', 'New', parent='1'), 'number': 201}, EPIC, MILESTONE)
+
+    apply_entry(manifest, update)
+
+    entry = manifest['tasks']['2']
+    assert entry['title'] == 'Task 2: New' and entry['parent'] == '1'
+    assert (entry['issue_state'], entry['linked']) == ('closed', 200)
+
+
+def test_replay_of_create_for_a_new_issue_drops_the_old_state():
+    manifest = {'tasks': {'2': {'issue': 150, 'title': 'Task 2: Two', 'hash': 'a', 'issue_state': 'closed',
+                                'linked': 149}}}
+
+    apply_entry(manifest, created(Task('2', 'Two'), 201))
+
+    assert manifest['tasks']['2']['issue_state'] == 'open'
+    assert 'linked' not in manifest['tasks']['2']
+
+
+def test_replay_of_close_marks_the_task_closed_and_ignores_unknown_tasks():
+    manifest = {'tasks': {'1': {'issue': 200, 'title': 'Task 1: One', 'hash': 'a'}}}
+
+    apply_entry(manifest, {'action': 'close', 'task': '1', 'issue': 200})
+    apply_entry(manifest, {'action': 'close', 'task': '7', 'issue': 207})
+
+    assert manifest['tasks'] == {'1': {'issue': 200, 'title': 'Task 1: One', 'hash': 'a', 'closed': True}}
+
+
+def test_checkpoint_saves_the_manifest_and_removes_the_journal(tmp_path):
+    path = tmp_path / 'spec.journal.jsonl'
+    manifest_file = tmp_path / 'spec.json'
+    journal = Journal(path, run_id='101')
+    journal.record(created(Task('1', 'One'), 200))
+
+    manifest = load_manifest(manifest_file)
+    journal.checkpoint(manifest, manifest_file)
+
+    assert not path.exists()
+    assert load_manifest(manifest_file)['tasks']['1']['issue'] == 200
+
+
+def test_checkpoint_keeps_the_state_recorded_after_the_create(tmp_path):
+    path = tmp_path / 'spec.journal.jsonl'
+    manifest_file = tmp_path / 'spec.json'
+    journal = Journal(path, run_id='101')
+    task = Task('1', 'One', completed=True)
+    journal.record(created(task, 200))
+
+    manifest = load_manifest(manifest_file)
+    apply_entry(manifest, created(task, 200))
+    # What the state and sub-issue syncs record once the box is found checked
+    manifest['tasks']['1'].update(issue_state='closed', linked=199)
+    journal.checkpoint(manifest, manifest_file)
+
+    entry = load_manifest(manifest_file)['tasks']['1']
+    assert (entry['issue_state'], entry['linked']) == ('closed', 199)
@@ -0,0 +1,55 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from kiro_sync.manifest import BODY_FORMAT, content_hash, task_hash
+from kiro_sync.tasks import Task
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+
+
+def make_task(**fields):
+    values = dict(number='3', title='Add the action bar', description='- Wire up buttons',
+                  requirements='1.1, 2.3')
+    values.update(fields)
+    return Task(**values)
+
+
+def test_task_hash_is_stable_across_processes():
+    script = ("from kiro_sync.manifest import task_hash; from kiro_sync.tasks import Task; "
+              "print(task_hash(Task('3', 'Add the action bar', '- Wire up buttons', '1.1, 2.3'), 7, 2))")
+    hashes = {
+        subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                       cwd=SCRIPTS_DIR, env={'PYTHONHASHSEED': seed}).stdout.strip()
+        for seed in ('1', '2')
+    }
+    assert hashes == {task_hash(make_task(), 7, 2)}
+
+
+def test_task_hash_ignores_checkbox_state():
+    assert task_hash(make_task(completed=True), 7, 2) == task_hash(make_task(completed=False), 7, 2)
+
+
+def test_task_hash_follows_rendered_content():
+    base = task_hash(make_task(), 7, 2)
+    changed = [
+        task_hash(make_task(title='Add the toolbar'), 7, 2),
+        task_hash(make_task(description='- Wire up menus'), 7, 2),
+        task_hash(make_task(requirements='1.1'), 7, 2),
+        task_hash(make_task(), 8, 2),
+        task_hash(make_task(), 7, 3),
+        task_hash(make_task(parent='1'), 7, 2),
+        task_hash(make_task(subtasks=[('3.1', 'Buttons', False)]), 7, 2),
+    ]
+    assert base not in changed
+    assert len(set(changed)) == len(changed)
+
+
+def test_task_hash_treats_missing_milestone_alike():
+    assert task_hash(make_task(), 7, None) == task_hash(make_task(), 7, '')
+
+
+def test_flat_task_hash_has_no_hierarchy_part():
+    task = make_task()
+    assert task_hash(task, 7, 2) == content_hash(
+        BODY_FORMAT, task.number, task.title, task.description, task.requirements, '7', '2')
@@ -0,0 +1,64 @@
+import asyncio
+
+from afs_tools.mirror import Mirror
+
+
+class Listing:
+    def __init__(self, entries, status=200):
+        self.entries = entries
+        self.status = status
+        self.ok = status == 200
+
+    def json(self):
+        return {'entries': self.entries}
+
+
+class FakeSession:
+    """Answers listDirectory from a dict of path -> entries"""
+
+    def __init__(self, tree):
+        self.tree = tree
+
+    async def call(self, operation, path):
+        return Listing(self.tree[path])
+
+
+def crawl(destination, tree):
+    """Dry-run a mirror of /archive and return {remote path: category}"""
+    mirror = Mirror(FakeSession(tree), '/archive', str(destination), jobs=2, crawl_jobs=2, dry_run=True)
+    outcomes = asyncio.run(asyncio.wait_for(mirror.run(report_every=60), timeout=10))
+    return {outcome.file.path: outcome.category for outcome in outcomes}
+
+
+def file(name, **entry):
+    return dict({'name': name, 'size': 1, 'modifiedAt': '2024-01-01T00:00:00Z'}, **entry)
+
+
+def test_malformed_listings_fail_only_their_directory(tmp_path):
+    tree = {
+        '/archive': [file('a.txt')] + [{'name': f'd{number}', 'type': 'directory'} for number in range(4)],
+        # Entries without a name: one KeyError per directory, more than there are listers
+        **{f'/archive/d{number}': [{'size': 1}] for number in range(3)},
+        '/archive/d3': [file('b.txt')],
+    }
+
+    assert crawl(tmp_path, tree) == {
+        '/archive/a.txt': 'downloaded', '/archive/d0': 'bad-listing', '/archive/d1': 'bad-listing',
+        '/archive/d2': 'bad-listing', '/archive/d3/b.txt': 'downloaded'}
+
+
+def test_entries_outside_the_destination_are_refused(tmp_path):
+    destination = tmp_path / 'mirror'
+    destination.mkdir()
+    (tmp_path / 'elsewhere').mkdir()
+    (destination / 'link').symlink_to(tmp_path / 'elsewhere')
+    tree = {'/archive': [file('ok.txt'), file('../../escape.txt'), file('x', path='/etc/passwd'),
+                         file('.'), file('link/inside.txt')]}
+
+    assert crawl(destination, tree) == {
+        '/archive/ok.txt': 'downloaded',
+        '/archive/../../escape.txt': 'unsafe-path',
+        '/etc/passwd': 'unsafe-path',
+        '/archive/.': 'unsafe-path',
+        '/archive/link/inside.txt': 'unsafe-path',
+    }
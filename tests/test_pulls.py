@@ -0,0 +1,37 @@
+from kiro_sync.index import issue_metadata
+from kiro_sync.pulls import fetch_pr_context
+
+
+class SearchClient:
+    """Answers the context query of an index miss with fixed search hits"""
+
+    repo = 'owner/name'
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.queries = []
+
+    def graphql(self, query, variables=None):
+        self.queries.append(query)
+        return {'repository': {'id': 'R_1', 'pullRequests': {'nodes': []}}, 'search': {'nodes': self.hits}}
+
+
+def hit(number, title, body):
+    return {'id': f'I_{number}', 'number': number, 'title': title, 'body': body, 'state': 'OPEN'}
+
+
+def test_index_miss_takes_the_epic_from_the_issue_metadata():
+    client = SearchClient([hit(5, 'Task 1: beta first', issue_metadata(kind='task', task='1', epic='4', spec='beta'))])
+
+    context = fetch_pr_context(client, 'feature/task-1', 'main', '1')
+
+    assert (context.issue.number, context.epic_number) == (5, 4)
+    assert 'epics' not in client.queries[0]
+
+
+def test_index_miss_without_epic_metadata_links_no_epic():
+    client = SearchClient([hit(7, 'Task 1: written by hand', 'No metadata')])
+
+    context = fetch_pr_context(client, 'feature/task-1', 'main', '1')
+
+    assert (context.issue.number, context.epic_number) == (7, None)
@@ -0,0 +1,117 @@
+import pytest
+
+from kiro_sync import sections
+from kiro_sync.sections import SectionIndex, blob_sha, load_section_index, read_file_section, scan_sections
+
+
+def baseline_read_file_section(file_path, start_marker, end_marker=None):
+    """read_file_section as the workflow shipped it before the section index"""
+    try:
+        with open(file_path, 'r') as f:
+            content = f.read()
+
+        start_idx = content.find(start_marker)
+        if start_idx == -1:
+            return "See attached document"
+
+        start_idx += len(start_marker)
+
+        if end_marker:
+            end_idx = content.find(end_marker, start_idx)
+            if end_idx != -1:
+                return content[start_idx:end_idx].strip()
+
+        return content[start_idx:start_idx + 500].strip()
+    except Exception as e:
+        return f"Error reading file: {e}"
+
+
+repository_cache_dir = sections.section_cache_dir
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches(monkeypatch):
+    """Start every test from empty in-memory caches and keep it out of the repository's .kiro/.sync"""
+    monkeypatch.setattr(sections, '_parsed_sections', {})
+    monkeypatch.setattr(sections, '_open_indexes', {})
+    monkeypatch.setattr(sections, 'section_cache_dir', lambda file_path: None)
+
+
+@pytest.mark.parametrize('file_name, start_marker, end_marker', [
+    ('requirements.md', '## Requirements', '### Requirement 1'),
+    ('requirements.md', '### Requirement 2', '### Requirement 3'),
+    ('requirements.md', '## Introduction', '## Requirements'),
+    ('design.md', '## Architecture', '### Component Structure'),
+    ('design.md', '## Overview', '## Architecture'),
+    ('design.md', '### Unit Tests', '### Integration Tests'),
+    ('design.md', '## Testing Strategy', '## Implementation Phases'),
+    ('design.md', '## Missing Section', '## Architecture'),
+])
+def test_matches_baseline_on_the_real_spec(spec_dir, file_name, start_marker, end_marker):
+    path = spec_dir / file_name
+    assert read_file_section(path, start_marker, end_marker) == \
+        baseline_read_file_section(path, start_marker, end_marker)
+
+
+def test_matches_baseline_for_non_heading_markers(tmp_path):
+    path = tmp_path / 'notes.md'
+    path.write_text('# Notes\n\nIntro text START middle END trailing\n\n## Next\nMore\n')
+    assert read_file_section(path, 'START', 'END') == baseline_read_file_section(path, 'START', 'END') == 'middle'
+
+
+def test_without_end_marker_the_whole_section_is_returned(tmp_path):
+    body = '\n'.join(f'Line {number} of a long overview' for number in range(40))
+    path = tmp_path / 'design.md'
+    path.write_text(f'# Design\n\n## Overview\n{body}\n\n## Architecture\nLayers\n')
+
+    assert read_file_section(path, '## Overview') == body
+    assert body.startswith(baseline_read_file_section(path, '## Overview'))
+    assert len(baseline_read_file_section(path, '## Overview')) < 500
+
+
+def test_headings_inside_code_fences_are_ignored():
+    data = b'# Doc\n```\n## Not a heading\n```\n## Real\ntext\n~~~\n# still code\n~~~\n'
+    index = SectionIndex(blob_sha(data), data, scan_sections(data))
+
+    assert [section.title for section in index.sections] == ['Doc', 'Real']
+    assert index.section_text(index.find('Real')) == 'text\n~~~\n# still code\n~~~'
+
+
+def test_find_by_any_trailing_heading_path(spec_dir):
+    index = load_section_index(spec_dir / 'design.md', cache_dir=None)
+
+    nested = index.find('Testing Strategy', 'Unit Tests')
+    assert nested is index.find('Unit Tests')
+    assert nested.path == ('Design Document', 'Testing Strategy', 'Unit Tests')
+    assert index.find('Architecture', 'Unit Tests') is None
+    assert index.section_text(index.find('Testing Strategy'), subsections=False) == ''
+
+
+def test_blob_sha_matches_git():
+    assert blob_sha(b'hello\n') == 'ce013625030ba8dba906f756967f9e9ca394464a'
+
+
+def test_disk_cache_round_trip(tmp_path, spec_dir, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    scanned = load_section_index(spec_dir / 'requirements.md', cache_dir=cache_dir)
+    assert list(cache_dir.glob('*.json')) == [cache_dir / f'{scanned.sha}.json']
+
+    monkeypatch.setattr(sections, '_parsed_sections', {})
+    monkeypatch.setattr(sections, '_open_indexes', {})
+    cached = load_section_index(spec_dir / 'requirements.md', cache_dir=cache_dir)
+    assert cached.sections == scanned.sections
+
+
+def test_default_cache_lives_in_the_documents_repository(tmp_path, monkeypatch):
+    monkeypatch.setattr(sections, 'section_cache_dir', repository_cache_dir)
+    repository = tmp_path / 'repo'
+    (repository / '.git').mkdir(parents=True)
+    (repository / 'docs').mkdir()
+    path = repository / 'docs' / 'design.md'
+    path.write_text('# Design\n## Overview\nText\n')
+    monkeypatch.chdir(tmp_path)
+
+    index = load_section_index(path)
+
+    assert (repository / '.kiro' / '.sync' / 'sections' / f'{index.sha}.json').is_file()
+    assert not (tmp_path / '.kiro').exists()
@@ -0,0 +1,69 @@
+import shutil
+
+import pytest
+
+from kiro_sync.index import load_index, lookup_task, parse_issue_metadata
+from kiro_sync.specs import discover_specs, sync_all_specs
+
+DOCS_URL = 'https://github.com/offline/kiro-benchmark/blob/main'
+
+
+def write_spec(root, name, titles):
+    directory = root / '.kiro' / 'specs' / name
+    directory.mkdir(parents=True)
+    (directory / 'requirements.md').write_text(f'# Requirements\n\n## Requirements\n{name} needs\n\n### Requirement 1\n')
+    (directory / 'design.md').write_text(f'# Design\n\n## Architecture\n{name} layers\n\n### Component Structure\n')
+    (directory / 'tasks.md').write_text(''.join(
+        f'- [ ] {number}. {title}\n  - Detail of {title}\n' for number, title in enumerate(titles, 1)))
+
+
+@pytest.fixture
+def two_specs(tmp_path, monkeypatch):
+    """Specs alpha and beta, both numbering their tasks from 1"""
+    write_spec(tmp_path, 'alpha', ['alpha first', 'alpha second'])
+    write_spec(tmp_path, 'beta', ['beta first', 'beta second'])
+    monkeypatch.chdir(tmp_path)
+    return discover_specs()
+
+
+def task_issues(client):
+    """{(spec, task number): title} of every task issue in the repository"""
+    issues = {}
+    for issue in client.list_issues(labels='task', state='all'):
+        metadata = parse_issue_metadata(issue.body)
+        key = (metadata.get('spec'), metadata.get('task'))
+        assert key not in issues, f'two issues for {key}'
+        issues[key] = issue.title
+    return issues
+
+
+def sync(client, specs):
+    summaries = sync_all_specs(client, specs, '', DOCS_URL, processes=1)
+    assert not any(summary['error'] or summary['failures'] for summary in summaries)
+    return {summary['spec']: summary['changes'] for summary in summaries}
+
+
+EXPECTED = {
+    ('alpha', '1'): 'Task 1: alpha first', ('alpha', '2'): 'Task 2: alpha second',
+    ('beta', '1'): 'Task 1: beta first', ('beta', '2'): 'Task 2: beta second',
+}
+
+
+def test_specs_with_the_same_task_numbers_keep_their_own_issues(github, two_specs):
+    assert sync(github, two_specs) == {'alpha': 2, 'beta': 2}
+    assert task_issues(github) == EXPECTED
+
+    index = load_index()
+    assert {spec: sorted(tasks) for spec, tasks in index['specs'].items()} == {'alpha': ['1', '2'], 'beta': ['1', '2']}
+    assert lookup_task(index, '1', 'feature/task-01') is None
+    assert lookup_task(index, '1', 'feature/beta/task-01')['title'] == 'Task 1: beta first'
+
+    assert sync(github, two_specs) == {'alpha': 0, 'beta': 0}
+
+
+def test_lost_manifests_adopt_each_specs_own_issues(github, two_specs, tmp_path):
+    sync(github, two_specs)
+    shutil.rmtree(tmp_path / '.kiro' / '.sync')
+
+    assert sync(github, two_specs) == {'alpha': 0, 'beta': 0}
+    assert task_issues(github) == EXPECTED
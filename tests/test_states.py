@@ -0,0 +1,107 @@
+import re
+
+from kiro_sync.states import COMPLETED_LABEL, plan_state_change, state_candidates, sync_task_states
+
+ALIAS = re.compile(r'^\s*(\w+): ', re.MULTILINE)
+
+
+class FakeClient:
+    """Answers the state sync's GraphQL requests from a dict of issues"""
+
+    def __init__(self, issues, label_id='LA_completed', failing=()):
+        self.repo = 'owner/name'
+        self.issues = issues
+        self.label_id = label_id
+        self.failing = set(failing)
+        self.requests = []
+
+    def graphql(self, query, variables=None, partial=False):
+        self.requests.append(query)
+        if query.startswith('query'):
+            repository = {'label': {'id': self.label_id} if self.label_id else None}
+            for number in map(int, re.findall(r'i(\d+): issue', query)):
+                if number in self.issues:
+                    state, labels = self.issues[number]
+                    repository[f'i{number}'] = {'id': f'I_{number}', 'state': state.upper(),
+                                                'labels': {'nodes': [{'name': name} for name in labels]}}
+            return {'repository': repository}, []
+
+        data, errors = {}, []
+        for alias in ALIAS.findall(query):
+            if alias in self.failing:
+                data[alias] = None
+                errors.append({'path': [alias], 'message': f'{alias} was refused'})
+            else:
+                data[alias] = {'clientMutationId': None}
+        return data, errors
+
+    def create_label(self, name, color, description):
+        self.label_id = f'LA_{name}'
+        return self.label_id
+
+
+def test_candidates_are_tasks_whose_checkbox_changed():
+    manifest = {'tasks': {
+        'done': {'issue': 1, 'completed': True},
+        'applied': {'issue': 2, 'completed': True, 'issue_state': 'closed'},
+        'unchecked': {'issue': 3, 'completed': False, 'issue_state': 'closed'},
+        'never applied': {'issue': 4, 'completed': False},
+        'removed': {'issue': 5, 'completed': True, 'closed': True},
+        'unparsed': {'issue': 6},
+    }}
+
+    assert state_candidates(manifest) == ['done', 'unchecked']
+    # An unchecked task that was never closed is recorded as open without a call
+    assert manifest['tasks']['never applied']['issue_state'] == 'open'
+
+
+def test_plan_state_change():
+    open_issue = {'state': 'open', 'labels': {'task'}}
+    closed_issue = {'state': 'closed', 'labels': {'task', COMPLETED_LABEL}}
+
+    assert plan_state_change({'completed': True}, open_issue) == ['close', 'label']
+    assert plan_state_change({'completed': True}, closed_issue) == []
+    assert plan_state_change({'completed': False, 'issue_state': 'closed'}, closed_issue) == ['reopen', 'unlabel']
+    # Closed on GitHub while its box was never checked: left alone
+    assert plan_state_change({'completed': False, 'issue_state': 'open'}, closed_issue) == []
+
+
+def test_sync_batches_every_change_into_one_query_and_one_mutation():
+    manifest = {'tasks': {
+        '1': {'issue': 11, 'completed': True, 'title': 'Task 1: One'},
+        '2': {'issue': 12, 'completed': True, 'title': 'Task 2: Two'},
+        '3': {'issue': 13, 'completed': False, 'issue_state': 'closed', 'title': 'Task 3: Three'},
+        '4': {'issue': 14, 'completed': True, 'title': 'Task 4: Four'},
+    }}
+    client = FakeClient({11: ('open', ['task']), 12: ('closed', ['task', COMPLETED_LABEL]),
+                         13: ('closed', ['task', COMPLETED_LABEL])})
+
+    results = sync_task_states(client, manifest)
+
+    assert len(client.requests) == 2
+    assert [(result['action'], result['task'].number, result['error']) for result in results] == [
+        ('complete', '1', None), ('reopen', '3', None)]
+    assert {number: entry.get('issue_state') for number, entry in manifest['tasks'].items()} == {
+        '1': 'closed', '2': 'closed', '3': 'open', '4': None}
+    # Nothing is left to do on the next run except the issue that no longer exists
+    assert state_candidates(manifest) == ['4']
+
+
+def test_failed_mutation_is_retried_on_the_next_run():
+    manifest = {'tasks': {'1': {'issue': 11, 'completed': True}, '2': {'issue': 12, 'completed': True}}}
+    client = FakeClient({11: ('open', []), 12: ('open', [])}, failing={'label3'})
+
+    results = sync_task_states(client, manifest)
+
+    assert {result['task'].number: result['error'] for result in results} == {'1': None, '2': 'label3 was refused'}
+    assert state_candidates(manifest) == ['2']
+
+
+def test_missing_label_is_created_once():
+    manifest = {'tasks': {'1': {'issue': 11, 'completed': True}}}
+    client = FakeClient({11: ('open', [])}, label_id=None)
+
+    sync_task_states(client, manifest)
+
+    assert client.label_id == f'LA_{COMPLETED_LABEL}'
+    assert f'labelIds: ["LA_{COMPLETED_LABEL}"]' in client.requests[-1]
@@ -0,0 +1,99 @@
+from textwrap import dedent
+
+from kiro_sync.tasks import Task, iter_tasks, parse_tasks_file
+
+
+def parse(text):
+    return list(iter_tasks(dedent(text).splitlines(keepends=True)))
+
+
+def test_nested_subtasks_follow_their_parent():
+    tasks = parse("""\
+        - [ ] 1. Build the service
+          - Outline the API
+          - [x] 1.1 Add retries
+            - Exponential backoff
+            - _Requirements: 3.1_
+          - [ ] 1.2. Add caching
+            - [ ] 1.2.1 Pick a store
+        - [x] 2. Ship it
+        """)
+
+    assert [(task.number, task.parent) for task in tasks] == [
+        ('1', None), ('1.1', '1'), ('1.2', '1'), ('1.2.1', '1.2'), ('2', None)]
+    assert tasks[0].description == '- Outline the API'
+    assert tasks[0].subtasks == (('1.1', 'Add retries', True), ('1.2', 'Add caching', False))
+    assert tasks[1] == Task('1.1', 'Add retries', '- Exponential backoff', '3.1', True, parent='1')
+    assert tasks[2].subtasks == (('1.2.1', 'Pick a store', False),)
+    assert tasks[4].completed and tasks[4].subtasks == ()
+
+
+def test_requirement_refs_bare_or_as_a_bullet():
+    tasks = parse("""\
+        - [ ] 1. Bullet form
+          - _Requirements: 1.1, 2.3_
+        - [ ] 2. Bare form
+          _Requirements: 4.2_
+        - [ ] 3. No refs
+          - _Note: skipped from the description_
+        """)
+
+    assert [task.requirements for task in tasks] == ['1.1, 2.3', '4.2', 'Not specified']
+    assert [task.description for task in tasks] == ['', '', '']
+
+
+def test_blank_lines_and_relative_nesting_stay_in_the_description():
+    tasks = parse("""\
+        - [ ] 1. Title
+
+
+            - First
+              - Nested
+
+            - Second
+        ## Notes
+          - Not part of any task
+        """)
+
+    assert len(tasks) == 1
+    assert tasks[0].description == '- First\n  - Nested\n- Second'
+
+
+def test_unnumbered_checklists_are_description():
+    tasks = parse("""\
+        - [ ] 1. Review
+          - [ ] Check the docs
+        """)
+
+    assert [task.number for task in tasks] == ['1']
+    assert tasks[0].description == '- [ ] Check the docs'
+
+
+def test_tasks_stream_before_the_file_ends():
+    def lines():
+        yield '- [ ] 1. First\n'
+        yield '- [ ] 2. Second\n'
+        raise AssertionError('read past the second task line')
+
+    tasks = iter_tasks(lines())
+    assert next(tasks).number == '1'
+
+
+def test_real_tasks_file(spec_dir):
+    tasks = list(parse_tasks_file(spec_dir / 'tasks.md'))
+
+    assert [task.number for task in tasks] == [str(number) for number in range(1, 13)]
+    assert [task.completed for task in tasks] == [True] * 7 + [False] * 5
+    assert all(task.parent is None for task in tasks)
+    assert tasks[0].title == 'Extend data models and interfaces'
+    assert tasks[0].requirements == '2.1, 2.2, 4.1, 4.2, 4.3'
+    assert tasks[0].description.splitlines() == [
+        '- Create extended FileNode interface with selection state and permissions',
+        '- Create FilePermissions, NavigationState, and OperationProgress interfaces',
+        '- Create ActionConfig interface for action button configuration',
+    ]
+    assert tasks[1].requirements == '3.1, 3.2, 3.3, 3.4, 3.5, 3.6, 5.2, 5.3'
+
+
+def test_missing_file_yields_nothing(tmp_path):
+    assert list(parse_tasks_file(tmp_path / 'tasks.md')) == []